@@ -808,14 +808,16 @@ class ChannelList(list):
 
            A `host` is required if an open `connection` is not given
         """
-        from ..io.nds import (auth_connect, NDSWarning)
+        from ..io.nds import (POOL, NDSWarning)
         out = cls()
         # connect
         if connection is None:
             if host is None:
                 raise ValueError("Please given either an open nds2.connection,"
                                  " or the name of the host to connect to")
-            connection = auth_connect(host, port)
+            with POOL.connection(host, port) as connection:
+                return cls.query_nds2(names, connection=connection, type=type,
+                                      unique=unique)
         if isinstance(names, str):
             names = [names]
         for name in names:
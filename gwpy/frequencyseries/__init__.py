@@ -24,10 +24,12 @@ __author__ = "Duncan Macleod <duncan.macleod@ligo.org>"
 # import objects
 from .core import *
 from .hist import *
+from .running import *
 
 # import unified I/O
 from .io import *
 
 # setup spectrum generation method registrations
 from .scipy_ import *
+from .numpy_ import *
 from .lal_ import *
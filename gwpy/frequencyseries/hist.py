@@ -20,10 +20,6 @@
 """
 
 import numpy
-import sys
-
-if sys.version_info[0] < 3:
-    range = xrange
 
 __author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
 
@@ -33,6 +29,9 @@ from ..detector import Channel
 
 __all__ = ['SpectralVariance']
 
+#: maximum number of (time, frequency) samples histogrammed at once
+SPECVAR_CHUNK_SIZE = 2 ** 22
+
 
 class SpectralVariance(Array2D):
     """A 2-dimensional array containing the variance histogram of a
@@ -69,11 +68,11 @@ class SpectralVariance(Array2D):
 
     @property
     def normed(self):
-        return self._normed
+        return getattr(self, '_normed', False)
 
     @property
     def density(self):
-        return self._density
+        return getattr(self, '_density', False)
 
     @property
     def bins(self):
@@ -189,6 +188,13 @@ class SpectralVariance(Array2D):
         specvar : `SpectralVariance`
             2D-array of spectral frequency-amplitude counts
 
+        Notes
+        -----
+        The input spectrograms are histogrammed one block of rows at a
+        time, with all frequencies counted in a single pass, so they are
+        never stacked in memory. More data can be added to the result
+        later with :meth:`SpectralVariance.update`.
+
         See Also
         --------
         :func:`numpy.histogram`
@@ -208,50 +214,90 @@ class SpectralVariance(Array2D):
             raise ValueError("Cannot give both norm=True and density=True, "
                              "please pick one")
 
-        # get data and bins
+        # get bins
         spectrogram = spectrograms[0]
-        data = numpy.vstack(s.value for s in spectrograms)
-        ubins = (bins is not None)
         if bins is None:
-            if low is None and log:
-                low = numpy.log10(data.min() / 2)
-            elif low is None:
-                low = data.min()/2
-            elif log:
-                low = numpy.log10(low)
-            if high is None and log:
-                high = numpy.log10(data.max() * 2)
-            elif high is None:
-                high = data.max() * 2
-            elif log:
-                high = numpy.log10(high)
-            if log:
-                bins = numpy.logspace(low, high, num=nbins+1)
-            else:
-                bins = numpy.linspace(low, high, num=nbins+1)
+            bins = _bin_edges(spectrograms, low=low, high=high, nbins=nbins,
+                              log=log)
+        bins = numpy.asarray(bins)
         nbins = bins.size-1
-        bins = bins * spectrogram.unit
 
-        # loop over frequencies
-        out = numpy.zeros((data.shape[1], nbins))
-        for i in range(data.shape[1]):
-            out[i, :], bins = numpy.histogram(data[:, i], bins,
-                                              density=density)
-            if norm and out[i, :].sum():
-                out[i, :] /= out[i, :].sum()
+        # count all spectrograms into a single array
+        counts = numpy.zeros((spectrogram.shape[1], nbins), dtype=int)
+        for specgram in spectrograms:
+            counts += _histogram_counts(specgram.value, bins)
 
         # return SpectralVariance
         name = '%s variance' % spectrogram.name
-        new = cls(out, bins, epoch=spectrogram.epoch, name=name,
-                  channel=spectrogram.channel, f0=spectrogram.f0,
+        new = cls(_normalise(counts, bins, norm=norm, density=density),
+                  bins * spectrogram.unit, epoch=spectrogram.epoch,
+                  name=name, channel=spectrogram.channel, f0=spectrogram.f0,
                   df=spectrogram.df)
+        new._counts = counts
         new._normed = norm
         new._density = density
         return new
 
+    def update(self, *spectrograms):
+        """Add the counts from new spectrograms to this `SpectralVariance`
+
+        The new data are histogrammed with the existing `bins` and the
+        normalisation of this `SpectralVariance` is recalculated in place,
+        without requiring the data already counted.
+
+        Parameters
+        ----------
+        *spectrograms : :class:`~gwpy.spectrogram.core.Spectrogram`
+            input `Spectrogram` data, with the same frequencies as this
+            `SpectralVariance`
+
+        Returns
+        -------
+        self : `SpectralVariance`
+            this `SpectralVariance`, updated in place
+
+        Raises
+        ------
+        ValueError
+            if the input data have the wrong number of frequencies, or
+            if the underlying counts of a normalised `SpectralVariance`
+            are not known
+        """
+        counts = self.counts
+        bins = self.bins.value
+        for specgram in spectrograms:
+            if specgram.shape[1] != self.shape[0]:
+                raise ValueError(
+                    "Cannot update SpectralVariance with %d frequencies "
+                    "using Spectrogram with %d frequencies"
+                    % (self.shape[0], specgram.shape[1]))
+            counts += _histogram_counts(specgram.value, bins)
+        self._counts = counts
+        self.value[:] = _normalise(counts, bins, norm=self.normed,
+                                   density=self.density)
+        return self
+
+    @property
+    def counts(self):
+        """Number of samples counted in each (frequency, amplitude) bin
+
+        :type: `numpy.ndarray`
+        """
+        try:
+            return self._counts
+        except AttributeError:
+            if self.normed or self.density:
+                raise ValueError("Cannot determine counts for normalised "
+                                 "SpectralVariance")
+            self._counts = self.value.round().astype(int)
+            return self._counts
+
     def percentile(self, percentile):
         """Calculate a given spectral percentile for this `SpectralVariance`
 
+        The percentile is linearly interpolated within the amplitude bin
+        in which the cumulative count for each frequency crosses it.
+
         Parameters
         ----------
         percentile : `float`
@@ -263,25 +309,98 @@ class SpectralVariance(Array2D):
             the given percentile `FrequencySeries` calculated from this
             `SpectralVaraicence`
         """
-        rows, columns = self.shape
-        out = numpy.zeros(rows)
-        # Loop over frequencies
-        for i in range(rows):
-            # Calculate cumulative sum for array
-            cumsumvals = numpy.cumsum(self.value[i, :])
-
-            # Find value nearest requested percentile
-            abs_cumsumvals_minus_percentile = numpy.abs(cumsumvals -
-                                                        percentile)
-            minindex = abs_cumsumvals_minus_percentile.argmin()
-            val = self.bins[minindex]
-            out[i] = val
+        bins = self.bins.value
+        weights = self.value
+        if self.density:
+            weights = weights * numpy.diff(bins)
+        cumsum = numpy.cumsum(weights, axis=1)
+        total = cumsum[:, -1]
+        target = total * percentile / 100.
+        # find bin in which each cumulative sum reaches the target,
+        # skipping leading empty bins so that 0% is the lowest occupied bin
+        before = (cumsum < target[:, None]) | (cumsum == 0)
+        idx = before.sum(axis=1).clip(0, bins.size - 2)
+        rows = numpy.arange(self.shape[0])
+        below = cumsum[rows, idx] - weights[rows, idx]
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            frac = ((target - below) / weights[rows, idx]).clip(0, 1)
+        frac[~numpy.isfinite(frac)] = 0
+        out = bins[idx] + frac * (bins[idx + 1] - bins[idx])
+        out[total == 0] = numpy.nan
         name = '%s %s%% percentile' % (self.name, percentile)
         return FrequencySeries(out, epoch=self.epoch, channel=self.channel,
-                               frequencies=self.bins[:-1], name=name)
+                               frequencies=self.frequencies,
+                               unit=self.bins.unit, name=name)
 
     def plot(self, **kwargs):
         """Plot this `SpectralVariance`.
         """
         from ..plotter import FrequencySeriesPlot
         return FrequencySeriesPlot(self, **kwargs)
+
+
+# -- histogramming utilities --------------------------------------------------
+
+def _bin_edges(spectrograms, low=None, high=None, nbins=500, log=False):
+    """Generate amplitude bin edges spanning the given spectrograms
+    """
+    if low is None:
+        low = min(s.value.min() for s in spectrograms) / 2.
+    if high is None:
+        high = max(s.value.max() for s in spectrograms) * 2.
+    if log:
+        return numpy.logspace(numpy.log10(low), numpy.log10(high),
+                              num=nbins+1)
+    return numpy.linspace(low, high, num=nbins+1)
+
+
+def _histogram_counts(data, bins, chunksize=SPECVAR_CHUNK_SIZE):
+    """Count the amplitudes for each frequency of a 2D array into bins
+
+    The bin index of every sample is found with a single
+    :func:`numpy.searchsorted` over monotonic ``bins`` (linear or log),
+    and the (frequency, bin) pairs are counted with a single
+    :func:`numpy.bincount`, processing at most ``chunksize`` samples at
+    once.
+
+    Parameters
+    ----------
+    data : `numpy.ndarray`
+        2D array of (time, frequency) amplitudes
+    bins : `numpy.ndarray`
+        monotonically increasing bin edges, including the rightmost edge
+
+    Returns
+    -------
+    counts : `numpy.ndarray`
+        2D array of (frequency, bin) counts, matching
+        :func:`numpy.histogram` for each frequency
+    """
+    data = numpy.asarray(data)
+    nrows, nfreq = data.shape
+    nbins = bins.size - 1
+    counts = numpy.zeros(nfreq * nbins, dtype=int)
+    offset = numpy.arange(nfreq) * nbins
+    step = max(chunksize // max(nfreq, 1), 1)
+    for i in range(0, nrows, step):
+        chunk = data[i:i+step]
+        idx = numpy.searchsorted(bins, chunk, side='right') - 1
+        # include the rightmost edge in the last bin, as numpy.histogram
+        idx[chunk == bins[-1]] = nbins - 1
+        keep = (idx >= 0) & (idx < nbins)
+        flat = (idx + offset)[keep]
+        counts += numpy.bincount(flat, minlength=counts.size)
+    return counts.reshape(nfreq, nbins)
+
+
+def _normalise(counts, bins, norm=False, density=False):
+    """Normalise (frequency, bin) counts as requested
+    """
+    if not (norm or density):
+        return counts.astype(float)
+    total = counts.sum(axis=1, keepdims=True).astype(float)
+    total[total == 0] = 1
+    out = counts / total
+    if density:
+        out /= numpy.diff(bins)
+    return out
@@ -28,12 +28,13 @@ from .core import FrequencySeries
 from .registry import register_method
 from .utils import scale_timeseries_units
 from ..utils import with_import
+from ..utils.lru import LRUCache
 
 __author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
 
-# cache windows internally
-LAL_WINDOWS = {}
-LAL_FFTPLANS = {}
+# cache windows and FFT plans internally
+LAL_WINDOWS = LRUCache(maxsize=64)
+LAL_FFTPLANS = LRUCache(maxsize=64)
 LAL_FFTPLAN_LEVEL = 1
 
 
@@ -41,9 +42,12 @@ LAL_FFTPLAN_LEVEL = 1
 # Utilities
 
 def generate_lal_fft_plan(length, level=None,
-                          dtype=numpy.dtype(numpy.float64)):
+                          dtype=numpy.dtype(numpy.float64), forward=True):
     """Build a :lal:`REAL8FFTPlan` for a fast Fourier transform.
 
+    Plans are cached by ``(length, dtype, direction)`` in the
+    `LAL_FFTPLANS` cache.
+
     Parameters
     ----------
     length : `int`
@@ -53,6 +57,8 @@ def generate_lal_fft_plan(length, level=None,
         LAL_FFTPLAN_LEVEL module variable.
     dtype : :class:`numpy.dtype`
         numeric type of data to plan for, default `numpy.dtype(numpy.float64)`
+    forward : `bool`, optional
+        if `True` (default) plan a forward FFT, otherwise a reverse FFT
 
     Returns
     -------
@@ -61,15 +67,14 @@ def generate_lal_fft_plan(length, level=None,
     """
     from ..utils.lal import LAL_TYPE_STR_FROM_NUMPY
     from lal import lal
-    laltype = LAL_TYPE_STR_FROM_NUMPY[dtype.type]
-    try:
-        plan = LAL_FFTPLANS[(length, laltype)]
-    except KeyError:
-        create = getattr(lal, 'CreateForward%sFFTPlan' % laltype)
-        if level is None:
-            level = LAL_FFTPLAN_LEVEL
-        plan = LAL_FFTPLANS[(length, laltype)] = create(length, level)
-    return plan
+    laltype = LAL_TYPE_STR_FROM_NUMPY[numpy.dtype(dtype).type]
+    direction = forward and 'Forward' or 'Reverse'
+
+    def _create():
+        create = getattr(lal, 'Create%s%sFFTPlan' % (direction, laltype))
+        return create(length, LAL_FFTPLAN_LEVEL if level is None else level)
+
+    return LAL_FFTPLANS.get((length, laltype, direction), _create)
 
 
 def generate_lal_window(length, type_=('kaiser', 24),
@@ -77,6 +82,9 @@ def generate_lal_window(length, type_=('kaiser', 24),
     """Generate a time-domain window for use in a Fourier transform using
     the LIGO Algorithm Library routines.
 
+    Windows are cached by ``(type_, length, dtype)`` in the `LAL_WINDOWS`
+    cache.
+
     Parameters
     ----------
     length : `int`
@@ -95,23 +103,21 @@ def generate_lal_window(length, type_=('kaiser', 24),
     """
     from ..utils.lal import LAL_TYPE_STR_FROM_NUMPY
     from lal import lal
-    laltype = LAL_TYPE_STR_FROM_NUMPY[dtype.type]
-    wtype = isinstance(type_, (list, tuple)) and type_[0] or str(type_)
-    try:
-        window = LAL_WINDOWS[(length, wtype.lower(), laltype)]
-    except KeyError:
-        if isinstance(type_, (list, tuple)):
-            try:
-                args = type_[1:]
-            except IndexError:
-                args = []
-        else:
-            args = []
-        wtype = wtype.islower() and wtype.title() or wtype
-        create = getattr(lal, 'Create%s%sWindow' % (wtype, laltype))
-        window = LAL_WINDOWS[(length, wtype.lower(), laltype)] = create(
-            length, *args)
-    return window
+    laltype = LAL_TYPE_STR_FROM_NUMPY[numpy.dtype(dtype).type]
+    if isinstance(type_, (list, tuple)):
+        wtype = str(type_[0])
+        args = tuple(type_[1:])
+    else:
+        wtype = str(type_)
+        args = ()
+
+    def _create():
+        name = wtype.islower() and wtype.title() or wtype
+        create = getattr(lal, 'Create%s%sWindow' % (name, laltype))
+        return create(length, *args)
+
+    return LAL_WINDOWS.get(((wtype.lower(),) + args, length, laltype),
+                           _create)
 
 
 # ---------------------------------------------------------------------------
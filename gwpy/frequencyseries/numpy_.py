@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2016)
+#
+# This file is part of GWpy.
+#
+# GWpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWpy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Median-average spectrum methods using only NumPy (and SciPy windows).
+
+These methods replace the LAL implementations of the same name, using
+the vectorised engine in :mod:`gwpy.signal.spectral`; the LAL versions
+remain available as ``'lal-median'`` and ``'lal-median-mean'``.
+"""
+
+from six import string_types
+
+from .core import FrequencySeries
+from .registry import register_method
+from .utils import scale_timeseries_units
+from ..signal import spectral
+from ..signal.window import get_window
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+# default window, matching the default for the LAL methods
+DEFAULT_WINDOW = ('kaiser', 24)
+
+
+def _average_psd(timeseries, segmentlength, noverlap=None, method='median',
+                 window=None, detrend=False, scaling='density', plan=None):
+    """Calculate an average spectrum `FrequencySeries` with NumPy
+
+    Parameters
+    ----------
+    timeseries : :class:`~gwpy.timeseries.TimeSeries`
+        input `TimeSeries` data.
+    segmentlength : `int`
+        number of samples in single average.
+    noverlap : `int`
+        number of samples to overlap between segments, defaults to 50%.
+    method : `str`
+        average method, one of ``'median'`` or ``'median-mean'``
+    window : `tuple`, `str`, `numpy.ndarray`, optional
+        window parameters to apply to timeseries prior to FFT, defaults
+        to a symmetric ``('kaiser', 24)`` window
+    detrend : `str`, `False`, optional
+        type of detrending to apply to each segment, default: `False`
+    scaling : `str`, optional
+        one of ``'density'`` or ``'spectrum'``
+    plan : `object`, optional
+        ignored, accepted for compatibility with the LAL methods
+
+    Returns
+    -------
+    FrequencySeries
+        average power `FrequencySeries`
+    """
+    # default to 50% overlap
+    if noverlap is None:
+        noverlap = int(segmentlength // 2)
+    # get window
+    if window is None:
+        window = get_window(DEFAULT_WINDOW, segmentlength, fftbins=False)
+    elif isinstance(window, string_types) or type(window) is tuple:
+        window = get_window(window, segmentlength)
+    # calculate spectrum
+    fs = timeseries.sample_rate.decompose().value
+    try:
+        psd_ = spectral.average_spectrum(
+            timeseries.value, segmentlength, noverlap, window, fs=fs,
+            method=method, scaling=scaling, detrend=detrend)
+    except ValueError as e:
+        if method == 'median-mean' and 'fewer than two' in str(e):
+            raise ValueError("Cannot calculate median-mean spectrum with "
+                             "this small a TimeSeries.")
+        raise
+    return FrequencySeries(psd_, unit=scale_timeseries_units(
+                               timeseries.unit, scaling=scaling),
+                           f0=0, df=fs / segmentlength, copy=False,
+                           name=timeseries.name, epoch=timeseries.epoch,
+                           channel=timeseries.channel)
+
+
+def median(timeseries, segmentlength, **kwargs):
+    """Calculate a PSD using the median of the periodograms of
+    overlapping segments, corrected for the bias of the median
+    """
+    kwargs['method'] = 'median'
+    return _average_psd(timeseries, segmentlength, **kwargs)
+
+register_method(median)
+
+
+def median_mean(timeseries, segmentlength, **kwargs):
+    """Calculate a PSD using the mean of the bias-corrected medians of
+    the even and odd overlapping segments
+    """
+    kwargs['method'] = 'median-mean'
+    return _average_psd(timeseries, segmentlength, **kwargs)
+
+register_method(median_mean, 'median-mean')
@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2016)
+#
+# This file is part of GWpy.
+#
+# GWpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWpy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Incremental average spectrum estimation for streaming data
+"""
+
+from __future__ import division
+
+import numpy
+
+from six import string_types
+
+from .core import FrequencySeries
+from .utils import scale_timeseries_units
+from ..signal import spectral
+from ..signal.window import get_window
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+__all__ = ['RunningPSD']
+
+# PSD methods that can be updated incrementally, mapped to their
+# (average method, default detrend) pair
+RUNNING_METHODS = {
+    'welch': ('mean', 'constant'),
+    'bartlett': ('mean', 'constant'),
+    'median': ('median', False),
+    'median-mean': ('median-mean', False),
+}
+
+
+class _SortedWindow(object):
+    """Columns of values kept in sorted order as values are replaced
+
+    This is the order-statistic structure behind the running median:
+    each column holds the values for a single frequency, unused rows are
+    filled with ``+inf``, and replacing one value per column costs a
+    binary search (vectorised over columns) plus a shift of the rows
+    between the old and new ranks.
+    """
+    def __init__(self, size, ncol):
+        self.data = numpy.empty((size, ncol))
+        self.data.fill(numpy.inf)
+        self.count = 0
+        self._cols = numpy.arange(ncol)
+
+    def _rank(self, values):
+        """Return the insertion index of each value in its column
+        """
+        lo = numpy.zeros(values.size, dtype=int)
+        hi = numpy.empty(values.size, dtype=int)
+        hi.fill(self.count)
+        active = lo < hi
+        while active.any():
+            mid = (lo + hi) // 2
+            below = active & (self.data[mid.clip(max=self.count - 1),
+                                        self._cols] < values)
+            above = active & ~below
+            lo[below] = mid[below] + 1
+            hi[above] = mid[above]
+            active = lo < hi
+        return lo
+
+    def _shift(self, start, stop, direction):
+        """Shift rows ``[start, stop)`` of each column by one place
+        """
+        first = start.min()
+        last = stop.max()
+        if last <= first:
+            return
+        # include the destination row at whichever end the rows move to
+        if direction > 0:
+            offset = first
+            block = self.data[first:last+1]
+        else:
+            offset = first - 1
+            block = self.data[first-1:last]
+        rows = numpy.arange(offset, offset + block.shape[0])[:, numpy.newaxis]
+        move = (rows >= start) & (rows < stop)
+        if direction > 0:  # move down, towards higher rows
+            block[1:][move[:-1]] = block[:-1][move[:-1]]
+        else:  # move up, towards lower rows
+            block[:-1][move[1:]] = block[1:][move[1:]]
+
+    def remove(self, values):
+        """Remove one value from each column
+        """
+        pos = self._rank(values)
+        self._shift(pos + 1, numpy.repeat(self.count, values.size), -1)
+        self.count -= 1
+        self.data[self.count] = numpy.inf
+
+    def insert(self, values):
+        """Insert one value into each column
+        """
+        pos = self._rank(values)
+        self._shift(pos, numpy.repeat(self.count, values.size), 1)
+        self.data[pos, self._cols] = values
+        self.count += 1
+
+    def median(self):
+        """Return the median of each column
+        """
+        n = self.count
+        if n % 2:
+            return self.data[n // 2].copy()
+        return (self.data[n // 2 - 1] + self.data[n // 2]) / 2.
+
+
+class RunningPSD(object):
+    """An average power spectral density updated one chunk at a time
+
+    Each call to :meth:`update` only transforms the FFT segments that are
+    completed by the new data, so the cost of an update is proportional
+    to the new data, not to the length of the averaging window. The
+    periodograms in the window are kept in a ring buffer, with a
+    running sum for mean averages, or a sorted copy of each frequency
+    bin for median averages.
+
+    Parameters
+    ----------
+    fftlength : `float`
+        number of seconds in single FFT
+    overlap : `float`, optional
+        number of seconds of overlap between FFTs, defaults to half of
+        ``fftlength`` (or `0` for the ``'bartlett'`` method)
+    method : `str`, optional, default: ``'welch'``
+        average spectrum method, one of ``'welch'``, ``'bartlett'``,
+        ``'median'``, or ``'median-mean'``, matching the methods of the
+        same name for :meth:`TimeSeries.psd <gwpy.timeseries.TimeSeries.psd>`
+    duration : `float`, optional
+        length (seconds) of the averaging window, the estimate over a full
+        window matches the output of
+        :meth:`TimeSeries.psd <gwpy.timeseries.TimeSeries.psd>` for the
+        last ``duration`` seconds of data
+    alpha : `float`, optional
+        weight (``0 < alpha <= 1``) of each new periodogram in an
+        exponential moving average, only valid for the ``'welch'`` and
+        ``'bartlett'`` methods; one of ``duration`` or ``alpha`` must be
+        given
+    window : `str`, `numpy.ndarray`, optional
+        window function to apply to each segment prior to FFT, see
+        `scipy.signal.get_window` for details on acceptable formats
+    detrend : `str`, `False`, optional
+        type of detrending to apply to each segment, defaults to the
+        same as the relevant method
+    scaling : `str`, optional, default: ``'density'``
+        one of ``'density'`` or ``'spectrum'``
+
+    Examples
+    --------
+    >>> running = RunningPSD(4, overlap=2, method='median', duration=600)
+    >>> for chunk in stream:
+    ...     running.update(chunk)
+    ...     asd = running.asd()
+    """
+    def __init__(self, fftlength, overlap=None, method='welch',
+                 duration=None, alpha=None, window=None, detrend=None,
+                 scaling='density'):
+        try:
+            self.average, defdetrend = RUNNING_METHODS[method.lower()]
+        except KeyError:
+            raise ValueError("Cannot calculate running PSD with method %r, "
+                             "select one of %s" % (
+                                 method,
+                                 ', '.join(map(repr, RUNNING_METHODS))))
+        if duration is None and alpha is None:
+            raise ValueError("Must give one of duration or alpha")
+        if duration is not None and alpha is not None:
+            raise ValueError("Cannot give both duration and alpha, "
+                             "please pick one")
+        if alpha is not None and self.average != 'mean':
+            raise ValueError("Exponential averaging is only available for "
+                             "mean-average methods")
+        if alpha is not None and not 0 < alpha <= 1:
+            raise ValueError("alpha must be in the interval (0, 1]")
+        if overlap is None:
+            overlap = 0 if method.lower() == 'bartlett' else fftlength / 2.
+        self.method = method
+        self.fftlength = float(fftlength)
+        self.overlap = float(overlap)
+        self.duration = duration
+        self.alpha = alpha
+        self.window = window
+        self.detrend = defdetrend if detrend is None else detrend
+        self.scaling = scaling
+        self.reset()
+
+    def reset(self):
+        """Discard all data and start a new estimate
+        """
+        self._fs = None
+        self._buffer = None
+        self._end = None
+        self._psd = None
+        self._series = None
+        self._count = 0
+        self._total = 0
+
+    # -------------------------------------------
+    # data handling
+
+    def _setup(self, timeseries):
+        """Configure the FFT parameters from the first chunk of data
+        """
+        fs = timeseries.sample_rate.decompose().value
+        self._fs = fs
+        self.nfft = int(self.fftlength * fs)
+        self.nstride = self.nfft - int(self.overlap * fs)
+        nfreqs = self.nfft // 2 + 1
+        # get window
+        window = self.window
+        if window is None and self.average == 'mean':
+            window = 'hanning'
+        elif window is None:
+            window = get_window(('kaiser', 24), self.nfft, fftbins=False)
+        if isinstance(window, string_types) or type(window) is tuple:
+            window = get_window(window, self.nfft)
+        self._window = numpy.asarray(window)
+        if self._window.shape != (self.nfft,):
+            raise ValueError("Window is the wrong size.")
+        # record metadata
+        self._series = timeseries
+        self._buffer = numpy.zeros(0, dtype=timeseries.dtype)
+        self._end = timeseries.x0.value
+        # allocate averaging state
+        if self.alpha is not None:
+            return
+        nsamp = int(self.duration * fs)
+        self.size = 1 + (nsamp - self.nfft) // self.nstride
+        if self.average == 'median-mean':
+            self.size -= self.size % 2
+        if self.size < 1 or (self.average == 'median-mean' and
+                             self.size < 2):
+            raise ValueError("Averaging window is too short for the "
+                             "given fftlength and overlap")
+        self._pgrams = numpy.zeros((self.size, nfreqs))
+        self._starts = numpy.zeros(self.size)
+        if self.average == 'mean':
+            self._sum = numpy.zeros(nfreqs)
+        elif self.average == 'median':
+            self._sorted = [_SortedWindow(self.size, nfreqs)]
+        else:
+            self._sorted = [_SortedWindow(self.size // 2, nfreqs),
+                            _SortedWindow(self.size // 2, nfreqs)]
+
+    def update(self, timeseries):
+        """Add a new chunk of data to this estimate
+
+        Parameters
+        ----------
+        timeseries : `~gwpy.timeseries.TimeSeries`
+            the new data, which must follow directly on from the
+            previous chunk
+
+        Returns
+        -------
+        nseg : `int`
+            the number of new FFT segments added to the estimate
+
+        Raises
+        ------
+        ValueError
+            if the new data are not contiguous with the previous chunk,
+            or have a different sample rate
+        """
+        if self._fs is None:
+            self._setup(timeseries)
+        else:
+            fs = timeseries.sample_rate.decompose().value
+            if fs != self._fs:
+                raise ValueError("Cannot update RunningPSD with data at "
+                                 "%s Hz, expected %s Hz" % (fs, self._fs))
+            if abs(timeseries.x0.value - self._end) > .5 / fs:
+                raise ValueError("Cannot update RunningPSD with "
+                                 "non-contiguous data starting at %s, "
+                                 "expected %s" % (timeseries.x0.value,
+                                                  self._end))
+        start = self._end - self._buffer.size / self._fs
+        data = numpy.concatenate((self._buffer, timeseries.value))
+        self._end += timeseries.size / self._fs
+        if data.size < self.nfft:
+            self._buffer = data
+            return 0
+
+        # calculate periodograms for all new segments at once
+        pgrams = spectral.periodograms(
+            spectral.segment_view(data, self.nfft, self.nstride),
+            self._window, fs=self._fs, scaling=self.scaling,
+            detrend=self.detrend)
+        nseg = pgrams.shape[0]
+        starts = start + numpy.arange(nseg) * self.nstride / self._fs
+        self._buffer = data[nseg * self.nstride:].copy()
+
+        # and add them to the average
+        if self.alpha is None:
+            for pgram, t in zip(pgrams, starts):
+                self._add(pgram, t)
+        else:
+            self._add_exponential(pgrams, starts)
+        return nseg
+
+    def _add(self, pgram, start):
+        """Add a single periodogram to the ring buffer
+        """
+        idx = self._total % self.size
+        full = self._count == self.size
+        old = self._pgrams[idx].copy() if full else None
+        self._pgrams[idx] = pgram
+        self._starts[idx] = start
+        if self.average == 'mean':
+            self._sum += pgram
+            if full:
+                self._sum -= old
+            # re-sum once per cycle to stop rounding errors accumulating
+            if idx == self.size - 1:
+                self._sum = self._pgrams.sum(axis=0)
+        else:
+            sorted_ = self._sorted[idx % len(self._sorted)]
+            if full:
+                sorted_.remove(old)
+            sorted_.insert(pgram)
+        self._total += 1
+        self._count = min(self._count + 1, self.size)
+
+    def _add_exponential(self, pgrams, starts):
+        """Add periodograms to the exponential moving average
+        """
+        self._count += pgrams.shape[0]
+        self._total = self._count
+        if self._psd is None:
+            self._psd = pgrams[0].copy()
+            self._starts = starts[:1]
+            pgrams = pgrams[1:]
+        for pgram in pgrams:
+            self._psd *= 1 - self.alpha
+            self._psd += self.alpha * pgram
+
+    # -------------------------------------------
+    # output
+
+    @property
+    def count(self):
+        """Number of FFT segments currently contributing to the estimate
+
+        :type: `int`
+        """
+        return self._count
+
+    @property
+    def full(self):
+        """`True` if the averaging window has been filled with data
+
+        :type: `bool`
+        """
+        return self.alpha is not None or self._count == getattr(
+            self, 'size', -1)
+
+    def _average(self):
+        if self.alpha is not None:
+            return self._psd.copy()
+        if self.average == 'mean':
+            return self._sum / self._count
+        if self.average == 'median':
+            return (self._sorted[0].median() /
+                    spectral.median_bias(self._count))
+        even, odd = self._sorted
+        if not odd.count:
+            raise ValueError("Cannot calculate median-mean spectrum with "
+                             "fewer than two segments")
+        return (even.median() / spectral.median_bias(even.count) +
+                odd.median() / spectral.median_bias(odd.count)) / 2.
+
+    def psd(self):
+        """Return the current PSD estimate
+
+        Returns
+        -------
+        psd : `~gwpy.frequencyseries.FrequencySeries`
+            the average of the periodograms in the current window
+
+        Raises
+        ------
+        ValueError
+            if not enough data have been added to form an estimate
+        """
+        if not self._count:
+            raise ValueError("Not enough data to calculate PSD, need at "
+                             "least %s seconds" % self.fftlength)
+        if self.alpha is None and self._count < self.size:
+            epoch = self._starts[0]
+        elif self.alpha is None:
+            epoch = self._starts[self._total % self.size]
+        else:
+            epoch = self._starts[0]
+        series = self._series
+        return FrequencySeries(
+            self._average(), f0=0, df=1 / self.fftlength, copy=False,
+            unit=scale_timeseries_units(series.unit, scaling=self.scaling),
+            name=series.name, channel=series.channel, epoch=epoch)
+
+    def asd(self):
+        """Return the current ASD estimate
+
+        Returns
+        -------
+        asd : `~gwpy.frequencyseries.FrequencySeries`
+            the square root of the current PSD estimate
+        """
+        return self.psd() ** (1/2.)
@@ -19,13 +19,16 @@
 """User-friendly extensions to `glue.datafind`
 """
 
+import copy
 import os.path
 import re
+import threading
 
 from glue.lal import CacheEntry
 
 from ..time import to_gps
-from ..utils import (shell, with_import)
+from ..utils import with_import
+from .gwf import get_toc
 
 __author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
 
@@ -35,8 +38,103 @@ SECOND_TREND_TYPE = re.compile('\A(.*_)?T\Z')  # T or anything ending in _T
 MINUTE_TREND_TYPE = re.compile('\A(.*_)?M\Z')  # M or anything ending in _M
 
 
+class CachedConnection(object):
+    """Thread-safe wrapper around datafind connections, caching results
+
+    The result of each query is stored, so that repeated identical
+    queries (e.g. when finding the frametype for many channels) only go to
+    the server once, even if made concurrently from several threads.
+
+    If ``factory`` is given, each thread queries the server through its
+    own connection (the underlying HTTP connections are not thread-safe),
+    so that different queries run concurrently, and only access to the
+    cache of results is serialised. Otherwise all queries share
+    ``connection`` and are made one at a time.
+
+    Parameters
+    ----------
+    connection : `~glue.datafind.GWDataFindHTTPConnection`
+        the connection to wrap, used by the thread creating this object
+    factory : `callable`, optional
+        function, taking no arguments, that opens a new connection for
+        each other thread
+    """
+    def __init__(self, connection, factory=None):
+        self._connection = connection
+        self._factory = factory
+        self._owner = threading.current_thread()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._query_lock = threading.Lock()
+        self._cache = {}
+
+    @property
+    def connection(self):
+        """The connection to use in the current thread
+        """
+        if (self._factory is None or
+                threading.current_thread() is self._owner):
+            return self._connection
+        try:
+            return self._local.connection
+        except AttributeError:
+            self._local.connection = self._factory()
+            return self._local.connection
+
+    def _query(self, name, *args, **kwargs):
+        """Run a query, or wait for an identical query already running
+        """
+        key = (name, args, tuple(sorted(kwargs.items())))
+        with self._lock:
+            try:
+                pending = self._cache[key]
+            except KeyError:
+                pending = self._cache[key] = _PendingQuery()
+                owner = True
+            else:
+                owner = False
+        if owner:
+            try:
+                pending.result = self._call(name, *args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self._cache.pop(key, None)
+                raise
+            finally:
+                pending.done.set()
+        else:
+            pending.done.wait()
+            if not hasattr(pending, 'result'):  # owner failed, try ourselves
+                return self._call(name, *args, **kwargs)
+        return pending.result
+
+    def _call(self, name, *args, **kwargs):
+        method = getattr(self.connection, name)
+        if self._factory is not None:
+            return method(*args, **kwargs)
+        with self._query_lock:
+            return method(*args, **kwargs)
+
+    def __getattr__(self, name):
+        attr = getattr(self._connection, name)
+        if not callable(attr):
+            return attr
+
+        def query(*args, **kwargs):
+            # return a copy, so callers can sort (etc) without side-effects
+            return copy.copy(self._query(name, *args, **kwargs))
+        return query
+
+
+class _PendingQuery(object):
+    """The (eventual) result of a query made by a `CachedConnection`
+    """
+    def __init__(self):
+        self.done = threading.Event()
+
+
 @with_import('glue.datafind')
-def connect(host=None, port=None):
+def connect(host=None, port=None, cached=False):
     """Open a new datafind connection
 
     Parameters
@@ -45,6 +143,9 @@ def connect(host=None, port=None):
         name of datafind server to query
     port : `int`
         port of datafind server on host
+    cached : `bool`, optional
+        return a `CachedConnection`, that can be shared between threads
+        (each of which opens its own connection), default: `False`
 
     Returns
     -------
@@ -52,16 +153,22 @@ def connect(host=None, port=None):
         the new open connection
     """
     port = port and int(port)
-    if port is not None and port != 80:
-        cert, key = datafind.find_credential()
-        return datafind.GWDataFindHTTPSConnection(
-            host=host, port=port, cert_file=cert, key_file=key)
-    else:
+
+    def _connect():
+        if port is not None and port != 80:
+            cert, key = datafind.find_credential()
+            return datafind.GWDataFindHTTPSConnection(
+                host=host, port=port, cert_file=cert, key_file=key)
         return datafind.GWDataFindHTTPConnection(host=host, port=port)
 
+    if cached:
+        return CachedConnection(_connect(), factory=_connect)
+    return _connect()
+
 
 def find_frametype(channel, gpstime=None, frametype_match=None,
-                   host=None, port=None, return_all=False, exclude_tape=False):
+                   host=None, port=None, return_all=False, exclude_tape=False,
+                   connection=None):
     """Find the frametype(s) that hold data for a given channel
 
     Parameters
@@ -80,6 +187,9 @@ def find_frametype(channel, gpstime=None, frametype_match=None,
     exclude_tape : `bool`, optional, default: `False`
         do not test types whose frame files are stored on tape (not on
         spinning disk)
+    connection : `~glue.datafind.GWDataFindHTTPConnection`, optional
+        open connection to use, ``host`` and ``port`` are ignored if
+        this is given
 
     Returns
     -------
@@ -93,7 +203,8 @@ def find_frametype(channel, gpstime=None, frametype_match=None,
     name = channel.name
     if gpstime is not None:
         gpstime = to_gps(gpstime).seconds
-    connection = connect(host, port)
+    if connection is None:
+        connection = connect(host, port)
     types = connection.find_types(channel.ifo[0], match=frametype_match)
     # get reference frame for all types
     frames = []
@@ -151,7 +262,6 @@ def find_frametype(channel, gpstime=None, frametype_match=None,
         return found
 
 
-@with_import('lalframe')
 def num_channels(framefile):
     """Find the total number of channels in this framefile
 
@@ -168,16 +278,12 @@ def num_channels(framefile):
 
     Notes
     -----
-    This method requires LALFrame
+    The table of contents is read via the persistent index in
+    :mod:`gwpy.io.gwf`, which requires frameCPP or LALFrame
     """
-    frfile = lalframe.FrameUFrFileOpen(framefile, "r")
-    frtoc = lalframe.FrameUFrTOCRead(frfile)
-    return sum(
-        getattr(lalframe, 'FrameUFrTOCQuery%sN' % type_.title())(frtoc) for
-        type_ in ['adc', 'proc', 'sim'])
+    return len(get_toc(framefile).channels)
 
 
-@with_import('lalframe')
 def get_channel_type(channel, framefile):
     """Find the channel type in a given frame file
 
@@ -195,23 +301,7 @@ def get_channel_type(channel, framefile):
         channel exists in the table-of-contents for the given frame,
         otherwise `False`
     """
-    name = str(channel)
-    # read frame and table of contents
-    frfile = lalframe.FrameUFrFileOpen(framefile, "r")
-    frtoc = lalframe.FrameUFrTOCRead(frfile)
-    for type_ in ['sim', 'proc', 'adc']:
-        query = getattr(lalframe, 'FrameUFrTOCQuery%sName' % type_.title())
-        i = 0
-        while True:
-            try:
-                c = query(frtoc, i)
-            except RuntimeError:
-                break
-            else:
-                if c == name:
-                    return type_
-            i += 1
-    return False
+    return get_toc(framefile).get_type(channel)
 
 
 def channel_in_frame(channel, framefile):
@@ -230,27 +320,24 @@ def channel_in_frame(channel, framefile):
         whether this channel is included in the table of contents for
         the given framefile
     """
-    name = str(channel)
-    try:
-        out = shell.call(['FrChannels', framefile])[0]
-    except (OSError, shell.CalledProcessError):
-        return get_channel_type(channel, framefile) is not False
-    else:
-        for line in out.splitlines():
-            if line.split(' ')[0] == name:
-                return True
-        return False
+    return get_channel_type(channel, framefile) is not False
 
 
 def find_best_frametype(channel, start, end, urltype='file',
-                        host=None, port=None, allow_tape=True):
+                        host=None, port=None, allow_tape=True,
+                        connection=None):
     """Intelligently select the best frametype from which to read this channel
+
+    If ``connection`` is given it is used for all queries, otherwise a new
+    connection is opened to ``host`` and ``port``.
     """
     start = to_gps(start).seconds
     end = to_gps(end).seconds
-    frametype = find_frametype(channel, gpstime=start, host=host, port=port,
-                               exclude_tape=not allow_tape)
-    connection = connect(host=host, port=port)
+    if connection is None:
+        connection = connect(host=host, port=port)
+    frametype = find_frametype(channel, gpstime=start,
+                               exclude_tape=not allow_tape,
+                               connection=connection)
     try:
         cache = connection.find_frame_urls(channel[0], frametype,
                                            start, end, urltype=urltype,
@@ -258,8 +345,9 @@ def find_best_frametype(channel, start, end, urltype='file',
         if not allow_tape and on_tape(*cache):
             raise RuntimeError()
     except RuntimeError:
-        alltypes = find_frametype(channel, gpstime=start, host=host, port=port,
-                                  return_all=True, exclude_tape=not allow_tape)
+        alltypes = find_frametype(channel, gpstime=start, return_all=True,
+                                  exclude_tape=not allow_tape,
+                                  connection=connection)
         cache = [(ft, connection.find_frame_urls(
             channel[0], ft, start, end, urltype=urltype,
             on_gaps='ignore')) for ft in alltypes]
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2016)
+#
+# This file is part of GWpy.
+#
+# GWpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWpy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Persistent index of GWF table-of-contents information
+
+Reading the table of contents (TOC) of a GWF file is the largest per-file
+cost when reading or searching frames on network file systems, so the
+information from each TOC is stored in a small SQLite database, keyed by
+file path, and validated against the file modification time and size on
+each lookup.
+
+The database is stored in ``$XDG_CACHE_HOME/gwpy/frame-index.sqlite`` by
+default, this can be changed by setting the ``GWPY_FRAME_INDEX``
+environment variable to a new path, or to an empty string to keep the
+index in memory only.
+"""
+
+import json
+import os
+
+from glue.lal import CacheEntry
+
+from ..utils import with_import
+from .sqlite import (SQLiteCache, cache_path)
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+CHANNEL_TYPES = ('adc', 'proc', 'sim')
+
+# the module-level index, created on first use
+INDEX = {}
+
+
+def _default_index_path():
+    return cache_path('GWPY_FRAME_INDEX', 'frame-index.sqlite')
+
+
+# -----------------------------------------------------------------------------
+# TOC reading
+
+def read_toc(framefile):
+    """Read the table of contents of a GWF file (bypassing the index)
+
+    Parameters
+    ----------
+    framefile : `str`
+        path of GWF file to read
+
+    Returns
+    -------
+    epochs : `list` of `tuple`
+        the `(gps, duration)` pair for each frame in the file
+    channels : `list` of `tuple`
+        the `(name, type)` pair for each channel in the file, where
+        ``type`` is one of ``'adc'``, ``'proc'``, or ``'sim'``
+
+    Raises
+    ------
+    ImportError
+        if neither frameCPP or lalframe can be imported
+    """
+    try:
+        return _read_toc_framecpp(framefile)
+    except ImportError:
+        return _read_toc_lalframe(framefile)
+
+
+def _read_toc_framecpp(framefile):
+    try:
+        from LDAStools import frameCPP
+    except ImportError:
+        import frameCPP
+    toc = frameCPP.IFrameFStream(framefile).GetTOC()
+    epochs = [(s + n * 1e-9, float(dt)) for
+              s, n, dt in zip(toc.GTimeS, toc.GTimeN, toc.dt)]
+    channels = []
+    for type_ in CHANNEL_TYPES:
+        names = getattr(toc, 'Get%s' % type_.title())()
+        try:
+            names = names.keys()
+        except AttributeError:
+            pass
+        channels.extend((str(name), type_) for name in names)
+    return epochs, channels
+
+
+@with_import('lalframe')
+def _read_toc_lalframe(framefile):
+    frfile = lalframe.FrameUFrFileOpen(framefile, "r")
+    frtoc = lalframe.FrameUFrTOCRead(frfile)
+    epochs = []
+    for pos in range(lalframe.FrameUFrTOCQueryNFrame(frtoc)):
+        frac, gps = lalframe.FrameUFrTOCQueryGTimeModf(frtoc, pos)
+        epochs.append((gps + frac, lalframe.FrameUFrTOCQueryDt(frtoc, pos)))
+    channels = []
+    for type_ in CHANNEL_TYPES:
+        query = getattr(lalframe, 'FrameUFrTOCQuery%sName' % type_.title())
+        count = getattr(lalframe, 'FrameUFrTOCQuery%sN' % type_.title())
+        channels.extend((query(frtoc, i), type_) for
+                        i in range(count(frtoc)))
+    return epochs, channels
+
+
+# -----------------------------------------------------------------------------
+# index
+
+class FrameTOC(object):
+    """Table-of-contents information for a single GWF file
+
+    Parameters
+    ----------
+    path : `str`
+        the path of the file
+    epochs : `list` of `tuple`
+        the `(gps, duration)` pair for each frame in the file
+    channels : `dict`
+        `(name, (type, sample_rate, dtype))` pairs for each channel in
+        the file, the sample rate and data type are `None` until they
+        have been recorded with :meth:`FrameIndex.record_channels`
+    """
+    def __init__(self, path, epochs, channels):
+        self.path = path
+        self.epochs = epochs
+        self.channels = channels
+
+    @property
+    def segment(self):
+        """The GPS `[start, end)` segment covered by this file
+        """
+        from ..segments import Segment
+        return Segment(self.epochs[0][0], sum(self.epochs[-1]))
+
+    def get_type(self, channel):
+        """Return the type of the given channel in this file
+
+        Returns
+        -------
+        type : `str`, `False`
+            the channel type, or `False` if the channel isn't in the file
+        """
+        try:
+            return self.channels[str(channel)][0]
+        except KeyError:
+            return False
+
+
+class FrameIndex(SQLiteCache):
+    """An SQLite-backed cache of GWF table-of-contents information
+
+    Parameters
+    ----------
+    path : `str`, optional
+        the path of the database file, see the module documentation for
+        the default
+    """
+    def __init__(self, path=None):
+        if path is None:
+            path = _default_index_path()
+        super(FrameIndex, self).__init__(path)
+
+    @staticmethod
+    def _create_tables(conn):
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS files "
+                         "(path TEXT PRIMARY KEY, mtime REAL, size INTEGER, "
+                         "epochs TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS channels "
+                         "(path TEXT, name TEXT, type TEXT, "
+                         "sample_rate REAL, dtype TEXT, "
+                         "PRIMARY KEY (path, name))")
+
+    def get(self, framefile):
+        """Return the table-of-contents information for a GWF file
+
+        If the file has been modified since it was last indexed, its TOC
+        is read again.
+
+        Parameters
+        ----------
+        framefile : `str`, `~glue.lal.CacheEntry`
+            the path of the file
+
+        Returns
+        -------
+        toc : `FrameTOC`
+            the TOC information for this file
+        """
+        if isinstance(framefile, CacheEntry):
+            framefile = framefile.path
+        path = os.path.abspath(framefile)
+        stat = os.stat(path)
+        conn = self.connection
+        row = conn.execute("SELECT mtime, size, epochs FROM files "
+                           "WHERE path = ?", (path,)).fetchone()
+        if row is None or (row[0], row[1]) != (stat.st_mtime, stat.st_size):
+            return self._index(path, stat)
+        channels = dict(
+            (name, (type_, rate, dtype)) for (name, type_, rate, dtype) in
+            conn.execute("SELECT name, type, sample_rate, dtype FROM "
+                         "channels WHERE path = ?", (path,)))
+        return FrameTOC(path, [tuple(e) for e in json.loads(row[2])],
+                        channels)
+
+    def _index(self, path, stat):
+        epochs, channels = read_toc(path)
+        with self.connection as conn:
+            conn.execute("DELETE FROM channels WHERE path = ?", (path,))
+            conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                         (path, stat.st_mtime, stat.st_size,
+                          json.dumps(epochs)))
+            conn.executemany(
+                "INSERT OR REPLACE INTO channels VALUES (?, ?, ?, NULL, NULL)",
+                [(path, name, type_) for (name, type_) in channels])
+        return FrameTOC(path, epochs, dict(
+            (name, (type_, None, None)) for (name, type_) in channels))
+
+    def record_channels(self, framefile, channels):
+        """Record the sample rate and data type of channels in a file
+
+        Parameters
+        ----------
+        framefile : `str`, `~glue.lal.CacheEntry`
+            the path of the file
+        channels : `dict`
+            `(name, (sample_rate, dtype))` pairs to record
+        """
+        if isinstance(framefile, CacheEntry):
+            framefile = framefile.path
+        path = os.path.abspath(framefile)
+        with self.connection as conn:
+            conn.executemany(
+                "UPDATE channels SET sample_rate = ?, dtype = ? "
+                "WHERE path = ? AND name = ?",
+                [(float(rate), str(dtype), path, str(name)) for
+                 name, (rate, dtype) in channels.items()])
+
+    def clear(self):
+        """Remove all entries from this index
+        """
+        with self.connection as conn:
+            conn.execute("DELETE FROM files")
+            conn.execute("DELETE FROM channels")
+
+
+def get_index():
+    """Return the default `FrameIndex`
+    """
+    try:
+        return INDEX[None]
+    except KeyError:
+        index = INDEX[None] = FrameIndex()
+        return index
+
+
+def get_toc(framefile):
+    """Return the (indexed) table-of-contents information for a GWF file
+
+    Parameters
+    ----------
+    framefile : `str`, `~glue.lal.CacheEntry`
+        the path of the file
+
+    Returns
+    -------
+    toc : `FrameTOC`
+        the TOC information for this file
+
+    See Also
+    --------
+    FrameIndex.get
+        for details of the index
+    """
+    return get_index().get(framefile)
@@ -24,7 +24,10 @@ from __future__ import print_function
 
 import os
 import sys
+import threading
+import time
 import warnings
+from contextlib import contextmanager
 
 import nds2
 
@@ -167,3 +170,129 @@ def auth_connect(host, port=None):
         else:
             raise
     return connection
+
+
+class ConnectionPool(object):
+    """Process-wide pool of open NDS2 connections
+
+    Connections are keyed by ``(host, port)``, and are re-used between
+    requests, with at most ``maxconn`` connections open to any one server
+    at the same time.
+
+    Parameters
+    ----------
+    maxconn : `int`, optional
+        maximum number of concurrent connections to each server,
+        default: ``4``
+    maxidle : `float`, optional
+        maximum time (seconds) for which a connection can be idle before
+        being discarded, rather than re-used, default: ``300``
+    connect : `callable`, optional
+        function to open a new connection, with signature
+        ``connect(host, port)``, default: :func:`auth_connect`
+
+    Examples
+    --------
+    >>> from gwpy.io.nds import POOL
+    >>> with POOL.connection('nds.ligo.caltech.edu', 31200) as conn:
+    ...     conn.find_channels('L1:DMT-STRAIN*')
+    """
+    def __init__(self, maxconn=4, maxidle=300, connect=None):
+        self.maxconn = maxconn
+        self.maxidle = maxidle
+        self.connect = connect or auth_connect
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = {}
+        self._semaphores = {}
+
+    def _semaphore(self, key):
+        with self._lock:
+            # connections cannot be shared with a parent process
+            if os.getpid() != self._pid:
+                self._reset()
+            try:
+                return self._semaphores[key]
+            except KeyError:
+                sem = self._semaphores[key] = threading.BoundedSemaphore(
+                    self.maxconn)
+                return sem
+
+    def _checkout(self, key):
+        now = time.time()
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            while idle:
+                conn, lastused = idle.pop()
+                if now - lastused < self.maxidle:
+                    return conn
+                _close(conn)
+        return self.connect(*key)
+
+    def _checkin(self, key, conn):
+        with self._lock:
+            self._idle.setdefault(key, []).append((conn, time.time()))
+
+    @contextmanager
+    def connection(self, host, port=None):
+        """Context manager to borrow a connection from this pool
+
+        If the body of the ``with`` statement raises an exception (or a
+        generator holding the connection is closed early), the connection
+        is discarded, rather than returned to the pool. If the
+        exception was raised because the Kerberos ticket has expired, a new
+        ticket is requested before re-raising.
+
+        Parameters
+        ----------
+        host : `str`
+            name of server with which to connect
+        port : `int`, optional
+            connection port
+
+        Yields
+        ------
+        connection : `nds2.connection`
+            an open connection
+        """
+        key = (host, port)
+        sem = self._semaphore(key)
+        sem.acquire()
+        try:
+            conn = self._checkout(key)
+            try:
+                yield conn
+            except BaseException as e:  # includes GeneratorExit
+                _close(conn)
+                if 'SASL authentication' in str(e):
+                    print('\nError authenticating against %s' % host,
+                          file=sys.stderr)
+                    kinit()
+                raise
+            else:
+                self._checkin(key, conn)
+        finally:
+            sem.release()
+
+    def clear(self):
+        """Close all idle connections in this pool
+        """
+        with self._lock:
+            for idle in self._idle.values():
+                for conn, _ in idle:
+                    _close(conn)
+            self._idle = {}
+
+
+def _close(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+# the default connection pool
+POOL = ConnectionPool()
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2016)
+#
+# This file is part of GWpy.
+#
+# GWpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWpy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Pure-python stand-in for an NDS2 server
+
+This module provides `FakeNDS2Connection`, which implements the parts of
+the `nds2.connection` API used by GWpy, serving synthetic data, so that
+the NDS2 connection pool and the `TimeSeries.fetch` methods can be tested
+and benchmarked without network access.
+
+The value of each synthetic sample is its GPS time, so the alignment of
+any data returned can be checked trivially, e.g.:
+
+>>> from gwpy.io.ndsfake import FakeNDS2Server
+>>> server = FakeNDS2Server({'X1:TEST': 16})
+>>> conn = server.connect('localhost')
+>>> buffers = conn.fetch(1000000000, 1000000001, ['X1:TEST'])
+>>> buffers[0].length
+16
+>>> float(buffers[0].data[8])
+1000000000.5
+"""
+
+import fnmatch
+import threading
+import time
+
+import numpy
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+
+class FakeNDS2Channel(object):
+    """Stand-in for an `nds2.channel`
+    """
+    CHANNEL_TYPE_UNKNOWN = 0
+    CHANNEL_TYPE_ONLINE = 1
+    CHANNEL_TYPE_RAW = 2
+    CHANNEL_TYPE_RDS = 4
+    CHANNEL_TYPE_STREND = 8
+    CHANNEL_TYPE_MTREND = 16
+    CHANNEL_TYPE_TEST_POINT = 32
+    CHANNEL_TYPE_STATIC = 64
+
+    DATA_TYPE_UNKNOWN = 0
+    DATA_TYPE_INT16 = 1
+    DATA_TYPE_INT32 = 2
+    DATA_TYPE_INT64 = 4
+    DATA_TYPE_FLOAT32 = 8
+    DATA_TYPE_FLOAT64 = 16
+    DATA_TYPE_COMPLEX32 = 32
+
+    _TYPE_STRINGS = {
+        CHANNEL_TYPE_UNKNOWN: 'unknown',
+        CHANNEL_TYPE_ONLINE: 'online',
+        CHANNEL_TYPE_RAW: 'raw',
+        CHANNEL_TYPE_RDS: 'reduced',
+        CHANNEL_TYPE_STREND: 's-trend',
+        CHANNEL_TYPE_MTREND: 'm-trend',
+        CHANNEL_TYPE_TEST_POINT: 'test-pt',
+        CHANNEL_TYPE_STATIC: 'static',
+    }
+
+    _NUMPY_TYPES = {
+        DATA_TYPE_INT16: numpy.int16,
+        DATA_TYPE_INT32: numpy.int32,
+        DATA_TYPE_INT64: numpy.int64,
+        DATA_TYPE_FLOAT32: numpy.float32,
+        DATA_TYPE_FLOAT64: numpy.float64,
+        DATA_TYPE_COMPLEX32: numpy.complex64,
+    }
+
+    def __init__(self, name, sample_rate, data_type=DATA_TYPE_FLOAT64,
+                 channel_type=CHANNEL_TYPE_RAW, signal_units=''):
+        self.name = name
+        self.sample_rate = float(sample_rate)
+        self.data_type = data_type
+        self.channel_type = channel_type
+        self.signal_units = signal_units
+
+    @classmethod
+    def channel_type_to_string(cls, channel_type):
+        return cls._TYPE_STRINGS.get(channel_type, 'unknown')
+
+    @property
+    def dtype(self):
+        """The `numpy.dtype` of data for this channel
+        """
+        return numpy.dtype(self._NUMPY_TYPES[self.data_type])
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return '<%s (%s, %s, %s Hz)>' % (
+            self.name, self.channel_type_to_string(self.channel_type),
+            self.dtype.name, self.sample_rate)
+
+
+class FakeNDS2Buffer(object):
+    """Stand-in for an `nds2.buffer`
+    """
+    def __init__(self, channel, data, gps_seconds, gps_nanoseconds=0):
+        self.channel = channel
+        self.name = channel.name
+        self.data = data
+        self.gps_seconds = gps_seconds
+        self.gps_nanoseconds = gps_nanoseconds
+        self.length = data.shape[0]
+
+
+class FakeNDS2Connection(object):
+    """Stand-in for an `nds2.connection`, serving synthetic data
+
+    Parameters
+    ----------
+    server : `FakeNDS2Server`
+        the server from which to serve data
+    host : `str`
+        the name of the host
+    port : `int`, optional
+        the port on the host
+    """
+    def __init__(self, server, host, port=None):
+        self.server = server
+        self.host = host
+        self.port = port
+        self.closed = False
+
+    def get_host(self):
+        return self.host
+
+    def get_port(self):
+        return self.port
+
+    def close(self):
+        self.closed = True
+
+    def _check_open(self):
+        if self.closed:
+            raise RuntimeError("Connection to %s is closed" % self.host)
+
+    def find_channels(self, pattern='*', channel_type=None,
+                      data_type=None, min_sample_rate=0.,
+                      max_sample_rate=1e12):
+        """Find channels matching the given pattern
+
+        The ``channel_type`` and ``data_type`` arguments are bit masks,
+        as for `nds2.connection.find_channels`.
+        """
+        self._check_open()
+        self.server.queries += 1
+        if ',' in pattern:
+            pattern, ctype = pattern.rsplit(',', 1)
+            channel_type = dict((v, k) for k, v in
+                                FakeNDS2Channel._TYPE_STRINGS.items())[ctype]
+        out = []
+        for channel in self.server.channels.values():
+            if not fnmatch.fnmatch(channel.name, pattern):
+                continue
+            if channel_type and not channel.channel_type & channel_type:
+                continue
+            if data_type and not channel.data_type & data_type:
+                continue
+            if not min_sample_rate <= channel.sample_rate <= max_sample_rate:
+                continue
+            out.append(channel)
+        return out
+
+    def _get_channel(self, name):
+        try:
+            return self.server.channels[name.split(',')[0]]
+        except KeyError:
+            raise RuntimeError("Channel %s not found" % name)
+
+    def _buffers(self, start, end, channels):
+        return [FakeNDS2Buffer(c, self.server.data(c, start, end), start)
+                for c in channels]
+
+    def fetch(self, start, end, names):
+        """Fetch data for the given channels in one go
+        """
+        self._check_open()
+        channels = [self._get_channel(n) for n in names]
+        self.server.queries += 1
+        return self._buffers(int(start), int(end), channels)
+
+    def iterate(self, start, end, *args):
+        """Iterate over data for the given channels
+
+        Call as ``iterate(start, end, names)`` or
+        ``iterate(start, end, stride, names)``; by default each buffer
+        holds `FakeNDS2Server.stride` seconds of data.
+        """
+        self._check_open()
+        names = args[-1]
+        stride = args[0] if len(args) > 1 else self.server.stride
+        channels = [self._get_channel(n) for n in names]
+        self.server.queries += 1
+        for t in range(int(start), int(end), int(stride)):
+            t2 = min(t + stride, int(end))
+            if any(a < t2 and b > t for a, b in self.server.gaps):
+                continue
+            if self.server.latency:
+                time.sleep(self.server.latency)
+            yield self._buffers(t, t2, channels)
+
+
+class FakeNDS2Server(object):
+    """A pure-python stand-in for an NDS2 server
+
+    Parameters
+    ----------
+    channels : `dict`, `list`
+        `dict` of (name, sample rate) pairs, or a `list` of
+        `FakeNDS2Channel` objects, to serve
+    stride : `int`, optional
+        the default duration (seconds) of each buffer served by
+        `FakeNDS2Connection.iterate`, default: ``1``
+    latency : `float`, optional
+        the delay (seconds) before serving each buffer, default: ``0``
+    gaps : `list` of `tuple`, optional
+        `(start, end)` GPS intervals with no data, any buffer
+        overlapping a gap is not served by `FakeNDS2Connection.iterate`
+
+    Attributes
+    ----------
+    connections : `list`
+        the list of all connections opened to this server
+    queries : `int`
+        the number of queries made to this server
+    """
+    def __init__(self, channels, stride=1, latency=0, gaps=()):
+        if isinstance(channels, dict):
+            channels = [FakeNDS2Channel(name, rate) for
+                        name, rate in channels.items()]
+        self.channels = dict((c.name, c) for c in channels)
+        self.stride = stride
+        self.latency = latency
+        self.gaps = list(gaps)
+        self.connections = []
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def connect(self, host, port=None):
+        """Open a new `FakeNDS2Connection` to this server
+
+        This method has the same signature as
+        :func:`gwpy.io.nds.auth_connect`, so can be given as the
+        ``connect`` argument of :class:`gwpy.io.nds.ConnectionPool`.
+        """
+        conn = FakeNDS2Connection(self, host, port)
+        with self._lock:
+            self.connections.append(conn)
+        return conn
+
+    @staticmethod
+    def data(channel, start, end):
+        """Generate the synthetic data for a channel
+
+        Each sample holds its own GPS time (cast to the channel data type).
+        """
+        rate = channel.sample_rate
+        idx = numpy.arange(int(round(start * rate)), int(round(end * rate)))
+        return (idx / rate).astype(channel.dtype)
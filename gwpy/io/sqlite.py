@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2016)
+#
+# This file is part of GWpy.
+#
+# GWpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWpy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Small SQLite databases used to cache information between sessions
+"""
+
+import os
+import sqlite3
+import threading
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+
+def cache_path(envvar, filename):
+    """Return the path of a cache database
+
+    Parameters
+    ----------
+    envvar : `str`
+        name of the environment variable that, if set, gives the path,
+        with an empty value meaning the database is kept in memory
+    filename : `str`
+        name of the database file in ``$XDG_CACHE_HOME/gwpy``, used if
+        ``envvar`` is not set
+
+    Returns
+    -------
+    path : `str`
+        the path of the database, or ``':memory:'``
+    """
+    try:
+        return os.environ[envvar] or ':memory:'
+    except KeyError:
+        cachedir = os.getenv('XDG_CACHE_HOME', os.path.join(
+            os.path.expanduser('~'), '.cache'))
+        return os.path.join(cachedir, 'gwpy', filename)
+
+
+class SQLiteCache(object):
+    """Base class for an SQLite-backed cache
+
+    Sub-classes should implement `_create_tables` to create the tables
+    they need in a new connection.
+
+    Parameters
+    ----------
+    path : `str`
+        the path of the database file, or ``':memory:'``
+
+    Notes
+    -----
+    The database can be shared by any number of processes, each thread
+    (and each process) opens its own connection on first use. If the
+    database cannot be opened for writing, the connection falls back to
+    an in-memory database.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        if path != ':memory:':
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)))
+            except OSError:  # directory already exists (or can't be made)
+                pass
+
+    @property
+    def connection(self):
+        """The `sqlite3.Connection` for the current thread and process
+        """
+        conn = getattr(self._local, 'connection', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        try:
+            conn = sqlite3.connect(self.path, timeout=60)
+            self._create_tables(conn)
+        except sqlite3.Error:  # can't write database, use memory instead
+            conn = sqlite3.connect(':memory:')
+            self._create_tables(conn)
+        self._local.connection = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _create_tables(conn):
+        raise NotImplementedError("SQLiteCache sub-classes must define "
+                                  "_create_tables")
@@ -25,7 +25,7 @@ The core of this module is adapted from the :mod:`Grid LIGO User Environment
 
 __author__ = "Duncan Macleod <duncan.macleod@ligo.org>"
 
-from .segments import (Segment, SegmentList, SegmentListDict)
+from .segments import (Segment, SegmentList, SegmentListDict, SegmentArray)
 from .flag import *
 from .io import *
 
@@ -33,6 +33,7 @@ __all__ = [
     'Segment',
     'SegmentList',
     'SegmentListDict',
+    'SegmentArray',
     'DataQualityFlag',
     'DataQualityDict',
 ]
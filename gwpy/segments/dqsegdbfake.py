@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2016)
+#
+# This file is part of GWpy.
+#
+# GWpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWpy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Local HTTP stand-in for a DQSegDB segment database
+
+This module provides `FakeDQSegDBServer`, which serves the parts of the
+DQSegDB REST API used by :mod:`gwpy.segments.query` from a `dict` of
+segments, so that the query layer can be tested and benchmarked without
+network access, e.g.:
+
+>>> from gwpy.segments.dqsegdbfake import FakeDQSegDBServer
+>>> from gwpy.segments.query import query_flags
+>>> flags = {'X1:TEST:1': ([(0, 100)], [(10, 20)])}
+>>> with FakeDQSegDBServer(flags) as server:
+...     known, active, meta = query_flags(
+...         [('X1:TEST:1', 'X1', 'TEST', 1)], [(0, 50)], url=server.url)[0]
+>>> print(active)
+[[10 ... 20)]
+"""
+
+import json
+import threading
+
+from six.moves import socketserver
+from six.moves.BaseHTTPServer import (HTTPServer, BaseHTTPRequestHandler)
+from six.moves.urllib.parse import (urlparse, parse_qs)
+
+from .segments import (Segment, SegmentList)
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _DQSegDBHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server.fake
+        with server._lock:
+            server.requests.append(self.path)
+        url = urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+        query = parse_qs(url.query)
+        if len(parts) == 3 and parts[0] == 'dq':
+            versions = server.versions(parts[1], parts[2])
+            if versions:
+                return self._send(200, {'version': versions})
+        elif len(parts) == 4 and parts[0] == 'dq':
+            flag = ':'.join(parts[1:])
+            try:
+                known, active, metadata = server.flags[flag]
+                span = SegmentList([Segment(float(query['s'][0]),
+                                            float(query['e'][0]))])
+            except (KeyError, ValueError):
+                pass
+            else:
+                return self._send(200, {
+                    'ifo': parts[1],
+                    'name': parts[2],
+                    'version': int(parts[3]),
+                    'known': [list(s) for s in known & span],
+                    'active': [list(s) for s in active & span],
+                    'metadata': metadata,
+                })
+        self._send(404, {'error': 'not found: %s' % self.path})
+
+
+class FakeDQSegDBServer(object):
+    """A local HTTP server that stands in for a DQSegDB segment database
+
+    The server runs in a background (daemon) thread from creation until
+    `~FakeDQSegDBServer.stop` is called, and can be used as a context
+    manager.
+
+    Parameters
+    ----------
+    flags : `dict`
+        `(name, (known, active))` or `(name, (known, active, metadata))`
+        pairs to serve, where each name includes a version, e.g.
+        ``'X1:TEST:1'``
+    host : `str`, optional
+        the host on which to listen, default: ``'127.0.0.1'``
+    port : `int`, optional
+        the port on which to listen, default: any free port
+
+    Attributes
+    ----------
+    requests : `list`
+        the path of each request made to this server
+    connections : `int`
+        the number of connections opened to this server
+    """
+    def __init__(self, flags, host='127.0.0.1', port=0):
+        self.flags = {}
+        for name, segs in flags.items():
+            known, active = segs[:2]
+            metadata = segs[2] if len(segs) > 2 else {}
+            self.flags[name] = (
+                SegmentList(Segment(*s) for s in known).coalesce(),
+                SegmentList(Segment(*s) for s in active).coalesce(),
+                metadata)
+        self.requests = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = _ThreadingHTTPServer((host, port), _DQSegDBHandler)
+        self._server.fake = self
+        # count connections as they are accepted
+        _process = self._server.process_request
+
+        def process_request(request, client_address):
+            with self._lock:
+                self.connections += 1
+            return _process(request, client_address)
+        self._server.process_request = process_request
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def url(self):
+        """The URL of this server
+        """
+        host, port = self._server.server_address[:2]
+        return 'http://%s:%d' % (host, port)
+
+    def versions(self, ifo, tag):
+        """Return the list of versions served for a flag
+        """
+        prefix = '%s:%s:' % (ifo, tag)
+        return sorted(int(name[len(prefix):]) for name in self.flags if
+                      name.startswith(prefix))
+
+    def stop(self):
+        """Stop this server
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
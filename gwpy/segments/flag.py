@@ -33,9 +33,8 @@ import tempfile
 from urlparse import urlparse
 from copy import (copy as shallowcopy, deepcopy)
 from math import (floor, ceil)
-from threading import Thread
-from Queue import Queue
 
+from six import string_types
 from six.moves.urllib import request
 from six.moves.urllib.error import URLError
 
@@ -44,10 +43,11 @@ from numpy import inf
 from glue.segments import PosInfinity
 
 from ..time import to_gps
-from ..utils.deps import with_import
 from ..utils.compat import OrderedDict
 from ..io import (reader, writer)
-from .segments import Segment, SegmentList
+from .segments import (Segment, SegmentList, SegmentArray)
+from .query import (DEFAULT_URL, QUERY_NTHREADS, SegmentCache, get_cache,
+                    query_flags)
 
 __author__ = "Duncan Macleod <duncan.macleod@ligo.org>"
 __all__ = ['DataQualityFlag', 'DataQualityDict']
@@ -443,7 +443,6 @@ class DataQualityFlag(object):
         return flags[flag]
 
     @classmethod
-    @with_import('dqsegdb.apicalls')
     def query_dqsegdb(cls, flag, *args, **kwargs):
         """Query the advanced LIGO DQSegDB for the given flag
 
@@ -457,27 +456,23 @@ class DataQualityFlag(object):
             defining a number of summary segments
         url : `str`, optional, default: ``'https://segments.ligo.org'``
             URL of the segment database
+        cache : `bool`, `str`, `~gwpy.segments.query.SegmentCache`, optional
+            cache in which to look for, and store, results, see
+            :meth:`DataQualityDict.query_dqsegdb` for details
 
         Returns
         -------
         flag : `DataQualityFlag`
             A new `DataQualityFlag`, with the `known` and `active` lists
             filled appropriately.
+
+        See Also
+        --------
+        gwpy.segments.query
+            for details of the query layer and the cache
         """
-        # parse arguments
-        if len(args) == 1 and isinstance(args[0], SegmentList):
-            qsegs = args[0]
-        elif len(args) == 1 and len(args[0]) == 2:
-            qsegs = SegmentList(Segment(map(to_gps, args[0])))
-        elif len(args) == 2:
-            qsegs = SegmentList([Segment(map(to_gps, args))])
-        else:
-            raise ValueError("DataQualityFlag.query must be called with a "
-                             "flag name, and either GPS start and stop times, "
-                             "or a SegmentList of query segments")
-        # get server
-        protocol, server = kwargs.pop(
-            'url', 'https://segments.ligo.org').split('://', 1)
+        qsegs, url, _, include, cache = _parse_dqsegdb_query(
+            args, kwargs, 'DataQualityFlag.query')
 
         # parse flag
         out = cls(name=flag)
@@ -485,40 +480,18 @@ class DataQualityFlag(object):
             raise ValueError("Cannot parse ifo or tag (name) for flag %r"
                              % flag)
 
-        # other keyword arguments
-        request = kwargs.pop('request', 'metadata,active,known')
-
         # process query
-        for start, end in qsegs:
-            if end == PosInfinity or float(end) == +inf:
-                end = to_gps('now').seconds
-            if out.version is None:
-                data, versions, _ = apicalls.dqsegdbCascadedQuery(
-                    protocol, server, out.ifo, out.tag, request,
-                    start, end)
-                metadata = versions[-1]['metadata']
-            else:
-                try:
-                    data, _ = apicalls.dqsegdbQueryTimes(
-                        protocol, server, out.ifo, out.tag, out.version,
-                        request, start, end)
-                except URLError as e:
-                    e.args = ('Error querying for %s: %s' % (flag, e),)
-                    raise
-                metadata = data['metadata']
-            new = cls(name=flag)
-            for s2 in data['active']:
-                new.active.append(Segment(*s2))
-            for s2 in data['known']:
-                new.known.append(Segment(*s2))
-            segl = SegmentList([Segment(start, end)])
-            new.known &= segl
-            new.active &= segl
-            out += new
-            out.description = metadata.get('flag_description', None)
-            out.isgood = not metadata.get(
-                'active_indicates_ifo_badness', False)
-
+        result, = query_flags([(str(flag), out.ifo, out.tag, out.version)],
+                              qsegs, url=url, nproc=1, cache=cache,
+                              include=include)
+        if isinstance(result, Exception):
+            result.args = ('Error querying for %s: %s' % (flag, result),)
+            raise result
+        known, active, metadata = result
+        out.known = known
+        out.active = active
+        out.description = metadata.get('flag_description', None)
+        out.isgood = not metadata.get('active_indicates_ifo_badness', False)
         return out
 
     # use input/output registry to allow multi-format reading
@@ -744,9 +717,21 @@ class DataQualityFlag(object):
         self
             a view of this flag, not a copy.
         """
-        self.known = self.known.coalesce()
-        self.active = self.active.coalesce()
-        self.active = (self.known & self.active).coalesce()
+        try:
+            known = SegmentArray.from_segmentlist(self.known)
+            active = SegmentArray.from_segmentlist(self.active)
+        except TypeError:  # segments can't be represented as an array
+            known = active = None
+        # numpy would promote mixed int/float boundaries, so leave those
+        # to glue, which preserves the type of each boundary
+        if known is None or known.starts.dtype != active.starts.dtype:
+            self.known = self.known.coalesce()
+            self.active = self.active.coalesce()
+            self.active = (self.known & self.active).coalesce()
+        else:
+            known = known.coalesce()
+            self.known = known.to_segmentlist()
+            self.active = (active & known).to_segmentlist()
         return self
 
     def __repr__(self):
@@ -888,26 +873,46 @@ class DataQualityFlag(object):
     __iadd__ = __ior__
 
 
-class _QueryDQSegDBThread(Thread):
-    """Threaded DQSegDB query
+def _parse_query_segments(args, func):
+    """Parse the query segments for a segment database query
     """
-    def __init__(self, inqueue, outqueue, *args, **kwargs):
-        Thread.__init__(self)
-        self.in_ = inqueue
-        self.out = outqueue
-        self.args = args
-        self.kwargs = kwargs
-
-    def run(self):
-        i, flag = self.in_.get()
-        self.in_.task_done()
-        try:
-            self.out.put(
-                (i, DataQualityFlag.query_dqsegdb(flag, *self.args,
-                                                  **self.kwargs)))
-        except Exception as e:
-            self.out.put((i, e))
-        self.out.task_done()
+    if len(args) == 1 and isinstance(args[0], SegmentList):
+        return args[0]
+    if len(args) == 1 and len(args[0]) == 2:
+        return SegmentList([Segment(map(to_gps, args[0]))])
+    if len(args) == 2:
+        return SegmentList([Segment(map(to_gps, args))])
+    raise ValueError("{0} must be called with a flag name, and either GPS "
+                     "start and stop times, or a SegmentList of query "
+                     "segments".format(func))
+
+
+def _parse_dqsegdb_query(args, kwargs, func):
+    """Parse the arguments for a DQSegDB query
+
+    Returns
+    -------
+    segments, url, nproc, include, cache
+        the query segments (with infinite ends replaced by the current
+        time), and the keyword arguments for
+        :func:`~gwpy.segments.query.query_flags`
+    """
+    qsegs = SegmentList()
+    for start, end in _parse_query_segments(args, func):
+        if end == PosInfinity or float(end) == +inf:
+            end = to_gps('now').seconds
+        qsegs.append(Segment(start, end))
+    url = kwargs.pop('url', DEFAULT_URL)
+    nproc = kwargs.pop('nproc', QUERY_NTHREADS)
+    include = kwargs.pop('request', 'metadata,active,known')
+    cache = kwargs.pop('cache', False)
+    if cache is True:
+        cache = get_cache()
+    elif isinstance(cache, string_types):
+        cache = SegmentCache(cache)
+    elif not cache:
+        cache = None
+    return qsegs, url, nproc, include, cache
 
 
 class DataQualityDict(OrderedDict):
@@ -1077,12 +1082,25 @@ class DataQualityDict(OrderedDict):
 
         url : `str`, optional, default: ``'https://segments.ligo.org'``
             URL of the segment database.
+        nproc : `int`, optional, default: ``8``
+            number of flags to query in parallel, each query thread
+            re-uses a single connection to the database
+        cache : `bool`, `str`, `~gwpy.segments.query.SegmentCache`, optional
+            cache in which to look for, and store, results, either `True`
+            to use the default cache, or the path of a cache database,
+            default: `False`; with a cache, only those intervals not
+            already covered are requested from the database
 
         Returns
         -------
         flagdict : `DataQualityDict
             An ordered `DataQualityDict` of (name, `DataQualityFlag`)
             pairs.
+
+        See Also
+        --------
+        gwpy.segments.query
+            for details of the query layer and the cache
         """
         # check on_error flag
         on_error = kwargs.pop('on_error', 'raise').lower()
@@ -1090,22 +1108,29 @@ class DataQualityDict(OrderedDict):
             raise ValueError("on_error must be one of 'raise', 'warn', "
                              "or 'ignore'")
 
-        # set up threading
-        inq = Queue()
-        outq = Queue()
-        for i in range(len(flags)):
-            t = _QueryDQSegDBThread(inq, outq, *args, **kwargs)
-            t.setDaemon(True)
-            t.start()
-        for i, flag in enumerate(flags):
-            inq.put((i, flag))
-
-        # capture output
-        inq.join()
-        outq.join()
+        # parse arguments
+        qsegs, url, nproc, include, cache = _parse_dqsegdb_query(
+            args, kwargs, 'DataQualityDict.query')
+
+        # parse flags
+        queries = []
+        results = []
+        for flag in flags:
+            new = cls._EntryClass(name=flag)
+            if new.ifo is None or new.tag is None:
+                results.append(ValueError(
+                    "Cannot parse ifo or tag (name) for flag %r" % flag))
+            else:
+                results.append(None)
+                queries.append((str(flag), new.ifo, new.tag, new.version))
+
+        # run queries
+        found = iter(query_flags(queries, qsegs, url=url, nproc=nproc,
+                                 cache=cache, include=include))
+        results = [next(found) if r is None else r for r in results]
+
+        # format output
         new = cls()
-        results = zip(*sorted([outq.get() for i in range(len(flags))],
-                              key=lambda x: x[0]))[1]
         for result, flag in zip(results, flags):
             if isinstance(result, Exception):
                 new[flag] = cls._EntryClass(name=flag)
@@ -1117,7 +1142,12 @@ class DataQualityDict(OrderedDict):
                 else:
                     raise result
             else:
-                new[flag] = result
+                known, active, metadata = result
+                new[flag] = cls._EntryClass(
+                    name=flag, known=known, active=active,
+                    description=metadata.get('flag_description', None),
+                    isgood=not metadata.get('active_indicates_ifo_badness',
+                                            False))
         return new
 
     # use input/output registry to allow multi-format reading
@@ -1378,7 +1408,7 @@ class DataQualityDict(OrderedDict):
             a new `DataQualityFlag` who's active and known segments
             are the union of those of the values of this dict
         """
-        usegs = reduce(operator.or_, self.itervalues())
+        usegs = self._reduce(SegmentArray.union, operator.or_)
         usegs.name = ' | '.join(self.iterkeys())
         return usegs
 
@@ -1391,10 +1421,33 @@ class DataQualityDict(OrderedDict):
             a new `DataQualityFlag` who's active and known segments
             are the intersection of those of the values of this dict
         """
-        isegs = reduce(operator.and_, self.itervalues())
+        isegs = self._reduce(SegmentArray.intersection, operator.and_)
         isegs.name = ' & '.join(self.iterkeys())
         return isegs
 
+    def _reduce(self, arrayfunc, op):
+        """Combine all flags in this dict using the given operation
+
+        The `SegmentArray` function ``arrayfunc`` is used to combine all
+        segment lists at once, falling back to reducing the flags pairwise
+        with the operator ``op`` if the segments can't be represented as
+        arrays.
+        """
+        flags = list(self.itervalues())
+        try:
+            known = [SegmentArray.from_segmentlist(f.known) for f in flags]
+            active = [SegmentArray.from_segmentlist(f.active) for f in flags]
+        except TypeError:
+            return reduce(op, flags)
+        # numpy would promote mixed int/float boundaries, so leave those
+        # to glue, which preserves the type of each boundary
+        if len(set(a.starts.dtype for a in known + active if len(a))) > 1:
+            return reduce(op, flags)
+        out = shallowcopy(flags[0])
+        out.known = arrayfunc(*known).to_segmentlist()
+        out.active = arrayfunc(*active).to_segmentlist()
+        return out
+
     def plot(self, label='key', **kwargs):
         """Plot the data for this dict.
 
@@ -35,7 +35,8 @@ from ...io.hdf5 import (open_hdf5, identify_hdf5)
 from ...io.registry import (register_reader, register_writer,
                             register_identifier)
 from ..flag import DataQualityFlag
-from ..segments import (SegmentList, Segment)
+from ..segments import SegmentList
+from .utils import (segmentlist_from_columns, segmentlist_to_columns)
 
 __author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
 
@@ -169,27 +170,15 @@ def segmentlist_from_hdf5(f, name=None, gpstype=LIGOTimeGPS):
         else:
             dataset = h5file[name]
 
+        # read all rows in one go
         try:
             data = dataset[()]
         except ValueError:
-            data = []
-
-        out = SegmentList()
-        for row in data:
-            row = map(int, row)
-            # extract as LIGOTimeGPS
-            start = LIGOTimeGPS(*row[:2])
-            end = LIGOTimeGPS(*row[2:])
-            # convert to user type
-            try:
-                start = gpstype(start)
-            except TypeError:
-                start = gpstype(float(start))
-            try:
-                end = gpstype(end)
-            except TypeError:
-                end = gpstype(float(end))
-            out.append(Segment(start, end))
+            data = numpy.zeros((0, 4), dtype=int)
+        data = numpy.asarray(data, dtype=int).reshape(-1, 4)
+        out = segmentlist_from_columns(data[:, 0], data[:, 2],
+                                       start_ns=data[:, 1],
+                                       end_ns=data[:, 3], gpstype=gpstype)
     finally:
         if not isinstance(f, (h5py.Dataset, h5py.Group)):
             h5file.close()
@@ -219,11 +208,8 @@ def segmentlist_to_hdf5(seglist, output, name, group=None,
             h5group = h5file
 
         # create dataset
-        data = numpy.zeros((len(seglist), 4), dtype=int)
-        for i, seg in enumerate(seglist):
-            start, end = map(LIGOTimeGPS, seg)
-            data[i, :] = (start.seconds, start.nanoseconds,
-                          end.seconds, end.nanoseconds)
+        data = numpy.column_stack(segmentlist_to_columns(seglist)).reshape(
+            len(seglist), 4)
         if (not len(seglist) and
                 LooseVersion(h5py.version.version).version[0] < 2):
             kwargs.setdefault('maxshape', (None, 4))
@@ -20,6 +20,9 @@
 """
 
 import datetime
+
+import numpy
+
 from six import string_types
 
 from glue.lal import LIGOTimeGPS
@@ -34,8 +37,9 @@ from ...io import registry
 from ...io.utils import GzipFile
 from ...io.ligolw import (identify_ligolw, GWpyContentHandler)
 from ...io.cache import file_list
-from ...segments import (Segment, DataQualityFlag, DataQualityDict)
+from ...segments import (DataQualityFlag, DataQualityDict)
 from ...table import lsctables
+from .utils import (segmentlist_from_columns, segmentlist_to_columns)
 
 __author__ = "Duncan Macleod <duncan.macleod@ligo.org>"
 
@@ -107,33 +111,74 @@ def read_flag_dict(f, flags=None, gpstype=LIGOTimeGPS, coalesce=False,
                                  "in file." % flag)
     # read segment summary table as 'known'
     seg_sum_table = lsctables.SegmentSumTable.get_table(xmldoc)
-    for row in seg_sum_table:
-        for flag in out:
-            if not id_[flag] or row.segment_def_id in id_[flag]:
-                try:
-                    s = row.get()
-                except AttributeError:
-                    s = row.start_time, row.end_time
-                out[flag].known.append(Segment(gpstype(s[0]), gpstype(s[1])))
+    _add_table_segments(out, 'known', seg_sum_table, id_, gpstype=gpstype)
     for dqf in out:
         if coalesce:
             out[dqf].coalesce()
     # read segment table as 'active'
     seg_table = lsctables.SegmentTable.get_table(xmldoc)
-    for row in seg_table:
-        for flag in out:
-            if not id_[flag] or row.segment_def_id in id_[flag]:
-                try:
-                    s = row.get()
-                except AttributeError:
-                    s = row.start_time, row.end_time
-                out[flag].active.append(Segment(gpstype(s[0]), gpstype(s[1])))
+    _add_table_segments(out, 'active', seg_table, id_, gpstype=gpstype)
     for dqf in out:
         if coalesce:
             out[dqf].coalesce()
     return out
 
 
+def _get_column(table, name, default=None):
+    try:
+        column = table.getColumnByName(name)
+    except KeyError:
+        return default
+    return numpy.array([0 if x is None else x for x in column], dtype=int)
+
+
+def _add_table_segments(flags, attr, table, ids, gpstype=LIGOTimeGPS):
+    """Append segments from a segment table to a set of flags
+
+    The table is parsed column-by-column, and the rows for each
+    ``segment_def_id`` are found in one go, rather than matching each row
+    against each flag.
+
+    Parameters
+    ----------
+    flags : `DataQualityDict`
+        the flags to append to
+    attr : `str`
+        the flag attribute to append to, ``'known'`` or ``'active'``
+    table : `~glue.ligolw.table.Table`
+        the ``segment`` or ``segment_summary`` table to read
+    ids : `dict`
+        `(flag, segment_def_ids)` pairs identifying the rows for each flag,
+        an empty list of IDs matches all rows
+    gpstype : `type`, optional
+        the type for the segment boundaries
+    """
+    if not len(table):
+        return
+    start = _get_column(table, 'start_time')
+    end = _get_column(table, 'end_time')
+    zeros = numpy.zeros(start.size, dtype=int)
+    start_ns = _get_column(table, 'start_time_ns', zeros)
+    end_ns = _get_column(table, 'end_time_ns', zeros)
+    # group row indices by segment_def_id, preserving the row order
+    defids = numpy.array([str(x) for x in
+                          table.getColumnByName('segment_def_id')])
+    uids, inverse = numpy.unique(defids, return_inverse=True)
+    order = numpy.argsort(inverse, kind='mergesort')
+    bounds = numpy.searchsorted(inverse[order], numpy.arange(uids.size + 1))
+    rows = dict((uid, order[bounds[i]:bounds[i+1]]) for
+                i, uid in enumerate(uids))
+    for flag in flags:
+        if ids[flag]:
+            idx = numpy.sort(numpy.concatenate(
+                [rows.get(str(i), zeros[:0]) for i in ids[flag]]))
+        else:
+            idx = slice(None)
+        getattr(flags[flag], attr).extend(segmentlist_from_columns(
+            start[idx], end[idx], start_ns=start_ns[idx], end_ns=end_ns[idx],
+            gpstype=gpstype))
+
+
 def read_flag(fp, flag=None, **kwargs):
     """Read a single `DataQualityFlag` from a LIGO_LW XML file
     """
@@ -209,20 +254,24 @@ def write_to_xmldoc(flags, xmldoc, process_id=None):
         segdeftab.append(segdef)
 
         # write segment summary (known segments)
-        for vseg in flag.known:
+        for row in zip(*[c.tolist() for c in
+                         segmentlist_to_columns(flag.known)]):
             segsum = lsctables.SegmentSum()
             segsum.segment_def_id = segdef.segment_def_id
-            segsum.set(map(LIGOTimeGPS, map(float, vseg)))
+            (segsum.start_time, segsum.start_time_ns,
+             segsum.end_time, segsum.end_time_ns) = row
             segsum.comment = None
             segsum.segment_sum_id = lsctables.SegmentSumTable.get_next_id()
             segsum.process_id = process_id
             segsumtab.append(segsum)
 
         # write segment table (active segments)
-        for aseg in flag.active:
+        for row in zip(*[c.tolist() for c in
+                         segmentlist_to_columns(flag.active)]):
             seg = lsctables.Segment()
             seg.segment_def_id = segdef.segment_def_id
-            seg.set(map(LIGOTimeGPS, map(float, aseg)))
+            (seg.start_time, seg.start_time_ns,
+             seg.end_time, seg.end_time_ns) = row
             seg.segment_id = lsctables.SegmentTable.get_next_id()
             seg.process_id = process_id
             segtab.append(seg)
@@ -19,18 +19,27 @@
 """Read SegmentLists from seg-wizard format ASCII files
 """
 
+import re
+
+import numpy
+
 from six import string_types
 
 from glue.lal import (CacheEntry, Cache, LIGOTimeGPS)
-from glue import segmentsUtils
 
 from .. import (Segment, SegmentList, DataQualityFlag)
+from .utils import segmentlist_from_columns
 from ...io import registry
 from ...io.utils import identify_factory
 from ...io.cache import file_list
 
 __author__ = "Duncan Macleod <duncan.macleod@ligo.org>"
 
+# comments start with '#' or ';' and run to the end of the line
+re_COMMENT = re.compile(r'[#;].*')
+
+SEGWIZARD_HEADER = "# seg\tstart    \tstop     \tduration"
+
 
 def from_segwizard(f, coalesce=True, gpstype=LIGOTimeGPS, strict=True,
                    nproc=1):
@@ -47,13 +56,61 @@ def from_segwizard(f, coalesce=True, gpstype=LIGOTimeGPS, strict=True,
         if isinstance(fp, file):
             fp = fp.name
         with open(fp, 'r') as fobj:
-            segs += SegmentList(map(Segment, segmentsUtils.fromsegwizard(
-                fobj, coltype=gpstype, strict=strict)))
+            segs.extend(_read_segwizard(fobj, gpstype=gpstype,
+                                        strict=strict))
     if coalesce:
         segs.coalesce()
     return segs
 
 
+def _read_segwizard(fobj, gpstype=LIGOTimeGPS, strict=True):
+    """Parse all segments from a segwizard-format file object
+
+    The whole file is parsed as a single array of tokens, rather than
+    line-by-line, with segments built from the start and end columns at
+    the end.
+    """
+    lines = [line.split() for line in
+             re_COMMENT.sub('', fobj.read()).splitlines()]
+    lines = [line for line in lines if line]
+    if not lines:
+        return SegmentList()
+    ncols = set(map(len, lines))
+    if not ncols.issubset((2, 3, 4)):
+        raise ValueError("Cannot parse segwizard file %r, all lines should "
+                         "have 2, 3, or 4 columns" % fobj.name)
+    if strict and len(ncols) > 1:
+        raise ValueError("segwizard file %r has mixed formats"
+                         % fobj.name)
+    # extract (start, end, duration) columns as strings
+    if len(ncols) == 1:
+        ncol = ncols.pop()
+        tokens = numpy.array(lines, dtype=str)
+        if ncol == 2:
+            tokens = numpy.column_stack((tokens, [''] * len(lines)))
+        tokens = tokens[:, -3:].T
+    else:
+        tokens = numpy.array([line[len(line) - 3:] if len(line) > 2 else
+                              line + [''] for line in lines], dtype=str).T
+    start, end, duration = tokens
+    fstart = start.astype(float)
+    fend = end.astype(float)
+    if strict:
+        # check durations (where given)
+        given = duration != ''
+        bad = numpy.abs(numpy.abs(fend - fstart)[given] -
+                        duration[given].astype(float)) > 1e-6
+        if bad.any():
+            i = numpy.flatnonzero(given)[numpy.flatnonzero(bad)[0]]
+            raise ValueError("segment '%s' has incorrect duration"
+                             % ' '.join(lines[i]))
+    if gpstype in (float, int):
+        return segmentlist_from_columns(fstart, fend, gpstype=gpstype)
+    # parse the original strings to preserve precision
+    return SegmentList(map(Segment, map(gpstype, start.tolist()),
+                           map(gpstype, end.tolist())))
+
+
 def flag_from_segwizard(filename, flag=None, coalesce=True, gpstype=float,
                         strict=True, nproc=1):
     if isinstance(flag, DataQualityFlag):
@@ -83,15 +140,23 @@ def to_segwizard(segs, fobj, header=True, coltype=int):
     See Also
     --------
     :mod:`glue.segmentsUtils`
-        for definition of the segwizard format, and the to/from functions
-        used in this GWpy module
+        for definition of the segwizard format
     """
     if isinstance(fobj, string_types):
         close = True
         fobj = open(fobj, 'w')
     else:
         close = False
-    segmentsUtils.tosegwizard(fobj, segs, header=header, coltype=coltype)
+    # format all rows, then write them in one go
+    starts = [coltype(seg[0]) for seg in segs]
+    ends = [coltype(seg[1]) for seg in segs]
+    durations = [coltype(abs(seg)) for seg in segs]
+    lines = ['%d\t%s\t%s\t%s' % row for row in
+             zip(range(len(starts)), starts, ends, durations)]
+    if header:
+        lines.insert(0, SEGWIZARD_HEADER)
+    if lines:
+        fobj.write('\n'.join(lines) + '\n')
     if close:
         fobj.close()
 
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2016)
+#
+# This file is part of GWpy.
+#
+# GWpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWpy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Columnar conversions between segment lists and arrays
+
+The segment readers and writers parse or format whole columns of GPS
+times at once, and only create `Segment` objects at the very end.
+"""
+
+import numpy
+
+from glue.lal import LIGOTimeGPS
+
+from ..segments import (Segment, SegmentList, SegmentArray)
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+
+def _to_gpstype(values, gpstype):
+    """Convert a list of `LIGOTimeGPS` into the given type
+    """
+    if gpstype is LIGOTimeGPS:
+        return values
+    try:
+        return list(map(gpstype, values))
+    except TypeError:
+        return [gpstype(float(x)) for x in values]
+
+
+def segmentlist_from_columns(start, end, start_ns=None, end_ns=None,
+                             gpstype=float):
+    """Build a `SegmentList` from columns of GPS times
+
+    Parameters
+    ----------
+    start : `array-like`
+        the GPS start time (or start seconds) for each segment
+    end : `array-like`
+        the GPS end time (or end seconds) for each segment
+    start_ns : `array-like`, optional
+        the start nanoseconds for each segment
+    end_ns : `array-like`, optional
+        the end nanoseconds for each segment
+    gpstype : `type`, optional
+        the type for the segment boundaries, default: `float`
+
+    Returns
+    -------
+    segmentlist : `SegmentList`
+        the list of segments, in the same order as the input
+    """
+    start = numpy.asarray(start)
+    end = numpy.asarray(end)
+    # combine seconds and nanoseconds
+    if gpstype in (float, int):
+        if start_ns is not None:
+            if gpstype is int:
+                start = start.astype(int)
+                end = end.astype(int)
+            else:
+                start = start + numpy.asarray(start_ns) * 1e-9
+                end = end + numpy.asarray(end_ns) * 1e-9
+        start = start.astype(gpstype).tolist()
+        end = end.astype(gpstype).tolist()
+    # or build exact GPS times
+    else:
+        if start_ns is None:
+            start = [LIGOTimeGPS(x) for x in start.tolist()]
+            end = [LIGOTimeGPS(x) for x in end.tolist()]
+        else:
+            start = list(map(LIGOTimeGPS, start.tolist(),
+                             numpy.asarray(start_ns).tolist()))
+            end = list(map(LIGOTimeGPS, end.tolist(),
+                           numpy.asarray(end_ns).tolist()))
+        start = _to_gpstype(start, gpstype)
+        end = _to_gpstype(end, gpstype)
+    return SegmentList(map(Segment, start, end))
+
+
+def segmentlist_to_columns(segmentlist):
+    """Split a list of segments into columns of GPS seconds and nanoseconds
+
+    Parameters
+    ----------
+    segmentlist : `SegmentList`
+        the list of segments to convert
+
+    Returns
+    -------
+    start, start_ns, end, end_ns : `numpy.ndarray`
+        integer arrays of GPS seconds and nanoseconds for the start and
+        end of each segment
+    """
+    try:
+        arr = SegmentArray.from_segmentlist(segmentlist)
+    except TypeError:  # segments contain GPS objects
+        times = [LIGOTimeGPS(x) for seg in segmentlist for x in seg]
+        seconds = numpy.array([t.seconds for t in times], dtype=int)
+        nanosec = numpy.array([t.nanoseconds for t in times], dtype=int)
+        return seconds[::2], nanosec[::2], seconds[1::2], nanosec[1::2]
+    out = []
+    for times in (arr.starts, arr.ends):
+        seconds = numpy.floor(times).astype(int)
+        nanosec = numpy.round((times - seconds) * 1e9).astype(int)
+        # carry rounding up to a full second
+        carry = nanosec >= 1000000000
+        seconds[carry] += 1
+        nanosec[carry] -= 1000000000
+        out.extend((seconds, nanosec))
+    return tuple(out)
@@ -0,0 +1,468 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2016)
+#
+# This file is part of GWpy.
+#
+# GWpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWpy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Bounded, cached queries of the DQSegDB segment database
+
+Queries for many flags are distributed over a fixed-size pool of threads,
+each of which keeps its own persistent (keep-alive) HTTP connection to
+each server.
+
+Results can optionally be stored in a small SQLite database, recording
+which intervals have already been queried for each flag, so that
+repeated or overlapping queries only request the intervals not already
+covered. The database is stored in ``$XDG_CACHE_HOME/gwpy/segments.sqlite``
+by default, this can be changed by setting the ``GWPY_SEGMENT_CACHE``
+environment variable to a new path, or to an empty string to keep the
+cache in memory only.
+"""
+
+import json
+import os
+import socket
+import threading
+
+from six.moves import http_client
+from six.moves.urllib.error import (HTTPError, URLError)
+from six.moves.urllib.parse import (urlparse, urlencode)
+
+from ..io.sqlite import (SQLiteCache, cache_path)
+from ..time import to_gps
+from ..utils import parallel
+from .segments import (Segment, SegmentList)
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+DEFAULT_URL = 'https://segments.ligo.org'
+
+# number of threads to use for queries
+QUERY_NTHREADS = 8
+
+# segments newer than this many seconds are not cached, since they
+# may still be changing in the database
+CACHE_LATENCY = 3600
+
+# module-level clients and caches, created on first use
+CLIENTS = {}
+CACHE = {}
+
+
+def _default_cache_path():
+    return cache_path('GWPY_SEGMENT_CACHE', 'segments.sqlite')
+
+
+def _find_credentials():
+    """Find the X509 certificate and key to use for HTTPS queries
+    """
+    cert = os.getenv('X509_USER_CERT')
+    key = os.getenv('X509_USER_KEY')
+    if cert and key:
+        return cert, key
+    proxy = os.getenv('X509_USER_PROXY')
+    if not proxy and hasattr(os, 'getuid'):
+        proxy = '/tmp/x509up_u%d' % os.getuid()
+    if proxy and os.path.isfile(proxy):
+        return proxy, proxy
+    return None, None
+
+
+def _float_segments(segments):
+    return SegmentList(Segment(float(a), float(b)) for a, b in segments)
+
+
+def _format_gps(gps):
+    gps = float(gps)
+    if gps.is_integer():
+        return str(int(gps))
+    return repr(gps)
+
+
+# -----------------------------------------------------------------------------
+# HTTP client
+
+class DQSegDBClient(object):
+    """Client for the DQSegDB REST API that re-uses connections
+
+    Each thread (in each process) opens its own persistent connection
+    on first use, which is re-used for all subsequent requests from that
+    thread.
+
+    Parameters
+    ----------
+    url : `str`, optional
+        URL of the segment database, default: ``'https://segments.ligo.org'``
+    timeout : `float`, optional
+        socket timeout (seconds) for each request, default: ``60``
+    """
+    def __init__(self, url=DEFAULT_URL, timeout=60):
+        if '://' not in url:
+            url = 'https://%s' % url
+        parsed = urlparse(url)
+        self.scheme = parsed.scheme
+        self.netloc = parsed.netloc
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @property
+    def url(self):
+        """The base URL of the segment database
+        """
+        return '%s://%s' % (self.scheme, self.netloc)
+
+    def _connect(self):
+        if self.scheme == 'https':
+            import ssl
+            cert, key = _find_credentials()
+            # SSL contexts are only available from python 2.7.9
+            if not hasattr(ssl, 'create_default_context'):
+                return http_client.HTTPSConnection(
+                    self.netloc, key_file=key, cert_file=cert,
+                    timeout=self.timeout)
+            context = ssl.create_default_context()
+            if cert:
+                context.load_cert_chain(cert, key)
+            return http_client.HTTPSConnection(
+                self.netloc, timeout=self.timeout, context=context)
+        return http_client.HTTPConnection(self.netloc, timeout=self.timeout)
+
+    def _get_connection(self):
+        conn = getattr(self._local, 'connection', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn, True
+        self._local.connection = self._connect()
+        self._local.pid = os.getpid()
+        return self._local.connection, False
+
+    def close(self):
+        """Close the connection for the current thread
+        """
+        conn = getattr(self._local, 'connection', None)
+        if conn is not None:
+            conn.close()
+        self._local.connection = None
+
+    def request(self, path, query=None):
+        """GET a path from the database, and decode the JSON response
+
+        Parameters
+        ----------
+        path : `str`
+            the path to request, e.g. ``'/dq/H1/DMT-SCIENCE'``
+        query : `list` of `tuple`, optional
+            `(key, value)` query parameters
+
+        Returns
+        -------
+        data : `dict`
+            the decoded JSON response
+
+        Raises
+        ------
+        urllib2.HTTPError
+            if the database returns an error status
+        urllib2.URLError
+            if the connection fails
+        """
+        if query:
+            path = '%s?%s' % (path, urlencode(query))
+        while True:
+            conn, reused = self._get_connection()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                body = response.read()
+            except (http_client.HTTPException, socket.error) as e:
+                self.close()
+                # the server may have closed an idle connection, so
+                # retry once with a new one
+                if reused:
+                    continue
+                raise URLError(e)
+            if response.status >= 400:
+                raise HTTPError(self.url + path, response.status,
+                                response.reason, response.msg, None)
+            return json.loads(body.decode('utf-8'))
+
+    def versions(self, ifo, name):
+        """Return the list of versions for a flag, in ascending order
+        """
+        return sorted(self.request('/dq/%s/%s' % (ifo, name))['version'])
+
+    def query_version(self, ifo, name, version, start, end,
+                      include='metadata,active,known'):
+        """Query for one version of a flag in a single interval
+
+        Returns
+        -------
+        data : `dict`
+            the decoded JSON response, including ``'known'`` and
+            ``'active'`` lists of `[start, end]` pairs
+        """
+        return self.request('/dq/%s/%s/%d' % (ifo, name, version), [
+            ('s', _format_gps(start)), ('e', _format_gps(end)),
+            ('include', include)])
+
+    def query(self, ifo, name, version, segments,
+              include='metadata,active,known'):
+        """Query for segments for a flag in a number of intervals
+
+        If ``version`` is `None`, the query cascades over all versions,
+        from highest to lowest, taking segments from each version only for
+        the times not already known from a higher version.
+
+        Parameters
+        ----------
+        ifo : `str`
+            the interferometer prefix for the flag
+        name : `str`
+            the name (tag) of the flag
+        version : `int`, `None`
+            the version of the flag, or `None` to cascade over all versions
+        segments : `SegmentList`
+            the (coalesced) intervals in which to query
+
+        Returns
+        -------
+        known : `SegmentList`
+            the known segments for the flag
+        active : `SegmentList`
+            the active segments for the flag
+        metadata : `dict`
+            the flag metadata, from the highest version with known segments
+        """
+        if version is None:
+            versions = self.versions(ifo, name)[::-1]
+        else:
+            versions = [version]
+        known = SegmentList()
+        active = SegmentList()
+        metadata = {}
+        remaining = SegmentList(segments)
+        for vers in versions:
+            vknown = SegmentList()
+            vactive = SegmentList()
+            for start, end in remaining:
+                data = self.query_version(ifo, name, vers, start, end,
+                                          include=include)
+                vknown.extend(Segment(*seg) for seg in data['known'])
+                vactive.extend(Segment(*seg) for seg in data['active'])
+                if not metadata:
+                    metadata = data.get('metadata', {})
+            vknown = vknown.coalesce() & remaining
+            known.extend(vknown)
+            active.extend(vactive.coalesce() & vknown)
+            remaining -= vknown
+            if not remaining:
+                break
+        return known.coalesce(), active.coalesce(), metadata
+
+
+def get_client(url=DEFAULT_URL):
+    """Return the shared `DQSegDBClient` for the given URL
+    """
+    try:
+        return CLIENTS[url]
+    except KeyError:
+        return CLIENTS.setdefault(url, DQSegDBClient(url))
+
+
+# -----------------------------------------------------------------------------
+# cache
+
+class SegmentCache(SQLiteCache):
+    """An SQLite-backed cache of segment database query results
+
+    For each flag, the cache records the intervals that have been queried,
+    as well as the known and active segments found in those intervals.
+
+    Parameters
+    ----------
+    path : `str`, optional
+        the path of the database file, see the module documentation for
+        the default
+    latency : `float`, optional
+        segments newer than this many seconds are not cached,
+        default: `CACHE_LATENCY`
+    """
+    def __init__(self, path=None, latency=CACHE_LATENCY):
+        if path is None:
+            path = _default_cache_path()
+        super(SegmentCache, self).__init__(path)
+        self.latency = latency
+
+    @staticmethod
+    def _create_tables(conn):
+        with conn:
+            for table in ('queried', 'known', 'active'):
+                conn.execute("CREATE TABLE IF NOT EXISTS %s "
+                             "(url TEXT, flag TEXT, gps_start REAL, "
+                             "gps_end REAL)" % table)
+                conn.execute("CREATE INDEX IF NOT EXISTS %s_flag ON %s "
+                             "(url, flag)" % (table, table))
+            conn.execute("CREATE TABLE IF NOT EXISTS metadata "
+                         "(url TEXT, flag TEXT, metadata TEXT, "
+                         "PRIMARY KEY (url, flag))")
+
+    def _read(self, table, url, flag):
+        return SegmentList(Segment(*row) for row in self.connection.execute(
+            "SELECT gps_start, gps_end FROM %s WHERE url = ? AND flag = ?"
+            % table, (url, flag))).coalesce()
+
+    def get(self, url, flag, segments):
+        """Return the cached results for a flag
+
+        Parameters
+        ----------
+        url : `str`
+            the URL of the segment database
+        flag : `str`
+            the name of the flag
+        segments : `SegmentList`
+            the (coalesced) intervals of interest
+
+        Returns
+        -------
+        covered : `SegmentList`
+            the parts of ``segments`` that are covered by the cache
+        known : `SegmentList`
+            the cached known segments in ``covered``
+        active : `SegmentList`
+            the cached active segments in ``covered``
+        metadata : `dict`
+            the cached flag metadata
+        """
+        covered = self._read('queried', url, flag) & segments
+        if not covered:
+            return covered, SegmentList(), SegmentList(), {}
+        known = self._read('known', url, flag) & covered
+        active = self._read('active', url, flag) & covered
+        row = self.connection.execute(
+            "SELECT metadata FROM metadata WHERE url = ? AND flag = ?",
+            (url, flag)).fetchone()
+        return covered, known, active, json.loads(row[0]) if row else {}
+
+    def add(self, url, flag, segments, known, active, metadata):
+        """Record the results of a query for a flag
+
+        Only results older than `SegmentCache.latency` seconds are
+        recorded.
+
+        Parameters
+        ----------
+        url : `str`
+            the URL of the segment database
+        flag : `str`
+            the name of the flag
+        segments : `SegmentList`
+            the (coalesced) intervals that were queried
+        known : `SegmentList`
+            the known segments found in those intervals
+        active : `SegmentList`
+            the active segments found in those intervals
+        metadata : `dict`
+            the flag metadata
+        """
+        cutoff = float(to_gps('now')) - self.latency
+        # work in floats, LIGOTimeGPS can't be compared with infinity
+        segments, known, active = map(_float_segments,
+                                      (segments, known, active))
+        stable = segments & SegmentList([Segment(float('-inf'), cutoff)])
+        if not stable:
+            return
+        with self.connection as conn:
+            for table, segs in (('queried', stable),
+                                ('known', known & stable),
+                                ('active', active & stable)):
+                conn.executemany(
+                    "INSERT INTO %s VALUES (?, ?, ?, ?)" % table,
+                    [(url, flag, float(s), float(e)) for s, e in segs])
+            conn.execute("INSERT OR REPLACE INTO metadata VALUES (?, ?, ?)",
+                         (url, flag, json.dumps(metadata)))
+
+    def clear(self):
+        """Remove all entries from this cache
+        """
+        with self.connection as conn:
+            for table in ('queried', 'known', 'active', 'metadata'):
+                conn.execute("DELETE FROM %s" % table)
+
+
+def get_cache():
+    """Return the default `SegmentCache`
+    """
+    try:
+        return CACHE[None]
+    except KeyError:
+        return CACHE.setdefault(None, SegmentCache())
+
+
+# -----------------------------------------------------------------------------
+# query
+
+def query_flags(flags, segments, url=DEFAULT_URL, nproc=QUERY_NTHREADS,
+                cache=None, include='metadata,active,known'):
+    """Query the segment database for a number of flags
+
+    Parameters
+    ----------
+    flags : `list` of `tuple`
+        the `(name, ifo, tag, version)` for each flag, with
+        ``version=None`` for a versionless query
+    segments : `SegmentList`
+        the intervals in which to query
+    url : `str`, optional
+        URL of the segment database
+    nproc : `int`, optional
+        number of flags to query in parallel, default: `QUERY_NTHREADS`
+    cache : `SegmentCache`, optional
+        cache in which to look for, and store, results
+    include : `str`, optional
+        comma-separated list of information to query for
+
+    Returns
+    -------
+    results : `list`
+        the `(known, active, metadata)` tuple for each flag, or the
+        exception raised when querying for that flag
+    """
+    client = get_client(url)
+    segments = SegmentList(segments).coalesce()
+
+    def _query(args):
+        name, ifo, tag, version = args
+        try:
+            if cache is None:
+                known, active, metadata = SegmentList(), SegmentList(), {}
+                missing = segments
+            else:
+                covered, known, active, metadata = cache.get(
+                    client.url, name, segments)
+                missing = segments - covered
+            if missing:
+                newknown, newactive, newmeta = client.query(
+                    ifo, tag, version, missing, include=include)
+                if cache is not None:
+                    cache.add(client.url, name, missing, newknown,
+                              newactive, newmeta)
+                known.extend(newknown)
+                active.extend(newactive)
+                metadata = newmeta or metadata
+            return known.coalesce(), active.coalesce(), metadata
+        except Exception as e:
+            return e
+
+    return parallel.parallel_map(_query, flags, nproc=nproc, threads=True)
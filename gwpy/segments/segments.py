@@ -25,9 +25,12 @@ configuration.
 __author__ = "Duncan Macleod <duncan.macleod@ligo.org>"
 __credits__ = "Kipp Cannon <kipp.cannon@ligo.org>"
 
+import numpy
+
 from glue.segments import (segment as _Segment,
                            segmentlist as _SegmentList,
-                           segmentlistdict as _SegmentListDict)
+                           segmentlistdict as _SegmentListDict,
+                           PosInfinity, NegInfinity)
 
 from ..io import (reader, writer)
 
@@ -133,6 +136,187 @@ class SegmentList(_SegmentList):
     write = writer()
 
 
+class SegmentArray(object):
+    """Compact array representation of a list of segments
+
+    A `SegmentArray` stores the start and end times of its segments in
+    two numeric arrays, and implements the segment algebra (coalescing,
+    union, intersection, difference, complement, contraction, and
+    protraction) as vectorised `numpy` operations, which is much faster
+    than `SegmentList` for lists of many segments.
+
+    All methods return a new `SegmentArray`, and the results of all
+    algebra are coalesced.
+
+    Parameters
+    ----------
+    starts : `array-like`
+        the GPS start times of each segment
+    ends : `array-like`
+        the GPS end times of each segment
+
+    Examples
+    --------
+    >>> from gwpy.segments import (SegmentList, SegmentArray)
+    >>> a = SegmentArray.from_segmentlist(SegmentList([(0, 2), (4, 6)]))
+    >>> b = SegmentArray([1], [5])
+    >>> (a & b).to_segmentlist()
+    <SegmentList([Segment(1, 2)
+                  Segment(4, 5)])>
+    """
+    def __init__(self, starts=(), ends=()):
+        self.starts = numpy.asarray(starts)
+        self.ends = numpy.asarray(ends)
+        if self.starts.dtype.kind not in 'iuf':
+            self.starts = self.starts.astype(float)
+            self.ends = self.ends.astype(float)
+        if self.starts.shape != self.ends.shape:
+            raise ValueError("Cannot create SegmentArray with %d starts and "
+                             "%d ends" % (self.starts.size, self.ends.size))
+
+    @classmethod
+    def from_segmentlist(cls, segmentlist):
+        """Create a new `SegmentArray` from a list of segments
+
+        Parameters
+        ----------
+        segmentlist : `SegmentList`, `list` of `tuple`
+            the input list of `(start, end)` segments
+
+        Raises
+        ------
+        TypeError
+            if the segment boundaries cannot be stored as numbers,
+            e.g. `~glue.lal.LIGOTimeGPS` or infinite bounds
+        """
+        arr = numpy.array(list(segmentlist))
+        if arr.size == 0:
+            return cls()
+        if arr.ndim != 2 or arr.dtype.kind not in 'iuf':
+            raise TypeError("Cannot represent %s as a SegmentArray"
+                            % type(segmentlist).__name__)
+        return cls(arr[:, 0], arr[:, 1])
+
+    def to_segmentlist(self):
+        """Convert this `SegmentArray` into a `SegmentList`
+
+        Infinite bounds are returned as `~glue.segments.PosInfinity` or
+        `~glue.segments.NegInfinity`.
+        """
+        starts = self.starts.tolist()
+        ends = self.ends.tolist()
+        if self.starts.dtype.kind == 'f':
+            if self.starts.size and self.starts[0] == -numpy.inf:
+                starts[0] = NegInfinity
+            if self.ends.size and self.ends[-1] == numpy.inf:
+                ends[-1] = PosInfinity
+        return SegmentList(map(Segment, starts, ends))
+
+    def __len__(self):
+        return self.starts.size
+
+    def __iter__(self):
+        return (Segment(a, b) for (a, b) in
+                zip(self.starts.tolist(), self.ends.tolist()))
+
+    def __abs__(self):
+        return (self.ends - self.starts).sum()
+
+    def __repr__(self):
+        return "<SegmentArray(%d segments)>" % len(self)
+
+    # -- algebra --------------------------------
+
+    def coalesce(self):
+        """Sort and merge all overlapping or touching segments
+
+        Zero-length segments are removed.
+        """
+        if not len(self):
+            return type(self)(self.starts, self.ends)
+        order = numpy.lexsort((self.ends, self.starts))
+        starts = self.starts[order]
+        ends = numpy.maximum.accumulate(self.ends[order])
+        # a new segment starts wherever there is a gap before the next start
+        first = numpy.concatenate(
+            ([0], numpy.flatnonzero(starts[1:] > ends[:-1]) + 1))
+        last = numpy.concatenate((first[1:] - 1, [starts.size - 1]))
+        starts = starts[first]
+        ends = ends[last]
+        keep = starts != ends
+        return type(self)(starts[keep], ends[keep])
+
+    @classmethod
+    def union(cls, *arrays):
+        """Return the union of any number of `SegmentArray`
+        """
+        arrays = [a for a in arrays if len(a)] or [cls()]
+        return cls(numpy.concatenate([a.starts for a in arrays]),
+                   numpy.concatenate([a.ends for a in arrays])).coalesce()
+
+    @classmethod
+    def intersection(cls, *arrays):
+        """Return the intersection of any number of `SegmentArray`
+
+        The intersection is computed with a single sweep over all of the
+        segment boundaries, counting how many inputs are active at each
+        point.
+        """
+        if not arrays or not all(len(a) for a in arrays):
+            return cls()
+        arrays = [a.coalesce() for a in arrays]
+        times = numpy.concatenate([a.starts for a in arrays] +
+                                  [a.ends for a in arrays])
+        nseg = sum(len(a) for a in arrays)
+        delta = numpy.concatenate((numpy.ones(nseg, dtype=int),
+                                   -numpy.ones(nseg, dtype=int)))
+        # sort by time, putting ends ahead of starts at the same time
+        order = numpy.lexsort((delta, times))
+        times = times[order]
+        depth = numpy.cumsum(delta[order])
+        active = depth == len(arrays)
+        previous = numpy.concatenate(([False], active[:-1]))
+        starts = times[active & ~previous]
+        ends = times[~active & previous]
+        keep = starts != ends
+        return cls(starts[keep], ends[keep])
+
+    def __or__(self, other):
+        return self.union(self, other)
+
+    def __and__(self, other):
+        return self.intersection(self, other)
+
+    def __invert__(self):
+        new = self.coalesce()
+        starts = numpy.concatenate(([-numpy.inf], new.ends))
+        ends = numpy.concatenate((new.starts, [numpy.inf]))
+        keep = starts != ends
+        return type(self)(starts[keep], ends[keep])
+
+    def __sub__(self, other):
+        if not len(other):
+            return self.coalesce()
+        new = self & ~other
+        return type(self)(new.starts.astype(self.starts.dtype),
+                          new.ends.astype(self.ends.dtype))
+
+    def contract(self, x):
+        """Contract each segment by ``x`` seconds at each end
+
+        Segments contracted to zero (or negative) length are removed.
+        """
+        starts = self.starts + x
+        ends = self.ends - x
+        keep = starts < ends
+        return type(self)(starts[keep], ends[keep]).coalesce()
+
+    def protract(self, x):
+        """Protract each segment by ``x`` seconds at each end
+        """
+        return type(self)(self.starts - x, self.ends + x).coalesce()
+
+
 class SegmentListDict(_SegmentListDict):
     __doc__ = _update_docstring(_SegmentListDict.__doc__)
 
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2016)
+#
+# This file is part of GWpy.
+#
+# GWpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWpy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Polyphase rational resampling
+
+Data are resampled by a rational factor ``p / q`` by (notionally)
+up-sampling by ``p``, applying a linear-phase anti-alias FIR filter,
+and down-sampling by ``q``. Only the output samples that are kept are
+calculated: each is the dot product of one polyphase component of the
+filter with a window of the input, read from a zero-copy strided view.
+"""
+
+from __future__ import division
+
+from fractions import Fraction
+
+import numpy
+from numpy.lib.stride_tricks import as_strided
+
+from scipy import signal
+
+from ..utils.lru import LRUCache
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+#: cache of designed anti-alias filters
+FILTER_CACHE = LRUCache(maxsize=32)
+
+#: default window for anti-alias filter design
+DEFAULT_WINDOW = ('kaiser', 5.0)
+
+
+# -----------------------------------------------------------------------------
+# utilities
+
+def rational_factors(rate, newrate, maxfactor=10000):
+    """Return the up- and down-sampling factors between two sample rates
+
+    Parameters
+    ----------
+    rate : `float`
+        the input sample rate
+    newrate : `float`
+        the output sample rate
+    maxfactor : `int`, optional
+        the largest up- or down-sampling factor to consider
+
+    Returns
+    -------
+    p, q : `int`
+        the up-sampling and down-sampling factors, with no common factor
+
+    Raises
+    ------
+    ValueError
+        if the ratio of rates is not a fraction with a denominator of at
+        most ``maxfactor``
+    """
+    ratio = Fraction(float(newrate) / float(rate)).limit_denominator(
+        maxfactor)
+    if (not ratio or ratio.numerator > maxfactor or
+            abs(float(ratio) * rate - newrate) > 1e-9 * newrate):
+        raise ValueError("Cannot resample from %s to %s with a rational "
+                         "factor" % (rate, newrate))
+    return ratio.numerator, ratio.denominator
+
+
+def design_filter(p, q, ntaps=None, window=DEFAULT_WINDOW):
+    """Design the anti-alias FIR filter for resampling by ``p / q``
+
+    Filters are cached by ``(p, q, ntaps, window)``, the design does not
+    depend on the input sample rate.
+
+    Parameters
+    ----------
+    p : `int`
+        up-sampling factor
+    q : `int`
+        down-sampling factor
+    ntaps : `int`, optional
+        number of taps, must be odd, defaults to
+        ``20 * max(p, q) + 1``
+    window : `str`, `tuple`, optional
+        window to use in designing the filter, see
+        `scipy.signal.firwin`
+
+    Returns
+    -------
+    taps : `numpy.ndarray`
+        the (read-only) filter coefficients, including a gain of ``p``
+    """
+    factor = max(p, q)
+    if ntaps is None:
+        ntaps = 20 * factor + 1
+    if not ntaps % 2:
+        raise ValueError("ntaps must be odd, not %d" % ntaps)
+    if isinstance(window, list):
+        window = tuple(window)
+
+    def _create():
+        if factor == 1:  # no resampling, so no filter
+            taps = numpy.ones(1)
+        else:
+            taps = signal.firwin(ntaps, 1. / factor, window=window) * p
+        taps.flags.writeable = False
+        return taps
+
+    return FILTER_CACHE.get((p, q, ntaps, window), _create)
+
+
+def _phases(taps, p):
+    """Split a filter into its ``p`` polyphase components
+
+    Each component is padded to the same length, and time-reversed so
+    that it can be dotted directly with a window of input data.
+    """
+    length = -(-taps.size // p)
+    padded = numpy.zeros(length * p)
+    padded[:taps.size] = taps
+    return padded.reshape((length, p)).T[:, ::-1].copy()
+
+
+def _apply(buf, start, phases, p, q, delay, mstart, mstop, out):
+    """Calculate output samples ``[mstart, mstop)`` into ``out``
+
+    ``buf`` holds the zero-padded input from padded index ``start``
+    along its last axis.
+    """
+    length = phases.shape[1]
+    step = buf.strides[-1]
+    for k in range(min(p, mstop - mstart)):
+        first = mstart + k
+        count = (mstop - 1 - first) // p + 1
+        n = first * q + delay
+        idx = n // p - start
+        view = as_strided(buf[..., idx:], shape=buf.shape[:-1] + (
+            count, length), strides=buf.strides[:-1] + (step * q, step))
+        out[..., k::p] = numpy.dot(view, phases[n % p])
+    return out
+
+
+# -----------------------------------------------------------------------------
+# resampling
+
+def resample(data, p, q, taps=None):
+    """Resample some data by a rational factor ``p / q``
+
+    Parameters
+    ----------
+    data : `numpy.ndarray`
+        input data, the last axis is taken as time, so that a
+        `(nchannels, nsamples)` block of same-rate channels can be
+        resampled in one go
+    p : `int`
+        up-sampling factor
+    q : `int`
+        down-sampling factor
+    taps : `numpy.ndarray`, optional
+        odd-length anti-alias filter (with a gain of ``p``), defaults to
+        the output of :func:`design_filter`
+
+    Returns
+    -------
+    out : `numpy.ndarray`
+        the resampled data, with ``ceil(nsamples * p / q)`` samples along
+        the last axis, aligned so that the first output sample is at the
+        same time as the first input sample
+    """
+    resampler = Resampler(p, q, taps=taps)
+    first = resampler.update(data)
+    return numpy.concatenate((first, resampler.flush()), axis=-1)
+
+
+class Resampler(object):
+    """Resample a stream of contiguous data chunks by ``p / q``
+
+    Input samples are held only until all of the outputs that depend on
+    them have been calculated, so that the concatenation of the outputs
+    of :meth:`update` and a final :meth:`flush` is identical to
+    :func:`resample` applied to the concatenation of all inputs.
+
+    Parameters
+    ----------
+    p : `int`
+        up-sampling factor
+    q : `int`
+        down-sampling factor
+    taps : `numpy.ndarray`, optional
+        odd-length anti-alias filter (with a gain of ``p``), defaults to
+        the output of :func:`design_filter`
+
+    Examples
+    --------
+    >>> resampler = Resampler(1, 64)
+    >>> for chunk in chunks:
+    ...     out = resampler.update(chunk)
+    >>> tail = resampler.flush()
+    """
+    def __init__(self, p, q, taps=None):
+        if taps is None:
+            taps = design_filter(p, q)
+        taps = numpy.asarray(taps)
+        if not taps.size % 2:
+            raise ValueError("Resampling filter must have an odd number "
+                             "of taps")
+        self.p = int(p)
+        self.q = int(q)
+        self.phases = _phases(taps, self.p)
+        self.delay = (taps.size - 1) // 2
+        self._buffer = None
+        self._start = 0  # padded index of the first sample in the buffer
+        self._nin = 0  # number of input samples received
+        self._nout = 0  # number of output samples calculated
+
+    @classmethod
+    def from_rates(cls, rate, newrate, **kwargs):
+        """Create a new `Resampler` between two sample rates
+
+        Parameters
+        ----------
+        rate : `float`
+            the input sample rate
+        newrate : `float`
+            the output sample rate
+        **kwargs
+            other keyword arguments are passed to :func:`design_filter`
+
+        Returns
+        -------
+        resampler : `Resampler`
+        """
+        p, q = rational_factors(rate, newrate)
+        return cls(p, q, taps=design_filter(p, q, **kwargs))
+
+    def _window_start(self, m):
+        """Return the padded index of the first input for output ``m``
+        """
+        return (m * self.q + self.delay) // self.p
+
+    def _process(self, data, final=False):
+        data = numpy.asarray(data, dtype=float)
+        length = self.phases.shape[1]
+        if self._buffer is None:
+            # pad the start of the stream with zeros
+            self._buffer = numpy.zeros(data.shape[:-1] + (length - 1,))
+        self._nin += data.shape[-1]
+        if final:
+            # pad the end of the stream with zeros
+            stop = -(-self._nin * self.p // self.q)
+            need = self._window_start(stop - 1) + length if stop else 0
+            pad = max(0, need - self._start - self._buffer.shape[-1] -
+                      data.shape[-1])
+            data = numpy.concatenate((data, numpy.zeros(
+                data.shape[:-1] + (pad,))), axis=-1)
+        buf = numpy.concatenate((self._buffer, data), axis=-1)
+        end = self._start + buf.shape[-1]
+        if not final:
+            # find last output whose window of input is complete
+            stop = ((end - length + 1) * self.p - 1 - self.delay) // self.q + 1
+        stop = max(stop, self._nout)
+        out = numpy.zeros(buf.shape[:-1] + (stop - self._nout,))
+        _apply(buf, self._start, self.phases, self.p, self.q, self.delay,
+               self._nout, stop, out)
+        # keep only the input required for future outputs
+        keep = min(self._window_start(stop), end) - self._start
+        self._buffer = buf[..., keep:].copy()
+        self._start += keep
+        self._nout = stop
+        return out
+
+    def update(self, data):
+        """Add a new chunk of data, and return the completed outputs
+
+        Parameters
+        ----------
+        data : `numpy.ndarray`
+            the next chunk of input data, time along the last axis
+
+        Returns
+        -------
+        out : `numpy.ndarray`
+            all output samples that can be calculated from the data
+            received so far
+        """
+        return self._process(data)
+
+    def flush(self):
+        """Return the remaining outputs, padding the input with zeros
+
+        Returns
+        -------
+        out : `numpy.ndarray`
+            the outputs that depend on samples beyond the end of the
+            input received, up to a total of ``ceil(ninput * p / q)``
+        """
+        if self._buffer is None:
+            return numpy.zeros(0)
+        return self._process(numpy.zeros(self._buffer.shape[:-1] + (0,)),
+                             final=True)
@@ -32,11 +32,21 @@ from six.moves import xrange
 import numpy
 from numpy import fft as npfft
 
+from ..frequencyseries import FrequencySeries
 from ..timeseries import TimeSeries
+from ..utils import parallel
+from ..utils.compat import OrderedDict
+from ..utils.lru import LRUCache
 
 __author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
 __credits__ = 'Scott Coughlin <scott.coughlin@ligo.org>'
 
+# cache tile windows and indices for recently-used plane configurations
+QPLANE_ROWS = LRUCache(maxsize=64)
+
+# interpolation methods supported by QPlane.interpolate
+INTERPOLATION_KINDS = ('linear', 'cubic', 'nearest')
+
 
 class QObject(object):
     """Base class for Q-transform objects
@@ -134,6 +144,49 @@ class QTiling(QObject):
                          mismatch=self.mismatch)
         raise StopIteration()
 
+    def transform(self, fseries, epoch=0, gps=None, search=.5, nproc=1):
+        """Q-transform the given data with every plane, and find the loudest
+
+        Parameters
+        ----------
+        fseries : `numpy.ndarray`
+            the complex FFT of a time-series data set
+        epoch : `float`, optional
+            the GPS start time of the data
+        gps : `float`, optional
+            central time of interest in which to search for the peak
+        search : `float`, optional
+            window around `gps` in which to find peak energies, only
+            used if `gps` is given
+        nproc : `int`, optional
+            number of threads with which to transform planes in parallel
+
+        Returns
+        -------
+        plane : `QPlane`
+            the plane containing the loudest normalized tile energy
+        energies : `list` of `tuple`
+            the `(rows, energy)` groups for the peak plane, as returned
+            by :meth:`QPlane.energies`
+        peak : `float`
+            the loudest normalized tile energy
+
+        See Also
+        --------
+        QPlane.energies
+            for details of the transform of each plane
+        """
+        def _transform(plane):
+            groups = plane.energies(fseries, normalized=True)
+            return groups, peak_energy(groups, self.duration, epoch=epoch,
+                                       gps=gps, search=search)
+
+        planes = list(self)
+        results = parallel.parallel_map(_transform, planes, nproc=nproc,
+                                        threads=True)
+        idx = numpy.argmax([peak for _, peak in results])
+        return planes[idx], results[idx][0], results[idx][1]
+
 
 class QPlane(QBase):
     """Iterable representation of a Q-transform plane
@@ -207,6 +260,94 @@ class QPlane(QBase):
         bandwidths = 2 * pi ** (1/2.) * f / self.q
         return f - bandwidths / 2.
 
+    def get_rows(self):
+        """Return the pre-computed tile windows and indices for this plane
+
+        Rows with the same number of tiles are grouped together, so that
+        they can be inverse-Fourier transformed as a single 2-D block. The
+        result is cached for each plane configuration.
+
+        Returns
+        -------
+        groups : `list` of `tuple`
+            a list of ``(rows, ntiles, target, source, window)`` tuples,
+            one per group, giving the row indices in the group, the number
+            of tiles in each row, the flattened indices of the
+            ``(len(rows), ntiles)`` block into which to write the windowed
+            data, the indices of the input FFT to read, and the window
+            to apply
+        """
+        key = (self.q, tuple(self.frange), self.duration, self.sampling,
+               self.mismatch)
+        return QPLANE_ROWS.get(key, self._create_rows)
+
+    def _create_rows(self):
+        """Compute the tile windows and indices for this plane
+
+        See :meth:`QPlane.get_rows` for details of the output.
+        """
+        tiles = OrderedDict()
+        for i, qtile in enumerate(self):
+            tiles.setdefault(qtile.ntiles, []).append((i, qtile))
+        groups = []
+        for ntiles, rows in tiles.items():
+            ntiles = int(ntiles)
+            target, source, window = [], [], []
+            for j, (_, qtile) in enumerate(rows):
+                # index of each window sample in the padded, shifted row
+                left = qtile.padding[0]
+                cols = (numpy.arange(qtile.windowsize) + left -
+                        ntiles // 2) % ntiles
+                target.append(j * ntiles + cols)
+                source.append(qtile.get_data_indices())
+                window.append(qtile.get_window())
+            groups.append((numpy.array([i for i, _ in rows]), ntiles,
+                           numpy.concatenate(target),
+                           numpy.concatenate(source),
+                           numpy.concatenate(window)))
+        return groups
+
+    def energies(self, fseries, normalized=True):
+        """Calculate the tile energies for every row of this plane
+
+        All rows with the same number of tiles are windowed and inverse
+        Fourier transformed together.
+
+        Parameters
+        ----------
+        fseries : `numpy.ndarray`
+            the complex FFT of a time-series data set
+        normalized : `bool`, optional
+            normalize the energy of the output, if `False` the output
+            is the complex `~numpy.fft.ifft` output of the Q-tranform
+
+        Returns
+        -------
+        energies : `list` of `tuple`
+            a list of ``(rows, energy)`` tuples, one per group of rows
+            with the same number of tiles, where ``energy`` is a
+            ``(len(rows), ntiles)`` array
+
+        See Also
+        --------
+        QTile.transform
+            for details on the transform for a single `(Q, frequency)` tile
+        """
+        fseries = numpy.asarray(fseries)
+        out = []
+        for rows, ntiles, target, source, window in self.get_rows():
+            windowed = numpy.zeros(rows.size * ntiles, dtype=complex)
+            windowed[target] = fseries[source] * window
+            tdenergy = npfft.ifft(windowed.reshape((rows.size, ntiles)),
+                                  axis=1)
+            if normalized:
+                energy = tdenergy.real ** 2. + tdenergy.imag ** 2.
+                energy /= energy.mean(axis=1)[:, numpy.newaxis]
+            else:
+                energy = tdenergy
+            out.append((rows, energy))
+        return out
+
     def transform(self, fseries, normalized=True, epoch=None):
         """Calculate the energy `TimeSeries` for the given fseries
 
@@ -232,15 +373,82 @@ class QPlane(QBase):
 
         See Also
         --------
-        QTile.transform
-            for details on the transform for a single `(Q, frequency)` tile
+        QPlane.energies
+            for details on the transform of all rows in this plane
         """
-        out = []
-        for qtile in self:
-            # get energy from transform
-            out.append(qtile.transform(fseries, normalized=normalized,
-                                       epoch=epoch))
-        return self.frequencies, out
+        if epoch is None and isinstance(fseries, FrequencySeries):
+            epoch = fseries.epoch
+        if epoch is None:
+            epoch = 0
+        return self.frequencies, self.to_timeseries(
+            self.energies(fseries, normalized=normalized), epoch=epoch)
+
+    def interpolate(self, energies, times, frequencies=None, epoch=0,
+                    kind='cubic'):
+        """Interpolate grouped tile energies onto a regular output grid
+
+        All rows with the same number of tiles are interpolated onto the
+        output time grid in one go, and then (optionally) all times are
+        interpolated onto the output frequency grid in one go.
+        Only the output samples are ever evaluated, so the cost scales
+        with the size of the output, not the duration of the input.
+
+        Parameters
+        ----------
+        energies : `list` of `tuple`
+            the `(rows, energy)` groups as returned by
+            :meth:`QPlane.energies`
+        times : `numpy.ndarray`
+            array of GPS times at which to sample the output
+        frequencies : `numpy.ndarray`, optional
+            array of frequencies at which to sample the output, defaults
+            to the central frequencies of this plane
+        epoch : `float`, optional
+            the GPS start time of the transformed data
+        kind : `str`, optional
+            type of interpolation, one of ``'linear'``, ``'cubic'``, or
+            ``'nearest'``
+
+        Returns
+        -------
+        energy : `numpy.ndarray`
+            a `(len(times), len(frequencies))` array of energies
+        """
+        if kind not in INTERPOLATION_KINDS:
+            raise ValueError("Unknown interpolation kind %r, select one of "
+                             "%s" % (kind, ', '.join(INTERPOLATION_KINDS)))
+        times = numpy.asarray(times, dtype=float) - float(epoch)
+        planef = self.frequencies
+        out = numpy.zeros((times.size, planef.size))
+        for rows, energy in energies:
+            dx = self.duration / energy.shape[1]
+            out[:, rows] = _interpolate_regular(energy, times / dx, kind).T
+        if frequencies is None:
+            return out
+        return _interpolate_sorted(planef, out, frequencies, kind)
+
+    def to_timeseries(self, energies, epoch=0):
+        """Convert grouped tile energies into one `TimeSeries` per row
+
+        Parameters
+        ----------
+        energies : `list` of `tuple`
+            the `(rows, energy)` groups as returned by
+            :meth:`QPlane.energies`
+        epoch : `~gwpy.time.LIGOTimeGPS`, `float`, optional
+            the GPS start time of the data
+
+        Returns
+        -------
+        transforms : `list` of `~gwpy.timeseries.TimeSeries`
+            the energy of each row, in order of frequency
+        """
+        out = [None] * sum(rows.size for rows, _ in energies)
+        for rows, energy in energies:
+            dx = self.duration / energy.shape[1]
+            for i, row in zip(rows, energy):
+                out[i] = TimeSeries(row, x0=epoch, dx=dx, copy=False)
+        return out
 
 
 class QTile(QBase):
@@ -352,6 +560,84 @@ class QTile(QBase):
             return cenergy
 
 
+def peak_energy(energies, duration, epoch=0, gps=None, search=.5):
+    """Find the loudest tile energy from a set of grouped Q-plane rows
+
+    Parameters
+    ----------
+    energies : `list` of `tuple`
+        the `(rows, energy)` groups as returned by :meth:`QPlane.energies`
+    duration : `float`
+        the duration of the transformed data
+    epoch : `float`, optional
+        the GPS start time of the data
+    gps : `float`, optional
+        central time of interest in which to search for the peak
+    search : `float`, optional
+        window around `gps` in which to find peak energies, only
+        used if `gps` is given
+
+    Returns
+    -------
+    peak : `float`
+        the loudest tile energy
+    """
+    peak = 0
+    for _, energy in energies:
+        if gps is not None:  # restrict search to [gps-search, gps+search)
+            ntiles = energy.shape[1]
+            dx = duration / ntiles
+            idx0 = max(0, int(float(gps - search - epoch) / dx))
+            idx1 = max(0, int(float(gps + search - epoch) / dx))
+            energy = energy[:, idx0:idx1]
+        if energy.size:
+            peak = max(peak, energy.max())
+    return peak
+
+
+def _interpolate_regular(data, index, kind='cubic'):
+    """Interpolate the rows of ``data`` at the given fractional indices
+
+    ``'cubic'`` fits an interpolating (not-a-knot) cubic spline to every
+    row at once, using only the samples spanning the requested indices.
+    """
+    n = data.shape[-1]
+    if kind == 'nearest' or n < 2:
+        idx = numpy.clip(numpy.round(index).astype(int), 0, n - 1)
+        return data[..., idx]
+    if kind == 'cubic':
+        i0 = min(max(int(numpy.floor(index.min())) - 1, 0), n - 1)
+        i1 = max(min(int(numpy.floor(index.max())) + 3, n), i0 + 1)
+        if i1 - i0 >= 4:
+            from scipy.interpolate import interp1d
+            # extrapolate beyond the last sample, as a spline would
+            return interp1d(numpy.arange(i0, i1), data[..., i0:i1],
+                            kind='cubic', axis=-1, assume_sorted=True,
+                            bounds_error=False,
+                            fill_value='extrapolate')(index)
+    index = numpy.clip(index, 0, n - 1)
+    i0 = numpy.clip(numpy.floor(index).astype(int), 0, n - 2)
+    s = index - i0
+    return data[..., i0] * (1 - s) + data[..., i0 + 1] * s
+
+
+def _interpolate_sorted(x, data, xnew, kind='cubic'):
+    """Interpolate the columns of ``data`` sampled at sorted points ``x``
+    """
+    xnew = numpy.clip(xnew, x[0], x[-1])
+    if kind == 'cubic' and x.size >= 4:
+        from scipy.interpolate import interp1d
+        return interp1d(x, data, kind='cubic', axis=-1,
+                        assume_sorted=True)(xnew)
+    i0 = numpy.clip(numpy.searchsorted(x, xnew) - 1, 0, max(x.size - 2, 0))
+    i1 = numpy.minimum(i0 + 1, x.size - 1)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        s = numpy.where(i1 > i0, (xnew - x[i0]) / (x[i1] - x[i0]), 0)
+    if kind == 'nearest':
+        return data[..., numpy.where(s < .5, i0, i1)]
+    return data[..., i0] * (1 - s) + data[..., i1] * s
+
+
 def next_power_of_two(x):
     """Return the smallest power of two greater than or equal to `x`
     """
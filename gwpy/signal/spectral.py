@@ -0,0 +1,526 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2016)
+#
+# This file is part of GWpy.
+#
+# GWpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWpy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Vectorised spectral estimation on strided segment views.
+
+The routines in this module operate on plain `numpy.ndarray` data,
+computing all of the periodograms required for an average spectrum
+(or a spectrogram of them) using a single FFT call over a 2-D block of
+overlapping segments, rather than a Python loop over data slices.
+"""
+
+from __future__ import division
+
+import numpy
+from numpy import fft as npfft
+from numpy.lib.stride_tricks import as_strided
+
+from scipy import signal
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+# maximum size (bytes) of segment block to transform in one go
+BLOCK_SIZE = 2 ** 26
+
+# average methods understood by this module
+AVERAGES = ('mean', 'median', 'median-mean')
+
+
+# -----------------------------------------------------------------------------
+# utilities
+
+def segment_view(data, nfft, nstride=1):
+    """Return a zero-copy view of overlapping segments of ``data``
+
+    Parameters
+    ----------
+    data : `numpy.ndarray`
+        input array, segments are taken along the last axis, so that
+        many channels of equal length can be segmented together
+    nfft : `int`
+        number of samples per segment
+    nstride : `int`, optional
+        number of samples between the start of neighbouring segments
+
+    Returns
+    -------
+    view : `numpy.ndarray`
+        a `(..., nsegments, nfft)` view of the input data, this array
+        shares memory with ``data`` and so should not be written to
+    """
+    data = numpy.asarray(data)
+    if not data.ndim:
+        raise ValueError("Cannot build segment view of 0-D data")
+    if nfft > data.shape[-1]:
+        raise ValueError("Segment length (%d) is greater than the length "
+                         "of the input data (%d)" % (nfft, data.shape[-1]))
+    nseg = 1 + (data.shape[-1] - nfft) // nstride
+    step = data.strides[-1]
+    return as_strided(data, shape=data.shape[:-1] + (nseg, nfft),
+                      strides=data.strides[:-1] + (step * nstride, step))
+
+
+def median_bias(n):
+    """Return the bias factor for the median of ``n`` periodograms
+
+    This matches the ``XLALMedianBias`` function from LAL, and is used
+    to normalise median-average spectra to the mean.
+
+    Parameters
+    ----------
+    n : `int`
+        the number of averages
+
+    Returns
+    -------
+    bias : `float`
+        the bias factor by which to divide a median-average spectrum
+    """
+    if n >= 1000:
+        return numpy.log(2)
+    ans = 1.
+    for i in range(1, (n - 1) // 2 + 1):
+        ans -= 1. / (2 * i)
+        ans += 1. / (2 * i + 1)
+    return ans
+
+
+def _scale(window, fs, scaling):
+    """Return the normalisation factor for a one-sided periodogram
+    """
+    if scaling == 'density':
+        return 1. / (fs * (window * window).sum())
+    elif scaling == 'spectrum':
+        return 1. / window.sum() ** 2
+    else:
+        raise ValueError("Unknown scaling: %r" % scaling)
+
+
+def _detrend(segments, detrend):
+    """Return a detrended copy of a 2-D block of segments
+
+    The input may be a strided view of some other array, so it is never
+    modified in place.
+    """
+    if detrend == 'constant':
+        return segments - segments.mean(axis=-1)[..., numpy.newaxis]
+    return signal.detrend(numpy.array(segments), axis=-1, type=detrend)
+
+
+# -----------------------------------------------------------------------------
+# periodograms and averages
+
+def periodograms(segments, window, fs=1., scaling='density',
+                 detrend='constant'):
+    """Calculate the one-sided periodogram of each segment in a 2-D block
+
+    Parameters
+    ----------
+    segments : `numpy.ndarray`
+        `(nsegments, nfft)` array of time-domain data, this array is
+        not modified
+    window : `numpy.ndarray`
+        window to apply to each segment
+    fs : `float`, optional
+        sampling frequency of the data
+    scaling : `str`, optional
+        one of ``'density'`` or ``'spectrum'``
+    detrend : `str`, `False`, optional
+        type of detrending to apply to each segment, see
+        `scipy.signal.detrend` for details, give `False` to skip
+
+    Returns
+    -------
+    pgrams : `numpy.ndarray`
+        `(nsegments, nfft // 2 + 1)` array of periodograms
+    """
+    nfft = segments.shape[-1]
+    if detrend:
+        segments = _detrend(segments, detrend)
+        segments *= window
+    else:
+        segments = segments * window
+    fft = npfft.rfft(segments, axis=-1)
+    del segments
+    pgrams = fft.real ** 2
+    pgrams += fft.imag ** 2
+    del fft
+    pgrams *= _scale(window, fs, scaling)
+    if nfft % 2:
+        pgrams[..., 1:] *= 2
+    else:
+        pgrams[..., 1:-1] *= 2
+    return pgrams
+
+
+def average(pgrams, method='mean', axis=0):
+    """Average a set of periodograms along the given axis
+
+    Parameters
+    ----------
+    pgrams : `numpy.ndarray`
+        array of periodograms
+    method : `str`, optional
+        average method, one of ``'mean'``, ``'median'``, or
+        ``'median-mean'``
+    axis : `int`, optional
+        the axis along which to average
+
+    Returns
+    -------
+    avg : `numpy.ndarray`
+        the average periodogram, with ``axis`` removed
+
+    Raises
+    ------
+    ValueError
+        if ``method='median-mean'`` and fewer than two periodograms
+        are given
+    """
+    n = pgrams.shape[axis]
+    if method == 'mean':
+        return pgrams.mean(axis=axis)
+    elif method == 'median':
+        return numpy.median(pgrams, axis=axis) / median_bias(n)
+    elif method == 'median-mean':
+        if n < 2:
+            raise ValueError("Cannot calculate median-mean spectrum with "
+                             "fewer than two segments")
+        n -= n % 2
+        idx = [slice(None)] * pgrams.ndim
+        idx[axis] = slice(0, n, 2)
+        even = numpy.median(pgrams[tuple(idx)], axis=axis)
+        idx[axis] = slice(1, n, 2)
+        odd = numpy.median(pgrams[tuple(idx)], axis=axis)
+        return (even + odd) / (2 * median_bias(n // 2))
+    else:
+        raise ValueError("Unknown average method %r, select one of %s"
+                         % (method, ', '.join(map(repr, AVERAGES))))
+
+
+def average_spectrum(data, nfft, noverlap, window, fs=1., method='mean',
+                     scaling='density', detrend='constant'):
+    """Calculate the average spectrum of some data
+
+    All overlapping segments are read from a single zero-copy view of
+    the input and transformed with one FFT call, before being averaged.
+
+    Parameters
+    ----------
+    data : `numpy.ndarray`
+        input data, the last axis is taken as time, so a
+        `(nchannels, nsamples)` array gives one spectrum per channel
+    nfft : `int`
+        number of samples per FFT
+    noverlap : `int`
+        number of samples of overlap between neighbouring FFTs
+    window : `numpy.ndarray`
+        window to apply to each segment prior to FFT
+    fs : `float`, optional
+        sampling frequency of the data
+    method : `str`, optional
+        average method, one of ``'mean'``, ``'median'``, or
+        ``'median-mean'``
+    scaling : `str`, optional
+        one of ``'density'`` or ``'spectrum'``
+    detrend : `str`, `False`, optional
+        type of detrending to apply to each segment
+
+    Returns
+    -------
+    spectrum : `numpy.ndarray`
+        `(..., nfft // 2 + 1)` array of average spectra
+
+    Raises
+    ------
+    ValueError
+        if ``method='median-mean'`` and the data contain fewer than
+        two segments
+    """
+    window = numpy.asarray(window)
+    if window.shape != (nfft,):
+        raise ValueError("Window is the wrong size.")
+    segments = segment_view(data, nfft, nfft - noverlap)
+    pgrams = periodograms(segments, window, fs=fs, scaling=scaling,
+                          detrend=detrend)
+    return average(pgrams, method=method, axis=-2)
+
+
+# -----------------------------------------------------------------------------
+# spectrogram engine
+
+def strided_spectrogram(data, nsamp, nfft, noverlap, window, fs=1.,
+                        method='mean', scaling='density', detrend='constant',
+                        padding=None, start=0, stop=None, out=None,
+                        blocksize=None):
+    """Calculate an average-spectrum spectrogram of some data
+
+    Each column of the output is the average of the periodograms of
+    the overlapping segments in the stride
+    ``[i * nsamp - padding // 2, (i + 1) * nsamp + padding // 2)``
+    (truncated at either end of the input data). All segments are read
+    from a single zero-copy view of the input, and transformed together
+    in blocks of at most ``blocksize`` bytes.
+
+    Parameters
+    ----------
+    data : `numpy.ndarray`
+        1-D input data
+    nsamp : `int`
+        number of samples per column of the spectrogram
+    nfft : `int`
+        number of samples per FFT
+    noverlap : `int`
+        number of samples of overlap between neighbouring FFTs
+    window : `numpy.ndarray`
+        window to apply to each segment prior to FFT
+    fs : `float`, optional
+        sampling frequency of the data
+    method : `str`, optional
+        average method, one of ``'mean'``, ``'median'``, or
+        ``'median-mean'``
+    scaling : `str`, optional
+        one of ``'density'`` or ``'spectrum'``
+    detrend : `str`, `False`, optional
+        type of detrending to apply to each segment
+    padding : `int`, optional
+        number of samples by which to extend each stride, split evenly
+        either side, defaults to ``noverlap``
+    start : `int`, optional
+        index of the first stride to calculate, default: ``0``
+    stop : `int`, optional
+        index after the last stride to calculate, defaults to the
+        number of complete strides in the data
+    out : `numpy.ndarray`, optional
+        `(stop - start, nfft // 2 + 1)` array into which to write the
+        output
+    blocksize : `int`, optional
+        maximum number of bytes of segment data to transform at once,
+        defaults to `BLOCK_SIZE`
+
+    Returns
+    -------
+    out : `numpy.ndarray`
+        2-D array of average spectra, one row per stride
+    """
+    data = numpy.asarray(data)
+    window = numpy.asarray(window)
+    if window.shape != (nfft,):
+        raise ValueError("Window is the wrong size.")
+    if blocksize is None:
+        blocksize = BLOCK_SIZE
+    if padding is None:
+        padding = noverlap
+    nstride = nfft - noverlap
+    if stop is None:
+        stop = data.size // nsamp
+    nsteps = max(0, stop - start)
+    nfreqs = nfft // 2 + 1
+    if out is None:
+        out = numpy.zeros((nsteps, nfreqs))
+    if not nsteps:
+        return out
+
+    # find the start index and number of segments for each column
+    starts = numpy.maximum(
+        0, numpy.arange(start, stop) * nsamp - padding // 2)
+    ends = numpy.minimum(data.size, starts + nsamp + padding)
+    nsegs = 1 + (ends - starts - nfft) // nstride
+    if method == 'median-mean':
+        nsegs -= nsegs % 2
+        if not nsegs.all():
+            raise ValueError("Cannot calculate median-mean spectrum with "
+                             "this small a TimeSeries.")
+
+    # build view of all possible segments (i.e. with a 1-sample stride)
+    view = segment_view(data, nfft)
+
+    # transform columns with the same number of segments together
+    for nseg in numpy.unique(nsegs):
+        cols = numpy.flatnonzero(nsegs == nseg)
+        offsets = numpy.arange(nseg) * nstride
+        ncol = max(1, int(blocksize // (nseg * nfft * 16)))
+        for i in range(0, cols.size, ncol):
+            block = cols[i:i+ncol]
+            idx = (starts[block][:, numpy.newaxis] + offsets).ravel()
+            pgrams = periodograms(view[idx], window, fs=fs, scaling=scaling,
+                                  detrend=detrend)
+            out[block] = average(pgrams.reshape((block.size, nseg, nfreqs)),
+                                 method=method, axis=1)
+    return out
+
+
+# -----------------------------------------------------------------------------
+# whitening
+
+def whitening_transfer(asd, nfft, fs=1., frequencies=None):
+    """Build the frequency-domain whitening filter for a given ASD
+
+    The returned transfer function includes the normalisation applied
+    by :meth:`gwpy.timeseries.TimeSeries.fft`, so can be applied directly
+    to the output of `numpy.fft.rfft` for a segment of ``nfft`` samples.
+
+    Parameters
+    ----------
+    asd : `numpy.ndarray`
+        amplitude spectral density by which to whiten
+    nfft : `int`
+        number of samples in each FFT segment
+    fs : `float`, optional
+        sampling frequency of the data to be whitened
+    frequencies : `numpy.ndarray`, optional
+        frequencies of each sample of ``asd``, only required if the ASD
+        does not have resolution ``fs / nfft``, in which case it is
+        linearly interpolated onto the FFT frequencies
+
+    Returns
+    -------
+    transfer : `numpy.ndarray`
+        array of ``nfft // 2 + 1`` filter coefficients
+    """
+    asd = numpy.asarray(asd)
+    nfreqs = nfft // 2 + 1
+    if asd.size != nfreqs:
+        if frequencies is None:
+            raise ValueError("ASD has %d samples, but %d are required for "
+                             "FFTs of length %d, please give frequencies "
+                             "for interpolation" % (asd.size, nfreqs, nfft))
+        asd = numpy.interp(numpy.arange(nfreqs) * fs / nfft, frequencies, asd)
+    transfer = 1. / (asd * nfft)
+    transfer[1:] *= 2
+    return transfer
+
+
+def _overlap_add(segments, out, nstride):
+    """Add a block of overlapping segments into a 1-D output array
+    """
+    nseg, nfft = segments.shape
+    if out.size < (nseg - 1) * nstride + nfft:
+        raise ValueError("Output array is too small for overlap-add")
+    step = out.strides[0]
+    # add each nstride-wide column of segments in one go, the rows of
+    # each target view never overlap, so the in-place add is safe
+    for j in range(0, nfft, nstride):
+        width = min(nstride, nfft - j)
+        target = as_strided(out[j:], shape=(nseg, width),
+                            strides=(step * nstride, step))
+        target += segments[:, j:j+width]
+
+
+def whiten(data, transfer, window, nstride, detrend='constant', out=None,
+           blocksize=None):
+    """Whiten some data by overlap-adding filtered FFT segments
+
+    Parameters
+    ----------
+    data : `numpy.ndarray`
+        1-D input data
+    transfer : `numpy.ndarray`
+        whitening filter as returned by :func:`whitening_transfer`
+    window : `numpy.ndarray`
+        window to apply to each segment prior to FFT, the length of the
+        window sets the FFT length
+    nstride : `int`
+        number of samples between the start of neighbouring segments
+    detrend : `str`, `False`, optional
+        type of detrending to apply to each segment
+    out : `numpy.ndarray`, optional
+        output array, must have at least
+        ``nsteps * nstride + nfft - nstride`` samples, into which the
+        whitened segments are added
+    blocksize : `int`, optional
+        maximum number of bytes of segment data to transform at once,
+        defaults to `BLOCK_SIZE`
+
+    Returns
+    -------
+    out : `numpy.ndarray`
+        the whitened data, only the samples covered by a complete
+        segment are returned
+    """
+    window = numpy.asarray(window)
+    nfft = window.size
+    if blocksize is None:
+        blocksize = BLOCK_SIZE
+    view = segment_view(data, nfft, nstride)
+    nsteps = view.shape[0]
+    if out is None:
+        out = numpy.zeros(nsteps * nstride + nfft - nstride)
+    nblock = max(1, int(blocksize // (nfft * 16)))
+    for i in range(0, nsteps, nblock):
+        segs = view[i:i+nblock]
+        if detrend:
+            segs = _detrend(segs, detrend)
+            segs *= window
+        else:
+            segs = segs * window
+        fft = npfft.rfft(segs, axis=-1)
+        fft *= transfer
+        _overlap_add(npfft.irfft(fft, n=nfft, axis=-1), out[i*nstride:],
+                     nstride)
+    return out
+
+
+def iter_whiten(chunks, transfer, window, nstride, detrend='constant'):
+    """Whiten an arbitrarily long sequence of data chunks
+
+    This generator applies :func:`whiten` to the stream of data given
+    by ``chunks``, carrying the unprocessed input, and the incomplete
+    overlap-add output, from one chunk to the next. The concatenation of
+    all yielded arrays is identical to `whiten` applied to the
+    concatenation of all input chunks.
+
+    Parameters
+    ----------
+    chunks : `iterable` of `numpy.ndarray`
+        sequence of contiguous 1-D data arrays
+    transfer : `numpy.ndarray`
+        whitening filter as returned by :func:`whitening_transfer`
+    window : `numpy.ndarray`
+        window to apply to each segment prior to FFT
+    nstride : `int`
+        number of samples between the start of neighbouring segments
+    detrend : `str`, `False`, optional
+        type of detrending to apply to each segment
+
+    Yields
+    ------
+    whitened : `numpy.ndarray`
+        the next block of whitened data, finalised samples are yielded
+        as soon as every segment that covers them has been processed,
+        with the tail of the output yielded once ``chunks`` is exhausted
+    """
+    nfft = numpy.asarray(window).size
+    noverlap = nfft - nstride
+    buffer_ = numpy.zeros(0)
+    carry = None
+    for chunk in chunks:
+        buffer_ = numpy.concatenate((buffer_, numpy.asarray(chunk)))
+        if buffer_.size < nfft:
+            continue
+        nsteps = 1 + (buffer_.size - nfft) // nstride
+        out = numpy.zeros(nsteps * nstride + noverlap)
+        if carry is not None:
+            out[:noverlap] = carry
+        whiten(buffer_[:(nsteps - 1) * nstride + nfft], transfer, window,
+               nstride, detrend=detrend, out=out)
+        carry = out[nsteps * nstride:]
+        buffer_ = buffer_[nsteps * nstride:]
+        yield out[:nsteps * nstride]
+    if carry is not None:
+        yield carry
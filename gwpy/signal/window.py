@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2016)
+#
+# This file is part of GWpy.
+#
+# GWpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWpy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Cached window functions for spectral methods
+
+Windows are generated by `scipy.signal.get_window`, and held in a
+bounded cache (together with their normalisation sums), so that repeated
+spectral calculations with the same parameters only generate each
+window once.
+"""
+
+import numpy
+
+from six import string_types
+
+from scipy import signal
+
+from ..utils.lru import LRUCache
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+#: cache of ``(window, S1, S2)`` tuples, keyed by
+#: ``(window spec, length, fftbins, dtype)``
+WINDOW_CACHE = LRUCache(maxsize=64)
+
+
+def _window_key(window, length, fftbins, dtype):
+    if isinstance(window, list):
+        window = tuple(window)
+    return (window, int(length), bool(fftbins), numpy.dtype(dtype).str)
+
+
+def _cached_window(window, length, fftbins=True, dtype=numpy.float64):
+    """Return the cached ``(window, S1, S2)`` tuple for a window spec
+    """
+    def _create():
+        win = signal.get_window(window, length, fftbins=fftbins).astype(
+            dtype)
+        win.flags.writeable = False
+        return win, win.sum(), (win * win).sum()
+    return WINDOW_CACHE.get(_window_key(window, length, fftbins, dtype),
+                            _create)
+
+
+def get_window(window, length, fftbins=True, dtype=numpy.float64):
+    """Return a window function of the given length
+
+    This wraps `scipy.signal.get_window`, caching the output for
+    each set of parameters.
+
+    Parameters
+    ----------
+    window : `str`, `tuple`, `numpy.ndarray`
+        the window specification, see `scipy.signal.get_window` for
+        details, arrays are returned as given
+    length : `int`
+        the number of samples in the window
+    fftbins : `bool`, optional
+        if `True` (default) return a periodic window for use in FFTs,
+        otherwise a symmetric window
+    dtype : `numpy.dtype`, optional
+        the data type of the window
+
+    Returns
+    -------
+    window : `numpy.ndarray`
+        the window array; cached arrays are shared between callers,
+        and so are read-only
+
+    Raises
+    ------
+    ValueError
+        if an array is given with the wrong length
+    """
+    if isinstance(window, string_types + (tuple, list)):
+        return _cached_window(window, length, fftbins=fftbins,
+                              dtype=dtype)[0]
+    window = numpy.asarray(window)
+    if window.shape != (length,):
+        raise ValueError("Window is the wrong size.")
+    return window
+
+
+def window_sums(window, length, fftbins=True, dtype=numpy.float64):
+    """Return the normalisation sums of a window function
+
+    Parameters
+    ----------
+    window : `str`, `tuple`, `numpy.ndarray`
+        the window specification, see :func:`get_window`
+    length : `int`
+        the number of samples in the window
+    fftbins : `bool`, optional
+        if `True` (default) use a periodic window, otherwise a
+        symmetric window
+    dtype : `numpy.dtype`, optional
+        the data type of the window
+
+    Returns
+    -------
+    s1, s2 : `float`
+        the sum of the window, and the sum of its square
+    """
+    if isinstance(window, string_types + (tuple, list)):
+        return _cached_window(window, length, fftbins=fftbins,
+                              dtype=dtype)[1:]
+    window = get_window(window, length)
+    return window.sum(), (window * window).sum()
+
+
+def cache_info():
+    """Return the hit/miss statistics for the window cache
+
+    Returns
+    -------
+    info : `~gwpy.utils.lru.CacheInfo`
+        `namedtuple` of ``(hits, misses, maxsize, currsize)``
+    """
+    return WINDOW_CACHE.cache_info()
@@ -22,72 +22,47 @@ time-frequency coherence spectrogram from a pair of time-series.
 
 from __future__ import division
 
-from multiprocessing import (Process, Queue as ProcessQueue)
-from math import ceil
+import numpy
 
-from numpy import zeros
-
-from astropy import units
-
-from .core import (Spectrogram, SpectrogramList)
+from ..timeseries import TimeSeries
+from ..utils import parallel
+from .core import Spectrogram
 
 __author__ = "Duncan Macleod <duncan.macleod@ligo.org>"
 
 
-def _from_timeseries(ts1, ts2, stride, fftlength=None, overlap=None,
-                     window=None, **kwargs):
-    """Generate a time-frequency coherence
-    :class:`~gwpy.spectrogram.core.Spectrogram` from a pair of
-    :class:`~gwpy.timeseries.TimeSeries`.
-
-    For each `stride`, a PSD :class:`~gwpy.frequencyseries.FrequencySeries`
-    is generated, with all resulting spectra stacked in time and returned.
-    """
-    # check sampling rates
-    if ts1.sample_rate.to('Hertz') != ts2.sample_rate.to('Hertz'):
-        sampling = min(ts1.sample_rate.value, ts2.sample_rate.value)
-        # resample higher rate series
-        if ts1.sample_rate.value == sampling:
-            ts2 = ts2.resample(sampling)
-        else:
-            ts1 = ts1.resample(sampling)
-    else:
-        sampling = ts1.sample_rate.value
-
-    # format FFT parameters
-    if fftlength is None:
-        fftlength = stride
-    if overlap is None:
-        overlap = 0
-    dt = stride
-    df = 1 / fftlength
-
-    stride = int(stride * sampling)
-
-    # get size of spectrogram
-    nsteps = int(ts1.size // stride)
-    nfreqs = int(fftlength * sampling // 2 + 1)
-
-    # generate output spectrogram
-    out = Spectrogram(zeros((nsteps, nfreqs)), epoch=ts1.epoch,
-                      f0=0, df=df, dt=dt, copy=True, unit='coherence')
-
-    if not nsteps:
-        return out
+def _coherence_columns(args):
+    """Calculate a contiguous block of columns of a coherence spectrogram
 
-    # stride through TimeSeries, recording PSDs as columns of spectrogram
-    for step in range(nsteps):
-        # find step TimeSeries
-        idx = stride * step
-        idx_end = idx + stride
-        stepseries1 = ts1[idx:idx_end]
-        stepseries2 = ts2[idx:idx_end]
-        stepcoh = stepseries1.coherence(stepseries2, fftlength=fftlength,
-                                        overlap=overlap, window=window,
-                                        **kwargs)
-        out.value[step] = stepcoh.value
+    This is a module-level function so that it can be sent to worker
+    processes by :func:`gwpy.utils.parallel.parallel_map`.
 
-    return out
+    Parameters
+    ----------
+    args : `tuple`
+        `(data1, data2, out, start, stop, params)` tuple, where ``data1``,
+        ``data2``, and ``out`` are `numpy.ndarray` or
+        `~gwpy.utils.parallel.SharedArray`, ``start`` and ``stop`` are
+        the column indices to calculate, and ``params`` is a `dict` of
+        FFT parameters
+    """
+    data1, data2, out, start, stop, params = args
+    ts1 = TimeSeries(numpy.asarray(data1), sample_rate=params['sampling'],
+                     copy=False)
+    ts2 = TimeSeries(numpy.asarray(data2), sample_rate=params['sampling'],
+                     copy=False)
+    out = numpy.asarray(out)
+    nsamp = params['nsamp']
+
+    # stride through TimeSeries, recording coherences as columns
+    for step in range(start, stop):
+        idx = nsamp * step
+        idx_end = idx + nsamp
+        stepcoh = ts1[idx:idx_end].coherence(
+            ts2[idx:idx_end], fftlength=params['fftlength'],
+            overlap=params['overlap'], window=params['window'],
+            **params['kwargs'])
+        out[step] = stepcoh.value
 
 
 def from_timeseries(ts1, ts2, stride, fftlength=None, overlap=None,
@@ -107,8 +82,8 @@ def from_timeseries(ts1, ts2, stride, fftlength=None, overlap=None,
     window : `timeseries.window.Window`, optional, default: `None`
         window function to apply to timeseries prior to FFT.
     nproc : `int`, default: ``1``
-        maximum number of independent frame reading processes, default
-        is set to single-process file reading.
+        number of parallel processes to use, each process calculates a
+        contiguous block of columns from input data held in shared memory
 
     Returns
     -------
@@ -116,60 +91,59 @@ def from_timeseries(ts1, ts2, stride, fftlength=None, overlap=None,
         time-frequency power spectrogram as generated from the
         input time-series.
     """
+    # check sampling rates
+    if ts1.sample_rate.to('Hertz') != ts2.sample_rate.to('Hertz'):
+        sampling = min(ts1.sample_rate.value, ts2.sample_rate.value)
+        # resample higher rate series
+        if ts1.sample_rate.value == sampling:
+            ts2 = ts2.resample(sampling)
+        else:
+            ts1 = ts1.resample(sampling)
+    else:
+        sampling = ts1.sample_rate.value
+
     # format FFT parameters
     if fftlength is None:
         fftlength = stride / 2.
-
-    sampling = min(ts1.sample_rate.value, ts2.sample_rate.value)
+    if overlap is None:
+        overlap = 0
 
     # get size of spectrogram
-    nsteps = int(ts1.size // (stride * ts1.sample_rate.value))
+    nsamp = int(stride * sampling)
+    nsteps = int(ts1.size // nsamp)
+    nfreqs = int(fftlength * sampling // 2 + 1)
     nproc = min(nsteps, nproc)
 
-    # single-process return
-    if nsteps == 0 or nproc == 1:
-        return _from_timeseries(ts1, ts2, stride, fftlength=fftlength,
-                                overlap=overlap, window=window, **kwargs)
-
-    # wrap spectrogram generator
-    def _specgram(q, ts, ts2):
-        try:
-            q.put(_from_timeseries(ts, ts2, stride, fftlength=fftlength,
-                                   overlap=overlap, window=window,
-                                   **kwargs))
-        except Exception as e:
-            q.put(e)
-
-    # otherwise build process list
-    stepperproc = int(ceil(nsteps / nproc))
-    nsamp = [stepperproc * ts.sample_rate.value * stride for ts in (ts1, ts2)]
-
-    queue = ProcessQueue(nproc)
-    processlist = []
-    for i in range(nproc):
-        process = Process(target=_specgram,
-                          args=(queue, ts1[i * nsamp[0]:(i + 1) * nsamp[0]],
-                                ts2[i * nsamp[1]:(i + 1) * nsamp[1]]))
-        process.daemon = True
-        processlist.append(process)
-        process.start()
-        if ((i + 1) * nsamp[0]) >= ts1.size:
-            break
-
-    # get data
-    data = []
-    for process in processlist:
-        result = queue.get()
-        if isinstance(result, Exception):
-            raise result
-        else:
-            data.append(result)
+    # generate output spectrogram
+    out = Spectrogram(numpy.zeros((nsteps, nfreqs)), epoch=ts1.epoch,
+                      f0=0, df=1 / fftlength, dt=stride, copy=False,
+                      unit='coherence')
+    if not nsteps:
+        return out
 
-    # and block
-    for process in processlist:
-        process.join()
+    params = {'sampling': sampling, 'nsamp': nsamp, 'fftlength': fftlength,
+              'overlap': overlap, 'window': window, 'kwargs': kwargs}
 
-    # format and return
-    out = SpectrogramList(*data)
-    out.sort(key=lambda spec: spec.epoch.gps)
-    return out.join()
+    # single-process calculation
+    if nproc == 1:
+        _coherence_columns((ts1.value, ts2.value, out.value, 0, nsteps,
+                            params))
+        return out
+
+    # otherwise, move the data into shared memory and let each
+    # process fill a contiguous block of columns
+    shared = [parallel.SharedArray.from_array(ts1.value),
+              parallel.SharedArray.from_array(ts2.value),
+              parallel.SharedArray(out.shape)]
+    try:
+        data1, data2, sout = shared
+        parallel.parallel_map(
+            _coherence_columns,
+            [(data1, data2, sout, start, stop, params) for
+             (start, stop) in parallel.split(nsteps, nproc)],
+            nproc=nproc)
+        out.value[:] = sout.array
+    finally:
+        for arr in shared:
+            arr.unlink()
+    return out
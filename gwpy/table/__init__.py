@@ -49,6 +49,9 @@ from glue.ligolw.table import Table
 from . import lsctables
 
 
+# columnar event tables
+from .events import EventTable
+
 # attach unified I/O
 from .io import *
 
@@ -57,4 +60,4 @@ from .rate import (event_rate, binned_event_rates)
 
 __author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
 __credits__ = 'Kipp Cannon <kipp.cannon@ligo.org>'
-__all__ = ['Column', 'Document', 'Table', 'lsctables']
+__all__ = ['Column', 'Document', 'Table', 'EventTable', 'lsctables']
@@ -0,0 +1,674 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2016)
+#
+# This file is part of GWpy.
+#
+# GWpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWpy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Columnar event tables backed by a `numpy.recarray`
+
+The `EventTable` stores each column of a set of events as a contiguous
+array, rather than as one Python object per event, so that filtering,
+sorting and histogramming events are all vectorised operations.
+
+The event trigger readers (``'omicron'``, ``'omega'``, ``'omegadq'`` and
+``'cwb-ascii'``) fill an `EventTable` directly, the LIGO_LW table readers
+for those formats convert the result to a :mod:`glue.ligolw` table at the
+very end.
+"""
+
+import operator as _operator
+import re
+
+import numpy
+
+from .lsctables import NUMPY_TYPE
+from .utils import TIME_COLUMN
+from ..io import reader
+from ..utils import parallel
+from ..utils.compat import OrderedDict
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+__all__ = ['EventTable']
+
+CONDITION_OPERATORS = OrderedDict([
+    ('<=', _operator.le),
+    ('>=', _operator.ge),
+    ('==', _operator.eq),
+    ('!=', _operator.ne),
+    ('<', _operator.lt),
+    ('>', _operator.gt),
+    ('=', _operator.eq),
+])
+
+# columnar readers, keyed by (format, table name)
+EVENT_READERS = {}
+
+re_CONDITION = re.compile(r'\A\s*(?P<column>\w+)\s*(?P<operator>%s)\s*'
+                          r'(?P<value>\S+)\s*\Z'
+                          % '|'.join(map(re.escape, CONDITION_OPERATORS)))
+
+
+# -----------------------------------------------------------------------------
+# GPS time handling
+
+def gps_split(times):
+    """Split an array of GPS times into integer seconds and nanoseconds
+
+    Parameters
+    ----------
+    times : `array-like`
+        an array of `float` GPS times, or an array of `str` GPS times, which
+        are split exactly at the decimal point
+
+    Returns
+    -------
+    seconds, nanoseconds : `numpy.ndarray`
+        integer arrays of GPS seconds and nanoseconds
+    """
+    times = numpy.asarray(times)
+    if times.size and times.dtype.kind in 'SU' and not (
+            numpy.char.count(times, 'e' if times.dtype.kind == 'U' else
+                             b'e').any()):
+        if times.dtype.kind == 'U':
+            dot, zero = '.', '0'
+        else:
+            dot, zero = b'.', b'0'
+        parts = numpy.char.partition(numpy.char.strip(times), dot)
+        seconds = parts[..., 0].astype(numpy.int64)
+        # pad (or truncate) the fractional part to exactly nine digits
+        frac = numpy.char.ljust(parts[..., 2], 9, zero)
+        nanoseconds = frac.astype('%s9' % times.dtype.kind).astype(
+            numpy.int64)
+        return seconds, nanoseconds
+    times = times.astype(float)
+    seconds = numpy.floor(times).astype(numpy.int64)
+    nanoseconds = numpy.round((times - seconds) * 1e9).astype(numpy.int64)
+    carry = nanoseconds >= 1000000000
+    seconds[carry] += 1
+    nanoseconds[carry] -= 1000000000
+    return seconds, nanoseconds
+
+
+def gps_shift(seconds, nanoseconds, offset):
+    """Shift arrays of GPS seconds and nanoseconds by a number of seconds
+
+    The arithmetic is performed in integer nanoseconds, so no precision is
+    lost for large GPS times.
+
+    Parameters
+    ----------
+    seconds : `numpy.ndarray`
+        the integer GPS seconds
+    nanoseconds : `numpy.ndarray`
+        the integer GPS nanoseconds
+    offset : `float`, `numpy.ndarray`
+        the offset(s) (seconds) to add
+
+    Returns
+    -------
+    seconds, nanoseconds : `numpy.ndarray`
+        the shifted integer arrays of GPS seconds and nanoseconds
+    """
+    total = (numpy.asarray(seconds, dtype=numpy.int64) * 1000000000 +
+             numpy.asarray(nanoseconds, dtype=numpy.int64) +
+             numpy.round(numpy.asarray(offset) * 1e9).astype(numpy.int64))
+    return numpy.divmod(total, 1000000000)
+
+
+# -----------------------------------------------------------------------------
+# filtering
+
+def parse_condition(condition):
+    """Parse a filter condition into a `(column, operator, value)` tuple
+
+    Parameters
+    ----------
+    condition : `str`, `tuple`
+        a `str` like ``'snr > 8'``, or a `(column, operator, value)` tuple
+
+    Returns
+    -------
+    column : `str`
+        the name of the column
+    operator : `str`, `callable`
+        the operator, either a key of `CONDITION_OPERATORS`, or a function
+    value : `float`
+        the value against which to compare
+
+    Raises
+    ------
+    ValueError
+        if the condition cannot be parsed
+    """
+    if isinstance(condition, tuple):
+        column, op, value = condition
+    else:
+        try:
+            match = re_CONDITION.match(condition).groupdict()
+        except (AttributeError, TypeError):
+            raise ValueError("Cannot parse filter condition %r" % condition)
+        column, op = match['column'], match['operator']
+        value = float(match['value'])
+    if not callable(op) and op not in CONDITION_OPERATORS:
+        raise ValueError("Unrecognised operator %r in filter condition %r"
+                         % (op, condition))
+    return column, op, value
+
+
+# -----------------------------------------------------------------------------
+# table
+
+class EventTable(numpy.recarray):
+    """A table of events, with one `numpy.recarray` field per column
+
+    An `EventTable` is normally created by reading events from a file, or
+    from a set of column arrays with :meth:`EventTable.from_columns`, and
+    is associated with a LIGO_LW table class (e.g. `SnglBurstTable`) that
+    defines the valid columns, and the type for each column.
+
+    Indexing an `EventTable` with a column name returns that column as a
+    `numpy.ndarray` (without copying), all other indexing (slices, boolean
+    masks, index arrays) returns a new `EventTable`.
+
+    Examples
+    --------
+    >>> events = EventTable.read('H1-OMICRON.root', format='omicron')
+    >>> loud = events.filter('snr > 8', 'central_freq < 100')
+    >>> loudest = loud.sort_by('snr', reverse=True)[:10]
+    >>> loudest.get_time()
+    """
+    _table = None
+
+    def __array_finalize__(self, obj):
+        super(EventTable, self).__array_finalize__(obj)
+        self._table = getattr(obj, '_table', None)
+
+    def __reduce__(self):
+        # add the table class to the pickled state
+        func, args, state = super(EventTable, self).__reduce__()
+        return func, args, (state, self._table)
+
+    def __setstate__(self, state):
+        state, self._table = state
+        super(EventTable, self).__setstate__(state)
+
+    # -------------------------------------------------------------------------
+    # constructors
+
+    @classmethod
+    def from_columns(cls, columns, table=None):
+        """Create a new `EventTable` from a set of column arrays
+
+        Parameters
+        ----------
+        columns : `dict`, `list` of `tuple`
+            the `(name, array)` pair for each column, use an `OrderedDict`
+            to preserve the column order
+        table : `type`, optional
+            the LIGO_LW table class for these events, if given, each
+            column is cast to the type defined by that table, except that
+            floating-point columns are never stored at lower precision
+            than the input data
+
+        Returns
+        -------
+        events : `EventTable`
+            a new table holding a copy of each column
+        """
+        if isinstance(columns, dict):
+            columns = list(columns.items())
+        names = [str(name) for name, _ in columns]
+        arrays = []
+        for name, data in columns:
+            data = numpy.asarray(data)
+            try:
+                dtype = numpy.dtype(NUMPY_TYPE[table.validcolumns[name]])
+            except (AttributeError, KeyError):
+                arrays.append(data)
+                continue
+            # don't truncate float64 data to a LIGO_LW real_4 column
+            if dtype.kind == 'f' and data.dtype.kind == 'f':
+                dtype = numpy.promote_types(dtype, data.dtype)
+            arrays.append(data.astype(dtype, copy=False))
+        if arrays:
+            new = numpy.rec.fromarrays(arrays, names=names)
+        else:
+            new = numpy.recarray((0,), dtype=[])
+        new = new.view(cls)
+        new._table = table
+        return new
+
+    @classmethod
+    def from_ligolw(cls, table, columns=None):
+        """Create a new `EventTable` from a LIGO_LW table
+
+        Parameters
+        ----------
+        table : :class:`glue.ligolw.table.Table`
+            the table to convert
+        columns : `list` of `str`, optional
+            the columns to convert, default: all columns in the table
+
+        Returns
+        -------
+        events : `EventTable`
+            a new table holding the data from each column
+        """
+        new = table.to_recarray(columns=columns).view(cls)
+        new._table = type(table)
+        return new
+
+    @classmethod
+    def concatenate(cls, tables, table=None):
+        """Join a sequence of `EventTables <EventTable>` into one
+
+        Parameters
+        ----------
+        tables : `list` of `EventTable`
+            the tables to join, all must have the same columns
+        table : `type`, optional
+            the LIGO_LW table class for the output, default: that of the
+            first table
+
+        Returns
+        -------
+        events : `EventTable`
+            a new table containing all of the events
+        """
+        tables = list(tables)
+        if table is None and tables:
+            table = tables[0]._table
+        if not tables:
+            return cls.from_columns([], table=table)
+        new = numpy.concatenate([t.view(numpy.ndarray) for t in tables])
+        new = new.view(cls)
+        new._table = table
+        return new
+
+    read = classmethod(reader(doc="""
+        Read events into an `EventTable`.
+
+        Parameters
+        ----------
+        f : `file`, `str`, `~glue.lal.CacheEntry`, `list`, `~glue.lal.Cache`
+            object representing one or more files. One of
+
+                - an open `file`
+                - a `str` pointing to a file path on disk
+                - a formatted `~glue.lal.CacheEntry` representing one file
+                - a `list` of `str` file paths
+                - a formatted `~glue.lal.Cache` representing many files
+
+        format : `str`, optional
+            the format of the given file(s), one of ``'omicron'``,
+            ``'omega'``, ``'omegadq'``, or ``'cwb-ascii'``
+
+        columns : `list`, optional
+            list of column name strings to read, default all.
+
+        filt : `str`, `tuple`, `callable`, `list`, optional
+            condition(s) by which to filter events, see
+            :meth:`EventTable.filter` for details
+
+        nproc : `int`, optional, default: ``1``
+            number of parallel processes with which to distribute file I/O,
+            default: serial process.
+
+        Returns
+        -------
+        events : `EventTable`
+            a new table of events
+        """))
+
+    # -------------------------------------------------------------------------
+    # LIGO_LW compatibility
+
+    @property
+    def table(self):
+        """The LIGO_LW table class for these events
+        """
+        return self._table
+
+    @property
+    def tableName(self):
+        """The LIGO_LW name of the table for these events
+        """
+        try:
+            return self._table.tableName
+        except AttributeError:
+            return None
+
+    @property
+    def columnnames(self):
+        """The list of columns in this table
+        """
+        return list(self.dtype.names or [])
+
+    def getColumnByName(self, name):
+        """Return a column of this table as a `numpy.ndarray`
+
+        The returned array is a view of the data in this table.
+        """
+        return self[str(name)]
+
+    def get_column(self, name):
+        """Return a column of this table as a `numpy.ndarray`
+
+        ``'time'`` is accepted as an alias for the standard time
+        column(s) of the table, see :meth:`EventTable.get_time`.
+        """
+        if name == 'time' and 'time' not in self.columnnames:
+            return self.get_time()
+        return self.getColumnByName(name)
+
+    def get_time(self):
+        """Return the standard GPS time of each event as `float`
+
+        This is the peak time of burst events, the end time of inspiral
+        events, or the start time of ringdown events, combining the
+        seconds and nanoseconds columns.
+
+        Raises
+        ------
+        ValueError
+            if the time columns cannot be determined, or are not present
+        """
+        names = self.columnnames
+        if 'time' in names:
+            return self['time'].astype(float)
+        try:
+            sec, nsec = TIME_COLUMN[self.tableName]
+        except KeyError:
+            raise ValueError("Cannot determine time columns for %r"
+                             % self.tableName)
+        if sec not in names:
+            raise ValueError("Time column %r not found in table" % sec)
+        if nsec not in names:
+            return self[sec].astype(float)
+        return self[sec] + self[nsec] * 1e-9
+
+    def to_recarray(self, columns=None):
+        """Return a `numpy.recarray` view of this table
+
+        Parameters
+        ----------
+        columns : `list` of `str`, optional
+            the columns to return, if given the output is a copy, otherwise
+            it is a view of the data in this table
+        """
+        if columns is not None:
+            return self.select(columns).view(numpy.recarray)
+        return self.view(numpy.recarray)
+
+    def to_ligolw(self, columns=None, filt=None):
+        """Convert this table to a LIGO_LW table
+
+        Parameters
+        ----------
+        columns : `list` of `str`, optional
+            the columns to convert, default: all columns
+        filt : `callable`, optional
+            function by which to filter rows of the output table, the
+            callable must accept a single row and return `True`/`False`
+
+        Returns
+        -------
+        table : :class:`glue.ligolw.table.Table`
+            a new LIGO_LW table of the associated type
+
+        Raises
+        ------
+        ValueError
+            if this table has no associated LIGO_LW table class
+        """
+        if self._table is None:
+            raise ValueError("Cannot convert EventTable to LIGO_LW without "
+                             "an associated table class")
+        out = self._table.from_recarray(self, columns=columns)
+        if filt is not None:
+            rows = [row for row in out if filt(row)]
+            del out[:]
+            out.extend(rows)
+        return out
+
+    # -------------------------------------------------------------------------
+    # vectorised operations
+
+    def _condition_mask(self, condition):
+        if callable(condition):
+            return numpy.asarray(condition(self), dtype=bool)
+        column, op, value = parse_condition(condition)
+        if not callable(op):
+            op = CONDITION_OPERATORS[op]
+        return numpy.asarray(op(self.get_column(column), value), dtype=bool)
+
+    def filter(self, *conditions):
+        """Return the events in this table that match all conditions
+
+        Parameters
+        ----------
+        *conditions
+            any number of conditions, each one of
+
+            - a `str` like ``'snr > 8'``, comparing a column to a number,
+            - a `(column, operator, value)` `tuple`, where ``operator``
+              is a `str` (e.g. ``'>'``) or a function like
+              :func:`operator.gt`, or
+            - a `callable` that accepts this table, and returns a boolean
+              array with one element per event
+
+        Returns
+        -------
+        events : `EventTable`
+            a new table containing only those events matching all
+            conditions
+        """
+        mask = numpy.ones(self.shape, dtype=bool)
+        for condition in conditions:
+            mask &= self._condition_mask(condition)
+        return self[mask]
+
+    def select(self, columns):
+        """Return a new table containing only the given columns
+
+        Parameters
+        ----------
+        columns : `list` of `str`
+            the names of the columns to select
+
+        Returns
+        -------
+        events : `EventTable`
+            a new table with a copy of each of the given columns
+        """
+        return type(self).from_columns(
+            [(c, self.get_column(c)) for c in columns], table=self._table)
+
+    def sort_by(self, column, reverse=False):
+        """Return a copy of this table sorted by the given column
+
+        Parameters
+        ----------
+        column : `str`
+            the name of the column by which to sort, ``'time'`` sorts
+            by the standard GPS time of each event
+        reverse : `bool`, optional
+            sort in descending order, default: `False`
+
+        Returns
+        -------
+        events : `EventTable`
+            a new, sorted table
+        """
+        idx = numpy.argsort(self.get_column(column), kind='mergesort')
+        if reverse:
+            idx = idx[::-1]
+        return self[idx]
+
+
+# -----------------------------------------------------------------------------
+# I/O utilities
+
+def expand_columns(columns, table):
+    """Replace ``'time'`` in a list of columns with the standard time columns
+
+    Parameters
+    ----------
+    columns : `list` of `str`
+        the list of column names
+    table : `type`
+        the LIGO_LW table class
+
+    Returns
+    -------
+    columns : `list` of `str`
+        a new list of column names
+    """
+    out = []
+    for column in columns:
+        if column == 'time' and table.tableName in TIME_COLUMN:
+            out.extend(c for c in TIME_COLUMN[table.tableName] if
+                       c not in columns)
+        else:
+            out.append(column)
+    return out
+
+
+def events_from_columns(data, columns, table, filt=None):
+    """Build an `EventTable` from a `dict` of calculated column arrays
+
+    Parameters
+    ----------
+    data : `dict`
+        `(name, array)` pairs for all available columns
+    columns : `list` of `str`
+        the columns to select, in order, missing columns are ignored
+    table : `type`
+        the LIGO_LW table class for the events
+    filt : optional
+        condition(s) by which to filter the events, see
+        :meth:`EventTable.filter`
+
+    Returns
+    -------
+    events : `EventTable`
+        the new table
+    """
+    events = EventTable.from_columns(
+        [(c, data[c]) for c in expand_columns(columns, table) if c in data],
+        table=table)
+    return filter_events(events, filt)
+
+
+def filter_events(events, filt=None):
+    """Filter an `EventTable` by the given condition(s)
+
+    Parameters
+    ----------
+    events : `EventTable`
+        the table to filter
+    filt : optional
+        a single condition, or a `list` of conditions, see
+        :meth:`EventTable.filter` for details
+
+    Returns
+    -------
+    events : `EventTable`
+        the filtered table, or the input table if ``filt`` is `None`
+    """
+    if filt is None:
+        return events
+    if isinstance(filt, list):
+        return events.filter(*filt)
+    return events.filter(filt)
+
+
+def reassign_event_ids(events):
+    """Number the ``event_id`` column of an `EventTable` from zero
+
+    This is the columnar equivalent of `glue.ligolw.table.reassign_ids`,
+    used when joining events read separately.
+
+    Parameters
+    ----------
+    events : `EventTable`
+        the table to modify in-place
+
+    Returns
+    -------
+    events : `EventTable`
+        the input table
+    """
+    if 'event_id' in (events.dtype.names or ()):
+        events['event_id'] = numpy.arange(len(events))
+    return events
+
+
+def register_event_reader(format, table, func):
+    """Register a columnar reader for the given format and table class
+
+    Readers registered here can be used by :func:`read_events_parallel`
+    to read files in separate processes.
+    """
+    EVENT_READERS[(format, table.tableName)] = func
+
+
+def get_event_reader(format, table):
+    """Return the columnar reader for the given format and table class
+
+    Raises
+    ------
+    ValueError
+        if no reader has been registered
+    """
+    try:
+        return EVENT_READERS[(format, table.tableName)]
+    except KeyError:
+        raise ValueError("No EventTable reader defined for format %r and "
+                         "table %r" % (format, table.tableName))
+
+
+def _read_events(args):
+    format, table, files, kwargs = args
+    return get_event_reader(format, table)(files, **kwargs)
+
+
+def read_events_parallel(files, nproc, table, format, **kwargs):
+    """Read events from a list of files in parallel processes
+
+    Parameters
+    ----------
+    files : `list` of `str`
+        the list of file paths to read
+    nproc : `int`
+        number of parallel processes
+    table : `type`
+        the LIGO_LW table class for the output
+    format : `str`
+        the format of the files, see :func:`register_event_reader`
+    **kwargs
+        other keyword arguments to pass to the reader
+
+    Returns
+    -------
+    events : `EventTable`
+        a single table containing the events from all files, in order,
+        with any ``event_id`` column renumbered from zero
+    """
+    chunks = [(format, table, files[a:b], kwargs) for
+              a, b in parallel.split(len(files), nproc)]
+    return reassign_event_ids(EventTable.concatenate(
+        parallel.parallel_map(_read_events, chunks, nproc=nproc),
+        table=table))
@@ -18,37 +18,289 @@
 
 """Read event tables from ASCII files.
 
-This module only defines a function factory for reading lines of ASCII
+This module only defines a function factory for reading ASCII files
 into a particular LIGO_LW table object.
 
-Each specific ASCII table format should define their own line parser
-(that generates each row of the table) and pass it to the factory method.
+Each specific ASCII table format should define their own column parser
+(that converts the array of data read from the file into arrays for each
+LIGO_LW column) and pass it to the factory method.
 """
 
-from six import string_types
+from itertools import islice
 
-from numpy import loadtxt
+from six import text_type
 
-from glue.ligolw.table import (reassign_ids, StripTableName)
+import numpy
+from numpy import loadtxt
 
-from ..lsctables import (New, TableByName)
+from ..events import (EventTable, expand_columns, events_from_columns,
+                      gps_split, read_events_parallel, reassign_event_ids,
+                      register_event_reader)
+from ..lsctables import TableByName
 from ..utils import TIME_COLUMN
 from ...io.cache import file_list
-from ...io.utils import identify_factory
+from ...io.utils import (gopen, identify_factory)
 from ...io.registry import (register_reader, register_identifier)
-from ...time import LIGOTimeGPS
+from ...utils.compat import OrderedDict
 
 __author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
 
+# number of rows to parse from an ASCII file at a time
+ASCII_CHUNK_SIZE = 100000
+
+
+def _to_bytes(s):
+    if isinstance(s, text_type):
+        return s.encode('utf-8')
+    return s
 
-def return_reassign_ids(elem):
-    """Wrapper to `glue.ligolw.table.reassign_ids` that returns
+
+def _tokenize(lines, dtype, usecols, delimiter=None):
+    """Split lines of ASCII data into a structured array
+
+    All lines are split at once, and each column converted from an array
+    of strings in a single step.
+
+    Raises
+    ------
+    ValueError
+        if the lines have different numbers of columns, or a value cannot be
+        converted
     """
-    reassign_ids(elem)
-    return elem
+    rows = [line.split(delimiter) for line in lines]
+    if len(set(map(len, rows))) != 1:
+        raise ValueError("Ragged ASCII data")
+    tokens = numpy.array(rows)
+    out = numpy.empty(len(rows), dtype=dtype)
+    try:
+        for name, col in zip(dtype.names, usecols):
+            if delimiter is None:
+                out[name] = tokens[:, col]
+            else:
+                out[name] = numpy.char.strip(tokens[:, col])
+    except IndexError as e:
+        raise ValueError(str(e))
+    return out
+
+
+def iter_ascii_chunks(filename, dtype, chunksize=ASCII_CHUNK_SIZE,
+                      comments='#', delimiter=None, usecols=None, skiprows=0,
+                      **loadtxtkwargs):
+    """Read an ASCII file as a sequence of structured arrays
+
+    Parameters
+    ----------
+    filename : `str`
+        path of file to read, may be gzipped
+    dtype : `numpy.dtype`, `list`
+        the structured data type of each row
+    chunksize : `int`, optional
+        the maximum number of rows in each array
+    comments : `str`, optional
+        the character used to indicate the start of a comment
+    delimiter : `str`, optional
+        the string used to separate values, default: any whitespace
+    usecols : `list` of `int`, optional
+        the index of the column to read for each field of ``dtype``,
+        default: the first columns, in order
+    skiprows : `int`, optional
+        the number of lines to skip at the start of the file
+    **loadtxtkwargs
+        other keyword arguments are passed to `numpy.loadtxt`, in which case
+        each chunk is parsed by that function
+
+    Yields
+    ------
+    data : `numpy.ndarray`
+        a structured array of up to ``chunksize`` rows
+
+    Notes
+    -----
+    Rows are normally split into columns by a single call per chunk, with
+    each column then converted as a whole, only falling back to
+    `numpy.loadtxt` if that fails, so that memory use is bounded by the
+    chunk size rather than the size of the file.
+    """
+    dtype = numpy.dtype(dtype)
+    if usecols is None:
+        usecols = list(range(len(dtype.names)))
+    comments = _to_bytes(comments)
+    delimiter = _to_bytes(delimiter)
+    with gopen(filename, 'rb') as fobj:
+        lines = islice(fobj, skiprows, None)
+        while True:
+            chunk = []
+            for line in lines:
+                if comments:
+                    line = line.split(comments, 1)[0]
+                line = line.strip()
+                if line:
+                    chunk.append(line)
+                    if len(chunk) == chunksize:
+                        break
+            if not chunk:
+                break
+            data = None
+            if not loadtxtkwargs:
+                try:
+                    data = _tokenize(chunk, dtype, usecols, delimiter)
+                except ValueError:
+                    pass
+            if data is None:
+                data = loadtxt(chunk, dtype=dtype, delimiter=delimiter,
+                               usecols=usecols, ndmin=1, **loadtxtkwargs)
+            yield data
+            if len(chunk) < chunksize:
+                break
+
+
+def read_ascii_events(files, table, columns_func, columns, outcolumns=None,
+                      filt=None, chunksize=ASCII_CHUNK_SIZE, dtype=None,
+                      **loadtxtkwargs):
+    """Read an `EventTable` from ASCII files one chunk at a time
+
+    Each chunk of rows is converted into LIGO_LW columns and filtered
+    before the next is read, so only the selected events from each chunk
+    are kept in memory.
+
+    Parameters
+    ----------
+    files : `list` of `str`
+        the list of file paths to read
+    table : `type`
+        the LIGO_LW table class for the events
+    columns_func : `callable`
+        method to convert each array of data into a `dict` of arrays for
+        each LIGO_LW column
+    columns : `list` of `str`
+        the names of the ASCII columns to read
+    outcolumns : `list` of `str`, optional
+        the LIGO_LW columns for the output, default: ``columns``, with
+        ``'time'`` expanded into the standard time columns for the table
+    filt : `str`, `tuple`, `callable`, `list`, optional
+        condition(s) by which to filter events, see
+        :meth:`~gwpy.table.EventTable.filter` for details
+    chunksize : `int`, optional
+        the number of rows to parse at a time
+    dtype : `numpy.dtype`, optional
+        the data type of each row, default: `float` for all columns, except
+        ``'time'``, which is parsed as a string
+    **loadtxtkwargs
+        other keyword arguments are passed to :func:`iter_ascii_chunks`
+
+    Returns
+    -------
+    events : `~gwpy.table.EventTable`
+        a new `EventTable` of events
+    """
+    if outcolumns is None:
+        outcolumns = expand_columns(columns, table)
+    if dtype is None:
+        dtype = [(c, 'a20') if c == 'time' else (c, '<f8') for c in columns]
+
+    def _events(data):
+        out = columns_func(data, columns)
+        if 'event_id' in outcolumns:  # assigned after all files are read
+            out['event_id'] = numpy.zeros(data.size, dtype=int)
+        return events_from_columns(out, outcolumns, table, filt=filt)
+
+    chunks = [_events(data) for fp in files for data in
+              iter_ascii_chunks(fp, dtype, chunksize=chunksize,
+                                **loadtxtkwargs)]
+    if not chunks:
+        chunks.append(_events(numpy.zeros((0,), dtype=dtype)))
+    return reassign_event_ids(EventTable.concatenate(chunks, table=table))
+
+
+def event_table_from_ascii_factory(table, format, columns_func, cols=None,
+                                   **kwargs):
+    """Build an `EventTable` reader for the given format
+
+    Parameters
+    ----------
+    table : `type`
+        table class for which this format is relevant
+    format : `str`
+        name of the format
+    columns_func : `callable`
+        method to convert each array of data read from the file(s) into
+        a `dict` of arrays for each LIGO_LW column
+    cols : `list` of `str`
+        list of columns that can be read by default for this format
+    **kwargs
+        default keyword arguments to pass to :func:`read_ascii_events`
+
+    Returns
+    -------
+    events_reader : `function`
+        function that can be used to read an `EventTable` from ascii.
+        The returned function natively supports multi-processing.
+    """
+    def events_from_ascii(f, columns=cols, filt=None, nproc=1,
+                          **loadtxtkwargs):
+        # format keyword arguments
+        kwargs_ = kwargs.copy()
+        kwargs_.update(loadtxtkwargs)
+
+        # format list of files
+        files = file_list(f)
+
+        # allow multiprocessing
+        if nproc != 1:
+            return read_events_parallel(files, nproc, table, format=format,
+                                        columns=columns, filt=filt,
+                                        **kwargs_)
+
+        # work out columns to read from ASCII
+        if columns is None:
+            columns = cols
+        try:
+            columns = list(columns)
+        except TypeError as e:
+            e.args = ('This ascii format requires the column list to be given '
+                      'manually, please give the `columns` keyword argument',)
+            raise
 
+        # read all files, one chunk at a time
+        return read_ascii_events(files, table, columns_func, columns,
+                                 filt=filt, **kwargs_)
+    events_from_ascii.__doc__ = """
+        Read an `EventTable` from an ASCII file.
 
-def table_from_ascii_factory(table, format, trig_func, cols=None, **kwargs):
+        Parameters
+        ----------
+        f : `file`, `str`, `CacheEntry`, `list`, `Cache`
+            object representing one or more files. One of
+
+            - an open `file`
+            - a `str` pointing to a file path on disk
+            - a formatted :class:`~glue.lal.CacheEntry` representing one file
+            - a `list` of `str` file paths
+            - a formatted :class:`~glue.lal.Cache` representing many files
+
+        columns : `list`, optional
+            list of column name strings to read, default all.
+        filt : `str`, `tuple`, `callable`, `list`, optional
+            condition(s) by which to filter events, see
+            :meth:`~gwpy.table.EventTable.filter` for details
+        nproc : `int`, optional, default: 1
+            number of parallel processes with which to distribute file I/O,
+            default: serial process
+        chunksize : `int`, optional
+            number of rows to parse from each file at a time
+        **loadtxtkwargs
+            all other keyword arguments are passed to `numpy.loadtxt`
+
+        Returns
+        -------
+        events : `~gwpy.table.EventTable`
+            a new `EventTable` of `~{0}` events
+        """.format(table.__name__)
+    return events_from_ascii
+
+
+def table_from_ascii_factory(table, format, columns_func, cols=None,
+                             **kwargs):
     """Build a table reader for the given format
 
     Parameters
@@ -57,22 +309,38 @@ def table_from_ascii_factory(table, format, trig_func, cols=None, **kwargs):
         table class for which this format is relevant
     format : `str`
         name of the format
-    trig_func : `callable`
-        method to convert one row of data (from `numpy.loadtxt`) into an event
+    columns_func : `callable`
+        method to convert each array of data read from the file(s) into
+        a `dict` of arrays for each LIGO_LW column
     cols : `list` of `str`
         list of columns that can be read by default for this format
     **kwargs
-        default keyword arguments to pass to `numpy.loadtxt`
+        default keyword arguments to pass to :func:`read_ascii_events`
 
     Returns
     -------
-    row_reader : `function`
-        function that can be used to read a row of this table from ascii.
+    table_reader : `function`
+        function that can be used to read this table from ascii.
         The returned function natively supports multi-processing.
+
+    Notes
+    -----
+    The data are read into an `~gwpy.table.EventTable` (see
+    :func:`event_table_from_ascii_factory`), which is converted into
+    the LIGO_LW table at the very end. The columnar reader is also
+    registered, so that it can be used to read files in parallel.
     """
+    events_reader = event_table_from_ascii_factory(
+        table, format, columns_func, cols=cols, **kwargs)
+    register_event_reader(format, table, events_reader)
+
     def table_from_ascii_rows(
             f, columns=cols, filt=None, nproc=1, **loadtxtkwargs):
-        """Build a `~{0}` from events in an ASCII file.
+        events = events_reader(f, columns=columns, nproc=nproc,
+                               **loadtxtkwargs)
+        return events.to_ligolw(filt=filt)
+    table_from_ascii_rows.__doc__ = """
+        Build a `~{0}` from events in an ASCII file.
 
         Parameters
         ----------
@@ -101,116 +369,49 @@ def table_from_ascii_factory(table, format, trig_func, cols=None, **kwargs):
         table : `~{0}`
             a new `~{0}` filled with yummy data
         """.format(table.__name__)
-        # format keyword arguments
-        kwargs_ = kwargs.copy()
-        kwargs_.update(loadtxtkwargs)
-
-        # format list of files
-        files = file_list(f)
-
-        # allow multiprocessing
-        if nproc != 1:
-            from ...io.cache import read_cache
-            return read_cache(files, table, nproc, return_reassign_ids,
-                              columns=columns, format=format, **kwargs_)
-
-        # work out columns to read from ASCII
-        if columns is None:
-            columns = cols
-        else:
-            columns = list(columns)
-        # and translate them into LIGO_LW columns (only for 'time')
-        try:
-            ligolwcolumns = list(columns)
-        except TypeError as e:
-            e.args = ('This ascii format requires the column list to be given '
-                      'manually, please give the `columns` keyword argument',)
-            raise
-        if 'time' in columns and table.tableName in TIME_COLUMN:
-            ligolwcolumns.remove('time')
-            ligolwcolumns.extend(TIME_COLUMN[table.tableName])
-
-        # generate output
-        out = New(table, columns=ligolwcolumns)
-        append = out.append
-
-        # get dtypes
-        dtype = kwargs_.pop('dtype', None)
-        if dtype is None:
-            dtype = [(c, 'a20') if c == 'time' else (c, '<f8')
-                     for c in columns]
-
-        # iterate over events
-        for fp in files:
-            dat = loadtxt(fp, dtype=dtype, **kwargs_)
-            for line in dat:
-                row = trig_func(line, columns=columns)
-                if 'event_id' in ligolwcolumns:
-                    row.event_id = out.get_next_id()
-                if filt is None or filt(row):
-                    append(row)
-        return out
     return table_from_ascii_rows
 
 
-def row_from_ascii_factory(table, delimiter):
-    """Build a generic ASCII table row reader for the given delimiter
+def columns_from_ascii_factory(table):
+    """Build a generic ASCII column parser for the given table
     """
-    name = table.tableName
-    RowType = table.RowType
-    tcols = TIME_COLUMN.get(name, None)
+    tcols = TIME_COLUMN.get(table.tableName, None)
 
-    def row_from_ascii(line, columns):
-        """Build a `~{0}` from a line of ASCII data
+    def columns_from_ascii(data, columns):
+        """Map the columns of an array of ASCII data to LIGO_LW columns
 
         Parameters
         ----------
-        line : `str`, `array-like`
-            a line of ASCII data, either as a delimited string, or an array
+        data : `numpy.ndarray`
+            a structured array of data, with one field per column
         columns : `list` of `str`
             the names of each of the ASCII columns, give 'time' for 'standard'
             time columns for a given table (e.g. 'end_time', and 'end_time_ns'
             for `SnglInspiralTable`)
-        delimiter : `str`, optional, default: any whitespace
-            the ASCII delimiter, only needed if `line` is given as a `str`
 
         Returns
         -------
-        {1}: `~{0}`
-            a new `~{0}` filled with data
-
-        Raises
-        ------
-        AttributeError
-            if any column is not recognised
-        """.format(RowType.__name__, StripTableName(name))
-        row = table.RowType()
-        if isinstance(line, str):
-            line = line.rstrip('\n').split(delimiter)
-        for datum, colname in zip(line, columns):
+        columns : `OrderedDict`
+            `(name, array)` pairs for each LIGO_LW column
+        """
+        out = OrderedDict()
+        for colname in columns:
             if colname == 'time' and tcols is not None:
-                if isinstance(datum, string_types):
-                    datum = str(datum)
-                t = LIGOTimeGPS(datum)
-                setattr(row, tcols[0], t.seconds)
-                setattr(row, tcols[1], t.nanoseconds)
+                out[tcols[0]], out[tcols[1]] = gps_split(data[colname])
             else:
-                try:
-                    getattr(row, 'set_%s' % colname)(datum)
-                except AttributeError:
-                    setattr(row, colname, datum)
-        return row
-    return row_from_ascii
+                out[colname] = data[colname]
+        return out
+    return columns_from_ascii
 
 # register generic ASCII parsing for all tables
 for table in TableByName.itervalues():
     # register whitespace-delimited ASCII
     register_reader(
         'ascii', table, table_from_ascii_factory(
-            table, 'ascii', row_from_ascii_factory(table, None)))
+            table, 'ascii', columns_from_ascii_factory(table)))
     register_identifier('ascii', table, identify_factory('txt', 'txt.gz'))
     # register csv
     register_reader(
         'csv', table, table_from_ascii_factory(
-            table, 'csv', row_from_ascii_factory(table, ','), delimiter=','))
+            table, 'csv', columns_from_ascii_factory(table), delimiter=','))
     register_identifier('csv', table, identify_factory('csv', 'csv.gz'))
@@ -23,12 +23,18 @@ import os.path
 import re
 import warnings
 
+from functools import partial
+
+import numpy
+
 from glue.lal import CacheEntry
 
-from .ascii import return_reassign_ids
+from .ascii import (columns_from_ascii_factory, read_ascii_events)
+from ..events import (EventTable, expand_columns, read_events_parallel,
+                      register_event_reader)
 from ..lsctables import SnglBurstTable
 from ...io.registry import (register_reader, register_identifier)
-from ...io.cache import (file_list, read_cache)
+from ...io.cache import file_list
 from ...io.utils import (gopen, GzipFile)
 
 __author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
@@ -121,9 +127,37 @@ def get_column_list(filename, ifo, comments='#'):
     return usecols, names
 
 
-def sngl_burst_table_from_cwb_ascii(f, columns=None, ifo=None, filt=None,
-                                    usecols=None, nproc=1, **loadtxtkwargs):
-    """Read a `SnglBurstTable` from a cWB-format ASCII file
+_columns_from_ascii = columns_from_ascii_factory(SnglBurstTable)
+
+
+def sngl_burst_columns_from_cwb(data, columns, ifo=None):
+    """Build `SnglBurst` columns from an array of cWB ASCII data
+
+    Parameters
+    ----------
+    data : `numpy.ndarray`
+        the structured array of data read from the file(s)
+    columns : `list`
+        the `LIGO_LW` names of each field in ``data``
+    ifo : `str`
+        prefix of the IFO for these events
+
+    Returns
+    -------
+    columns : `OrderedDict`
+        `(name, array)` pairs for each `SnglBurst` column
+    """
+    out = _columns_from_ascii(data, columns)
+    if 'snr' in out:
+        out['snr'] = out['snr'] ** (1/2.)
+    out['ifo'] = numpy.repeat(ifo, data.size)
+    out['search'] = numpy.repeat('cwb', data.size)
+    return out
+
+
+def event_table_from_cwb_ascii(f, columns=None, ifo=None, filt=None,
+                               usecols=None, nproc=1, **loadtxtkwargs):
+    """Read an `EventTable` of `SnglBurst` events from a cWB-format ASCII file
 
     Parameters
     ----------
@@ -143,16 +177,28 @@ def sngl_burst_table_from_cwb_ascii(f, columns=None, ifo=None, filt=None,
         prefix of IFO to read, required for 'cwb-ascii' format
         (but not for others)
 
+    filt : `str`, `tuple`, `callable`, `list`, optional
+        condition(s) by which to filter events, see
+        :meth:`~gwpy.table.EventTable.filter` for details
+
     usecols : `list` of `int`
         the list of column indices to read (absolute, zero-indexed)
 
+    nproc : `int`, optional, default: 1
+        number of parallel processes with which to distribute file I/O,
+        default: serial process
+
+    chunksize : `int`, optional
+        number of rows to parse from each file at a time, see
+        :func:`~gwpy.table.io.ascii.read_ascii_events`
+
     **loadtxtkwargs
         other keyword arguments are passed to `numpy.loadtxt`
 
     Returns
     -------
-    table : `SnglBurstTable`
-        a new `SnglBurstTable` filled with data read from the file(s)
+    events : `~gwpy.table.EventTable`
+        a new `EventTable` filled with data read from the file(s)
 
     Raises
     ------
@@ -165,14 +211,15 @@ def sngl_burst_table_from_cwb_ascii(f, columns=None, ifo=None, filt=None,
         if `usecols` is given (and not `columns`) and that column isn't
         parseable from the given file (no `sngl_burst` equivalent)
     """
+    files = file_list(f)
+
     # allow multiprocessing
     if nproc != 1:
-        return read_cache(f, SnglBurstTable, nproc, return_reassign_ids,
-                          columns=columns, usecols=usecols, ifo=ifo,
-                          filt=filt, format='cwb-ascii', **loadtxtkwargs)
+        return read_events_parallel(files, nproc, SnglBurstTable, 'cwb-ascii',
+                                    columns=columns, usecols=usecols, ifo=ifo,
+                                    filt=filt, **loadtxtkwargs)
 
     comments = loadtxtkwargs.pop('comments', '#')
-    files = file_list(f)
     if ifo is None:
         raise ValueError("ifo keyword argument must be given to read cWB "
                          "events from ASCII")
@@ -215,32 +262,65 @@ def sngl_burst_table_from_cwb_ascii(f, columns=None, ifo=None, filt=None,
     elif not columns and not usecols:
         columns = allcolumns
         usecols = allusecols
-    # read data
-    out = SnglBurstTable.read(files, columns, usecols=usecols, format='ascii',
-                              comments=comments, filt=filt, **loadtxtkwargs)
-    # append search information and fix SNR
-    out.appendColumn('ifo')
-    out.appendColumn('search')
-    for t in out:
-        t.ifo = ifo
-        t.search = 'cwb'
-        if 'snr' in columns:
-            t.snr **= 1/2.
-    return out
+    # read data, one chunk at a time
+    columns = list(columns)
+    return read_ascii_events(
+        files, SnglBurstTable, partial(sngl_burst_columns_from_cwb, ifo=ifo),
+        columns, outcolumns=(expand_columns(columns, SnglBurstTable) +
+                             ['ifo', 'search']),
+        filt=filt, usecols=usecols, comments=comments, **loadtxtkwargs)
 
 
-def sngl_burst_from_cwb(f, *args, **kwargs):
-    """Read a `SnglBurstTable` from a cWB file either ROOT of EVENTS.TXT ASCII
+def sngl_burst_table_from_cwb_ascii(f, columns=None, ifo=None, filt=None,
+                                    usecols=None, nproc=1, **loadtxtkwargs):
+    """Read a `SnglBurstTable` from a cWB-format ASCII file
+
+    This method reads the events into an `~gwpy.table.EventTable` with
+    :func:`event_table_from_cwb_ascii`, which is converted into a
+    `SnglBurstTable` at the very end, see that function for details of the
+    arguments.
+
+    Parameters
+    ----------
+    filt : `function`, optional
+        function by which to filt events. The callable must accept as
+        input a `SnglBurst` event and return `True`/`False`.
+
+    Returns
+    -------
+    table : `SnglBurstTable`
+        a new `SnglBurstTable` filled with data read from the file(s)
+    """
+    return event_table_from_cwb_ascii(
+        f, columns=columns, ifo=ifo, usecols=usecols, nproc=nproc,
+        **loadtxtkwargs).to_ligolw(filt=filt)
+
+
+def _check_cwb_extension(f):
+    """Check that the given cWB files can be read as ASCII
     """
     files = file_list(f)
     extensions = list(set(os.path.splitext(fp)[1] for fp in files))
     if len(extensions) == 1 and extensions[0].lower() == '.root':
         raise NotImplementedError("Reading cWB from ROOT files has not been "
                                   "implemented yet")
-    elif len(extensions) <= 1:
-        return sngl_burst_table_from_cwb_ascii(f, *args, **kwargs)
-    raise ValueError("Cannot determine correct cWB reader for multiple file "
-                     "extensions: %s" % ", ".join(extensions))
+    elif len(extensions) > 1:
+        raise ValueError("Cannot determine correct cWB reader for multiple "
+                         "file extensions: %s" % ", ".join(extensions))
+
+
+def event_table_from_cwb(f, *args, **kwargs):
+    """Read an `EventTable` from a cWB file either ROOT of EVENTS.TXT ASCII
+    """
+    _check_cwb_extension(f)
+    return event_table_from_cwb_ascii(f, *args, **kwargs)
+
+
+def sngl_burst_from_cwb(f, *args, **kwargs):
+    """Read a `SnglBurstTable` from a cWB file either ROOT of EVENTS.TXT ASCII
+    """
+    _check_cwb_extension(f)
+    return sngl_burst_table_from_cwb_ascii(f, *args, **kwargs)
 
 
 def identify_cwb_ascii(origin, path, fileobj, *args, **kwargs):
@@ -286,3 +366,9 @@ def identify_cwb_ascii(origin, path, fileobj, *args, **kwargs):
 register_identifier('cwb-ascii', SnglBurstTable, identify_cwb_ascii)
 register_reader('cwb-ascii', SnglBurstTable, sngl_burst_table_from_cwb_ascii)
 register_reader('cwb', SnglBurstTable, sngl_burst_from_cwb)
+
+# register columnar readers
+register_event_reader('cwb-ascii', SnglBurstTable, event_table_from_cwb_ascii)
+register_event_reader('cwb', SnglBurstTable, event_table_from_cwb)
+register_reader('cwb-ascii', EventTable, event_table_from_cwb_ascii)
+register_reader('cwb', EventTable, event_table_from_cwb)
@@ -19,19 +19,14 @@
 """Read events from an Omega-format ASCII file.
 """
 
-import sys
-from math import sqrt
-
-from six import string_types
-
-from numpy import loadtxt
+import numpy
 
 from astropy.io import registry
 
 from .ascii import table_from_ascii_factory
-from ..lsctables import (SnglBurstTable, SnglBurst)
-from ...io.cache import file_list
-from ...time import LIGOTimeGPS
+from ..events import (EventTable, gps_split, gps_shift, get_event_reader)
+from ..lsctables import SnglBurstTable
+from ...utils.compat import OrderedDict
 
 __author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
 
@@ -77,173 +72,121 @@ OMEGADQ_LIGOLW_COLUMNS = ['search', 'event_id', 'peak_time', 'peak_time_ns',
                           'snr', 'ms_snr', 'amplitude', 'confidence']
 
 
-def to_LIGOTimeGPS(x):
-    if isinstance(x, string_types):
-        x = str(x)
-    return LIGOTimeGPS(x)
+def _duration(start, stop):
+    """Return the duration (seconds) between two (seconds, nanoseconds) pairs
+    """
+    return ((stop[0] - start[0]) * 1000000000 + (stop[1] - start[1])) * 1e-9
 
 
-def sngl_burst_from_omega(line, columns=OMEGA_LIGOLW_COLUMNS):
-    """Build a `SnglBurst` from an Omega ASCII line.
+def sngl_burst_columns_from_omega(data, columns=OMEGA_LIGOLW_COLUMNS):
+    """Build `SnglBurst` columns from an array of Omega ASCII data.
 
     Parameters
     ----------
-    line : `str`
-        the ASCII line to read
+    data : `numpy.ndarray`
+        the structured array of data read from the file(s)
     columns : `list`
         a `list` of valid `LIGO_LW` column names to load.
 
     Returns
     -------
-    burst : :class:`~gwpy.table.lsctables.SnglBurst`
-        a `SnglBurst` with attributes populated from the ROOT data.
+    columns : `OrderedDict`
+        `(name, array)` pairs for each `SnglBurst` column
     """
-    t = SnglBurst()
-    t.search = u'omega'
-
-    if isinstance(line, str):
-        line = line.rstrip('\n').split()
-    peak, freq, duration, band, nerg = line
-    duration = float(duration)
+    out = OrderedDict()
+    out['search'] = numpy.repeat('omega', data.size)
 
     # parse time data
-    peak = to_LIGOTimeGPS(peak)
-    if 'time' in columns or 'peak_time' in columns:
-        t.peak_time = peak.seconds
-    if 'time' in columns or 'peak_time_ns' in columns:
-        t.peak_time_ns = peak.nanoseconds
-    start = peak - duration / 2.
-    if 'start_time' in columns:
-        t.start_time = start.seconds
-    if 'start_time_ns' in columns:
-        t.start_time_ns = start.nanoseconds
-    stop = peak + duration / 2.
-    if 'stop_time' in columns:
-        t.stop_time = stop.seconds
-    if 'stop_time_ns' in columns:
-        t.stop_time_ns = stop.nanoseconds
-    if 'duration' in columns:
-        t.duration = duration
+    peak = gps_split(data['time'])
+    duration = data['duration']
+    out['peak_time'], out['peak_time_ns'] = peak
+    out['start_time'], out['start_time_ns'] = gps_shift(
+        peak[0], peak[1], -duration / 2.)
+    out['stop_time'], out['stop_time_ns'] = gps_shift(
+        peak[0], peak[1], duration / 2.)
+    out['duration'] = duration
 
     # parse frequency data
-    flow = freq - band / 2.
-    fhigh = freq + band / 2.
-    if 'central_freq' in columns:
-        t.central_freq = freq
-    if 'flow' in columns:
-        t.flow = flow
-    if 'fhigh' in columns:
-        t.fhigh = fhigh
-    if 'bandwidth' in columns:
-        t.bandwidth = band
+    freq = data['frequency']
+    band = data['bandwidth']
+    out['central_freq'] = freq
+    out['flow'] = freq - band / 2.
+    out['fhigh'] = freq + band / 2.
+    out['bandwidth'] = band
 
     # others
-    snr = sqrt(2 * nerg)
-    if 'snr' in columns:
-        t.snr = snr
-    if 'amplitude' in columns:
-        t.amplitude = nerg
-    if 'confidence' in columns:
-        t.confidence = snr
+    nerg = data['energy']
+    snr = numpy.sqrt(2 * nerg)
+    out['snr'] = snr
+    out['amplitude'] = nerg
+    out['confidence'] = snr
 
-    return t
+    return out
 
 
-def sngl_burst_from_omegadq(line, columns=OMEGADQ_LIGOLW_COLUMNS):
-    """Build a `SnglBurst` from an Omega DQ (DetChar) ASCII line.
+def sngl_burst_columns_from_omegadq(data, columns=OMEGADQ_LIGOLW_COLUMNS):
+    """Build `SnglBurst` columns from an array of Omega DQ (DetChar) data.
 
     Parameters
     ----------
-    line : `str`
-        the ASCII line to read
+    data : `numpy.ndarray`
+        the structured array of data read from the file(s)
     columns : `list`
         a `list` of valid `LIGO_LW` column names to load.
 
     Returns
     -------
-    burst : :class:`~gwpy.table.lsctables.SnglBurst`
-        a `SnglBurst` with attributes populated from the ROOT data.
+    columns : `OrderedDict`
+        `(name, array)` pairs for each `SnglBurst` column
     """
-    t = SnglBurst()
-    t.search = u'omega'
-
-    if isinstance(line, str):
-        line = map(float, line.rstrip('\n').split())
-    (start, stop, peak, flow, fhigh, ms_start, ms_stop, ms_flow,
-     ms_fhigh, clst_energy, ms_snr) = line
+    out = OrderedDict()
+    out['search'] = numpy.repeat('omega', data.size)
 
     # parse time data
-    peak = to_LIGOTimeGPS(peak)
-    if 'time' in columns or 'peak_time' in columns:
-        t.peak_time = peak.seconds
-    if 'time' in columns or 'peak_time_ns' in columns:
-        t.peak_time_ns = peak.nanoseconds
-    start = to_LIGOTimeGPS(start)
-    if 'start_time' in columns:
-        t.start_time = start.seconds
-    if 'start_time_ns' in columns:
-        t.start_time_ns = start.nanoseconds
-    stop = to_LIGOTimeGPS(stop)
-    if 'stop_time' in columns:
-        t.stop_time = stop.seconds
-    if 'stop_time_ns' in columns:
-        t.stop_time_ns = stop.nanoseconds
-    if 'duration' in columns:
-        t.duration = float(stop - start)
+    start = gps_split(data['start'])
+    stop = gps_split(data['stop'])
+    out['peak_time'], out['peak_time_ns'] = gps_split(data['peak'])
+    out['start_time'], out['start_time_ns'] = start
+    out['stop_time'], out['stop_time_ns'] = stop
+    out['duration'] = _duration(start, stop)
 
     # parse frequency data
-    flow = flow
-    fhigh = fhigh
-    if 'flow' in columns:
-        t.flow = flow
-    if 'fhigh' in columns:
-        t.fhigh = fhigh
-    if 'bandwidth' in columns:
-        t.bandwidth = fhigh-flow
-    if 'central_freq' in columns:
-        t.central_freq = flow + (fhigh - flow) * .5
+    flow = data['flow']
+    fhigh = data['fhigh']
+    out['flow'] = flow
+    out['fhigh'] = fhigh
+    out['bandwidth'] = fhigh - flow
+    out['central_freq'] = flow + (fhigh - flow) * .5
 
     # most-significant tile information
-    ms_start = to_LIGOTimeGPS(ms_start)
-    if 'ms_start_time' in columns:
-        t.ms_start_time = ms_start.seconds
-    if 'ms_start_time_ns' in columns:
-        t.ms_start_time_ns = ms_start.nanoseconds
-    ms_stop = to_LIGOTimeGPS(ms_stop)
-    if 'ms_stop_time' in columns:
-        t.ms_stop_time = ms_stop.seconds
-    if 'ms_stop_time_ns' in columns:
-        t.ms_stop_time_ns = ms_stop.nanoseconds
-    if 'ms_duration' in columns:
-        t.ms_duration = float(ms_stop - ms_start)
-    if 'ms_flow' in columns:
-        t.ms_flow = ms_flow
-    if 'ms_fhigh' in columns:
-        t.ms_fhigh = ms_fhigh
-    if 'ms_bandwidth' in columns:
-        t.ms_bandwidth = ms_fhigh - ms_flow
-    if 'peak_frequency' in columns:
-        t.peak_frequency = ms_flow + (ms_fhigh - ms_flow) * .5
+    ms_start = gps_split(data['ms_start'])
+    ms_stop = gps_split(data['ms_stop'])
+    out['ms_start_time'], out['ms_start_time_ns'] = ms_start
+    out['ms_stop_time'], out['ms_stop_time_ns'] = ms_stop
+    out['ms_duration'] = _duration(ms_start, ms_stop)
+    ms_flow = data['ms_fmin']
+    ms_fhigh = data['ms_fmax']
+    out['ms_flow'] = ms_flow
+    out['ms_fhigh'] = ms_fhigh
+    out['ms_bandwidth'] = ms_fhigh - ms_flow
+    out['peak_frequency'] = ms_flow + (ms_fhigh - ms_flow) * .5
 
     # others
-    snr = sqrt(2 * clst_energy)
-    if 'snr' in columns:
-        t.snr = snr
-    if 'amplitude' in columns:
-        t.amplitude = clst_energy
-    if 'confidence' in columns:
-        t.confidence = snr
-    if 'ms_snr' in columns:
-        t.ms_snr = sqrt(2 * ms_snr)
+    energy = data['energy']
+    snr = numpy.sqrt(2 * energy)
+    out['snr'] = snr
+    out['amplitude'] = energy
+    out['confidence'] = snr
+    out['ms_snr'] = numpy.sqrt(2 * data['ms_snr'])
 
-    return t
+    return out
 
 
 # register OmegaDQ
 registry.register_reader(
     'omegadq', SnglBurstTable,
     table_from_ascii_factory(
-        SnglBurstTable, 'omegadq', sngl_burst_from_omegadq,
+        SnglBurstTable, 'omegadq', sngl_burst_columns_from_omegadq,
         OMEGADQ_LIGOLW_COLUMNS,
         dtype=filter(lambda x: x is not None, OMEGADQ_DTYPE),
         usecols=[i for i, c in enumerate(OMEGADQ_DTYPE) if c is not None]))
@@ -252,6 +195,12 @@ registry.register_reader(
 registry.register_reader(
     'omega', SnglBurstTable,
     table_from_ascii_factory(
-        SnglBurstTable, 'omega', sngl_burst_from_omega, OMEGA_LIGOLW_COLUMNS,
+        SnglBurstTable, 'omega', sngl_burst_columns_from_omega,
+        OMEGA_LIGOLW_COLUMNS,
         dtype=filter(lambda x: x is not None, OMEGA_DTYPE), comments='%',
         usecols=[i for i, c in enumerate(OMEGA_DTYPE) if c is not None]))
+
+# register columnar readers
+for _format in ('omegadq', 'omega'):
+    registry.register_reader(_format, EventTable,
+                             get_event_reader(_format, SnglBurstTable))
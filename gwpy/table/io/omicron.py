@@ -24,13 +24,18 @@ import sys
 if sys.version_info[0] < 3:
     range = xrange
 
+import numpy
+
 from glue.lal import (Cache, CacheEntry)
 
 from .. import lsctables
+from ..events import (CONDITION_OPERATORS, EventTable, events_from_columns,
+                      expand_columns, gps_split, parse_condition,
+                      read_events_parallel, register_event_reader)
 from ...io import registry
 from ...io.cache import open_cache
-from ...time import LIGOTimeGPS
 from ...utils import with_import
+from ...utils.compat import OrderedDict
 
 __author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
 
@@ -42,71 +47,277 @@ OMICRON_COLUMNS = ['search', 'peak_time', 'peak_time_ns',
                    'snr', 'amplitude', 'confidence']
 
 
-def sngl_burst_from_root(tchain, columns=OMICRON_COLUMNS):
-    """Build a `SnglBurst` from a ROOT `TChain`.
+# ROOT branches in each Omicron tree
+OMICRON_BRANCHES = ['time', 'tstart', 'tend', 'fstart', 'fend',
+                    'frequency', 'snr']
+
+# ROOT branches required to compute each column
+OMICRON_BRANCH_MAP = {
+    'search': (),
+    'peak_time': ('time',),
+    'peak_time_ns': ('time',),
+    'start_time': ('tstart',),
+    'start_time_ns': ('tstart',),
+    'stop_time': ('tend',),
+    'stop_time_ns': ('tend',),
+    'duration': ('tstart', 'tend'),
+    'central_freq': ('frequency',),
+    'peak_frequency': ('frequency',),
+    'flow': ('fstart',),
+    'fhigh': ('fend',),
+    'bandwidth': ('fstart', 'fend'),
+    'snr': ('snr',),
+    'amplitude': ('snr',),
+    'confidence': ('snr',),
+}
+
+# columns whose values are exactly those of a single ROOT branch, conditions
+# on these are applied to the branch data before any columns are built
+OMICRON_BRANCH_ALIASES = {
+    'time': 'time',
+    'central_freq': 'frequency',
+    'peak_frequency': 'frequency',
+    'flow': 'fstart',
+    'fhigh': 'fend',
+    'snr': 'snr',
+    'confidence': 'snr',
+}
+
+
+def sngl_burst_columns_from_root(data, columns=OMICRON_COLUMNS):
+    """Build `SnglBurst` columns from arrays of Omicron ROOT data.
+
+    Only those columns that can be computed from the given branches
+    are returned.
 
     Parameters
     ----------
-    tchain : `ROOT.TChain`
-        the ROOT object from which to read.
+    data : `dict`
+        `(branch, array)` pairs of data read from the ROOT tree
     columns : `list`
         a `list` of valid `LIGO_LW` column names to load.
 
     Returns
     -------
-    burst : :class:`~glue.ligolw.lsctables.SnglBurst`
-        a `SnglBurst` with attributes populated from the ROOT data.
+    columns : `OrderedDict`
+        `(name, array)` pairs for each `SnglBurst` column
     """
-    t = lsctables.SnglBurst()
-    t.search = u'omicron'
+    out = OrderedDict()
+    size = len(next(iter(data.values()))) if data else 0
+    out['search'] = numpy.repeat('omicron', size)
 
     # parse frequency data
-    flow = tchain.fstart
-    fhigh = tchain.fend
-    if 'flow' in columns:
-        t.flow = flow
-    if 'fhigh' in columns:
-        t.fhigh = fhigh
-    if 'bandwidth' in columns:
-        t.bandwidth = fhigh-flow
-    if 'central_freq' in columns:
-        t.central_freq = tchain.frequency
-    if 'peak_frequency' in columns:
-        t.peak_frequency = tchain.frequency
+    if 'fstart' in data:
+        out['flow'] = data['fstart']
+    if 'fend' in data:
+        out['fhigh'] = data['fend']
+    if 'fstart' in data and 'fend' in data:
+        out['bandwidth'] = data['fend'] - data['fstart']
+    if 'frequency' in data:
+        out['central_freq'] = data['frequency']
+        out['peak_frequency'] = data['frequency']
 
     # parse time data
-    peak_time = LIGOTimeGPS(tchain.time)
-    if 'time' in columns or 'peak_time' in columns:
-        t.peak_time = peak_time.seconds
-    if 'time' in columns or 'peak_time_ns' in columns:
-        t.peak_time_ns = peak_time.nanoseconds
-    start_time = LIGOTimeGPS(tchain.tstart)
-    if 'start_time' in columns:
-        t.start_time = start_time.seconds
-    if 'start_time_ns' in columns:
-        t.start_time_ns = start_time.nanoseconds
-    stop_time = LIGOTimeGPS(tchain.tend)
-    if 'stop_time' in columns:
-        t.stop_time = stop_time.seconds
-    if 'stop_time_ns' in columns:
-        t.stop_time_ns = stop_time.nanoseconds
-    if 'duration' in columns:
-        t.duration = float(stop_time - start_time)
+    if 'time' in data:
+        out['peak_time'], out['peak_time_ns'] = gps_split(data['time'])
+    if 'tstart' in data:
+        start = gps_split(data['tstart'])
+        out['start_time'], out['start_time_ns'] = start
+    if 'tend' in data:
+        stop = gps_split(data['tend'])
+        out['stop_time'], out['stop_time_ns'] = stop
+    if 'tstart' in data and 'tend' in data:
+        out['duration'] = ((stop[0] - start[0]) * 1000000000 +
+                           (stop[1] - start[1])) * 1e-9
 
     # others
-    if 'snr' in columns:
-        t.snr = tchain.snr
-    if 'amplitude' in columns:
-        t.amplitude = tchain.snr ** 2 / 2.
-    if 'confidence' in columns:
-        t.confidence = tchain.snr
+    if 'snr' in data:
+        snr = data['snr']
+        out['snr'] = snr
+        out['amplitude'] = snr ** 2 / 2.
+        out['confidence'] = snr
+
+    return OrderedDict((c, out[c]) for c in columns if c in out)
+
+
+def _file_list(f):
+    if isinstance(f, CacheEntry):
+        return [f.path]
+    elif isinstance(f, (str, unicode)) and f.endswith(('.cache', '.lcf')):
+        return open_cache(f).pfnlist()
+    elif isinstance(f, (str, unicode)):
+        return f.split(',')
+    elif isinstance(f, Cache):
+        return f.pfnlist()
+    else:
+        return list(f)
 
-    return t
+
+def branches_for_columns(columns):
+    """Return the list of ROOT branches needed to build the given columns
+
+    Parameters
+    ----------
+    columns : `list` of `str`
+        the list of `LIGO_LW` column names
+
+    Returns
+    -------
+    branches : `list` of `str`
+        the list of branch names, in tree order
+    """
+    needed = set()
+    for column in columns:
+        try:
+            needed.update(OMICRON_BRANCH_MAP[column])
+        except KeyError:
+            if column in OMICRON_BRANCHES:
+                needed.add(column)
+    return [b for b in OMICRON_BRANCHES if b in needed]
+
+
+def split_conditions(filt):
+    """Separate conditions that can be applied to the raw ROOT branches
+
+    Parameters
+    ----------
+    filt : `str`, `tuple`, `callable`, `list`, `None`
+        condition(s) by which to filter events, see
+        :meth:`~gwpy.table.EventTable.filter` for details
+
+    Returns
+    -------
+    branchconditions : `list` of `tuple`
+        `(branch, operator, value)` conditions to apply to the branch data
+    remainder : `list`, `None`
+        the other conditions, to be applied to the `EventTable`, or `None`
+    """
+    if filt is None:
+        return [], None
+    if not isinstance(filt, list):
+        filt = [filt]
+    branchconditions = []
+    remainder = []
+    for condition in filt:
+        try:
+            column, op, value = parse_condition(condition)
+        except (ValueError, TypeError):  # callable or invalid
+            remainder.append(condition)
+            continue
+        if callable(op) or column not in OMICRON_BRANCH_ALIASES:
+            remainder.append(condition)
+        else:
+            branchconditions.append((OMICRON_BRANCH_ALIASES[column], op,
+                                     float(value)))
+    return branchconditions, remainder or None
+
+
+def selection_string(conditions):
+    """Format a list of branch conditions as a ROOT selection string
+
+    Parameters
+    ----------
+    conditions : `list` of `tuple`
+        `(branch, operator, value)` conditions
+
+    Returns
+    -------
+    selection : `str`, `None`
+        the selection string, e.g. ``'snr > 8.0 && frequency < 100.0'``,
+        or `None` if no conditions were given
+
+    Examples
+    --------
+    >>> selection_string([('snr', '>', 8), ('frequency', '=', 100)])
+    'snr > 8 && frequency == 100'
+    """
+    if not conditions:
+        return None
+    return ' && '.join('%s %s %r' % (branch, op == '=' and '==' or op, value)
+                       for (branch, op, value) in conditions)
+
+
+def _branch_mask(data, conditions):
+    """Evaluate a list of branch conditions as a single boolean mask
+    """
+    mask = None
+    for branch, op, value in conditions:
+        cond = CONDITION_OPERATORS[op](data[branch], value)
+        mask = cond if mask is None else mask & cond
+    return mask
 
 
 @with_import('ROOT')
-def table_from_root(f, columns=OMICRON_COLUMNS, filt=None, nproc=1):
-    """Build a `SnglBurstTable` from events in an Omicron ROOT file.
+def _read_branches_pyroot(files, branches):
+    """Read the given branches from Omicron ROOT files using PyROOT
+    """
+    tree = ROOT.TChain('triggers')
+    for filename in files:
+        tree.Add(filename)
+
+    # only read the requested branches from disk
+    tree.SetBranchStatus('*', 0)
+    for branch in branches:
+        tree.SetBranchStatus(branch, 1)
+
+    nevents = tree.GetEntries()
+    data = dict((b, numpy.empty(nevents)) for b in branches)
+    for i in range(nevents):
+        tree.GetEntry(i)
+        for branch in branches:
+            data[branch][i] = getattr(tree, branch)
+    return data
+
+
+def read_branches(files, branches, conditions=None):
+    """Read ROOT branches from Omicron files into arrays
+
+    If `root_numpy` is available the branches are read in bulk, with the
+    conditions passed to ROOT as a selection, otherwise only the requested
+    branches are enabled in a `ROOT.TChain`, and the conditions applied as
+    a mask afterwards.
+
+    Parameters
+    ----------
+    files : `list` of `str`
+        the list of file paths to read
+    branches : `list` of `str`
+        the names of the branches to read
+    conditions : `list` of `tuple`, optional
+        `(branch, operator, value)` conditions to apply
+
+    Returns
+    -------
+    data : `dict`
+        `(branch, array)` pairs for each branch read, including those
+        needed only to apply the conditions
+    """
+    conditions = conditions or []
+    # always read the branches needed to apply the conditions
+    readbranches = branches_for_columns(
+        list(branches) + [c[0] for c in conditions]) or ['time']
+    try:
+        from root_numpy import root2array
+    except ImportError:
+        data = _read_branches_pyroot(files, readbranches)
+        mask = _branch_mask(data, conditions)
+        if mask is not None:
+            data = dict((b, a[mask]) for b, a in data.items())
+    else:
+        arr = root2array(files, treename='triggers', branches=readbranches,
+                         selection=selection_string(conditions))
+        data = dict((b, numpy.asarray(arr[b], dtype=float)) for
+                    b in readbranches)
+    return data
+
+
+def event_table_from_root(f, columns=OMICRON_COLUMNS, filt=None, nproc=1):
+    """Build an `EventTable` from events in an Omicron ROOT file.
+
+    Only the ROOT branches needed for the requested columns are read, and
+    simple conditions on columns that are stored directly as branches
+    (e.g. ``'snr > 8'`` or ``('central_freq', '<', 100)``) are applied to
+    the branch data before any columns are computed.
 
     Parameters
     ----------
@@ -121,49 +332,63 @@ def table_from_root(f, columns=OMICRON_COLUMNS, filt=None, nproc=1):
 
     columns : `list`, optional
         list of column name strings to read, default all.
-    filt : `function`, optional
-        function by which to filt events. The callable must accept as
-        input a `SnglBurst` event and return `True`/`False`.
+    filt : `str`, `tuple`, `callable`, `list`, optional
+        condition(s) by which to filter events, see
+        :meth:`~gwpy.table.EventTable.filter` for details
     nproc : `int`, optional, default: 1
         number of parallel processes with which to distribute file I/O,
         default: serial process
+
+    Returns
+    -------
+    events : `~gwpy.table.EventTable`
+        a new `EventTable` of `SnglBurst` events
     """
+    files = _file_list(f)
+
     # allow multiprocessing
     if nproc != 1:
-        from .cache import read_cache
-        return read_cache(f, lsctables.SnglBurstTable.tableName,
-                          columns=columns, nproc=nproc, format='omicron')
+        return read_events_parallel(files, nproc, lsctables.SnglBurstTable,
+                                    'omicron', columns=columns, filt=filt)
 
-    # format list of files
-    if isinstance(f, CacheEntry):
-        files = [f.path]
-    elif isinstance(f, (str, unicode)) and f.endswith(('.cache', '.lcf')):
-        files = open_cache(f).pfnlist()
-    elif isinstance(f, (str, unicode)):
-        files = f.split(',')
-    elif isinstance(f, Cache):
-        files = f.pfnlist()
-    else:
-        files = list(f)
+    if columns is None:
+        columns = OMICRON_COLUMNS
+    columns = expand_columns(columns, lsctables.SnglBurstTable)
 
-    # read tree chain
-    tree = ROOT.TChain('triggers')
-    for filename in files:
-        tree.Add(filename)
+    # read only those branches needed, applying simple conditions in bulk
+    conditions, filt = split_conditions(filt)
+    data = read_branches(files, branches_for_columns(columns),
+                         conditions=conditions)
 
-    # generate output
-    out = lsctables.New(lsctables.SnglBurstTable, columns=columns)
-    append = out.append
+    return events_from_columns(sngl_burst_columns_from_root(data, columns),
+                               columns, lsctables.SnglBurstTable, filt=filt)
 
-    # iterate over events
-    nevents = tree.GetEntries()
-    for i in xrange(nevents):
-        tree.GetEntry(i)
-        burst = sngl_burst_from_root(tree, columns=columns)
-        if filt is None or filt(burst):
-            append(burst)
 
-    return out
+def table_from_root(f, columns=OMICRON_COLUMNS, filt=None, nproc=1):
+    """Build a `SnglBurstTable` from events in an Omicron ROOT file.
+
+    Parameters
+    ----------
+    f : `file`, `str`, `CacheEntry`, `list`, `Cache`
+        object representing one or more files. One of
+
+        - an open `file`
+        - a `str` pointing to a file path on disk
+        - a formatted :class:`~glue.lal.CacheEntry` representing one file
+        - a `list` of `str` file paths
+        - a formatted :class:`~glue.lal.Cache` representing many files
+
+    columns : `list`, optional
+        list of column name strings to read, default all.
+    filt : `function`, optional
+        function by which to filt events. The callable must accept as
+        input a `SnglBurst` event and return `True`/`False`.
+    nproc : `int`, optional, default: 1
+        number of parallel processes with which to distribute file I/O,
+        default: serial process
+    """
+    return event_table_from_root(f, columns=columns,
+                                 nproc=nproc).to_ligolw(filt=filt)
 
 
 def identify_omicron(origin, path, fileobj, *args, **kwargs):
@@ -181,3 +406,9 @@ def identify_omicron(origin, path, fileobj, *args, **kwargs):
 registry.register_reader('omicron', lsctables.SnglBurstTable, table_from_root)
 registry.register_identifier('omicron', lsctables.SnglBurstTable,
                              identify_omicron)
+
+# register columnar reader
+register_event_reader('omicron', lsctables.SnglBurstTable,
+                      event_table_from_root)
+registry.register_reader('omicron', EventTable, event_table_from_root)
+registry.register_identifier('omicron', EventTable, identify_omicron)
@@ -87,7 +87,7 @@ def from_recarray(cls, array, columns=None):
 
     Parameters
     ----------
-    array : `numpy.recarray`
+    array : `numpy.recarray`, `~gwpy.table.EventTable`
         an array of data
     column : `list` of `str`, optional
         the columns to populate, if not given, all columns present in the
@@ -97,22 +97,31 @@ def from_recarray(cls, array, columns=None):
     -----
     The columns populated in the `numpy.recarray` must all map exactly to
     valid columns of the target `~glue.ligolw.table.Table`.
+
+    Each column is converted to a `list` in a single operation, and the
+    rows are then filled from those lists, so that no per-element access
+    of the array is needed.
     """
     if columns is None:
         columns = list(array.dtype.names)
     out = New(cls, columns=columns)
     tblname = strip_table_name(out.tableName)
-    ilwdchar = dict((col, get_ilwdchar_class(tblname, col))
-                    for (col, llwtype) in zip(out.columnnames, out.columntypes)
-                    if llwtype == 'ilwd:char')
-    for rec in array:
-        row = out.RowType()
-        for col, llwtype in zip(out.columnnames, out.columntypes):
-            if llwtype == 'ilwd:char':
-                setattr(row, col, ilwdchar[col](rec[col]))
-            else:
-                setattr(row, col, rec[col])
-        out.append(row)
+    # convert each column to a list of python objects in one go
+    values = []
+    for col, llwtype in zip(out.columnnames, out.columntypes):
+        data = array[col].tolist()
+        if llwtype == 'ilwd:char':
+            data = map(get_ilwdchar_class(tblname, col), data)
+        values.append(data)
+    # and build the rows
+    names = out.columnnames
+    RowType = out.RowType
+    append = out.append
+    for rec in zip(*values):
+        row = RowType()
+        for col, val in zip(names, rec):
+            setattr(row, col, val)
+        append(row)
     return out
 
 
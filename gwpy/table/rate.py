@@ -24,16 +24,139 @@ from math import ceil
 
 import numpy
 
+from .events import EventTable
 from .utils import (EVENT_TABLES, get_table_column)
 
 __author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
-__all__ = ['event_rate', 'binned_event_rates']
+__all__ = ['event_rate', 'binned_event_rates', 'EventRateAccumulator']
 
 OPERATORS = {'<': _operator.lt, '<=': _operator.le, '=': _operator.eq,
              '>=': _operator.ge, '>': _operator.gt, '==': _operator.is_,
              '!=': _operator.is_not}
 
 
+# operators that can be evaluated as cumulative counts over sorted
+# thresholds, mapped to the `numpy.searchsorted` side that gives the index
+# of each value amongst the thresholds, and whether each event satisfies
+# the operator for thresholds at or above (True), or below (False) that
+# index
+CUMULATIVE_OPERATORS = {
+    '>=': ('right', False),
+    '>': ('left', False),
+    '<=': ('left', True),
+    '<': ('right', True),
+}
+
+
+def _time_bins(stride, start, end):
+    """Generate the time bin edges for a rate calculation
+    """
+    nsamp = int(ceil((end - start) / stride))
+    return numpy.arange(nsamp + 1) * stride + start
+
+
+def _time_index(times, timebins):
+    """Find the time bin index for each event
+
+    As with `numpy.histogram`, the last bin includes its right-hand edge,
+    events outside of the bins are given the index ``-1``.
+    """
+    nsamp = timebins.size - 1
+    idx = numpy.searchsorted(timebins, times, side='right') - 1
+    idx[times == timebins[-1]] = nsamp - 1
+    idx[(idx < 0) | (idx >= nsamp)] = -1
+    return idx
+
+
+def _bincount2d(tidx, vidx, shape):
+    """Count events in each (time bin, value bin) pair
+    """
+    keep = (tidx >= 0) & (vidx >= 0) & (vidx < shape[1])
+    flat = tidx[keep] * shape[1] + vidx[keep]
+    return numpy.bincount(flat, minlength=shape[0] * shape[1]).reshape(shape)
+
+
+def _binned_counts(times, values, timebins, bins, operator='>='):
+    """Count the events in each time bin for each of a number of value bins
+
+    Parameters
+    ----------
+    times : `numpy.ndarray`
+        the time of each event
+    values : `numpy.ndarray`
+        the binning column value of each event
+    timebins : `numpy.ndarray`
+        the edges of the time bins
+    bins : `list`
+        a list of `(low, high)` `tuples <tuple>` to count events with
+        ``low <= value < high``, or a list of thresholds to compare each
+        value against with the given operator
+    operator : `str`, `callable`
+        the operator with which to compare values against thresholds
+
+    Returns
+    -------
+    counts : `numpy.ndarray`
+        a 2-D array of shape ``(len(timebins) - 1, len(bins))`` counting
+        the events in each (time bin, value bin) pair
+    """
+    nsamp = timebins.size - 1
+    tidx = _time_index(times, timebins)
+    values = numpy.asarray(values, dtype=float)
+
+    # containing bins: count into the elementary intervals between all
+    # bin edges, then sum the intervals contained by each bin
+    if bins and isinstance(bins[0], tuple):
+        tidx[numpy.isnan(values)] = -1
+        edges = numpy.unique(numpy.asarray(bins, dtype=float))
+        vidx = numpy.searchsorted(edges, values, side='right') - 1
+        counts = _bincount2d(tidx, vidx, (nsamp, edges.size - 1))
+        cumsum = numpy.zeros((nsamp, edges.size), dtype=counts.dtype)
+        numpy.cumsum(counts, axis=1, out=cumsum[:, 1:])
+        low = numpy.searchsorted(edges, [b[0] for b in bins])
+        high = numpy.searchsorted(edges, [b[1] for b in bins])
+        return cumsum[:, high] - cumsum[:, low]
+
+    # thresholds: count by the number of thresholds below each value,
+    # then accumulate in the right direction
+    if operator in CUMULATIVE_OPERATORS:
+        side, below = CUMULATIVE_OPERATORS[operator]
+        tidx[numpy.isnan(values)] = -1
+        thresholds = numpy.asarray(bins, dtype=float)
+        order = numpy.argsort(thresholds, kind='mergesort')
+        vidx = numpy.searchsorted(thresholds[order], values, side=side)
+        counts = _bincount2d(tidx, vidx, (nsamp, thresholds.size + 1))
+        if below:  # value op threshold for all thresholds at or above vidx
+            counts = numpy.cumsum(counts[:, :-1], axis=1)
+        else:  # value op threshold for all thresholds below vidx
+            counts = numpy.cumsum(counts[:, :0:-1], axis=1)[:, ::-1]
+        out = numpy.empty_like(counts)
+        out[:, order] = counts
+        return out
+
+    # other operators: one mask per bin
+    if isinstance(operator, (unicode, str)):
+        op = OPERATORS[operator]
+    else:
+        op = operator
+    out = numpy.empty((nsamp, len(bins)), dtype=int)
+    for j, bin_ in enumerate(bins):
+        mask = numpy.asarray(op(values, bin_), dtype=bool)
+        out[:, j] = numpy.bincount(tidx[mask & (tidx >= 0)],
+                                   minlength=nsamp)
+    return out
+
+
+def _parse_bins(bins, operator):
+    """Format the bins for a binned rate calculation
+    """
+    if not bins:
+        return [(-numpy.inf, numpy.inf)]
+    if operator == 'in' and not isinstance(bins[0], tuple):
+        return [(bins[i], bins[i+1]) for i in range(len(bins) - 1)]
+    return list(bins)
+
+
 def event_rate(self, stride, start=None, end=None, timecolumn='time'):
     """Calculate the rate `~gwpy.timeseries.TimeSeries` for this `Table`.
 
@@ -62,12 +185,13 @@ def event_rate(self, stride, start=None, end=None, timecolumn='time'):
         start = times.min()
     if not end:
         end = times.max()
-    nsamp = int(ceil((end - start) / stride))
-    timebins = numpy.arange(nsamp + 1) * stride + start
+    timebins = _time_bins(stride, start, end)
     # histogram data and return
-    out = TimeSeries(numpy.histogram(times, bins=timebins)[0] / float(stride),
-                     epoch=start, sample_rate=1/float(stride), unit='Hz',
-                     name='Event rate')
+    tidx = _time_index(times, timebins)
+    counts = numpy.bincount(tidx[tidx >= 0], minlength=timebins.size - 1)
+    out = TimeSeries(counts / float(stride),
+                     epoch=timebins[0], sample_rate=1/float(stride),
+                     unit='Hz', name='Event rate')
     return out
 
 
@@ -113,54 +237,137 @@ def binned_event_rates(self, stride, column, bins, operator='>=',
     rates : :class:`~gwpy.timeseries.TimeSeriesDict`
         a dict of (bin, `~gwpy.timeseries.TimeSeries`) pairs describing a
         rate of events per second (Hz) for each of the bins.
+
+    See Also
+    --------
+    EventRateAccumulator
+        to accumulate binned rates over many tables
     """
-    from gwpy.timeseries import (TimeSeries, TimeSeriesDict)
-    from gwpy.plotter.table import get_column_string
     # get time data
     times = get_table_column(self, timecolumn)
-
-    # get channel
-    try:
-        channel = self[0].channel
-    except (IndexError, AttributeError):
-        channel = None
-
-    # generate time bins
     if not start:
         start = times.min()
     if not end:
         end = times.max()
-    nsamp = int(ceil((end - start) / stride))
-    timebins = numpy.arange(nsamp + 1) * stride + start
-    # generate column bins
-    if not bins:
-        bins = [(-numpy.inf, numpy.inf)]
-    if operator == 'in' and not isinstance(bins[0], tuple):
-        bins2 = []
-        for i, bin_ in enumerate(bins[:-1]):
-            bins2.append((bin_, bins[i+1]))
-        bins = bins2
-    elif isinstance(operator, (unicode, str)):
-        op = OPERATORS[operator]
-    else:
-        op = operator
-    coldata = get_table_column(self, column)
-    colstr = get_column_string(column)
-    # generate one TimeSeries per bin
-    out = TimeSeriesDict()
-    for bin_ in bins:
-        if isinstance(bin_, tuple):
-            bintimes = times[(coldata >= bin_[0]) & (coldata < bin_[1])]
+    # count events in all bins at once
+    rates = EventRateAccumulator(stride, start, end, column, bins,
+                                 operator=operator, timecolumn=timecolumn)
+    rates.add_table(self, times=times)
+    return rates.rates()
+
+
+class EventRateAccumulator(object):
+    """Accumulate binned event rates over any number of tables
+
+    Events are counted into all (time bin, value bin) pairs in a single
+    pass over each table, so that rates can be built incrementally over
+    many files without holding all events in memory, e.g.::
+
+        >>> rates = EventRateAccumulator(1, start, end, 'snr', [5, 8, 10])
+        >>> for f in files:
+        ...     rates.add_table(SnglBurstTable.read(f))
+        >>> rates.rates()
+
+    Parameters
+    ----------
+    stride : `float`
+        size (seconds) of each time bin
+    start : `float`, :class:`~gwpy.time.LIGOTimeGPS`
+        GPS start epoch of the rates
+    end : `float`, :class:`~gwpy.time.LIGOTimeGPS`
+        GPS end time of the rates, this value will be rounded up to the
+        nearest sample if needed
+    column : `str`, optional
+        name of column by which to bin, if not given all events are
+        counted in a single bin
+    bins : `list`, optional
+        the bins, see :func:`binned_event_rates` for details
+    operator : `str`, `callable`, optional
+        the operator by which to bin, see :func:`binned_event_rates` for
+        details, default: ``'>='``
+    timecolumn : `str`, optional, default: ``time``
+        name of time-column to use when binning events
+
+    Attributes
+    ----------
+    counts : `numpy.ndarray`
+        the number of events counted in each (time bin, value bin) pair
+    """
+    def __init__(self, stride, start, end, column=None, bins=None,
+                 operator='>=', timecolumn='time'):
+        self.stride = float(stride)
+        self.timebins = _time_bins(self.stride, float(start), float(end))
+        self.column = column
+        self.bins = _parse_bins(bins, operator)
+        self.operator = operator
+        self.timecolumn = timecolumn
+        self.channel = None
+        self.counts = numpy.zeros((self.timebins.size - 1, len(self.bins)),
+                                  dtype=int)
+
+    def add(self, times, values=None):
+        """Count a set of events
+
+        Parameters
+        ----------
+        times : `array-like`
+            the time of each event
+        values : `array-like`, optional
+            the binning column value for each event, required if
+            this accumulator was created with a ``column``
+        """
+        times = numpy.asarray(times, dtype=float)
+        if values is None:
+            values = numpy.zeros_like(times)
+        self.counts += _binned_counts(times, values, self.timebins,
+                                      self.bins, operator=self.operator)
+
+    def add_table(self, table, times=None):
+        """Count the events in a table
+
+        Parameters
+        ----------
+        table : :class:`glue.ligolw.table.Table`
+            the table of events to count
+        times : `numpy.ndarray`, optional
+            the pre-extracted time column of this table
+        """
+        if self.channel is None:
+            try:
+                self.channel = table[0].channel
+            except (IndexError, AttributeError):
+                pass
+        if times is None:
+            times = get_table_column(table, self.timecolumn)
+        if self.column is None:
+            values = None
         else:
-            bintimes = times[op(coldata, bin_)]
-        out[bin_] = TimeSeries(
-            numpy.histogram(bintimes, bins=timebins)[0] / float(stride),
-            epoch=start, sample_rate=1/float(stride), unit='Hz',
-            name='%s $%s$ %s' % (colstr, operator, bin_), channel=channel)
-    return out
+            values = get_table_column(table, self.column)
+        self.add(times, values)
+
+    def rates(self):
+        """Return the rate `~gwpy.timeseries.TimeSeries` for each bin
+
+        Returns
+        -------
+        rates : :class:`~gwpy.timeseries.TimeSeriesDict`
+            a dict of (bin, `~gwpy.timeseries.TimeSeries`) pairs describing
+            a rate of events per second (Hz) for each of the bins.
+        """
+        from gwpy.timeseries import (TimeSeries, TimeSeriesDict)
+        from gwpy.plotter.table import get_column_string
+        colstr = get_column_string(self.column or 'all')
+        out = TimeSeriesDict()
+        for j, bin_ in enumerate(self.bins):
+            out[bin_] = TimeSeries(
+                self.counts[:, j] / self.stride,
+                epoch=self.timebins[0], sample_rate=1/self.stride,
+                unit='Hz', name='%s $%s$ %s' % (colstr, self.operator, bin_),
+                channel=self.channel)
+        return out
 
 
-# attach methods to lsctables
-for table in EVENT_TABLES:
+# attach methods to lsctables and the EventTable
+for table in EVENT_TABLES + (EventTable,):
     table.event_rate = event_rate
     table.binned_event_rates = binned_event_rates
@@ -78,7 +78,15 @@ def get_table_column(table, column, dtype=numpy.dtype(float)):
     column = str(column).lower()
     if hasattr(table, 'get_%s' % column):
         return numpy.asarray(getattr(table, 'get_%s' % column)()).astype(dtype)
-    elif column == 'time':
+    elif column == 'time' and table.tableName in TIME_COLUMN:
+        # combine the seconds and nanoseconds columns directly, rather
+        # than building a GPS object for each row
+        try:
+            return _get_gps_column(table, *TIME_COLUMN[table.tableName],
+                                   dtype=dtype)
+        except (KeyError, ValueError):  # column(s) not in table
+            pass
+    if column == 'time':
         if re.match('(sngl_inspiral|multi_inspiral)', table.tableName, re.I):
             return numpy.asarray(table.get_end()).astype(dtype)
         elif re.match('(sngl_burst|multi_burst)', table.tableName, re.I):
@@ -95,6 +103,14 @@ def get_table_column(table, column, dtype=numpy.dtype(float)):
         return numpy.asarray(table.getColumnByName(column)).astype(dtype)
 
 
+def _get_gps_column(table, seconds, nanoseconds, dtype=numpy.dtype(float)):
+    """Build an array of GPS times from seconds and nanoseconds columns
+    """
+    sec = numpy.asarray(table.getColumnByName(seconds), dtype=float)
+    nsec = numpy.asarray(table.getColumnByName(nanoseconds), dtype=float)
+    return (sec + nsec * 1e-9).astype(dtype)
+
+
 def get_row_value(row, attr):
     """Get the attribute value of a given LIGO_LW row.
 
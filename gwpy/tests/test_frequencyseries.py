@@ -21,13 +21,18 @@
 
 from tempfile import NamedTemporaryFile
 
-from numpy import (testing as nptest, arange, linspace)
+from compat import unittest
+
+from numpy import (testing as nptest, arange, linspace, random, histogram)
 
 from scipy import signal
 
 from astropy import units
 
-from gwpy.frequencyseries import (FrequencySeries, SpectralVariance)
+from gwpy.frequencyseries import (FrequencySeries, SpectralVariance,
+                                  RunningPSD)
+from gwpy.spectrogram import Spectrogram
+from gwpy.timeseries import TimeSeries
 from gwpy.plotter import FrequencySeriesPlot
 
 from test_array import (SeriesTestCase, Array2DTestCase)
@@ -158,6 +163,86 @@ class SpectralVarianceTestCase(Array2DTestCase):
                          self.data[2][1] * units.m)
         self.assertRaises(IndexError, ts1.value_at, 1.6, 5.8)
 
+    def test_from_spectrogram(self):
+        data = random.lognormal(size=(200, 8))
+        specgram = Spectrogram(data, df=.5, unit='m')
+        for log in (False, True):
+            variance = SpectralVariance.from_spectrogram(
+                specgram, nbins=20, log=log)
+            self.assertEqual(variance.shape, (8, 20))
+            self.assertEqual(variance.df, specgram.df)
+            self.assertEqual(variance.bins.unit, units.m)
+            bins = variance.bins.value
+            for i in range(data.shape[1]):
+                nptest.assert_array_equal(variance.value[i],
+                                          histogram(data[:, i], bins)[0])
+        # check normalisation
+        density = SpectralVariance.from_spectrogram(
+            specgram, bins=bins, density=True)
+        for i in range(data.shape[1]):
+            nptest.assert_allclose(
+                density.value[i],
+                histogram(data[:, i], bins, density=True)[0])
+        # check incremental update against a single histogram
+        half = SpectralVariance.from_spectrogram(
+            specgram[:100], bins=bins, density=True)
+        half.update(specgram[100:])
+        nptest.assert_allclose(half.value, density.value)
+        nptest.assert_array_equal(half.counts, variance.counts)
+        # check percentiles
+        median = variance.percentile(50)
+        self.assertIsInstance(median, FrequencySeries)
+        nptest.assert_array_equal(median.frequencies.value,
+                                  specgram.frequencies.value)
+        self.assertTrue(((median.value >= bins[0]) &
+                         (median.value <= bins[-1])).all())
+
+
+
+class RunningPSDTestCase(unittest.TestCase):
+    """`~unittest.TestCase` for the `~gwpy.frequencyseries.RunningPSD`
+    """
+    def setUp(self):
+        random.seed(1)
+        self.data = TimeSeries(random.normal(size=4096), sample_rate=256,
+                               unit='m', name='test')
+
+    def _update(self, running, chunksize=100):
+        for i in range(0, self.data.size, chunksize):
+            running.update(self.data[i:i+chunksize])
+        return running
+
+    def test_fixed_window(self):
+        # after 16 seconds, the 4-second window holds the last segments
+        for method, start in [('welch', 3072), ('median', 3072),
+                              ('median-mean', 3200)]:
+            running = self._update(RunningPSD(1, overlap=.5, method=method,
+                                              duration=4))
+            self.assertTrue(running.full)
+            psd = running.psd()
+            self.assertIsInstance(psd, FrequencySeries)
+            self.assertEqual(psd.unit, units.m ** 2 / units.Hz)
+            self.assertEqual(psd.epoch.gps, start / 256.)
+            nptest.assert_allclose(
+                psd.value, self.data[start:].psd(1, .5, method=method).value,
+                rtol=1e-10)
+
+    def test_exponential(self):
+        running = self._update(RunningPSD(1, method='welch', alpha=1))
+        nptest.assert_allclose(running.psd().value,
+                               self.data[-256:].psd(1).value, rtol=1e-10)
+        self.assertRaises(ValueError, RunningPSD, 1, method='median',
+                          alpha=.1)
+
+    def test_errors(self):
+        running = RunningPSD(1, duration=4)
+        self.assertRaises(ValueError, running.psd)
+        running.update(self.data[:100])
+        self.assertRaises(ValueError, running.update, self.data[200:300])
+        self.assertRaises(ValueError, RunningPSD, 1)
+        self.assertRaises(ValueError, RunningPSD, 1, method='rayleigh',
+                          duration=4)
+
 
 if __name__ == '__main__':
     unittest.main()
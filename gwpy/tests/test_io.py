@@ -20,13 +20,15 @@
 """
 
 import os
+import shutil
 import tempfile
 
 from compat import unittest
 
-from gwpy.io import datafind
+from gwpy.io import (datafind, gwf)
 from gwpy.io.cache import (Cache, CacheEntry, cache_segments)
 from gwpy.segments import (Segment, SegmentList)
+from gwpy.utils import parallel
 
 __author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
 
@@ -113,6 +115,56 @@ class NdsIoTestCase(unittest.TestCase):
                   ('nds.ligo-la.caltech.edu', 31200),
                   ('nds.ligo.caltech.edu', 31200)])
 
+    def test_fake_server(self):
+        """Test the `gwpy.io.ndsfake` NDS2 stand-in
+        """
+        from gwpy.io.ndsfake import FakeNDS2Server
+        server = FakeNDS2Server({'X1:TEST-A': 16, 'X1:TEST-B': 4})
+        conn = server.connect('localhost', 31200)
+        self.assertEqual(len(conn.find_channels('X1:TEST-*')), 2)
+        buffers = conn.fetch(100, 102, ['X1:TEST-A', 'X1:TEST-B'])
+        self.assertListEqual([b.length for b in buffers], [32, 8])
+        self.assertEqual(buffers[1].data[-1], 101.75)
+        chunks = list(conn.iterate(100, 103, ['X1:TEST-B']))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(chunks[2][0].gps_seconds, 102)
+        self.assertEqual(server.queries, 3)
+
+    def test_connection_pool(self):
+        """Test `gwpy.io.nds.ConnectionPool`
+        """
+        try:
+            from gwpy.io import nds
+        except ImportError as e:
+            self.skipTest(str(e))
+        from gwpy.io.ndsfake import FakeNDS2Server
+        server = FakeNDS2Server({'X1:TEST': 16})
+        pool = nds.ConnectionPool(maxconn=2, connect=server.connect)
+        # test connections are re-used
+        with pool.connection('localhost', 31200) as conn:
+            conn.fetch(100, 101, ['X1:TEST'])
+        with pool.connection('localhost', 31200) as conn2:
+            self.assertIs(conn2, conn)
+        self.assertEqual(len(server.connections), 1)
+        # test concurrent requests get their own connections
+        with pool.connection('localhost', 31200) as conn:
+            with pool.connection('localhost', 31200) as conn2:
+                self.assertIsNot(conn2, conn)
+        self.assertEqual(len(server.connections), 2)
+        # test connection is discarded on error
+        try:
+            with pool.connection('localhost', 31200) as conn:
+                conn.fetch(100, 101, ['X1:MISSING'])
+        except RuntimeError:
+            pass
+        else:
+            self.fail("RuntimeError not raised for missing channel")
+        self.assertTrue(conn.closed)
+        with pool.connection('localhost', 31200) as conn2:
+            self.assertIsNot(conn2, conn)
+        pool.clear()
+        self.assertTrue(all(c.closed for c in server.connections))
+
 
 class CacheIoTestCase(unittest.TestCase):
     @staticmethod
@@ -186,6 +238,65 @@ class DataFindIoTestCase(unittest.TestCase):
             self.assertFalse(
                 datafind.channel_in_frame('X1:NOT-IN_FRAME', TEST_GWF_FILE))
 
+    def test_cached_connection(self):
+        class _Connection(object):
+            host = 'test'
+
+            def __init__(self):
+                self.queries = 0
+
+            def find_types(self, ifo, match=None):
+                self.queries += 1
+                return [ifo, match]
+
+        conn = datafind.CachedConnection(_Connection())
+        self.assertEqual(conn.host, 'test')
+        types = conn.find_types('L', match='R')
+        self.assertListEqual(types, ['L', 'R'])
+        types.append('X')  # check output is a copy
+        self.assertListEqual(conn.find_types('L', match='R'), ['L', 'R'])
+        self.assertEqual(conn.connection.queries, 1)
+        conn.find_types('H')
+        self.assertEqual(conn.connection.queries, 2)
+
+        # check each thread uses its own connection, and that identical
+        # concurrent queries only go to the server once
+        opened = []
+
+        def _factory():
+            opened.append(_Connection())
+            return opened[-1]
+
+        conn = datafind.CachedConnection(_Connection(), factory=_factory)
+        out = parallel.parallel_map(lambda ifo: conn.find_types(ifo),
+                                    ['L'] * 8 + ['H'] * 8, nproc=4,
+                                    threads=True)
+        self.assertListEqual(out, [['L', None]] * 8 + [['H', None]] * 8)
+        self.assertEqual(sum(c.queries for c in opened), 2)
+        self.assertEqual(conn.connection.queries, 0)
+
+    def test_frame_index(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            index = gwf.FrameIndex(os.path.join(tmpdir, 'index.sqlite'))
+            try:
+                toc = index.get(TEST_GWF_FILE)
+            except ImportError as e:
+                self.skipTest(str(e))
+            self.assertListEqual(toc.epochs, [(968654552, 1)])
+            self.assertEqual(toc.segment, Segment(968654552, 968654553))
+            self.assertEqual(len(toc.channels), 3)
+            self.assertEqual(toc.get_type('L1:LDAS-STRAIN'), 'proc')
+            self.assertFalse(toc.get_type('X1:NOT-IN_FRAME'))
+            # record channel info, and check it persists
+            index.record_channels(TEST_GWF_FILE,
+                                  {'L1:LDAS-STRAIN': (16384, 'float64')})
+            toc = gwf.FrameIndex(index.path).get(TEST_GWF_FILE)
+            self.assertTupleEqual(toc.channels['L1:LDAS-STRAIN'],
+                                  ('proc', 16384, 'float64'))
+        finally:
+            shutil.rmtree(tmpdir)
+
     def test_on_tape(self):
         self.assertFalse(datafind.on_tape(TEST_GWF_FILE))
         self.assertFalse(datafind.on_tape(
@@ -32,8 +32,10 @@ import pytest
 from glue.segments import PosInfinity
 from glue.LDBDWClient import LDBDClientException
 
-from gwpy.segments import (Segment, SegmentList,
+from gwpy.segments import (Segment, SegmentList, SegmentArray,
                            DataQualityFlag, DataQualityDict)
+from gwpy.segments.query import (SegmentCache, query_flags)
+from gwpy.segments.dqsegdbfake import FakeDQSegDBServer
 from gwpy.io.registry import identify_format
 from gwpy.plotter import (SegmentPlot, SegmentAxes)
 
@@ -140,6 +142,46 @@ class TestCaseWithQueryMixin(object):
                 raise
 
 
+class SegmentArrayTests(unittest.TestCase):
+    """Unit tests for the `SegmentArray` class
+    """
+    def test_conversion(self):
+        arr = SegmentArray.from_segmentlist(ACTIVE)
+        self.assertEqual(len(arr), 3)
+        self.assertListEqual(arr.to_segmentlist(), ACTIVE)
+        self.assertIsInstance(arr.to_segmentlist()[0], Segment)
+        self.assertEqual(abs(arr), abs(ACTIVE))
+        self.assertRaises(TypeError, SegmentArray.from_segmentlist,
+                          SegmentList([Segment(0, PosInfinity)]))
+
+    def test_math(self):
+        active = SegmentArray.from_segmentlist(ACTIVE)
+        known = SegmentArray.from_segmentlist(KNOWN)
+        self.assertListEqual((active & known).to_segmentlist(),
+                             ACTIVE & KNOWN)
+        self.assertListEqual((active | known).to_segmentlist(),
+                             ACTIVE | KNOWN)
+        self.assertListEqual((active - known).to_segmentlist(),
+                             ACTIVE - KNOWN)
+        self.assertListEqual((~known).to_segmentlist(), ~KNOWN)
+        self.assertListEqual(
+            SegmentArray.intersection(active, known, known).to_segmentlist(),
+            ACTIVE & KNOWN)
+
+    def test_coalesce(self):
+        segs = SegmentList([Segment(5, 7), Segment(1, 3), Segment(2, 4),
+                            Segment(4, 4.5), Segment(8, 8)])
+        arr = SegmentArray.from_segmentlist(segs).coalesce()
+        self.assertListEqual(arr.to_segmentlist(), segs.coalesce())
+
+    def test_contract_protract(self):
+        arr = SegmentArray.from_segmentlist(ACTIVE)
+        self.assertListEqual(arr.contract(.1).to_segmentlist(),
+                             ACTIVE_CONTRACTED)
+        self.assertListEqual(arr.protract(.1).to_segmentlist(),
+                             ACTIVE_PROTRACTED.coalesce())
+
+
 class SegmentListTests(unittest.TestCase):
     """Unit tests for the `SegmentList` class
     """
@@ -159,6 +201,34 @@ class SegmentListTests(unittest.TestCase):
                         'differs from %s' % (tmpfile, SEGWIZ))
         os.remove(tmpfile)
 
+    def test_read_segwizard_formats(self):
+        tmpfile = self.tmpfile % 'txt'
+        with open(tmpfile, 'w') as f:
+            f.write("; comment\n1 2\n3 4  # comment\n5 7\n")
+        try:
+            active = SegmentList.read(tmpfile, coalesce=False, gpstype=float)
+            self.assertListEqual(active, ACTIVE)
+            with open(tmpfile, 'w') as f:
+                f.write("0 1 2 1\n1 3 4 2\n")
+            self.assertRaises(ValueError, SegmentList.read, tmpfile)
+            active = SegmentList.read(tmpfile, strict=False, gpstype=float)
+            self.assertListEqual(active, ACTIVE[:2])
+        finally:
+            os.remove(tmpfile)
+
+    def test_columns(self):
+        from gwpy.segments.io.utils import (segmentlist_from_columns,
+                                            segmentlist_to_columns)
+        segs = SegmentList([Segment(1.5, 2), Segment(-1.25, 3)])
+        cols = segmentlist_to_columns(segs)
+        self.assertListEqual([c.tolist() for c in cols],
+                             [[1, -2], [500000000, 750000000],
+                              [2, 3], [0, 0]])
+        start, start_ns, end, end_ns = cols
+        self.assertListEqual(
+            segmentlist_from_columns(start, end, start_ns=start_ns,
+                                     end_ns=end_ns, gpstype=float), segs)
+
     def test_io_identify(self):
         common.test_io_identify(SegmentList, ['txt', 'hdf', 'hdf5'])
 
@@ -264,6 +334,11 @@ class DataQualityFlagTests(unittest.TestCase, TestCaseWithQueryMixin):
                         'flag.active misset by coalesce')
         self.assertTrue(flag.regular,
                         'flag.regular test failed (should be True)')
+        # check int active segments are not promoted by float known
+        flag = DataQualityFlag(FLAG1, active=[(1, 3)], known=[(0., 2.5)])
+        flag.coalesce()
+        self.assertListEqual(flag.active, [(1, 2.5)])
+        self.assertIsInstance(flag.active[0][0], int)
 
     def test_contract(self):
         flag = DataQualityFlag(FLAG1, active=ACTIVE, known=KNOWN)
@@ -549,6 +624,13 @@ class DataQualityDictTests(unittest.TestCase, TestCaseWithQueryMixin):
         self.assertIsInstance(union, DataQualityFlag)
         self.assertListEqual(union.known, KNOWN + KNOWN2)
         self.assertListEqual(union.active, ACTIVE + ACTIVE2)
+        # check int segments are not promoted by float segments
+        flgd['flag2'] = DataQualityFlag(name='flag2', active=[(1.5, 2.5)],
+                                        known=[(100., 150.)])
+        union = flgd.union()
+        self.assertListEqual(union.active, [(1, 2.5), (3, 4), (5, 7)])
+        self.assertIsInstance(union.active[1][0], int)
+        self.assertIsInstance(union.known[0][0], int)
 
     def test_intersection(self):
         flgd = self.create()
@@ -556,6 +638,13 @@ class DataQualityDictTests(unittest.TestCase, TestCaseWithQueryMixin):
         self.assertIsInstance(inter, DataQualityFlag)
         self.assertListEqual(inter.known, KNOWN & KNOWN2)
         self.assertListEqual(inter.active, ACTIVE & ACTIVE2)
+        # check int segments are not promoted by float segments
+        flgd['flag2'] = DataQualityFlag(name='flag2', active=[(1.5, 6.5)],
+                                        known=[(0., 10.)])
+        inter = flgd.intersection()
+        self.assertListEqual(inter.active, [(1.5, 2), (3, 4), (5, 6.5)])
+        self.assertIsInstance(inter.active[1][0], int)
+        self.assertIsInstance(inter.known[0][1], int)
 
     def test_plot(self):
         flgd = self.create()
@@ -564,5 +653,105 @@ class DataQualityDictTests(unittest.TestCase, TestCaseWithQueryMixin):
         self.assertIsInstance(plot.gca(), SegmentAxes)
         self.assertEqual(len(plot.gca().collections), len(flgd) * 2)
 
+
+class DQSegDBQueryTests(unittest.TestCase):
+    """Tests of `gwpy.segments.query` against a local stand-in server
+    """
+    FLAGS = {
+        'X1:TEST:1': ([(0, 100)], [(10, 20), (60, 70)],
+                      {'flag_description': 'test flag',
+                       'active_indicates_ifo_badness': True}),
+        'X1:TEST:2': ([(50, 100)], [(55, 65)]),
+        'Y1:TEST:1': ([(0, 100)], [(0, 5), (95, 100)]),
+    }
+
+    def setUp(self):
+        self.server = FakeDQSegDBServer(self.FLAGS)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_query_dqsegdb(self):
+        flags = ['X1:TEST:1', 'Y1:TEST:1']
+        result = DataQualityDict.query_dqsegdb(flags, 0, 80,
+                                               url=self.server.url)
+        self.assertListEqual(list(result.keys()), flags)
+        x1 = result['X1:TEST:1']
+        self.assertListEqual(x1.known, [(0, 80)])
+        self.assertListEqual(x1.active, [(10, 20), (60, 70)])
+        self.assertEqual(x1.description, 'test flag')
+        self.assertFalse(x1.isgood)
+        self.assertListEqual(result['Y1:TEST:1'].active, [(0, 5)])
+        # check errors
+        self.assertRaises(Exception, DataQualityDict.query_dqsegdb,
+                          ['X1:MISSING:1'], 0, 80, url=self.server.url)
+        with pytest.warns(UserWarning):
+            result = DataQualityDict.query_dqsegdb(
+                ['X1:MISSING:1', 'X1:TEST:1'], 0, 80, url=self.server.url,
+                on_error='warn')
+        self.assertListEqual(result['X1:MISSING:1'].known, [])
+        self.assertListEqual(result['X1:TEST:1'].known, [(0, 80)])
+
+    def test_query_dqsegdb_flag(self):
+        flag = DataQualityFlag.query_dqsegdb('X1:TEST:1', 0, 80,
+                                             url=self.server.url)
+        self.assertIsInstance(flag, DataQualityFlag)
+        self.assertEqual(flag.name, 'X1:TEST:1')
+        self.assertListEqual(flag.known, [(0, 80)])
+        self.assertListEqual(flag.active, [(10, 20), (60, 70)])
+        self.assertEqual(flag.description, 'test flag')
+        self.assertFalse(flag.isgood)
+        self.assertRaises(Exception, DataQualityFlag.query_dqsegdb,
+                          'X1:MISSING:1', 0, 80, url=self.server.url)
+        self.assertRaises(ValueError, DataQualityFlag.query_dqsegdb,
+                          'TEST:1', 0, 80, url=self.server.url)
+
+    def test_query_versionless(self):
+        result = DataQualityDict.query_dqsegdb(['X1:TEST'], 0, 100,
+                                               url=self.server.url)
+        flag = result['X1:TEST']
+        self.assertListEqual(flag.known, [(0, 100)])
+        # version 2 for [50, 100), version 1 for [0, 50)
+        self.assertListEqual(flag.active, [(10, 20), (55, 65)])
+
+    def test_connection_reuse(self):
+        flags = [('X1:TEST:1', 'X1', 'TEST', 1),
+                 ('Y1:TEST:1', 'Y1', 'TEST', 1)]
+        segs = SegmentList([Segment(0, 10), Segment(20, 30)])
+        results = query_flags(flags, segs, url=self.server.url, nproc=1)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(len(self.server.requests), 4)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_cache(self):
+        tmpfile = tempfile.mktemp(prefix='gwpy_test_segcache',
+                                  suffix='.sqlite')
+        try:
+            cache = SegmentCache(tmpfile)
+            a = DataQualityDict.query_dqsegdb(['X1:TEST:1'], 0, 50,
+                                              url=self.server.url,
+                                              cache=cache)
+            self.assertEqual(len(self.server.requests), 1)
+            # overlapping query should only request the uncovered interval
+            b = DataQualityDict.query_dqsegdb(['X1:TEST:1'], 30, 80,
+                                              url=self.server.url,
+                                              cache=cache)
+            self.assertEqual(len(self.server.requests), 2)
+            self.assertIn('s=50&e=80', self.server.requests[-1])
+            self.assertListEqual(b['X1:TEST:1'].known, [(30, 80)])
+            self.assertListEqual(b['X1:TEST:1'].active, [(60, 70)])
+            self.assertEqual(b['X1:TEST:1'].description,
+                             a['X1:TEST:1'].description)
+            # repeated query should not request anything
+            c = DataQualityDict.query_dqsegdb(['X1:TEST:1'], 0, 80,
+                                              url=self.server.url,
+                                              cache=tmpfile)
+            self.assertEqual(len(self.server.requests), 2)
+            self.assertListEqual(c['X1:TEST:1'].active, [(10, 20), (60, 70)])
+        finally:
+            if os.path.isfile(tmpfile):
+                os.remove(tmpfile)
+
+
 if __name__ == '__main__':
     unittest.main()
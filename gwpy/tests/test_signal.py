@@ -29,6 +29,7 @@ from scipy import signal
 from astropy import units
 
 from gwpy import signal as gwpy_signal
+from gwpy.signal import (polyphase, qtransform, spectral, window)
 
 ONE_HZ = units.Quantity(1, 'Hz')
 
@@ -55,3 +56,199 @@ class FilterDesignTestCase(unittest.TestCase):
         zpk2 = gwpy_signal.notch(60 * ONE_HZ, 16384 * ONE_HZ)
         for a, b in zip(zpk, zpk2):
             nptest.assert_array_almost_equal(a, b)
+
+
+class SpectralTestCase(unittest.TestCase):
+    """`~unittest.TestCase` for the `gwpy.signal.spectral` module
+    """
+    def setUp(self):
+        numpy.random.seed(1)
+        self.data = numpy.random.normal(size=16384)
+
+    def test_segment_view(self):
+        view = spectral.segment_view(self.data, 256, 128)
+        self.assertTupleEqual(view.shape, (127, 256))
+        nptest.assert_array_equal(view[1], self.data[128:384])
+        self.assertRaises(ValueError, spectral.segment_view, self.data, 20000)
+        # check multi-channel views
+        view = spectral.segment_view(numpy.vstack((self.data, self.data)),
+                                     256, 128)
+        self.assertTupleEqual(view.shape, (2, 127, 256))
+        nptest.assert_array_equal(view[1, 1], self.data[128:384])
+
+    def test_median_bias(self):
+        self.assertEqual(spectral.median_bias(1), 1.)
+        self.assertAlmostEqual(spectral.median_bias(3), 1 - 1/2. + 1/3.)
+        self.assertAlmostEqual(spectral.median_bias(1001), numpy.log(2))
+
+    def test_average_spectrum(self):
+        window = signal.get_window('hanning', 256)
+        psd = spectral.average_spectrum(self.data, 256, 128, window, fs=256)
+        nptest.assert_allclose(
+            psd, signal.welch(self.data, fs=256, window=window, nperseg=256,
+                              noverlap=128)[1], rtol=1e-10)
+        # check median averages, including float32 and multi-channel input
+        pgrams = spectral.periodograms(
+            spectral.segment_view(self.data, 256, 128), window, fs=256)
+        median = spectral.average_spectrum(self.data, 256, 128, window,
+                                           fs=256, method='median')
+        nptest.assert_allclose(median, numpy.median(pgrams, axis=0) /
+                               spectral.median_bias(pgrams.shape[0]))
+        median32 = spectral.average_spectrum(self.data.astype('float32'),
+                                             256, 128, window, fs=256,
+                                             method='median')
+        nptest.assert_allclose(median32, median, rtol=1e-4)
+        mm = spectral.average_spectrum(
+            numpy.vstack((self.data, self.data[::-1])), 256, 128, window,
+            fs=256, method='median-mean')
+        self.assertTupleEqual(mm.shape, (2, 129))
+        nptest.assert_allclose(mm[0], spectral.average(
+            pgrams, method='median-mean'))
+        self.assertRaises(ValueError, spectral.average_spectrum,
+                          self.data[:256], 256, 0, window,
+                          method='median-mean')
+
+    def test_strided_spectrogram(self):
+        window = signal.get_window('hanning', 256)
+        out = spectral.strided_spectrogram(self.data, 1024, 256, 128,
+                                           window, fs=256, blocksize=1)
+        self.assertTupleEqual(out.shape, (16, 129))
+        for i, idx in enumerate((0, 1024 - 64)):
+            psd = signal.welch(self.data[idx:idx+1024+128], fs=256,
+                               window=window, nperseg=256, noverlap=128)[1]
+            nptest.assert_allclose(out[i], psd, rtol=1e-10)
+        # check median-mean
+        out = spectral.strided_spectrogram(self.data, 1024, 256, 128,
+                                           window, method='median-mean',
+                                           detrend=False)
+        self.assertTupleEqual(out.shape, (16, 129))
+        self.assertRaises(ValueError, spectral.strided_spectrogram,
+                          self.data, 256, 256, 0, window,
+                          method='median-mean')
+
+    def test_window_cache(self):
+        window.WINDOW_CACHE.clear()
+        win = window.get_window('hanning', 256)
+        nptest.assert_array_equal(win, signal.get_window('hanning', 256))
+        self.assertFalse(win.flags.writeable)
+        self.assertIs(window.get_window('hanning', 256), win)
+        s1, s2 = window.window_sums('hanning', 256)
+        self.assertAlmostEqual(s1, win.sum())
+        self.assertAlmostEqual(s2, (win ** 2).sum())
+        info = window.cache_info()
+        self.assertEqual(info.hits, 2)
+        self.assertEqual(info.misses, 1)
+        # check symmetric windows and arrays
+        self.assertIsNot(window.get_window('hanning', 256, fftbins=False),
+                         win)
+        self.assertIs(window.get_window(win, 256), win)
+        self.assertRaises(ValueError, window.get_window, win, 128)
+
+    def test_whiten(self):
+        window = signal.get_window('hanning', 256)
+        transfer = spectral.whitening_transfer(numpy.ones(129), 256)
+        out = spectral.whiten(self.data, transfer, window, 128)
+        self.assertEqual(out.size, self.data.size)
+        # check interpolation of ASD onto FFT frequencies
+        transfer2 = spectral.whitening_transfer(
+            numpy.ones(65), 256, fs=256, frequencies=numpy.arange(65) * 2)
+        nptest.assert_array_equal(transfer, transfer2)
+        self.assertRaises(ValueError, spectral.whitening_transfer,
+                          numpy.ones(65), 256)
+        # check streaming whitener matches
+        chunks = numpy.array_split(self.data, 37)
+        stream = list(spectral.iter_whiten(chunks, transfer, window, 128))
+        nptest.assert_allclose(numpy.concatenate(stream), out)
+
+
+class PolyphaseTestCase(unittest.TestCase):
+    """`~unittest.TestCase` for the `gwpy.signal.polyphase` module
+    """
+    def setUp(self):
+        numpy.random.seed(1)
+        self.data = numpy.random.normal(size=4096)
+
+    def test_rational_factors(self):
+        self.assertTupleEqual(polyphase.rational_factors(16384, 256), (1, 64))
+        self.assertTupleEqual(polyphase.rational_factors(100, 30), (3, 10))
+        self.assertRaises(ValueError, polyphase.rational_factors, 1, numpy.pi)
+
+    def test_resample(self):
+        for p, q in [(1, 4), (3, 2), (2, 3)]:
+            out = polyphase.resample(self.data, p, q)
+            nptest.assert_allclose(
+                out, signal.resample_poly(self.data, p, q,
+                                          window=polyphase.DEFAULT_WINDOW),
+                atol=1e-12)
+            # check streaming matches
+            resampler = polyphase.Resampler(p, q)
+            chunks = numpy.array_split(self.data, 37)
+            stream = [resampler.update(c) for c in chunks]
+            stream.append(resampler.flush())
+            nptest.assert_allclose(numpy.concatenate(stream), out,
+                                   atol=1e-12)
+            # check multi-channel blocks
+            block = polyphase.resample(
+                numpy.vstack((self.data, self.data * 2)), p, q)
+            nptest.assert_allclose(block[1], out * 2, atol=1e-12)
+        # check filter cache
+        self.assertIs(polyphase.design_filter(1, 4),
+                      polyphase.design_filter(1, 4))
+
+
+class QTransformTestCase(unittest.TestCase):
+    """`~unittest.TestCase` for the `gwpy.signal.qtransform` module
+    """
+    def setUp(self):
+        numpy.random.seed(1)
+        data = numpy.random.normal(size=4096)
+        self.fseries = numpy.fft.rfft(data) / data.size
+        self.fseries[1:] *= 2
+        self.tiling = qtransform.QTiling(4, 1024, qrange=(4, 64))
+
+    def test_plane_energies(self):
+        for plane in self.tiling:
+            energies = plane.energies(self.fseries)
+            rows = plane.to_timeseries(energies)
+            self.assertEqual(len(rows), plane.frequencies.size)
+            # check batched rows match single-tile transforms
+            for qtile, row in zip(plane, rows):
+                nptest.assert_allclose(
+                    row.value, qtile.transform(self.fseries, epoch=0).value)
+            # check transform of a plain array defaults the epoch
+            frequencies, rows2 = plane.transform(self.fseries)
+            self.assertEqual(rows2[0].x0.value, 0)
+            nptest.assert_array_equal(rows2[0].value, rows[0].value)
+        self.assertIs(plane.get_rows(), plane.get_rows())
+        self.assertLessEqual(len(qtransform.QPLANE_ROWS),
+                             qtransform.QPLANE_ROWS.maxsize)
+
+    def test_tiling_transform(self):
+        plane, energies, peak = self.tiling.transform(self.fseries)
+        self.assertIsInstance(plane, qtransform.QPlane)
+        self.assertEqual(peak, max(e.max() for _, e in energies))
+        # check threaded transform gives the same answer
+        plane2, _, peak2 = self.tiling.transform(self.fseries, nproc=2)
+        self.assertEqual(plane.q, plane2.q)
+        self.assertEqual(peak, peak2)
+        # check restricted search
+        _, _, peak3 = self.tiling.transform(self.fseries, gps=2, search=.1)
+        self.assertLessEqual(peak3, peak)
+
+    def test_plane_interpolate(self):
+        plane = list(self.tiling)[0]
+        energies = plane.energies(self.fseries)
+        rows = plane.to_timeseries(energies)
+        # interpolating at the tile times should return the tile energies
+        row = rows[0]
+        for kind in qtransform.INTERPOLATION_KINDS:
+            out = plane.interpolate(energies, row.times.value, kind=kind)
+            self.assertTupleEqual(out.shape, (row.size, len(rows)))
+            nptest.assert_allclose(out[:, 0], row.value)
+        # check frequency interpolation
+        frequencies = numpy.linspace(plane.frange[0], plane.frange[1], 20)
+        out = plane.interpolate(energies, numpy.arange(0, 4, .01),
+                                frequencies=frequencies, kind='linear')
+        self.assertTupleEqual(out.shape, (400, 20))
+        self.assertRaises(ValueError, plane.interpolate, energies, [0],
+                          kind='blah')
@@ -30,8 +30,9 @@ from numpy import testing as nptest
 from astropy import units
 
 from gwpy.time import LIGOTimeGPS
-from gwpy.table import lsctables
-from gwpy.table.io import (omega, trigfind)
+from gwpy.table import (lsctables, EventTable)
+from gwpy.table import rate as rate_
+from gwpy.table.io import (ascii, omega, omicron, trigfind)
 from gwpy.timeseries import (TimeSeries, TimeSeriesDict)
 
 import common
@@ -142,6 +143,33 @@ class SnglBurstTableTestCase(TableTestMixin, unittest.TestCase):
         self.assertIsInstance(rates, TimeSeriesDict)
         table.binned_event_rates(1, 'snr', [2, 4, 6], operator='in')
         table.binned_event_rates(1, 'snr', [(0, 2), (2, 4), (4, 6)])
+        # check single-pass counts against a histogram per bin
+        times = table.get_peak().astype(float)
+        snr = table.get_column('snr')
+        timebins = numpy.arange(rate.size + 1) + rate.x0.value
+        for op, bins in [('>=', [6, 2, 4]), ('<', [2, 4, 6]),
+                         ('in', [(0, 2), (2, 4), (1, 6)])]:
+            rates = table.binned_event_rates(1, 'snr', bins, operator=op)
+            for bin_ in bins:
+                if op == 'in':
+                    mask = (snr >= bin_[0]) & (snr < bin_[1])
+                else:
+                    mask = rate_.OPERATORS[op](snr, bin_)
+                nptest.assert_array_equal(
+                    rates[bin_].value,
+                    numpy.histogram(times[mask], bins=timebins)[0])
+        # check streaming accumulation
+        acc = rate_.EventRateAccumulator(1, timebins[0], timebins[-1],
+                                         'snr', [2, 4, 6])
+        half = len(table) // 2
+        acc.add(times[:half], snr[:half])
+        acc.add(times[half:], snr[half:])
+        streamed = acc.rates()
+        rates = table.binned_event_rates(1, 'snr', [2, 4, 6],
+                                         start=timebins[0], end=timebins[-1])
+        for bin_ in rates:
+            nptest.assert_array_equal(streamed[bin_].value,
+                                      rates[bin_].value)
 
     def test_to_recarray(self):
         table = self.TABLE_CLASS.read(self.TEST_XML_FILE)
@@ -171,3 +199,112 @@ class SnglBurstTableTestCase(TableTestMixin, unittest.TestCase):
                 nptest.assert_array_equal(
                     table.getColumnByName(column).asarray(),
                     table2.getColumnByName(column).asarray())
+
+
+class EventTableTestCase(unittest.TestCase):
+    """`TestCase` for `EventTable`
+    """
+    TEST_XML_FILE = SnglBurstTableTestCase.TEST_XML_FILE
+    TEST_OMEGA_FILE = SnglBurstTableTestCase.TEST_OMEGA_FILE
+
+    def test_read_omega(self):
+        events = EventTable.read(self.TEST_OMEGA_FILE, format='omega')
+        self.assertIsInstance(events, EventTable)
+        self.assertIs(events.table, lsctables.SnglBurstTable)
+        self.assertEqual(len(events), 92)
+        self.assertListEqual(events.columnnames, omega.OMEGA_LIGOLW_COLUMNS)
+        table = lsctables.SnglBurstTable.read(self.TEST_OMEGA_FILE,
+                                              format='omega')
+        nptest.assert_array_equal(events['snr'], table.get_column('snr'))
+        self.assertEqual(events['start_time'][50], 966211219)
+        self.assertEqual(events['start_time_ns'][50], 530621317)
+        nptest.assert_array_equal(events.get_time(),
+                                  table.get_peak().astype(float))
+
+    def test_read_ascii_chunks(self):
+        dtype = [c for c in omega.OMEGA_DTYPE if c is not None]
+        usecols = [i for i, c in enumerate(omega.OMEGA_DTYPE) if c is not None]
+        data = numpy.loadtxt(self.TEST_OMEGA_FILE, dtype=dtype,
+                             usecols=usecols, comments='%')
+        for chunksize in (1, 10, 1000):
+            chunks = list(ascii.iter_ascii_chunks(
+                self.TEST_OMEGA_FILE, dtype, chunksize=chunksize,
+                usecols=usecols, comments='%'))
+            self.assertEqual(len(chunks), -(-data.size // chunksize))
+            nptest.assert_array_equal(numpy.concatenate(chunks), data)
+        # check filtering and event IDs are independent of chunking
+        events = EventTable.read(self.TEST_OMEGA_FILE, format='omega',
+                                 filt='snr > 10')
+        events2 = EventTable.read(self.TEST_OMEGA_FILE, format='omega',
+                                  filt='snr > 10', chunksize=7)
+        nptest.assert_array_equal(events, events2)
+        nptest.assert_array_equal(events['event_id'],
+                                  numpy.arange(len(events)))
+
+    def test_ligolw(self):
+        table = lsctables.SnglBurstTable.read(self.TEST_XML_FILE)
+        columns = ['peak_time', 'peak_time_ns', 'snr', 'central_freq']
+        events = EventTable.from_ligolw(table, columns=columns)
+        self.assertListEqual(events.columnnames, columns)
+        self.assertEqual(len(events), len(table))
+        # check round trip
+        table2 = events.to_ligolw()
+        self.assertIsInstance(table2, lsctables.SnglBurstTable)
+        self.assertListEqual(table2.columnnames, columns)
+        nptest.assert_array_equal(table2.get_column('snr'), events['snr'])
+        # check recarray view
+        arr = events.to_recarray()
+        self.assertNotIsInstance(arr, EventTable)
+        arr['snr'][0] = 1e6
+        self.assertEqual(events['snr'][0], 1e6)
+
+    def test_filter_sort(self):
+        table = lsctables.SnglBurstTable.read(self.TEST_XML_FILE)
+        events = EventTable.from_ligolw(table)
+        snr = events['snr']
+        times = events.get_time()
+        t0 = times.min() + 5
+        loud = events.filter('snr > 5', ('time', '<', t0))
+        self.assertIsInstance(loud, EventTable)
+        self.assertIs(loud.table, lsctables.SnglBurstTable)
+        nptest.assert_array_equal(loud['snr'], snr[(snr > 5) & (times < t0)])
+        # callable filter
+        loud2 = events.filter(lambda t: t['snr'] > 5)
+        nptest.assert_array_equal(loud2['snr'], snr[snr > 5])
+        self.assertRaises(ValueError, events.filter, 'snr is big')
+        # sort
+        sorted_ = events.sort_by('snr', reverse=True)
+        nptest.assert_array_equal(sorted_['snr'], numpy.sort(snr)[::-1])
+        # select
+        sub = events.select(['time', 'snr'])
+        self.assertListEqual(sub.columnnames, ['time', 'snr'])
+        nptest.assert_array_equal(sub.get_time(), times)
+        # rates
+        rate = events.event_rate(1)
+        self.assertIsInstance(rate, TimeSeries)
+        self.assertEqual(rate.value.sum(), len(events))
+
+    def test_omicron_push_down(self):
+        # check column pruning
+        self.assertListEqual(
+            omicron.branches_for_columns(['peak_time', 'snr', 'duration']),
+            ['time', 'tstart', 'tend', 'snr'])
+        # check condition splitting
+        func = lambda t: t['snr'] > 5
+        conditions, remainder = omicron.split_conditions(
+            ['snr > 8', ('central_freq', '<', 100), 'duration > 1', func])
+        self.assertListEqual(conditions, [('snr', '>', 8.),
+                                          ('frequency', '<', 100.)])
+        self.assertListEqual(remainder, ['duration > 1', func])
+        self.assertEqual(omicron.selection_string(conditions),
+                         'snr > 8.0 && frequency < 100.0')
+        self.assertTupleEqual(omicron.split_conditions(None), ([], None))
+        # check columns from partial branch data
+        data = {'time': numpy.array([1.5, 2.25]),
+                'snr': numpy.array([6., 10.])}
+        columns = omicron.sngl_burst_columns_from_root(
+            data, ['peak_time', 'peak_time_ns', 'snr', 'amplitude', 'flow'])
+        self.assertListEqual(list(columns),
+                             ['peak_time', 'peak_time_ns', 'snr', 'amplitude'])
+        nptest.assert_array_equal(columns['peak_time_ns'], [5e8, 2.5e8])
+        nptest.assert_array_equal(columns['amplitude'], [18., 50.])
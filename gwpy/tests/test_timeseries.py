@@ -41,6 +41,7 @@ from astropy.io.registry import (get_reader, register_reader)
 
 from gwpy.time import Time
 
+from gwpy.timeseries import trend
 from gwpy.timeseries import (TimeSeries, StateVector, TimeSeriesDict,
                              StateVectorDict, TimeSeriesList)
 from gwpy.segments import (Segment, DataQualityFlag, DataQualityDict)
@@ -149,6 +150,16 @@ class TimeSeriesTestMixin(object):
             self.assertRaises(ValueError, self.TEST_CLASS.read, Cache(),
                               self.channel, format=format)
 
+            # test reading a sub-span
+            ts = self.TEST_CLASS.read(TEST_GWF_FILE, self.channel,
+                                      format=format)
+            start, end = ts.span[0] + 1, ts.span[1] - 1
+            ts2 = self.TEST_CLASS.read(TEST_GWF_FILE, self.channel,
+                                       format=format, start=start, end=end)
+            self.assertEqual(ts2.span, (start, end))
+            nptest.assert_array_equal(ts2.value,
+                                      ts.crop(start, end).value)
+
             # test cache method with `nproc=2`
             c = Cache.from_urls([TEST_GWF_FILE])
             ts = self.TEST_CLASS.read(c, self.channel, nproc=2, format=format)
@@ -159,6 +170,19 @@ class TimeSeriesTestMixin(object):
     def test_frame_read_framecpp(self):
         return self._test_frame_read_format('framecpp')
 
+    def test_frame_fill_gaps(self):
+        from gwpy.timeseries.io.gwf.framecpp import _fill_gaps
+        ts = self.TEST_CLASS(numpy.ones(10), x0=0, dx=1)
+        # data missing at the ends are cropped, not padded
+        out = _fill_gaps(ts, [(2, 5), (5, 8)])
+        self.assertEqual(out.span, (2, 8))
+        # but gaps in the middle are not allowed
+        self.assertRaises(ValueError, _fill_gaps, ts, [(0, 4), (6, 10)])
+        # unless pad is given
+        out = _fill_gaps(ts, [(2, 4), (6, 8)], pad=0)
+        self.assertEqual(out.span, (0, 10))
+        nptest.assert_array_equal(out.value, [0, 0, 1, 1, 0, 0, 1, 1, 0, 0])
+
     def test_frame_read_cache(self):
         try:
             a = self.TEST_CLASS.read(TEST_GWF_FILE, self.channel)
@@ -274,7 +298,13 @@ class TimeSeriesTestMixin(object):
         ts1 = self.create(sample_rate=100)
         ts2 = ts1.resample(10, ftype='iir')
         self.assertEquals(ts2.sample_rate, ONE_HZ*10)
-        ts1.resample(10, ftype='fir', n=10)
+        ts2 = ts1.resample(10, ftype='fir', n=10)
+        self.assertEqual(ts2.size, -(-ts1.size // 10))
+        self.assertEqual(ts2.epoch, ts1.epoch)
+        # test non-integer ratio
+        ts2 = ts1.resample(30)
+        self.assertEquals(ts2.sample_rate, ONE_HZ*30)
+        self.assertEqual(ts2.size, -(-ts1.size * 3 // 10))
 
     def test_to_from_lal(self):
         ts = self.create()
@@ -415,15 +445,23 @@ class TimeSeriesTestCase(TimeSeriesTestMixin, SeriesTestCase):
         ts.psd(fftlength=0.4, overlap=0.2)
         # test methods
         ts.psd(fftlength=0.4, overlap=0.2, method='welch')
+        ts.psd(fftlength=0.4, overlap=0.2, method='median-mean')
+        ts.psd(fftlength=0.4, overlap=0.2, method='median')
+        # test check for at least two averages
+        self.assertRaises(ValueError, ts.psd, method='median-mean')
+        # test single-precision input
+        fs = ts.astype('float32').psd(fftlength=0.4, overlap=0.2,
+                                      method='median-mean')
+        nptest.assert_allclose(
+            fs.value, ts.psd(fftlength=0.4, overlap=0.2,
+                             method='median-mean').value, rtol=1e-3)
         try:
             ts.psd(fftlength=0.4, overlap=0.2, method='lal-welch')
         except ImportError as e:
             pass
         else:
-            ts.psd(fftlength=0.4, overlap=0.2, method='median-mean')
-            ts.psd(fftlength=0.4, overlap=0.2, method='median')
-            # test check for at least two averages
-            self.assertRaises(ValueError, ts.psd, method='median-mean')
+            ts.psd(fftlength=0.4, overlap=0.2, method='lal-median-mean')
+            ts.psd(fftlength=0.4, overlap=0.2, method='lal-median')
 
     def test_asd(self):
         ts = self._read()
@@ -464,7 +502,7 @@ class TimeSeriesTestCase(TimeSeriesTestMixin, SeriesTestCase):
         self.assertEqual(sg.span, ts.span)
         # check the same result as PSD
         psd = ts.psd()
-        nptest.assert_array_equal(sg.data[0], psd.data)
+        nptest.assert_allclose(sg.data[0], psd.data, rtol=1e-10)
         # test fftlength
         sg = ts.spectrogram(1, fftlength=0.5)
         self.assertEqual(sg.shape, (1, 0.5 * ts.size//2+1))
@@ -480,6 +518,17 @@ class TimeSeriesTestCase(TimeSeriesTestMixin, SeriesTestCase):
         self.assertArraysEqual(sg, sg2)
         # test methods
         ts.spectrogram(0.5, fftlength=0.2, method='bartlett')
+        sg = ts.spectrogram(0.5, fftlength=0.1, overlap=0.05,
+                            method='median-mean')
+        self.assertEqual(sg.shape, (2, 0.1 * ts.size//2 + 1))
+        sg2 = ts.spectrogram(0.5, fftlength=0.1, overlap=0.05,
+                             method='median')
+        self.assertEqual(sg2.shape, sg.shape)
+        # check strided methods match the PSD of each stride
+        sg = ts.spectrogram(0.5, fftlength=0.1, overlap=0.05,
+                            method='bartlett')
+        psd = ts[:8192+819].psd(fftlength=0.1, method='bartlett')
+        nptest.assert_allclose(sg.data[0], psd.data, rtol=1e-10)
 
     def test_spectrogram2(self):
         ts = self._read()
@@ -495,7 +544,7 @@ class TimeSeriesTestCase(TimeSeriesTestMixin, SeriesTestCase):
         self.assertEqual(sg.span, ts.span)
         # test the same result as spectrogam
         sg1 = ts.spectrogram(1)
-        nptest.assert_array_equal(sg.data, sg1.data)
+        nptest.assert_allclose(sg.data, sg1.data, rtol=1e-10)
         # test fftlength
         sg = ts.spectrogram2(0.5)
         self.assertEqual(sg.shape, (2, 0.5 * ts.size//2+1))
@@ -573,6 +622,40 @@ class TimeSeriesTestCase(TimeSeriesTestMixin, SeriesTestCase):
         # test breaks when you try and 'fir' notch
         self.assertRaises(NotImplementedError, ts.notch, 10, type='fir')
 
+    def test_trend(self):
+        data = numpy.random.normal(size=1000)
+        ts = self.TEST_CLASS(data, sample_rate=100, unit='m', name='test')
+        trends = ts.trend(1)
+        self.assertIsInstance(trends, TimeSeriesDict)
+        self.assertListEqual(list(trends.keys()),
+                             ['min', 'max', 'mean', 'rms', 'std', 'n'])
+        self.assertEqual(trends['mean'].name, 'test.mean')
+        self.assertEqual(trends['mean'].unit, units.m)
+        self.assertEqual(trends['mean'].dt, 1 * units.second)
+        blocks = data.reshape((10, 100))
+        nptest.assert_array_equal(trends['min'].value, blocks.min(axis=1))
+        nptest.assert_array_equal(trends['max'].value, blocks.max(axis=1))
+        nptest.assert_allclose(trends['mean'].value, blocks.mean(axis=1))
+        nptest.assert_allclose(trends['std'].value, blocks.std(axis=1))
+        nptest.assert_allclose(ts.rms(1).value,
+                               numpy.sqrt((blocks ** 2).mean(axis=1)))
+        # check partial strides and NaN gaps
+        ts.value[:50] = numpy.nan
+        trends = ts[:950].trend(1, statistics=['mean', 'n'])
+        self.assertListEqual(list(trends.keys()), ['mean', 'n'])
+        nptest.assert_array_equal(trends['n'].value, [50] + [100] * 8 + [50])
+        self.assertAlmostEqual(trends['mean'].value[0], data[50:100].mean())
+        self.assertEqual(ts[:950].trend(1, partial=False)['n'].size, 9)
+        self.assertRaises(ValueError, ts.trend, .015)
+        self.assertRaises(ValueError, ts.trend, 1, statistics=['median'])
+        # check streaming trends match
+        stream = list(trend.iter_trend(
+            (ts[:950][i:i+130] for i in range(0, 950, 130)), 1,
+            statistics=['max', 'n']))
+        nptest.assert_array_equal(
+            numpy.concatenate([t['n'].value for t in stream]),
+            trends['n'].value)
+
     def _test_losc_inner(self, loscfile):
         ts = self.TEST_CLASS.read(loscfile, 'Strain', format='losc')
         self.assertEqual(ts.x0, units.Quantity(931069952, 's'))
@@ -594,6 +677,13 @@ class TimeSeriesTestCase(TimeSeriesTestMixin, SeriesTestCase):
             self.assertTupleEqual(qspecgram.shape, (32000, 2560))
             self.assertAlmostEqual(qspecgram.q, 11.31370849898476)
             self.assertAlmostEqual(qspecgram.value.max(), 37.035843858490509)
+            # test other interpolation and output options
+            qspecgram = ts.q_transform(method='welch', interp='linear',
+                                       fres=100, logf=True)
+            self.assertTupleEqual(qspecgram.shape, (32000, 100))
+            qspecgram = ts.q_transform(method='welch', fres=None,
+                                       outseg=(gps - 1, gps + 1))
+            self.assertEqual(qspecgram.shape[0], 2000)
 
 
 class StateVectorTestCase(TimeSeriesTestMixin, SeriesTestCase):
@@ -626,6 +716,21 @@ class StateVectorTestCase(TimeSeriesTestMixin, SeriesTestCase):
             self.assertEqual(flag.name, sv.bits[i])
             self.assertListEqual(flag.known, [sv.span])
 
+    def test_to_dqflags_minlen(self):
+        sv = self.TEST_CLASS([1, 3, 1, 0, 2, 2, 3, 1], bits=['a', 'b'],
+                             sample_rate=2, epoch=10, dtype='uint32')
+        dqdict = sv.to_dqflags()
+        self.assertListEqual(dqdict['a'].active, [(10, 11.5), (13, 14)])
+        self.assertListEqual(dqdict['b'].active, [(10.5, 11), (12, 13.5)])
+        self.assertListEqual(dqdict['b'].known, [(10, 14)])
+        dqdict = sv.to_dqflags(minlen=2, dtype=int)
+        self.assertListEqual(dqdict['a'].active, [(10, 11), (13, 14)])
+        self.assertListEqual(dqdict['b'].active, [(12, 13)])
+        self.assertIsInstance(dqdict['b'].active[0][0], int)
+        # check single bit conversion matches
+        flag = sv.get_bit_series(['b'])['b'].to_dqflag(minlen=2)
+        self.assertListEqual(flag.active, [(12, 13.5)])
+
     def test_plot(self):
         data = self.fetch_open_data()
         # test segment plotting
@@ -649,6 +754,42 @@ class StateVectorTestCase(TimeSeriesTestMixin, SeriesTestCase):
         ts1 = self.create(sample_rate=100)
         ts2 = ts1.resample(10)
         self.assertEquals(ts2.sample_rate, ONE_HZ*10)
+        # test downsampling takes the logical AND of each bit
+        sv = self.TEST_CLASS([1, 3, 3, 3, 7, 6, 2, 0], bits=['a', 'b', 'c'],
+                             sample_rate=4, dtype='uint32')
+        down = sv.resample(2)
+        self.assertEqual(down.sample_rate, 2 * units.Hz)
+        nptest.assert_array_equal(down.value, [1, 3, 6, 0])
+        # test downsampling without bits, including too little data
+        sv2 = self.TEST_CLASS([5, 7, 12, 13], sample_rate=4, dtype='uint32')
+        nptest.assert_array_equal(sv2.resample(2).value, [5, 12])
+        self.assertEqual(sv2[:1].resample(2).size, 0)
+        # test upsampling repeats samples
+        up = down.resample(8)
+        self.assertEqual(up.sample_rate, 8 * units.Hz)
+        self.assertEqual(up.x0, sv.x0)
+        nptest.assert_array_equal(up.value, numpy.repeat([1, 3, 6, 0], 4))
+        self.assertRaises(ValueError, sv.resample, 3)
+
+    def test_get_bit_series(self):
+        sv = self.TEST_CLASS([1, 3, 5, 6, 4, 0], bits=['a', 'b', 'c'],
+                             sample_rate=1, dtype='uint32')
+        bitseries = sv.get_bit_series()
+        self.assertListEqual(list(bitseries.keys()), ['a', 'b', 'c'])
+        nptest.assert_array_equal(bitseries['a'].value,
+                                  [True, True, True, False, False, False])
+        nptest.assert_array_equal(bitseries['b'].value,
+                                  [False, True, False, True, False, False])
+        nptest.assert_array_equal(bitseries['c'].value,
+                                  [False, False, True, True, True, False])
+        bitseries = sv.get_bit_series(['c'])
+        self.assertListEqual(list(bitseries.keys()), ['c'])
+        nptest.assert_array_equal(sv.boolean.value[:, 2],
+                                  bitseries['c'].value)
+        with self.assertRaises(ValueError) as exc:
+            sv.get_bit_series(['d'])
+        self.assertEqual(str(exc.exception),
+                         "Bit 'd' not found in StateVector")
 
 
 # -- TimeSeriesDict tests ------------------------------------------------------
@@ -702,6 +843,22 @@ class TimeSeriesDictTestCase(unittest.TestCase):
                 tsd2 = self.TEST_CLASS.read(f.name, tsd.keys())
             self.assertDictEqual(tsd, tsd2)
 
+    def test_trend(self):
+        tsd = self.TEST_CLASS()
+        for i, name in enumerate(self.channels):
+            tsd[name] = self.TEST_CLASS.EntryClass(
+                numpy.arange(1000) * (i + 1), sample_rate=100, name=name)
+        for nproc in (1, 2):
+            trends = tsd.trend(1, statistics=['mean', 'max'], nproc=nproc)
+            self.assertIsInstance(trends, self.TEST_CLASS)
+            self.assertListEqual(
+                list(trends.keys()),
+                ['%s.%s' % (c, s) for c in self.channels
+                 for s in ('mean', 'max')])
+            nptest.assert_array_equal(
+                trends['%s.max' % self.channels[1]].value,
+                (numpy.arange(10) * 100 + 99) * 2)
+
     def test_plot(self):
         tsd = self.read()
         plot = tsd.plot()
@@ -714,6 +871,18 @@ class TimeSeriesDictTestCase(unittest.TestCase):
         for key in tsd:
             self.assertEqual(tsd[key].sample_rate, 2048 * units.Hertz)
 
+    def test_resample_block(self):
+        tsd = self.TEST_CLASS()
+        for i, name in enumerate(self.channels):
+            tsd[name] = self.TEST_CLASS.EntryClass(
+                numpy.random.normal(size=1024), sample_rate=256, name=name)
+        single = tsd[self.channels[0]].resample(64)
+        tsd.resample(64)
+        for key in tsd:
+            self.assertEqual(tsd[key].sample_rate, 64 * units.Hertz)
+            self.assertEqual(tsd[key].name, key)
+        nptest.assert_allclose(tsd[self.channels[0]].value, single.value)
+
     def test_crop(self):
         tsd = self.read()
         tsd.crop(968654552, 968654552.5)
@@ -738,10 +907,52 @@ class TimeSeriesDictTestCase(unittest.TestCase):
         for key in b:
             self.assertEqual(b[key].span, Segment(968654552, 968654553))
 
+    def test_fetch_fake_nds2(self):
+        try:
+            import nds2
+        except ImportError as e:
+            self.skipTest(str(e))
+        from gwpy.io.ndsfake import FakeNDS2Server
+        server = FakeNDS2Server({'X1:TEST-A': 16, 'X1:TEST-B': 4}, stride=2)
+        names = ['X1:TEST-A', 'X1:TEST-B']
+        # test fetch, which should crop to the requested span
+        data = self.TEST_CLASS.fetch(names, 100.5, 105,
+                                     connection=server.connect('localhost'))
+        self.assertListEqual(list(data.keys()), names)
+        for key in names:
+            self.assertEqual(data[key].span, Segment(100.5, 105))
+            nptest.assert_array_equal(data[key].value,
+                                      data[key].times.value)
+        # test that missing data raise an error, unless padding
+        server = FakeNDS2Server({'X1:TEST-A': 16, 'X1:TEST-B': 4}, stride=2,
+                                gaps=[(102, 104)])
+        self.assertRaises(ValueError, self.TEST_CLASS.fetch, names, 100, 106,
+                          connection=server.connect('localhost'))
+        data = self.TEST_CLASS.fetch(names, 100, 106, pad=-1,
+                                     connection=server.connect('localhost'))
+        gap = data['X1:TEST-A'].crop(102, 104).value
+        nptest.assert_array_equal(gap, -1 * numpy.ones(32))
+        # test fetch_iter with a rolling window
+        conn = server.connect('localhost')
+        spans = []
+        for data in self.TEST_CLASS.fetch_iter(names, 100, 106, window=4,
+                                               connection=conn):
+            spans.append(data['X1:TEST-B'].span)
+            nptest.assert_array_equal(data['X1:TEST-B'].value[-8:],
+                                      data['X1:TEST-B'].times.value[-8:])
+        self.assertListEqual(spans, [Segment(98, 102), Segment(100, 104),
+                                     Segment(102, 106)])
+
 
 class StateVectorDictTestCase(TimeSeriesDictTestCase):
     TEST_CLASS = StateVectorDict
 
+    def test_trend(self):
+        self.skipTest("StateVectorDict does not support trends")
+
+    def test_resample_block(self):
+        self.skipTest("StateVectorDict does not support block resampling")
+
     def test_plot(self):
         tsd = self.read()
         plot = tsd.plot()
@@ -21,12 +21,15 @@
 
 import os
 import subprocess
+import tempfile
+
+import numpy
 
 import pytest
 
 from compat import unittest
 
-from gwpy.utils import shell
+from gwpy.utils import (lru, parallel, shell)
 
 __author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
 
@@ -56,3 +59,92 @@ class UtilsTestCase(unittest.TestCase):
         else:
             result = result.rstrip('\n')
         self.assertEqual(shell.which('true'), result)
+
+
+# -- parallel -----------------------------------------------------------------
+
+def _double_into(args):
+    shared, idx = args
+    if idx < 0:
+        raise ValueError(str(idx))
+    shared.array[idx] *= 2
+    return idx
+
+
+def _share_range(n):
+    if n < 0:
+        raise ValueError(str(n))
+    return parallel.share({'data': numpy.arange(n)})
+
+
+def _shared_files():
+    return set(f for f in os.listdir(parallel.SHARED_MEMORY_DIR or
+                                     tempfile.gettempdir())
+               if f.startswith('gwpy-shm-'))
+
+
+class ParallelTestCase(unittest.TestCase):
+    """`TestCase` for the `gwpy.utils.parallel` module
+    """
+    def test_shared_array(self):
+        data = numpy.arange(10.)
+        shared = parallel.SharedArray.from_array(data)
+        try:
+            numpy.testing.assert_array_equal(numpy.asarray(shared), data)
+            out = parallel.parallel_map(
+                _double_into, [(shared, i) for i in range(5)], nproc=2)
+            self.assertListEqual(out, list(range(5)))
+            numpy.testing.assert_array_equal(
+                shared.array, numpy.concatenate((data[:5] * 2, data[5:])))
+        finally:
+            shared.unlink()
+        self.assertFalse(os.path.exists(shared.filename))
+
+    def test_parallel_map_error(self):
+        shared = parallel.SharedArray((4,))
+        try:
+            with pytest.raises(ValueError) as exc:
+                parallel.parallel_map(
+                    _double_into, [(shared, i) for i in (0, -3, 1, -1)],
+                    nproc=4)
+            self.assertEqual(str(exc.value), '-3')
+        finally:
+            shared.unlink()
+
+    def test_share(self):
+        out = parallel.parallel_map(_share_range, [10, 20], nproc=2)
+        out = list(map(parallel.unshare, out))
+        self.assertIsInstance(out[0], dict)
+        numpy.testing.assert_array_equal(out[1]['data'], numpy.arange(20))
+        # check that shared results are released when another call fails
+        before = _shared_files()
+        for nproc in (1, 2):
+            self.assertRaises(ValueError, parallel.parallel_map,
+                              _share_range, [10, -1, 20], nproc=nproc)
+            self.assertSetEqual(_shared_files(), before)
+
+    def test_split(self):
+        self.assertListEqual(parallel.split(10, 3),
+                             [(0, 3), (3, 6), (6, 10)])
+        self.assertListEqual(parallel.split(2, 4), [(0, 1), (1, 2)])
+        self.assertListEqual(parallel.split(0, 4), [])
+
+
+# -- lru ----------------------------------------------------------------------
+
+class LRUCacheTestCase(unittest.TestCase):
+    """`TestCase` for the `gwpy.utils.lru` module
+    """
+    def test_get(self):
+        cache = lru.LRUCache(maxsize=2)
+        self.assertEqual(cache.get('a', lambda: 1), 1)
+        self.assertEqual(cache.get('a', lambda: 2), 1)
+        cache.get('b', lambda: 2)
+        cache.get('a', lambda: 0)
+        # 'b' is now the least recently used, so is discarded
+        cache.get('c', lambda: 3)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertTupleEqual(tuple(cache.cache_info()), (2, 3, 2, 2))
+        cache.clear()
+        self.assertTupleEqual(tuple(cache.cache_info()), (0, 0, 2, 0))
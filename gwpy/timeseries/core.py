@@ -45,7 +45,7 @@ from ..data import (Array2D, Series)
 from ..detector import (Channel, ChannelList)
 from ..io import (reader, writer, datafind)
 from ..time import (Time, to_gps)
-from ..utils import (gprint, with_import)
+from ..utils import (gprint, parallel, with_import)
 from ..utils.docstring import interpolate_docstring
 from ..utils.compat import OrderedDict
 
@@ -53,6 +53,9 @@ __author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
 
 __all__ = ['TimeSeriesBase', 'ArrayTimeSeries', 'TimeSeriesBaseDict']
 
+# minimum number of threads to use when finding and reading frame data
+FIND_NTHREADS = 8
+
 _UFUNC_STRING = {'less': '<',
                  'less_equal': '<=',
                  'equal': '==',
@@ -550,6 +553,87 @@ def as_series_dict_class(seriesclass):
     return decorate_class
 
 
+def _allocate_from_nds2_buffer(seriesclass, buffer_, start, end, dtype=None,
+                               pad=None):
+    """Allocate a new series to hold data for the given `nds2.buffer`
+
+    Parameters
+    ----------
+    seriesclass : `type`
+        the `TimeSeriesBase` sub-class to create
+    buffer_ : `nds2.buffer`
+        the first buffer of data for this channel, used for metadata
+    start : `float`
+        the GPS start time of the output series
+    end : `float`
+        the GPS end time of the output series
+    dtype : `numpy.dtype`, optional
+        the data type of the output, defaults to that of the buffer
+    pad : `float`, optional
+        value with which to fill the new array, by default the
+        array is not initialised
+
+    Returns
+    -------
+    series : `TimeSeriesBase`
+        a new, empty series spanning `[start, end)`
+    """
+    meta = seriesclass.from_nds2_buffer(buffer_, copy=False)
+    if dtype is None:
+        dtype = meta.dtype
+    rate = meta.sample_rate.value
+    nsamp = int(round((float(end) - float(start)) * rate))
+    data = numpy.empty(nsamp, dtype=dtype)
+    if pad is not None:
+        data.fill(pad)
+    return seriesclass(data, epoch=start, sample_rate=rate, unit=meta.unit,
+                       name=meta.name, channel=meta.channel, copy=False)
+
+
+def _fill_from_nds2_buffer(series, buffer_):
+    """Copy the data from an `nds2.buffer` into place in a series
+
+    Any data in the buffer outside of the span of the series are ignored.
+
+    Returns
+    -------
+    filled : `tuple` of `int`
+        the `(start, stop)` indices of the samples copied, which may be
+        empty
+    """
+    t0 = buffer_.gps_seconds + buffer_.gps_nanoseconds * 1e-9
+    idx = int(round((t0 - series.x0.value) / series.dx.value))
+    data = buffer_.data
+    a = max(0, -idx)
+    b = min(data.shape[0], series.shape[0] - idx)
+    if b <= a:
+        return idx + a, idx + a
+    series.value[idx+a:idx+b] = data[a:b]
+    return idx + a, idx + b
+
+
+def _check_nds2_coverage(series, filled):
+    """Raise a `ValueError` if any samples of a series were not filled
+
+    Parameters
+    ----------
+    series : `TimeSeriesBase`
+        the output series
+    filled : `list` of `tuple`
+        the `(start, stop)` indices of each block of samples filled
+    """
+    end = 0
+    for a, b in sorted(filled) + [(series.shape[0], series.shape[0])]:
+        if a > end:
+            x0 = series.x0.value
+            dx = series.dx.value
+            raise ValueError("Cannot fetch discontiguous data for %s, "
+                             "missing data in [%s, %s), give pad= to fill "
+                             "gaps" % (series.name, x0 + end * dx,
+                                       x0 + a * dx))
+        end = max(end, b)
+
+
 @as_series_dict_class(TimeSeriesBase)
 class TimeSeriesBaseDict(OrderedDict):
     """Ordered key-value mapping of named `TimeSeriesBase` objects
@@ -687,7 +771,7 @@ class TimeSeriesBaseDict(OrderedDict):
         """
         if not isinstance(rate, dict):
             rate = dict((c, rate) for c in self)
-        for key, resamp in rate.iteritems():
+        for key, resamp in rate.items():
             self[key] = self[key].resample(resamp, **kwargs)
         return self
 
@@ -757,9 +841,12 @@ class TimeSeriesBaseDict(OrderedDict):
         if host is not None and port is not None and connection is None:
             if verbose:
                 gprint("Connecting to %s:%s..." % (host, port), end=' ')
-            connection = ndsio.auth_connect(host, port)
-            if verbose:
-                gprint("Connected.")
+            with ndsio.POOL.connection(host, port) as connection:
+                if verbose:
+                    gprint("Connected.")
+                return cls.fetch(channels, start, end, connection=connection,
+                                 verify=verify, verbose=verbose, pad=pad,
+                                 type=type, dtype=dtype)
         elif connection is not None and verbose:
             gprint("Received connection to %s:%d."
                    % (connection.get_host(), connection.get_port()))
@@ -850,7 +937,7 @@ class TimeSeriesBaseDict(OrderedDict):
             try:
                 segs = ChannelList.query_nds2_availability(
                     channels, istart, iend, host=connection.get_host())
-            except (RuntimeError, CalledProcessError) as e:
+            except (RuntimeError, OSError, CalledProcessError) as e:
                 warnings.warn(str(e), ndsio.NDSWarning)
             else:
                 for channel in segs:
@@ -865,31 +952,37 @@ class TimeSeriesBaseDict(OrderedDict):
                 gprint('Found %d viable segments of data with %.2f%% coverage'
                        % (len(qsegs), abs(qsegs) / abs(allsegs) * 100))
 
+        # fill each channel's output array in place from each buffer,
+        # any gaps between the segments are filled with `pad`
+        names = [c.ndsname for c in qchannels]
         out = cls()
-        for (istart, iend) in qsegs:
-            istart = int(istart)
-            iend = int(iend)
+        filled = dict((c, []) for c in channels)
+        for (segstart, segend) in qsegs:
+            segstart = int(segstart)
+            segend = int(segend)
             # fetch data
             if verbose:
                 gprint('Downloading data... ', end='\r')
 
             # determine buffer duration
-            data = connection.iterate(istart, iend,
-                                      [c.ndsname for c in qchannels])
+            data = connection.iterate(segstart, segend, names)
             nsteps = 0
             i = 0
             for buffers in data:
                 for buffer_, c in zip(buffers, channels):
-                    ts = cls.EntryClass.from_nds2_buffer(
-                        buffer_, dtype=dtype.get(c))
-                    out.append({c: ts}, pad=pad,
-                               gap=pad is None and 'raise' or 'pad')
+                    try:
+                        series = out[c]
+                    except KeyError:
+                        series = out[c] = _allocate_from_nds2_buffer(
+                            cls.EntryClass, buffer_, istart, iend,
+                            dtype=dtype.get(c), pad=pad)
+                    filled[c].append(_fill_from_nds2_buffer(series, buffer_))
                 if not nsteps:
                     if have_minute_trends:
                         dur = buffer_.length * 60
                     else:
                         dur = buffer_.length / buffer_.channel.sample_rate
-                    nsteps = ceil((iend - istart) / dur)
+                    nsteps = ceil((segend - segstart) / dur)
                 i += 1
                 if verbose:
                     gprint('Downloading data... %d%%' % (100 * i // nsteps),
@@ -897,13 +990,11 @@ class TimeSeriesBaseDict(OrderedDict):
                     if i == nsteps:
                         gprint('')
 
-        # pad to end of request if required
-        if len(qsegs) and iend < float(end):
-            dt = float(end) - float(iend)
+        # without padding, all samples must have been received
+        if pad is None:
             for channel in out:
-                nsamp = dt * out[channel].sample_rate.value
-                out[channel].append(
-                    numpy.ones(nsamp, dtype=out[channel].dtype) * pad)
+                _check_nds2_coverage(out[channel], filled[channel])
+
         # match request exactly
         for channel in out:
             if istart > start or iend < end:
@@ -913,6 +1004,118 @@ class TimeSeriesBaseDict(OrderedDict):
             gprint('Success.')
         return out
 
+    @classmethod
+    def fetch_iter(cls, channels, start, end, stride=None, window=None,
+                   host=None, port=None, connection=None, pad=None,
+                   dtype=None):
+        """Iterate over data fetched from NDS for a number of channels.
+
+        Parameters
+        ----------
+        channels : `list`
+            required data channels.
+        start : `~gwpy.time.Time`, or float
+            GPS start time of data span.
+        end : `~gwpy.time.Time`, or float
+            GPS end time of data span.
+        stride : `int`, optional
+            duration (seconds) of data to yield each iteration, defaults
+            to the NDS server's choice of buffer length
+        window : `float`, optional
+            duration (seconds) of a rolling window of data to yield,
+            by default each chunk is yielded individually
+        host : `str`, optional
+            URL of NDS server to use, defaults to observatory site host.
+        port : `int`, optional
+            port number for NDS server query, must be given with `host`.
+        connection : :class:`~gwpy.io.nds.NDS2Connection`
+            open NDS connection to use.
+        pad : `float`, optional
+            value with which to fill the rolling window before data have
+            been received, default: ``0``
+        dtype : `numpy.dtype`, `str`, `type`, or `dict`
+            numeric data type for returned data, e.g. `numpy.float`, or
+            `dict` of (`channel`, `dtype`) pairs
+
+        Yields
+        ------
+        data : :class:`~gwpy.timeseries.TimeSeriesBaseDict`
+            a `TimeSeriesBaseDict` of (`str`, `TimeSeries`) pairs for each
+            chunk of data received.
+
+            If ``window`` is given, the same `TimeSeriesBaseDict` is
+            yielded every time, with each `TimeSeries` updated in place to
+            hold the most recent ``window`` seconds of data, so should be
+            copied if required beyond the next iteration.
+
+        Notes
+        -----
+        Unlike :meth:`~TimeSeriesBaseDict.fetch`, this method does not
+        verify the channel names, or search multiple servers for data.
+        """
+        from ..io import nds as ndsio
+        start = int(to_gps(start))
+        end = int(ceil(to_gps(end)))
+
+        # parse dtype
+        if isinstance(dtype, (tuple, list)):
+            dtype = dict(zip(channels, dtype))
+        elif not isinstance(dtype, dict):
+            dtype = dict((channel, dtype) for channel in channels)
+
+        # open connection
+        if connection is None:
+            if host is None:
+                ifos = set([Channel(channel).ifo for channel in channels])
+                ifo = list(ifos)[0] if len(ifos) == 1 else None
+                host, port = ndsio.host_resolution_order(
+                    ifo, epoch=start)[0]
+            elif not port and re.match('[a-z]1nds[0-9]\Z', host):
+                port = 8088
+            elif not port:
+                port = 31200
+            # hold a pooled connection until the iteration is finished
+            with ndsio.POOL.connection(host, port) as connection:
+                for chunk in cls.fetch_iter(channels, start, end,
+                                            stride=stride, window=window,
+                                            connection=connection, pad=pad,
+                                            dtype=dtype):
+                    yield chunk
+            return
+
+        names = [Channel(c).ndsname for c in channels]
+        if stride is None:
+            data = connection.iterate(start, end, names)
+        else:
+            data = connection.iterate(start, end, int(stride), names)
+
+        out = cls()
+        for buffers in data:
+            # yield each chunk on its own
+            if window is None:
+                yield cls((c, cls.EntryClass.from_nds2_buffer(
+                           buffer_, dtype=dtype.get(c))) for
+                          (buffer_, c) in zip(buffers, channels))
+                continue
+            # or update the rolling window
+            for buffer_, c in zip(buffers, channels):
+                chunkend = (buffer_.gps_seconds +
+                            buffer_.gps_nanoseconds * 1e-9 +
+                            buffer_.length / buffer_.channel.sample_rate)
+                try:
+                    series = out[c]
+                except KeyError:
+                    series = out[c] = _allocate_from_nds2_buffer(
+                        cls.EntryClass, buffer_, chunkend - window,
+                        chunkend, dtype=dtype.get(c), pad=pad or 0)
+                # shift the window, then fill with the new data
+                n = min(buffer_.length, series.shape[0])
+                if n < series.shape[0]:
+                    series.value[:-n] = series.value[n:]
+                series.x0 = chunkend - window
+                _fill_from_nds2_buffer(series, buffer_)
+            yield out
+
     @classmethod
     def find(cls, channels, start, end, frametype=None,
              pad=None, dtype=None, nproc=1, verbose=False,
@@ -945,19 +1148,34 @@ class TimeSeriesBaseDict(OrderedDict):
             allow reading from frames on tape
         **readargs
             any other keyword arguments to be passed to `.read()`
+
+        Notes
+        -----
+        The frametype for each channel, and the frame files for each
+        frametype, are found concurrently in threads, with all datafind
+        queries going through a single (cached) connection. If
+        ``nproc > 1`` the data for each frametype are then read in turn,
+        each using ``nproc`` processes, otherwise all frametypes are read
+        concurrently in threads.
         """
         start = to_gps(start)
         end = to_gps(end)
+        # use a single (thread-safe) connection for all queries
+        connection = datafind.connect(cached=True)
+        nthreads = max(nproc, FIND_NTHREADS)
+
         # -- find frametype(s)
         if frametype is None:
-            frametypes = dict()
-            for c in channels:
-                ft = datafind.find_best_frametype(c, start, end,
-                                                  allow_tape=allow_tape)
-                try:
-                    frametypes[ft].append(c)
-                except KeyError:
-                    frametypes[ft] = [c]
+            def _find_frametype(channel):
+                return datafind.find_best_frametype(
+                    channel, start, end, allow_tape=allow_tape,
+                    connection=connection)
+
+            frametypes = OrderedDict()
+            for c, ft in zip(channels, parallel.parallel_map(
+                    _find_frametype, channels, nproc=nthreads,
+                    threads=True)):
+                frametypes.setdefault(ft, []).append(c)
             if verbose and len(frametypes) > 1:
                 gprint("Determined %d frametypes to read" % len(frametypes))
             elif verbose:
@@ -965,11 +1183,12 @@ class TimeSeriesBaseDict(OrderedDict):
                        % frametypes.keys()[0])
         else:
             frametypes = {frametype: channels}
+
         # -- read data
-        out = cls()
-        for ft, clist in frametypes.iteritems():
-            if verbose:
-                gprint("Reading data from %s frames..." % ft, end=' ')
+        readargs.setdefault('format', 'gwf')
+
+        def _find_frames(args):
+            ft, clist = args
             # parse as a ChannelList
             channellist = ChannelList.from_names(*clist)
             # strip trend tags from channel names
@@ -977,27 +1196,47 @@ class TimeSeriesBaseDict(OrderedDict):
             # find observatory for this group
             if observatory is None:
                 try:
-                    observatory = ''.join(
+                    obs = ''.join(
                         sorted(set(c.ifo[0] for c in channellist)))
                 except TypeError as e:
                     e.args = ("Cannot parse list of IFOs from channel names",)
                     raise
+            else:
+                obs = observatory
             # find frames
-            connection = datafind.connect()
-            cache = connection.find_frame_urls(observatory, ft, start, end,
+            cache = connection.find_frame_urls(obs, ft, start, end,
                                                urltype='file')
             if len(cache) == 0:
                 raise RuntimeError("No %s-%s frame files found for [%d, %d)"
-                                   % (observatory, ft, start, end))
-            # read data
-            readargs.setdefault('format', 'gwf')
+                                   % (obs, ft, start, end))
+            return ft, clist, names, cache
+
+        def _read_frametype(args):
+            ft, clist, names, cache = args
+            if verbose:
+                gprint("Reading data from %s frames..." % ft)
             new = cls.read(cache, names, start=start, end=end, pad=pad,
                            dtype=dtype, nproc=nproc, **readargs)
-            # map back to user-given channel name and append
-            out.append(type(new)((key, new[c]) for
-                                 (key, c) in zip(clist, names)))
             if verbose:
-                gprint("Done")
+                gprint("Read data from %s frames" % ft)
+            # map back to user-given channel name
+            return [(key, new[c]) for (key, c) in zip(clist, names)]
+
+        # find the frames for all frametypes concurrently
+        groups = parallel.parallel_map(_find_frames,
+                                       list(frametypes.items()),
+                                       nproc=nthreads, threads=True)
+
+        # read each frametype, concurrently in threads unless the reader
+        # itself will fork processes (which is unsafe from a thread)
+        data = dict()
+        for group in parallel.parallel_map(
+                _read_frametype, groups,
+                nproc=nthreads if nproc == 1 else 1, threads=True):
+            data.update(group)
+        out = cls()
+        for c in channels:
+            out[c] = data[c]
         return out
 
     @classmethod
@@ -24,12 +24,12 @@ from __future__ import division
 import os
 import warnings
 from math import ceil
-from multiprocessing import (Process, Queue as ProcessQueue)
 
 from glue.lal import Cache
 
 from ...io import registry
 from ...io.cache import (cache_segments, open_cache)
+from ...utils import parallel
 from .. import (TimeSeries, TimeSeriesList, TimeSeriesDict,
                 StateVector, StateVectorList, StateVectorDict)
 
@@ -37,11 +37,37 @@ from .. import (TimeSeries, TimeSeriesList, TimeSeriesDict,
 MAX_LALFRAME_CHANNELS = 4
 
 
+def _read_subcache(args):
+    """Read data from a subset of a cache in a worker process
+
+    The output is returned via shared memory (see
+    :func:`gwpy.utils.parallel.share`) to avoid copying the data back to
+    the parent process through a pipe.
+    """
+    (cls, subcache, channel, start, end, padstart, resample, format_,
+     kwargs) = args
+    # if resampling, read from the padded start time, then resample and
+    # crop back to the requested limits
+    if padstart is not None:
+        out = cls.read(subcache, channel, format=format_, start=padstart,
+                       end=end, resample=None, **kwargs)
+        out = out.resample(resample).crop(start, end)
+    else:
+        out = cls.read(subcache, channel, format=format_, start=start,
+                       end=end, resample=resample, **kwargs)
+    return parallel.share(out)
+
+
 def read_cache(cache, channel, start=None, end=None, resample=None,
                gap=None, pad=None, nproc=1, format=None, **kwargs):
     """Read a `TimeSeries` from a cache of data files using
     multiprocessing.
 
+    When ``nproc > 1`` the cache is split into contiguous blocks that are
+    read in parallel by a persistent pool of worker processes (see
+    :mod:`gwpy.utils.parallel`), with the data returned to the calling
+    process via shared memory.
+
     The inner-workings are agnostic of data-type, but can only handle a
     single data type at a time.
 
@@ -170,49 +196,29 @@ def read_cache(cache, channel, start=None, end=None, resample=None,
         return cls.read(cache, channel, format=format, start=start, end=end,
                         resample=resample, **kwargs)
 
-    # define how to read each frame
-    def _read(q, pstart, pend):
-        try:
-            # don't go beyond the requested limits
-            pstart = float(max(start, pstart))
-            pend = float(min(end, pend))
-            # if resampling TimeSeries, pad by 8 seconds inside cache limits
-            if cls not in (StateVector, StateVectorDict) and resample:
-                cstart = float(max(cspan[0], pstart - 8))
-                subcache = cache.sieve(segment=Segment(cstart, pend))
-                out = cls.read(subcache, channel, format=format, start=cstart,
-                               end=pend, resample=None, **kwargs)
-                out = out.resample(resample)
-                q.put(out.crop(pstart, pend))
-            else:
-                subcache = cache.sieve(segment=Segment(pstart, pend))
-                q.put(cls.read(subcache, channel, format=format, start=pstart,
-                               end=pend, resample=resample, **kwargs))
-        except Exception as e:
-            q.put(e)
-
     # separate cache into parts
     fperproc = int(ceil(len(cache) / nproc))
     subcaches = [Cache(cache[i:i+fperproc]) for
                  i in range(0, len(cache), fperproc)]
-    subsegments = SegmentList([Segment(c[0].segment[0], c[-1].segment[1])
-                               for c in subcaches])
-
-    # start all processes
-    queue = ProcessQueue(nproc)
-    proclist = []
-    for subseg in subsegments:
-        process = Process(target=_read, args=(queue, subseg[0], subseg[1]))
-        process.daemon = True
-        proclist.append(process)
-        process.start()
-
-    # get data and block
-    data = [queue.get() for p in proclist]
-    for result in data:
-        process.join()
-        if isinstance(result, Exception):
-            raise result
+    jobs = []
+    for subcache in subcaches:
+        # don't go beyond the requested limits
+        pstart = float(max(start, subcache[0].segment[0]))
+        pend = float(min(end, subcache[-1].segment[1]))
+        # if resampling TimeSeries, pad by 8 seconds inside cache limits
+        if cls not in (StateVector, StateVectorDict) and resample:
+            cstart = float(max(cspan[0], pstart - 8))
+        else:
+            cstart = None
+        subcache = cache.sieve(segment=Segment(
+            pstart if cstart is None else cstart, pend))
+        jobs.append((cls, subcache, channel, pstart, pend, cstart, resample,
+                     format, kwargs))
+
+    # read all parts in parallel, and reconstruct data from shared memory
+    data = [parallel.unshare(result) for
+            result in parallel.parallel_map(_read_subcache, jobs,
+                                            nproc=nproc)]
 
     # format and return
     if issubclass(cls, dict):
@@ -25,6 +25,7 @@ import __builtin__
 import numpy
 
 from ....io.cache import (CacheEntry, file_list)
+from ....io.gwf import (get_index, get_toc)
 from ....time import LIGOTimeGPS
 from ....segments import Segment
 from ....utils import (gprint, with_import)
@@ -86,7 +87,7 @@ FRVECT_TYPE_FROM_NUMPY = dict(
 
 @with_import(DEPENDS)
 def read_timeseriesdict(source, channels, start=None, end=None, type=None,
-                        dtype=None, resample=None, verbose=False,
+                        dtype=None, resample=None, verbose=False, pad=None,
                         _SeriesClass=TimeSeries):
     """Read the data for a list of channels from a GWF data source.
 
@@ -113,6 +114,10 @@ def read_timeseriesdict(source, channels, start=None, end=None, type=None,
         rate of samples per second at which to resample input TimeSeries.
     verbose : `bool`, optional
         print verbose output.
+    pad : `float`, optional
+        value with which to fill gaps in the source data, by default
+        gaps are not allowed, and data that start late or end early
+        are returned without padding
 
     Returns
     -------
@@ -121,9 +126,14 @@ def read_timeseriesdict(source, channels, start=None, end=None, type=None,
 
     Notes
     -----
+    The data are read in two passes: the first uses the file names (or
+    the table of contents of each file) to determine the span of the
+    output, then each channel is allocated once, and each `FrVect` is
+    decoded directly into its place in the output array.
+
     If reading from a list, or cache, or framefiles, the frames contained
     must be contiguous and sorted in chronological order for this function
-    to return without exception.
+    to return without exception, unless ``pad`` is given.
 
     Raises
     ------
@@ -153,7 +163,22 @@ def read_timeseriesdict(source, channels, start=None, end=None, type=None,
     if dtype is None:
         raise ValueError("Cannot parse `dtype` request, please review "
                          "documentation for that argument")
-    # read each individually and append
+
+    # -- first pass: find the output span
+
+    segments = [_file_segment(fp) for fp in filelist]
+    for seg1, seg2 in zip(segments[:-1], segments[1:]):
+        if seg2[0] < seg1[0]:
+            raise ValueError("Cannot read from unsorted list of frames, "
+                             "please sort by GPS start time")
+    span = Segment(segments[0][0], segments[-1][1])
+    if start is not None:
+        span = Segment(max(span[0], float(start)), span[1])
+    if end is not None:
+        span = Segment(span[0], min(span[1], float(end)))
+
+    # -- second pass: read data into the output arrays
+
     N = len(filelist)
     if verbose:
         if not isinstance(verbose, (unicode, str)):
@@ -161,73 +186,101 @@ def read_timeseriesdict(source, channels, start=None, end=None, type=None,
         gprint("%sReading %d channels from frames... 0/%d (0.00%%)\r"
                % (verbose, len(channels), N), end='')
     out = TimeSeriesDict()
-    for i, fp in enumerate(filelist):
-        # read frame
-        new = _read_frame(fp, channels, start=start, end=end, ctype=type,
-                          dtype=dtype, _SeriesClass=_SeriesClass)
-        # get channel type for next frame (means we only query the TOC once)
-        if not i:
-            for channel, ts in new.iteritems():
-                type[channel] = ts.channel._ctype
-        # store
-        out.append(new, copy=False)
+    covered = dict((channel, []) for channel in channels)
+    for i, (fp, seg) in enumerate(zip(filelist, segments)):
+        if not seg.intersects(span):
+            continue
+        # read frame (the channel types are only read from the first TOC)
+        type = _read_frame(fp, channels, span, out, covered, ctype=type,
+                           dtype=dtype, _SeriesClass=_SeriesClass)
         if verbose is not False:
             gprint("%sReading %d channels from frames... %d/%d (%.1f%%)\r"
                    % (verbose, len(channels), i+1, N, (i+1)/N * 100), end='')
     if verbose is not False:
         gprint("%sReading %d channels from frames... %d/%d (100.0%%)"
                % (verbose, len(channels), N, N))
+
     # finalise
-    for channel, ts in out.iteritems():
+    for channel in channels:
+        try:
+            ts = out[channel]
+        except KeyError:
+            raise ValueError("Channel '%s' not found in frames"
+                             % str(channel))
+        ts = out[channel] = _fill_gaps(ts, covered[channel], pad)
         ts.channel.sample_rate = ts.sample_rate
         ts.channel.unit = ts.unit
         ts.channel.frametype = frametype
         # resample data
         if resample is not None and channel in resample:
-            out[channel] = out[channel].resample(resample[channel])
-        # crop data
-        if start is not None or end is not None:
-            out[channel] = out[channel].crop(start=start, end=end)
-        # copy into fresh memory if needed
-        out[channel] = numpy.require(out[channel], requirements=['O'])
+            out[channel] = ts.resample(resample[channel])
     return out
 
 
-def _read_frame(framefile, channels, start=None, end=None, ctype=None,
+def _file_segment(framefile):
+    """Internal function to determine the GPS span of a frame file
+
+    The span is parsed from the file name if it follows the T050017
+    convention, otherwise it is taken from the (indexed) table of contents.
+    """
+    if isinstance(framefile, CacheEntry):
+        return framefile.segment
+    try:
+        return CacheEntry.from_T050017(framefile).segment
+    except ValueError:
+        return get_toc(framefile).segment
+
+
+def _nsamples(duration, dx):
+    """Internal function to return the number of samples in a duration
+
+    This is rounded down, allowing for floating-point error in GPS times.
+    """
+    return max(0, int(numpy.floor(duration / dx + 1e-6)))
+
+
+def _read_frame(framefile, channels, span, out, covered, ctype=None,
                 dtype=None, _SeriesClass=TimeSeries):
     """Internal function to read data from a single frame.
 
     All users should be using the wrapper `read_timeseriesdict`.
 
+    Each channel is allocated (to cover the full ``span``) the first time
+    data are found for it, with each `FrVect` then copied directly into
+    place.
+
     Parameters
     ----------
     framefile : `str`, :class:`~glue.lal.CacheEntry`
         path to GWF-format frame file on disk.
     channels : `list`
         list of channels to read.
-    start : `Time`, :lalsuite:`LIGOTimeGPS`, optional
-        start GPS time of desired data.
-    end : `Time`, :lalsuite:`LIGOTimeGPS`, optional
-        end GPS time of desired data.
-    ctype : `str`, optional
-        channel data type to read, one of: ``'adc'``, ``'proc'``.
-    dtype : `numpy.dtype`, `str`, `type`, `dict`
+    span : `~gwpy.segments.Segment`
+        the GPS span of the output data
+    out : :class:`~gwpy.timeseries.TimeSeriesDict`
+        the `dict` of output arrays, new arrays are added as required
+    covered : `dict`
+        `dict` of `(channel, list)` pairs, for each `FrVect` read, the
+        `(start, end)` indices of the samples filled are appended to the
+        relevant list
+    ctype : `dict`, optional
+        channel data type to read, one of: ``'adc'``, ``'proc'``,
+        ``'sim'``, for each channel, read from the TOC index if not given
+    dtype : `dict`, optional
+        numeric data type for each channel
     _SeriesClass : `type`, optional
         class object to use as the data holder for a single channel,
         default is :class:`~gwpy.timeseries.TimeSeries`
 
     Returns
     -------
-    dict : :class:`~gwpy.timeseries.TimeSeriesDict`
-        dict of (channel, `TimeSeries`) data pairs
+    ctype : `dict`
+        the channel type for each channel, which can be passed to the
+        next call to avoid reading the table of contents again
     """
     if isinstance(channels, (unicode, str)):
         channels = channels.split(',')
 
-    # construct span segment
-    span = Segment(start is not None and start or -numpy.inf,
-                   end is not None and end or numpy.inf)
-
     # open file
     if isinstance(framefile, CacheEntry):
         fp = framefile.path
@@ -235,51 +288,23 @@ def _read_frame(framefile, channels, start=None, end=None, ctype=None,
         fp = framefile
     stream = frameCPP.IFrameFStream(fp)
 
-    # interpolate frame epochs from CacheEntry
-    try:
-        nframe = int(stream.GetNumberOfFrames())
-    except (AttributeError, ValueError):
-        nframe = None
-    if isinstance(framefile, CacheEntry) and nframe == 1:
-        epochs = [float(framefile.segment[0])]
-    else:
-        epochs = None
-
-    # load table of contents if needed
-    if epochs is None or not ctype:
-        toc = stream.GetTOC()
-    # get list of frame epochs
-    if epochs is None:
-        epochs = toc.GTimeS
-    # work out channel types
+    # get frame epochs and channel types from the TOC index
+    toc = get_toc(fp)
+    epochs = [epoch for epoch, _ in toc.epochs]
     if not ctype:
-        try:
-            adcs = toc.GetADC().keys()
-        except AttributeError:
-            adcs = toc.GetADC()
-        try:
-            procs = toc.GetProc().keys()
-        except AttributeError:
-            procs = toc.GetProc()
         ctype = {}
         for channel in channels:
-            name = str(channel)
-            if name in adcs:
-                ctype[channel] = 'adc'
-            elif name in procs:
-                ctype[channel] = 'proc'
-            else:
+            ctype[channel] = toc.get_type(channel)
+            if not ctype[channel]:
                 raise ValueError("Channel %s not found in frame table of "
-                                 "contents" % name)
+                                 "contents" % str(channel))
 
-    # set output
-    out = TimeSeriesDict()
+    newinfo = {}
     for channel in channels:
         name = str(channel)
         read_ = getattr(stream, 'ReadFr%sData' % ctype[channel].title())
-        ts = None
-        i = 0
         dtype_ = dtype.get(channel, None)
+        i = 0
         while True:
             try:
                 data = read_(i, name)
@@ -304,28 +329,82 @@ def _read_frame(framefile, channels, start=None, end=None, ctype=None,
                     arr = numpy.frombuffer(
                         arr, dtype=NUMPY_TYPE_FROM_FRVECT[vect.GetType()])
                 dx = vect.GetDim(0).dx
-                if ts is None:
-                    # create array
+                if toc.channels.get(name, (None, None))[1] is None:
+                    newinfo[name] = (1 / dx, arr.dtype)
+                try:
+                    ts = out[channel]
+                except KeyError:
+                    # create array, aligned with the samples in this frame
+                    x0 = thisepoch + dx * int((span[0] - thisepoch) / dx)
                     unit = vect.GetUnitY() or None
-                    ts = numpy.require(
-                        _SeriesClass(arr, epoch=thisepoch, dx=dx, name=name,
-                                     channel=channel, unit=unit, dtype=dtype_,
-                                     copy=False), requirements=['O'])
+                    if dtype_ is None:
+                        dtype_ = arr.dtype
+                    ts = out[channel] = _SeriesClass(
+                        numpy.empty(_nsamples(span[1] - x0, dx),
+                                    dtype=dtype_),
+                        epoch=x0, dx=dx, name=name, channel=channel,
+                        unit=unit, copy=False)
                     if not ts.channel.dtype:
                         ts.channel.dtype = arr.dtype
                     ts.channel._ctype = ctype[channel]
-                elif arr.dtype != ts.dtype:
-                    ts.append(arr.astype(dtype_))
-                else:
-                    ts.append(arr)
+                # copy the overlapping samples into place
+                idx = int(round((thisepoch - ts.x0.value) / dx))
+                a = max(0, -idx)
+                b = min(arr.size, ts.size - idx)
+                if b > a:
+                    ts.value[idx+a:idx+b] = arr[a:b]
+                    covered[channel].append((idx+a, idx+b))
+                thisepoch += arr.size * dx
             i += 1
-        if ts is None:
-            raise ValueError("Channel '%s' not found in frame '%s'"
-                             % (str(channel), fp))
-        else:
-            out[channel] = ts
 
-    return out
+    # record sample rates and data types in the TOC index
+    if newinfo:
+        get_index().record_channels(fp, newinfo)
+
+    return ctype
+
+
+def _fill_gaps(series, covered, pad=None):
+    """Internal function to fill samples in a series not read from a frame
+
+    Parameters
+    ----------
+    series : `TimeSeries`
+        the data array
+    covered : `list` of `tuple`
+        the `(start, end)` indices of samples that have been filled
+    pad : `float`, optional
+        the value with which to fill gaps, if `None` a gap raises
+        a `ValueError`, and the series is cropped to the samples read
+
+    Returns
+    -------
+    series : `TimeSeries`
+        the filled series
+    """
+    covered = sorted(covered)
+    if pad is None and covered:
+        first = covered[0][0]
+        stop = max(b for _, b in covered)
+    elif pad is None:
+        first = stop = 0
+    else:
+        first, stop = 0, series.size
+    end = first
+    for a, b in covered + [(stop, stop)]:
+        if a > end:
+            if pad is None:
+                x0 = series.x0.value
+                dx = series.dx.value
+                raise ValueError(
+                    "Cannot read discontiguous data for %s, missing "
+                    "data in [%s, %s)" % (series.name, x0 + end * dx,
+                                          x0 + a * dx))
+            series.value[end:a] = pad
+        end = max(end, b)
+    if first or stop < series.size:  # crop to the data actually read
+        return series[first:stop].copy()
+    return series
 
 
 @with_import(DEPENDS)
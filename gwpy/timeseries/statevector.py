@@ -27,12 +27,10 @@ arrays, representing a bit mask of states that combine to make a detailed
 statement of instrumental operation
 """
 
-from math import (ceil, log)
 import sys
 
 import numpy
 
-from glue.segmentsUtils import from_bitstream
 from astropy.units import Quantity
 
 from .core import (TimeSeriesBase, TimeSeriesBaseDict, TimeSeriesBaseList,
@@ -52,6 +50,87 @@ __all__ = ['StateTimeSeries',
            'StateVector', 'StateVectorDict', 'StateVectorList', 'Bits']
 
 
+def _unpack_bits(data, bits):
+    """Unpack the given bits of an array into a boolean matrix
+
+    All bits are unpacked in a single pass over the data, by viewing
+    each sample as a set of little-endian bytes.
+
+    Parameters
+    ----------
+    data : `numpy.ndarray`
+        1-D array of state-vector data, non-integer data are cast to
+        unsigned integers of the same size
+    bits : `list` of `int`
+        the indices of the bits to unpack
+
+    Returns
+    -------
+    matrix : `numpy.ndarray`
+        `bool` array of shape ``(len(bits), data.size)``, with each
+        (contiguous) row holding the values of one bit
+    """
+    data = numpy.asarray(data)
+    nbytes = data.dtype.itemsize
+    bytes_ = data.astype('<u%d' % nbytes).view(numpy.uint8).reshape(
+        data.size, nbytes)
+    # unpackbits gives the most-significant bit first, so reverse
+    # each byte to put the bits in index order
+    unpacked = numpy.unpackbits(bytes_, axis=1).reshape(
+        data.size, nbytes, 8)[:, :, ::-1].reshape(data.size, nbytes * 8)
+    return numpy.ascontiguousarray(unpacked[:, list(bits)].T, dtype=bool)
+
+
+def _bitstream_to_segments(matrix, start, dt, minlen=1, dtype=float):
+    """Convert rows of boolean data into lists of segments
+
+    Each contiguous set of `True` values is recorded as a segment from
+    the time of the first `True` to the time of the next `False` (or the
+    end of the data).
+
+    Parameters
+    ----------
+    matrix : `numpy.ndarray`
+        1-D array of boolean data, or 2-D array with one row per stream
+    start : `float`
+        GPS start time of the data
+    dt : `float`
+        time between samples
+    minlen : `int`, optional
+        minimum number of consecutive `True` values to identify as a
+        segment, default: ``1``
+    dtype : `type`, `callable`, default: `float`
+        output segment entry type
+
+    Returns
+    -------
+    segmentlists : `list` of `~gwpy.segments.SegmentList`
+        one list of segments for each row of the input
+    """
+    from ..segments import (Segment, SegmentList)
+    matrix = numpy.atleast_2d(numpy.asarray(matrix, dtype=bool))
+    nrows, nsamp = matrix.shape
+    # find rising and falling edges, padding each row with False
+    padded = numpy.zeros((nrows, nsamp + 2), dtype=numpy.int8)
+    padded[:, 1:-1] = matrix
+    edges = numpy.diff(padded, axis=1)
+    rows, ons = numpy.nonzero(edges == 1)
+    offs = numpy.nonzero(edges == -1)[1]
+    # apply minimum length
+    keep = (offs - ons) >= minlen
+    rows = rows[keep]
+    starts = (start + ons[keep] * dt).tolist()
+    ends = (start + offs[keep] * dt).tolist()
+    # split into one list per row
+    bounds = numpy.concatenate(([0], numpy.cumsum(
+        numpy.bincount(rows, minlength=nrows)))).tolist()
+    if dtype is not float:
+        starts = list(map(dtype, starts))
+        ends = list(map(dtype, ends))
+    return [SegmentList(map(Segment, starts[a:b], ends[a:b])) for
+            a, b in zip(bounds[:-1], bounds[1:])]
+
+
 @interpolate_docstring
 class StateTimeSeries(TimeSeriesBase):
     """Boolean array representing a good/bad state determination
@@ -123,13 +202,10 @@ class StateTimeSeries(TimeSeriesBase):
             defines the `known` segments, while the contiguous `True`
             sets defined each of the `active` segments
         """
-        from ..segments import (Segment, SegmentList, DataQualityFlag)
-        start = self.x0.value
-        dt = self.dx.value
-        active = from_bitstream(self.value, start, dt, minlen=int(minlen))
-        if dtype is not float:
-            active = active.__class__([Segment(dtype(s[0]), dtype(s[1])) for
-                                       s in active])
+        from ..segments import (SegmentList, DataQualityFlag)
+        active = _bitstream_to_segments(self.value, self.x0.value,
+                                        self.dx.value, minlen=int(minlen),
+                                        dtype=dtype)[0]
         known = SegmentList([self.span])
         out = DataQualityFlag(name=name or self.name, active=active,
                               known=known, label=label or self.name,
@@ -351,14 +427,23 @@ class StateVector(TimeSeriesBase):
             return self._boolean
         except AttributeError:
             nbits = len(self.bits)
-            boolean = numpy.zeros((self.size, nbits), dtype=bool)
-            for i, d in enumerate(self.value):
-                boolean[i, :] = [int(d) >> j & 1 for
-                                 j in range(nbits)]
+            boolean = _unpack_bits(self.value, range(nbits)).T
             self._boolean = Array2D(boolean, name=self.name,
                                     x0=self.x0, dx=self.dx, y0=0, dy=1)
             return self.boolean
 
+    def _get_bit_indices(self, bits=None):
+        if bits is None:
+            bits = [b for b in self.bits if b is not None and b is not '']
+        bindex = []
+        for b in bits:
+            try:
+                bindex.append((self.bits.index(b), b))
+            except ValueError as e:
+                e.args = ('Bit %r not found in StateVector' % b,)
+                raise
+        return bindex
+
     def get_bit_series(self, bits=None):
         """Get the `StateTimeSeries` for each bit of this `StateVector`.
 
@@ -374,19 +459,12 @@ class StateVector(TimeSeriesBase):
             a `TimeSeriesDict` of `StateTimeSeries`, one for each given
             bit
         """
-        if bits is None:
-            bits = [b for b in self.bits if b is not None and b is not '']
-        bindex = []
-        for b in bits:
-            try:
-                bindex.append((self.bits.index(b), b))
-            except IndexError as e:
-                e.args = ('Bit %r not found in StateVector' % b)
-                raise e
+        bindex = self._get_bit_indices(bits)
         self._bitseries = StateTimeSeriesDict()
-        for i, bit in bindex:
+        matrix = _unpack_bits(self.value, [i for i, _ in bindex])
+        for (i, bit), row in zip(bindex, matrix):
             self._bitseries[bit] = StateTimeSeries(
-                self.value >> i & 1, name=bit, epoch=self.x0.value,
+                row, name=bit, epoch=self.x0.value,
                 channel=self.channel, sample_rate=self.sample_rate)
         return self._bitseries
 
@@ -477,13 +555,22 @@ class StateVector(TimeSeriesBase):
             for details on the segment representation method for
             `StateVector` bits
         """
-        from ..segments import DataQualityDict
+        from ..segments import (SegmentList, DataQualityFlag,
+                                DataQualityDict)
+        bindex = self._get_bit_indices(bits)
+        # convert all bits in one go
+        matrix = _unpack_bits(self.value, [i for i, _ in bindex])
+        segmentlists = _bitstream_to_segments(
+            matrix, self.x0.value, self.dx.value, minlen=int(minlen),
+            dtype=dtype)
         out = DataQualityDict()
-        bitseries = self.get_bit_series(bits=bits)
-        for bit, sts in bitseries.iteritems():
-            out[bit] = sts.to_dqflag(name=bit, minlen=minlen, round=round,
-                                     dtype=dtype,
-                                     description=self.bits.description[bit])
+        for (i, bit), active in zip(bindex, segmentlists):
+            flag = DataQualityFlag(name=bit, active=active,
+                                   known=SegmentList([self.span]), label=bit,
+                                   description=self.bits.description[bit])
+            if round:
+                flag = flag.round()
+            out[bit] = flag.coalesce()
         return out
 
     @classmethod
@@ -654,38 +741,30 @@ class StateVector(TimeSeriesBase):
             rate2 = float(rate)
         # upsample
         if (rate2 / rate1).is_integer():
-            raise NotImplementedError("StateVector upsampling has not "
-                                      "been implemented yet, sorry.")
+            factor = int(rate2 / rate1)
+            new = StateVector(numpy.repeat(self.value, factor))
         # downsample
         elif (rate1 / rate2).is_integer():
             factor = int(rate1 / rate2)
-            # reshape incoming data to one column per new sample
-            newsize = self.size / factor
-            old = self.value.reshape((newsize, self.size // newsize))
-            # work out number of bits
+            # reshape incoming data to one row per new sample,
+            # discarding any samples that don't fill a whole row
+            newsize = self.size // factor
+            old = self.value[:newsize * factor].reshape((newsize, factor))
+            if old.dtype.kind not in 'iu':
+                old = old.astype('u%d' % old.dtype.itemsize)
+            # each bit in each new sample is the logical AND of that bit
+            # in all of the old samples
+            data = numpy.bitwise_and.reduce(old, axis=1)
+            # work out number of bits, and mask out any others
             if self.bits is not None and len(self.bits):
                 nbits = len(self.bits)
-            else:
-                max = self.value.max()
-                nbits = max != 0 and int(ceil(log(self.value.max(), 2))) or 1
-            bits = range(nbits)
-            # construct an iterator over the columns of the old array
-            it = numpy.nditer([old, None],
-                              flags=['external_loop', 'reduce_ok'],
-                              op_axes=[None, [0, -1]],
-                              op_flags=[['readonly'],
-                                        ['readwrite', 'allocate']])
-            dtype = self.dtype
-            type_ = self.dtype.type
-            # for each new sample, each bit is logical AND of old samples
-            # bit is ON,
-            for x, y in it:
-                y[...] = numpy.sum([type_((x >> bit & 1).all() * (2 ** bit))
-                                    for bit in bits], dtype=self.dtype)
-            new = StateVector(it.operands[1], dtype=dtype)
-            new.__dict__ = self.copy_metadata()
-            new.sample_rate = rate2
-            return new
+            elif old.size:
+                nbits = int(numpy.log2(max(old.max(), 1))) + 1
+            else:  # no data, nothing to mask
+                nbits = data.dtype.itemsize * 8
+            if nbits < data.dtype.itemsize * 8:
+                data &= data.dtype.type((1 << nbits) - 1)
+            new = StateVector(data.astype(self.dtype, copy=False))
         # error for non-integer resampling factors
         elif rate1 < rate2:
             raise ValueError("New sample rate must be multiple of input "
@@ -693,6 +772,9 @@ class StateVector(TimeSeriesBase):
         else:
             raise ValueError("New sample rate must be divisor of input "
                              "series rate if downsampling a StateVector")
+        new.__dict__ = self.copy_metadata()
+        new.sample_rate = rate2
+        return new
 
 
 @as_series_dict_class(StateTimeSeries)
@@ -22,8 +22,7 @@
 from __future__ import (division, print_function)
 
 from warnings import warn
-from math import (ceil, pi)
-from multiprocessing import (Process, Queue as ProcessQueue)
+from math import pi
 
 import numpy
 from numpy import fft as npfft
@@ -34,14 +33,96 @@ from astropy import units
 from ..io import (reader, writer)
 from ..segments import Segment
 from ..signal import (notch, sosfiltfilt)
-from ..utils import with_import
+from ..signal import (polyphase, spectral)
+from ..signal.window import (get_window, window_sums)
+from ..utils import (parallel, with_import)
 from ..utils.docstring import interpolate_docstring
 from ..utils.compat import OrderedDict
+from . import trend as trend_
 from .core import (TimeSeriesBase, TimeSeriesBaseDict, TimeSeriesBaseList,
                    as_series_dict_class)
 
 __author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
 
+# PSD methods that `TimeSeries.spectrogram` can calculate for all strides
+# at once, mapped to their (average method, default detrend) pair
+STRIDED_METHODS = {
+    'welch': ('mean', 'constant'),
+    'bartlett': ('mean', 'constant'),
+    'median': ('median', False),
+    'median-mean': ('median-mean', False),
+}
+
+
+def _spectrogram_columns(args):
+    """Calculate a contiguous block of columns for `TimeSeries.spectrogram`
+
+    This is a module-level function so that it can be sent to worker
+    processes by :func:`gwpy.utils.parallel.parallel_map`.
+
+    Parameters
+    ----------
+    args : `tuple`
+        `(data, cross, out, start, stop, params)` tuple, where ``data``,
+        ``cross``, and ``out`` are `numpy.ndarray` or
+        `~gwpy.utils.parallel.SharedArray`, ``start`` and ``stop`` are
+        the column indices to calculate, and ``params`` is a `dict` of
+        FFT parameters
+    """
+    data, cdata, out, start, stop, params = args
+    data = numpy.asarray(data)
+    out = numpy.asarray(out)[start:stop]
+    nsamp = params['nsamp']
+    noverlap = params['noverlap']
+
+    # calculate all PSDs in one go
+    if params['strided']:
+        spectral.strided_spectrogram(
+            data, nsamp, params['nfft'], params['nfftoverlap'],
+            params['window'], fs=params['fs'], method=params['average'],
+            scaling=params['scaling'], detrend=params['detrend'],
+            padding=noverlap, start=start, stop=stop, out=out)
+        return
+
+    kwargs = params['kwargs'].copy()
+    if params['lal']:
+        from ..frequencyseries.lal_ import (generate_lal_fft_plan,
+                                            generate_lal_window)
+        kwargs['window'] = generate_lal_window(params['nfft'],
+                                               dtype=params['dtype'])
+        if kwargs.get('plan', None) is None:
+            kwargs['plan'] = generate_lal_fft_plan(params['nfft'],
+                                                   dtype=params['dtype'])
+    ts = TimeSeries(data, sample_rate=params['fs'], unit=params['unit'],
+                    copy=False)
+    if cdata is not None:
+        cts = TimeSeries(numpy.asarray(cdata), sample_rate=params['fs'],
+                         copy=False)
+
+    # stride through TimeSeries, calculating PSDs or CSDs
+    for i, step in enumerate(range(start, stop)):
+        # find step TimeSeries with overlap
+        idx = max(0, nsamp * step - noverlap // 2)
+        idx_end = min(ts.size, idx + nsamp + noverlap)
+        stepseries = ts[idx:idx_end]
+        if cdata is None:
+            stepsd = stepseries.psd(fftlength=params['fftlength'],
+                                    overlap=params['overlap'],
+                                    method=params['method'], **kwargs)
+        else:
+            stepsd = stepseries.csd(cts[idx:idx_end],
+                                    fftlength=params['fftlength'],
+                                    overlap=params['overlap'], **kwargs)
+        out[i, :] = stepsd.value
+
+
+def _resample_filter(p, q, n=None, window='hamming'):
+    """Return the cached anti-alias filter for `TimeSeries.resample`
+    """
+    if n is not None:
+        n += 1 - n % 2
+    return polyphase.design_filter(p, q, ntaps=n, window=window)
+
 
 @interpolate_docstring
 class TimeSeries(TimeSeriesBase):
@@ -195,15 +276,16 @@ class TimeSeries(TimeSeriesBase):
         if window is None:
             window = 'boxcar'
         if isinstance(window, str) or type(window) is tuple:
-            win = signal.get_window(window, nfft)
+            win = get_window(window, nfft, dtype=self.dtype)
+            scaling = nfft / window_sums(window, nfft, dtype=self.dtype)[0]
         else:
             win = numpy.asarray(window)
             if len(win.shape) != 1:
                 raise ValueError('window must be 1-D')
             elif win.shape[0] != nfft:
                 raise ValueError('Window is the wrong size.')
-        win = win.astype(self.dtype)
-        scaling = 1. / numpy.absolute(win).mean()
+            win = win.astype(self.dtype)
+            scaling = 1. / numpy.absolute(win).mean()
 
         if nfft % 2:
             nfreqs = (nfft + 1) // 2
@@ -355,6 +437,11 @@ class TimeSeries(TimeSeriesBase):
         As a result, each time-bin is calculated using `stride + overlap`
         seconds of data.
 
+        For the 'welch', 'bartlett', 'median', and 'median-mean' methods
+        the periodograms for all time-bins are calculated together from a
+        strided view of the data, see
+        :func:`gwpy.signal.spectral.strided_spectrogram` for details.
+
         Parameters
         ----------
         timeseries : `TimeSeries`
@@ -380,8 +467,8 @@ class TimeSeries(TimeSeriesBase):
         plan : :lal:`REAL8FFTPlan`, optional
             LAL FFT plan to use when generating average spectrum,
             substitute type 'REAL8' as appropriate. This is only accepted
-            if you select `method` as one of 'median-mean', 'median', or
-            'lal-welch'
+            if you select `method` as one of 'lal-median-mean',
+            'lal-median', or 'lal-welch'
 
         nproc : `int`, default: ``1``
             number of CPUs to use in parallel processing of FFTs
@@ -400,7 +487,7 @@ class TimeSeries(TimeSeriesBase):
         from ..frequencyseries.utils import (
             safe_import, scale_timeseries_units)
         from ..frequencyseries.registry import get_method
-        from ..spectrogram import (Spectrogram, SpectrogramList)
+        from ..spectrogram import Spectrogram
 
         # format FFT parameters
         if fftlength is None:
@@ -426,124 +513,97 @@ class TimeSeries(TimeSeriesBase):
         noverlap = int((overlap * self.sample_rate).decompose().value)
         nsteps = int(self.size // nsamp)
         nproc = min(nsteps, nproc)
-        noverlap2 = int(noverlap // 2.)
 
         # generate window and plan if needed
         method_func = get_method(method)
-        if method_func.__module__.endswith('lal_') and cross is None:
+        strided = (cross is None and
+                   method_func.__module__.endswith(('scipy_', 'numpy_')) and
+                   method.lower() in STRIDED_METHODS and
+                   set(kwargs).issubset(('scaling', 'detrend', 'plan')))
+        if strided:
+            average, detrend = STRIDED_METHODS[method.lower()]
+            detrend = kwargs.pop('detrend', detrend)
+            kwargs.pop('plan', None)
+            if method.lower() == 'bartlett':
+                nfftoverlap = 0
+            else:
+                nfftoverlap = noverlap
+            if window is None and average == 'mean':
+                window = 'hanning'
+            elif window is None:
+                window = get_window(('kaiser', 24), nfft, fftbins=False)
+            if isinstance(window, str) or type(window) is tuple:
+                window = get_window(window, nfft)
+        elif method_func.__module__.endswith('lal_') and cross is None:
             safe_import('lal', method)
-            from ..frequencyseries.lal_ import (generate_lal_fft_plan,
-                                                generate_lal_window)
-            if kwargs.get('window', None) is None:
-                kwargs['window'] = generate_lal_window(nfft, dtype=self.dtype)
-            if kwargs.get('plan', None) is None:
-                kwargs['plan'] = generate_lal_fft_plan(nfft, dtype=self.dtype)
+            # LAL objects cannot be pickled, so each process generates
+            # its own window and plan
+            if nproc > 1:
+                kwargs.pop('plan', None)
         else:
             if window is None:
                 window = 'hanning'
             if isinstance(window, str) or type(window) is tuple:
-                window = signal.get_window(window, nfft)
+                window = get_window(window, nfft)
             kwargs['window'] = window
 
-        # set up single process Spectrogram generation
-        def _from_timeseries(ts, cts, epoch=None):
-            """Generate a `Spectrogram` from a `TimeSeries`.
-            """
-            # calculate specgram parameters
-            dt = stride
-            df = 1 / fftlength
-
-            # get size of spectrogram
-            nsteps_ = int(ts.size // nsamp)
-            nfreqs = int(fftlength * ts.sample_rate.value // 2 + 1)
-
-            # generate output spectrogram
-            unit = scale_timeseries_units(
-                ts.unit, kwargs.get('scaling', 'density'))
-            dtype = numpy.float64 if cts is None else complex
-            if epoch is None:
-                epoch = ts.epoch
-            out = Spectrogram(numpy.zeros((nsteps_, nfreqs)), dtype=dtype,
-                              unit=unit, channel=ts.channel, epoch=epoch,
-                              f0=0, df=df, dt=dt, copy=False)
-
-            if not nsteps_:
-                return out
-
-            # stride through TimeSeries, calculating PSDs or CSDs
-            if cts is not None and method not in (None, 'welch'):
-                warn("Cannot calculate cross spectral density using "
-                     "the %r method. Using 'welch' instead..." % method)
-            for step in range(nsteps_):
-                # find step TimeSeries with overlap
-                idx = max(0, nsamp * step - noverlap2)
-                idx_end = min(ts.size, idx + nsamp + noverlap)
-                stepseries = ts[idx:idx_end]
-                if cts is None:
-                    stepsd = stepseries.psd(fftlength=fftlength,
-                                            overlap=overlap,
-                                            method=method, **kwargs)
-                else:
-                    otherstepseries = cts[idx:idx_end]
-                    stepsd = stepseries.csd(otherstepseries,
-                                            fftlength=fftlength,
-                                            overlap=overlap, **kwargs)
-                out.value[step, :] = stepsd.value
-            return out
-
-        # single-process return
-        if nsteps == 0 or nproc == 1:
-            return _from_timeseries(self, cross)
+        # warn about unsupported cross-spectral methods
+        if cross is not None and method not in (None, 'welch'):
+            warn("Cannot calculate cross spectral density using "
+                 "the %r method. Using 'welch' instead..." % method)
 
-        # wrap spectrogram generator
-        def _specgram(q, *args, **kwargs):
-            try:
-                q.put(_from_timeseries(*args, **kwargs))
-            except Exception as e:
-                q.put(e)
-
-        # otherwise build process list
-        stepperproc = int(ceil(nsteps / nproc))
-        nsampperproc = stepperproc * nsamp
-        queue = ProcessQueue(nproc)
-        processlist = []
-        for i in range(nproc):
-            # index of un-overlapped time-series and epoch
-            a = i * nsampperproc
-            t = self.x0 + self.dx * a
-            # overlapped indices for FFT
-            ao = max(0, a - noverlap2)
-            bo = min(self.size, a + nsampperproc + noverlap)
-            tsamp = self[ao:bo]
-            if cross is None:
-                csamp = None
-            else:
-                csamp = cross[ao:bo]
-            # process this chunk
-            process = Process(target=_specgram, args=(queue, tsamp, csamp),
-                              kwargs={'epoch': t})
-            process.daemon = True
-            processlist.append(process)
-            process.start()
-            if ((i + 1) * nsampperproc) >= self.size:
-                break
+        # generate output spectrogram
+        fs = self.sample_rate.decompose().value
+        nfreqs = int(nfft // 2 + 1)
+        dtype = numpy.float64 if cross is None else complex
+        unit = scale_timeseries_units(
+            self.unit, kwargs.get('scaling', 'density'))
+        out = Spectrogram(numpy.zeros((nsteps, nfreqs), dtype=dtype),
+                          unit=unit, channel=self.channel, epoch=self.epoch,
+                          f0=0, df=1 / fftlength, dt=stride, copy=False)
+        if not nsteps:
+            return out
 
-        # get data
-        data = []
-        for process in processlist:
-            result = queue.get()
-            if isinstance(result, Exception):
-                raise result
-            else:
-                data.append(result)
-        # and block
-        for process in processlist:
-            process.join()
+        # parameters for each worker
+        params = {
+            'nsamp': nsamp, 'nfft': nfft, 'noverlap': noverlap,
+            'fs': fs, 'unit': self.unit, 'strided': strided,
+            'fftlength': fftlength, 'overlap': overlap, 'method': method,
+            'kwargs': kwargs, 'dtype': self.dtype,
+            'lal': (not strided and cross is None and
+                    method_func.__module__.endswith('lal_')),
+        }
+        if strided:
+            params.update(nfftoverlap=nfftoverlap, window=window,
+                          average=average, detrend=detrend,
+                          scaling=kwargs.get('scaling', 'density'))
+
+        # single-process calculation
+        if nproc == 1:
+            _spectrogram_columns((
+                self.value, None if cross is None else cross.value,
+                out.value, 0, nsteps, params))
+            return out
 
-        # format and return
-        out = SpectrogramList(*data)
-        out.sort(key=lambda spec: spec.epoch.gps)
-        return out.join()
+        # otherwise, move the data into shared memory and let each
+        # process fill a contiguous block of columns
+        shared = [parallel.SharedArray.from_array(self.value),
+                  parallel.SharedArray(out.shape, dtype=dtype)]
+        if cross is not None:
+            shared.append(parallel.SharedArray.from_array(cross.value))
+        try:
+            data, sout = shared[:2]
+            cdata = shared[2] if cross is not None else None
+            parallel.parallel_map(
+                _spectrogram_columns,
+                [(data, cdata, sout, start, stop, params) for
+                 (start, stop) in parallel.split(nsteps, nproc)],
+                nproc=nproc)
+            out.value[:] = sout.array
+        finally:
+            for arr in shared:
+                arr.unlink()
+        return out
 
     def spectrogram2(self, fftlength, overlap=0, window='hanning',
                      scaling='density', **kwargs):
@@ -624,7 +684,7 @@ class TimeSeries(TimeSeriesBase):
         if window is None:
             window = 'boxcar'
         if isinstance(window, (str, tuple)):
-            window = signal.get_window(window, nfft)
+            window = get_window(window, nfft)
 
         # calculate overlapping periodograms
         for i in xrange(nsteps):
@@ -1029,34 +1089,54 @@ class TimeSeries(TimeSeriesBase):
         rate : `float`
             rate to which to resample this `Series`
         window : array_like, callable, string, float, or tuple, optional
-            specifies the window applied to the signal in the Fourier
-            domain, only used for `ftype='fir'` or irregular downsampling
+            specifies the window used to design the FIR anti-alias
+            filter, or applied in the Fourier domain for irrational
+            resampling ratios
         ftype : `str`, optional
             type of filter, either 'fir' or 'iir', defaults to 'fir'
         n : `int`, optional
-            if `ftype='fir'` the number of taps in the filter, otherwise
-            the order of the Chebyshev type I IIR filter
+            if `ftype='fir'` the number of taps in the filter (rounded up
+            to an odd number), defaults to ``20 * max(p, q) + 1`` for a
+            ratio of ``p / q``, otherwise the order of the Chebyshev type
+            I IIR filter
 
         Returns
         -------
         Series
             a new Series with the resampling applied, and the same
             metadata
-        """
-        if n is None and ftype == 'iir':
-            n = 8
-        elif n is None:
-            n = 60
 
+        Notes
+        -----
+        For `ftype='fir'`, any rational ratio of sample rates is
+        resampled with a polyphase filter, calculating only the output
+        samples, see :mod:`gwpy.signal.polyphase` for details. Integer
+        down-sampling with `ftype='iir'` applies a zero-phase Chebyshev
+        filter before decimation, and other ratios fall back to
+        `scipy.signal.resample`.
+        """
         if isinstance(rate, units.Quantity):
             rate = rate.value
-        factor = (self.sample_rate.value / rate)
-        # if integer down-sampling, use decimate
-        if factor.is_integer():
-            if ftype == 'iir':
-                f = signal.cheby1(n, 0.05, 0.8/factor, output='sos')
+        fs = self.sample_rate.decompose().value
+        factor = fs / rate
+
+        # use polyphase filtering for FIR resampling by a rational factor
+        if ftype != 'iir':
+            try:
+                p, q = polyphase.rational_factors(fs, rate)
+            except ValueError:
+                pass
             else:
-                f = signal.firwin(n+1, 1./factor, window=window)
+                out = polyphase.resample(
+                    self.value, p, q, taps=_resample_filter(p, q, n, window))
+                new = type(self)(out)
+                new.__dict__ = self.copy_metadata()
+                new.sample_rate = rate
+                return new
+
+        # if integer down-sampling, use decimate
+        if factor.is_integer() and ftype == 'iir':
+            f = signal.cheby1(n or 8, 0.05, 0.8/factor, output='sos')
             return self.filter(f, filtfilt=True)[::int(factor)]
         # otherwise use Fourier filtering
         else:
@@ -1406,21 +1486,53 @@ class TimeSeries(TimeSeriesBase):
         -------
         rms : `TimeSeries`
             a new `TimeSeries` containing the RMS value with dt=stride
+
+        See Also
+        --------
+        TimeSeries.trend
+            for details of how the RMS is calculated
         """
-        stridesamp = stride * self.sample_rate.value
-        nsteps = int(self.size // stridesamp)
-        # stride through TimeSeries, recording RMS
-        data = numpy.zeros(nsteps)
-        for step in range(nsteps):
-            # find step TimeSeries
-            idx = stridesamp * step
-            idx_end = idx + stridesamp
-            stepseries = self[idx:idx_end]
-            rms_ = numpy.sqrt(numpy.mean(numpy.abs(stepseries.value)**2))
-            data[step] = rms_
-        name = '%s %.2f-second RMS' % (self.name, stride)
-        return self.__class__(data, channel=self.channel, epoch=self.epoch,
-                              name=name, sample_rate=(1/float(stride)))
+        rms_ = self.trend(stride, statistics=['rms'], partial=False)['rms']
+        rms_.name = '%s %.2f-second RMS' % (self.name, stride)
+        return rms_
+
+    def trend(self, stride, statistics=None, partial=True):
+        """Calculate trends of this `TimeSeries`, once per stride
+
+        All of the requested statistics are calculated in a single pass
+        over a `(nstrides, stride)` view of the data.
+
+        Parameters
+        ----------
+        stride : `float`
+            number of seconds per trend sample, must be an integer
+            number of samples
+        statistics : `list` of `str`, optional
+            the statistics to calculate, any of ``'min'``, ``'max'``,
+            ``'mean'``, ``'rms'``, ``'std'``, or ``'n'`` (the number of
+            non-NaN samples), defaults to all
+        partial : `bool`, optional
+            if `True` (default), include a trend sample for a trailing
+            incomplete stride, otherwise ignore it
+
+        Returns
+        -------
+        trends : `TimeSeriesDict`
+            a dict of (statistic, `TimeSeries`) pairs, with each series
+            named as ``'<name>.<statistic>'``
+
+        Notes
+        -----
+        NaN samples (e.g. gaps filled with ``pad=numpy.nan``) are ignored
+        in all statistics.
+
+        See Also
+        --------
+        gwpy.timeseries.trend.iter_trend
+            for a generator to trend a continuous stream of data chunks
+        """
+        return trend_.trend_series(self, stride, statistics=statistics,
+                                   partial=partial)
 
     def whiten(self, fftlength, overlap=0, method='welch', window='hanning',
                detrend='constant', asd=None, **kwargs):
@@ -1443,7 +1555,9 @@ class TimeSeries(TimeSeriesBase):
             ``fftlength * TimeSeries.sample_rate`` to use as the window.
 
         asd : `~gwpy.frequencyseries.FrequencySeries`
-            the amplitude-spectral density using which to whiten the data
+            the amplitude-spectral density using which to whiten the data,
+            this is linearly interpolated onto the FFT frequencies if its
+            resolution isn't ``1 / fftlength``
 
         **kwargs
             other keyword arguments are passed to the `TimeSeries.asd`
@@ -1462,34 +1576,38 @@ class TimeSeries(TimeSeriesBase):
         numpy.fft
             for details on the Fourier transform algorithm used her
         scipy.signal
+        gwpy.signal.spectral.iter_whiten
+            for a generator to whiten a continuous stream of data chunks
         """
         # build whitener
         if asd is None:
             asd = self.asd(fftlength, overlap=overlap,
                            method=method, window=window, **kwargs)
-        if isinstance(asd, units.Quantity):
-            asd = asd.value
-        invasd = 1. / asd
-        # build window
         nfft = int((fftlength * self.sample_rate).decompose().value)
         noverlap = int((overlap * self.sample_rate).decompose().value)
+        fs = self.sample_rate.decompose().value
+        try:
+            frequencies = asd.frequencies.value
+        except AttributeError:
+            frequencies = None
+        if isinstance(asd, units.Quantity):
+            asd = asd.value
+        transfer = spectral.whitening_transfer(asd, nfft, fs=fs,
+                                               frequencies=frequencies)
         # format window
         if type(window).__module__ == 'lal.lal':
             window = window.data.data
         elif not isinstance(window, numpy.ndarray):
-            window = signal.get_window(window, nfft)
+            window = get_window(window, nfft)
         # create output series
         nstride = nfft - noverlap
         nsteps = 1 + int((self.size - nfft) / nstride)
         out = type(self)(numpy.zeros(nsteps * nstride + noverlap))
         out.__dict__ = self.copy_metadata()
         del out.times
-        # loop over ffts and whiten each one
-        for i in range(nsteps):
-             i0 = i * nstride
-             i1 = i0 + nfft
-             in_ = self[i0:i1].detrend(detrend) * window
-             out.value[i0:i1] += npfft.irfft(in_.fft().value * invasd)
+        # whiten all FFT segments and overlap-add into the output
+        spectral.whiten(self.value, transfer, window, nstride,
+                        detrend=detrend, out=out.value)
         return out
 
     def detrend(self, detrend='constant'):
@@ -1552,8 +1670,9 @@ class TimeSeries(TimeSeriesBase):
         return self.filter(*zpk)
 
     def q_transform(self, qrange=(4, 64), frange=(0, numpy.inf),
-                    gps=None, search=.5, tres=.001, fres=.5, outseg=None,
-                    whiten=True, **psdkwargs):
+                    gps=None, search=.5, tres=.001, fres=.5, logf=False,
+                    outseg=None, whiten=True, interp='cubic', nproc=1,
+                    **psdkwargs):
         """Scan a `TimeSeries` using a multi-Q transform
 
         Parameters
@@ -1579,9 +1698,25 @@ class TimeSeries(TimeSeriesBase):
             give `None` to skip this step and return the original resolution,
             e.g. if you're going to do your own interpolation
 
+        logf : `bool`, optional
+            use logarithmically-spaced frequencies in the output
+            `Spectrogram`, in which case ``fres`` is interpreted as the
+            number of frequency samples, default: `False`
+
         outseg : `~gwpy.segments.Segment`, optional
             GPS `[start, stop)` segment for output `Spectrogram`
 
+        whiten : `bool`, optional
+            whiten the data before transforming, default: `True`
+
+        interp : `str`, optional
+            type of interpolation used to build the output `Spectrogram`,
+            one of ``'linear'``, ``'cubic'``, or ``'nearest'``,
+            default: ``'cubic'``
+
+        nproc : `int`, optional
+            number of threads with which to transform Q-planes in parallel
+
         **psdkwargs
             keyword arguments to pass to `TimeSeries.psd` when whitening
             the input data
@@ -1609,14 +1744,12 @@ class TimeSeries(TimeSeriesBase):
             for documentation on how the whitening is done
         gwpy.signal.qtransform
             for code and documentation on how the Q-transform is implemented
-        scipy.interpolate
-            for details on how the interpolation is implemented. This method
-            uses `~scipy.interpolate.InterpolatedUnivariateSpline` to
-            cast all frequency rows to the same time-axis, and then
-            `~scipy.interpolate.interpd` to apply the desired frequency
-            resolution across the band.
+        gwpy.signal.qtransform.QPlane.interpolate
+            for details on how the interpolation is implemented. All
+            frequency rows are cast to the same time-axis, and then the
+            desired frequency resolution is applied across the band,
+            evaluating only the samples inside ``outseg``.
         """
-        from scipy.interpolate import (interp2d, InterpolatedUnivariateSpline)
         from ..spectrogram import Spectrogram
         from ..signal.qtransform import QTiling
 
@@ -1643,56 +1776,39 @@ class TimeSeries(TimeSeriesBase):
         else:
             fdata = self.fft().value
 
-        # set up results
-        peakq = None
-        peakenergy = 0
-
-        # Q-transform data for each `(Q, frequency)` tile
-        for plane in planes:
-            f, normenergies = plane.transform(fdata, normalized=True,
-                                              epoch=self.x0)
-            # find peak energy in this plane and record if loudest
-            for ts in normenergies:
-                if gps is None:
-                    peak = ts.value.max()
-                else:
-                    peak = ts.crop(gps-search, gps+search).value.max()
-                if peak > peakenergy:
-                    peakenergy = peak
-                    peakq = plane.q
-                    norms = normenergies
-                    frequencies = f
-
-        # build regular Spectrogram from peak-Q data by interpolating each
-        # (Q, frequency) `TimeSeries` to have the same time resolution
+        # Q-transform data for each plane, and find the loudest
+        peakplane, energies, _ = planes.transform(
+            fdata, epoch=self.x0.value, gps=gps, search=search, nproc=nproc)
+
+        # build regular Spectrogram from peak-Q data by interpolating all
+        # rows onto the same time grid (and frequency grid if requested)
         nx = int(abs(Segment(*outseg)) / tres)
-        ny = frequencies.size
-        out = Spectrogram(numpy.zeros((nx, ny)), x0=outseg[0], dx=tres,
-                          frequencies=frequencies)
-        # FIXME: bug in Array2D.yindex setting
-        out._yindex = type(out.y0)(frequencies, out.y0.unit)
-        # record Q in output
-        out.q = peakq
-        # interpolate rows
-        for i, row in enumerate(norms):
-            row = row.crop(*outseg)
-            interp = InterpolatedUnivariateSpline(row.times.value, row.value)
-            out[:, i] = interp(out.times.value)
-
-        # then interpolate the spectrogram to increase the frequency resolution
-        # XXX: this is done because duncan doesn't like interpolated images,
-        #      because they don't support log scaling
+        times = float(outseg[0]) + numpy.arange(nx) * tres
         if fres is None:  # unless user tells us not to
-            return out
+            frequencies = None
+        elif logf:
+            frequencies = numpy.logspace(numpy.log10(planes.frange[0]),
+                                         numpy.log10(planes.frange[1]),
+                                         num=int(fres))
         else:
-            interp = interp2d(out.times.value, frequencies, out.value.T,
-                              kind='cubic')
-            f2 = numpy.arange(planes.frange[0], planes.frange[1], fres)
-            new = Spectrogram(interp(out.times.value, f2 + fres/2.).T,
-                              x0=outseg[0], dx=tres,
+            frequencies = numpy.arange(planes.frange[0], planes.frange[1],
+                                       fres) + fres / 2.
+        data = peakplane.interpolate(energies, times,
+                                     frequencies=frequencies,
+                                     epoch=self.x0.value, kind=interp)
+        if fres is not None and not logf:
+            out = Spectrogram(data, x0=outseg[0], dx=tres,
                               f0=planes.frange[0], df=fres)
-            new.q = peakq
-            return new
+        else:
+            if frequencies is None:
+                frequencies = peakplane.frequencies
+            out = Spectrogram(data, x0=outseg[0], dx=tres,
+                              frequencies=frequencies)
+            # FIXME: bug in Array2D.yindex setting
+            out._yindex = type(out.y0)(frequencies, out.y0.unit)
+        # record Q in output
+        out.q = peakplane.q
+        return out
 
 
 @as_series_dict_class(TimeSeries)
@@ -1702,6 +1818,93 @@ class TimeSeriesDict(TimeSeriesBaseDict):
     EntryClass = TimeSeries
     read = classmethod(reader(doc=TimeSeriesBaseDict.read.__doc__))
 
+    def resample(self, rate, **kwargs):
+        """Resample items in this dict.
+
+        This operation over-writes items inplace.
+
+        Channels with the same sample rate, length, and new rate are
+        resampled together as a single 2-D block, see
+        :meth:`TimeSeries.resample` for details.
+
+        Parameters
+        ----------
+        rate : `dict`, `float`
+            either a `dict` of (channel, `float`) pairs for key-wise
+            resampling, or a single float/int to resample all items.
+        kwargs
+             other keyword arguments to pass to each item's resampling
+             method.
+        """
+        if not isinstance(rate, dict):
+            rate = dict((c, rate) for c in self)
+        if kwargs.get('ftype', 'fir') == 'iir':
+            return super(TimeSeriesDict, self).resample(rate, **kwargs)
+
+        # group channels that can be resampled together
+        groups = OrderedDict()
+        for key in self:
+            if key not in rate:
+                continue
+            series = self[key]
+            newrate = rate[key]
+            if isinstance(newrate, units.Quantity):
+                newrate = newrate.value
+            fs = series.sample_rate.decompose().value
+            try:
+                p, q = polyphase.rational_factors(fs, newrate)
+            except ValueError:  # resample on its own
+                self[key] = series.resample(newrate, **kwargs)
+                continue
+            groups.setdefault((p, q, newrate, series.size), []).append(key)
+
+        # resample each group as a block
+        for (p, q, newrate, _), keys in groups.items():
+            taps = _resample_filter(p, q, kwargs.get('n', None),
+                                    kwargs.get('window', 'hamming'))
+            block = polyphase.resample(
+                numpy.vstack([self[key].value for key in keys]), p, q,
+                taps=taps)
+            for key, data in zip(keys, block):
+                new = type(self[key])(data)
+                new.__dict__ = self[key].copy_metadata()
+                new.sample_rate = newrate
+                self[key] = new
+        return self
+
+    def trend(self, stride, statistics=None, partial=True, nproc=1):
+        """Calculate trends of each `TimeSeries` in this dict
+
+        Parameters
+        ----------
+        stride : `float`
+            number of seconds per trend sample
+        statistics : `list` of `str`, optional
+            the statistics to calculate, see :meth:`TimeSeries.trend`
+        partial : `bool`, optional
+            if `True` (default), include a trend sample for a trailing
+            incomplete stride, otherwise ignore it
+        nproc : `int`, optional
+            number of threads over which to distribute channels,
+            default: ``1``
+
+        Returns
+        -------
+        trends : `TimeSeriesDict`
+            a flat dict of trends, keyed by ``'<key>.<statistic>'``, e.g.
+            ``'X1:TEST.mean'``
+        """
+        keys = list(self.keys())
+        results = parallel.parallel_map(
+            trend_.trend_series_star,
+            [(self[key], stride, statistics, partial) for key in keys],
+            nproc=nproc, threads=True)
+        out = type(self)()
+        for key, trends in zip(keys, results):
+            for stat, series in trends.items():
+                out['%s.%s' % (key, stat)] = series
+        return out
+
 
 class TimeSeriesList(TimeSeriesBaseList):
     __doc__ = TimeSeriesBaseDict.__doc__.replace('TimeSeriesBase',
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2016)
+#
+# This file is part of GWpy.
+#
+# GWpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWpy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Calculate min/max/mean/rms trends of time-series data
+
+The trends for each stride are calculated together from a
+`(nstrides, stride)` view of the data, so a single pass over the data
+calculates any number of statistics for all strides.
+"""
+
+from __future__ import division
+
+import numpy
+
+from ..utils.compat import OrderedDict
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+#: statistics understood by this module
+STATISTICS = ('min', 'max', 'mean', 'rms', 'std', 'n')
+
+
+def stride_samples(stride, sample_rate):
+    """Return the number of samples in a trend stride
+
+    Parameters
+    ----------
+    stride : `float`
+        the trend stride (seconds)
+    sample_rate : `float`
+        the sample rate (Hz) of the data
+
+    Returns
+    -------
+    nstride : `int`
+        the number of samples per stride
+
+    Raises
+    ------
+    ValueError
+        if ``stride`` is not an integer number of samples
+    """
+    nstride = float(stride) * float(sample_rate)
+    rounded = int(round(nstride))
+    if rounded < 1 or abs(nstride - rounded) > 1e-6 * nstride:
+        raise ValueError("Cannot calculate trends with a stride of %s "
+                         "seconds, which is not an integer number of "
+                         "samples at %s Hz" % (stride, sample_rate))
+    return rounded
+
+
+def _parse_statistics(statistics):
+    if statistics is None:
+        return STATISTICS
+    if isinstance(statistics, str):
+        statistics = [statistics]
+    statistics = tuple(s.lower() for s in statistics)
+    for stat in statistics:
+        if stat not in STATISTICS:
+            raise ValueError("Unknown trend statistic %r, select from %s"
+                             % (stat, ', '.join(map(repr, STATISTICS))))
+    return statistics
+
+
+def _trend_block(block, statistics):
+    """Calculate statistics over the last axis of a block of data
+    """
+    nstride = block.shape[-1]
+    out = {}
+    floating = block.dtype.kind in 'fc'
+    if floating and numpy.isnan(block).any():
+        valid = ~numpy.isnan(block)
+        count = valid.sum(axis=-1)
+        filled = numpy.where(valid, block, 0)
+    else:
+        valid = None
+        count = numpy.empty(block.shape[:-1], dtype=int)
+        count.fill(nstride)
+        filled = block
+
+    # minimum and maximum, ignoring NaNs
+    if 'min' in statistics:
+        out['min'] = (numpy.fmin.reduce(block, axis=-1) if valid is not None
+                      else block.min(axis=-1))
+    if 'max' in statistics:
+        out['max'] = (numpy.fmax.reduce(block, axis=-1) if valid is not None
+                      else block.max(axis=-1))
+    if 'n' in statistics:
+        out['n'] = count
+
+    # moments
+    if not set(statistics) & set(('mean', 'rms', 'std')):
+        return out
+    if filled.dtype.kind == 'c':
+        filled = numpy.abs(filled)
+    elif filled.dtype.kind != 'f':
+        filled = filled.astype(numpy.float64)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        mean = filled.sum(axis=-1) / count
+        if 'mean' in statistics:
+            out['mean'] = mean
+        if 'rms' in statistics:
+            out['rms'] = numpy.sqrt(
+                numpy.einsum('...i,...i->...', filled, filled) / count)
+        if 'std' in statistics:
+            dev = filled - mean[..., numpy.newaxis]
+            if valid is not None:
+                dev[~valid] = 0
+            out['std'] = numpy.sqrt(
+                numpy.einsum('...i,...i->...', dev, dev) / count)
+    return out
+
+
+def trend_array(data, nstride, statistics=None, partial=True):
+    """Calculate the trends of some data, once per stride
+
+    Parameters
+    ----------
+    data : `numpy.ndarray`
+        input data, the last axis is taken as time, so that a
+        `(nchannels, nsamples)` array of same-rate channels can be
+        trended in one go
+    nstride : `int`
+        number of samples per stride
+    statistics : `list` of `str`, optional
+        the statistics to calculate, any of ``'min'``, ``'max'``,
+        ``'mean'``, ``'rms'``, ``'std'``, or ``'n'`` (the number of
+        non-NaN samples), defaults to all
+    partial : `bool`, optional
+        if `True` (default), calculate trends for a trailing incomplete
+        stride, otherwise ignore it
+
+    Returns
+    -------
+    trends : `dict`
+        `dict` of (statistic, `numpy.ndarray`) pairs, each array has
+        one sample per stride along the last axis
+
+    Notes
+    -----
+    NaN samples are ignored in all statistics, strides with no valid
+    samples give NaN (or ``n=0``).
+    """
+    statistics = _parse_statistics(statistics)
+    data = numpy.asarray(data)
+    nfull = data.shape[-1] // nstride
+    split = nfull * nstride
+    blocks = [data[..., :split].reshape(data.shape[:-1] + (nfull, nstride))]
+    if partial and split < data.shape[-1]:
+        blocks.append(data[..., numpy.newaxis, split:])
+    trends = [_trend_block(block, statistics) for block in blocks]
+    if len(trends) == 1:
+        return trends[0]
+    return dict((stat, numpy.concatenate([t[stat] for t in trends],
+                                         axis=-1)) for stat in statistics)
+
+
+def trend_series(series, stride, statistics=None, partial=True):
+    """Calculate the `TimeSeriesDict` of trends for a single series
+
+    See :meth:`TimeSeries.trend <gwpy.timeseries.TimeSeries.trend>` for
+    details of the arguments.
+    """
+    from .timeseries import (TimeSeries, TimeSeriesDict)
+    fs = series.sample_rate.decompose().value
+    arrays = trend_array(series.value, stride_samples(stride, fs),
+                         statistics=statistics, partial=partial)
+    out = TimeSeriesDict()
+    for stat in _parse_statistics(statistics):
+        out[stat] = TimeSeries(
+            arrays[stat], epoch=series.epoch, sample_rate=1/float(stride),
+            unit=None if stat == 'n' else series.unit,
+            name='%s.%s' % (series.name, stat), channel=series.channel)
+    return out
+
+
+def trend_series_star(args):
+    """Unpack a tuple of arguments for :func:`trend_series`
+
+    This is a module-level function so that it can be passed to
+    :func:`gwpy.utils.parallel.parallel_map`.
+    """
+    return trend_series(*args)
+
+
+def iter_trend(chunks, stride, statistics=None, partial=True):
+    """Calculate trends over a stream of contiguous data chunks
+
+    Samples that do not fill a complete stride are carried over to the
+    next chunk, so the concatenation of all yielded trends is identical
+    to the trends of the concatenation of all input chunks.
+
+    Parameters
+    ----------
+    chunks : `iterable` of `~gwpy.timeseries.TimeSeries` or `TimeSeriesDict`
+        sequence of contiguous data chunks, e.g. from
+        :meth:`TimeSeriesDict.fetch_iter
+        <gwpy.timeseries.TimeSeriesDict.fetch_iter>` (without a
+        ``window``)
+    stride : `float`
+        number of seconds per trend sample
+    statistics : `list` of `str`, optional
+        the statistics to calculate, see :func:`trend_array`
+    partial : `bool`, optional
+        if `True` (default), yield the trends of a trailing incomplete
+        stride once ``chunks`` is exhausted
+
+    Yields
+    ------
+    trends : `~gwpy.timeseries.TimeSeriesDict`
+        the trends of all strides completed by the next chunk (chunks
+        that complete no strides yield nothing), as
+        returned by :meth:`TimeSeries.trend
+        <gwpy.timeseries.TimeSeries.trend>` (for `TimeSeries` input) or
+        :meth:`TimeSeriesDict.trend
+        <gwpy.timeseries.TimeSeriesDict.trend>` (for `TimeSeriesDict`
+        input)
+    """
+    from .timeseries import (TimeSeries, TimeSeriesDict)
+    buffers = OrderedDict()
+    single = None
+    dictclass = TimeSeriesDict
+
+    def _trend(key, series, part):
+        if single:
+            return series.trend(stride, statistics=statistics, partial=part)
+        out = dictclass()
+        for stat, trend in series.trend(stride, statistics=statistics,
+                                        partial=part).items():
+            out['%s.%s' % (key, stat)] = trend
+        return out
+
+    for chunk in chunks:
+        if single is None:
+            single = isinstance(chunk, TimeSeries)
+            if not single:
+                dictclass = type(chunk)
+        items = [(None, chunk)] if single else list(chunk.items())
+        out = dictclass()
+        for key, series in items:
+            try:
+                series = buffers.pop(key).append(series, inplace=False)
+            except KeyError:
+                pass
+            nstride = stride_samples(stride, series.sample_rate.value)
+            split = series.size // nstride * nstride
+            if split < series.size:
+                buffers[key] = series[split:].copy()
+            if split:
+                out.update(_trend(key, series[:split], False))
+        if out:
+            yield out
+
+    if partial and buffers:
+        out = dictclass()
+        for key, series in buffers.items():
+            out.update(_trend(key, series, True))
+        yield out
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2016)
+#
+# This file is part of GWpy.
+#
+# GWpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWpy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""A bounded least-recently-used cache with hit/miss statistics
+"""
+
+import threading
+from collections import namedtuple
+
+from .compat import OrderedDict
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+__all__ = ['LRUCache']
+
+CacheInfo = namedtuple('CacheInfo', ('hits', 'misses', 'maxsize', 'currsize'))
+
+
+class LRUCache(object):
+    """A thread-safe mapping that holds at most ``maxsize`` items
+
+    Items are created on demand by :meth:`get`, and the least-recently
+    used item is discarded once the cache is full.
+
+    Parameters
+    ----------
+    maxsize : `int`, optional
+        maximum number of items to hold, default: ``128``
+
+    Examples
+    --------
+    >>> cache = LRUCache(maxsize=2)
+    >>> cache.get('a', lambda: 1)
+    1
+    >>> cache.cache_info()
+    CacheInfo(hits=0, misses=1, maxsize=2, currsize=1)
+    """
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, create):
+        """Return the item for ``key``, creating it if needed
+
+        Parameters
+        ----------
+        key : `object`
+            hashable key for this item
+        create : `callable`
+            function, taking no arguments, that returns the item, only
+            called if ``key`` is not already in the cache
+
+        Returns
+        -------
+        item : `object`
+            the cached item
+        """
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                value = create()
+                while self._data and len(self._data) >= self.maxsize:
+                    self._data.popitem(last=False)
+            else:
+                self.hits += 1
+            self._data[key] = value
+            return value
+
+    def clear(self):
+        """Empty the cache and reset its statistics
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def cache_info(self):
+        """Return the statistics for this cache
+
+        Returns
+        -------
+        info : `CacheInfo`
+            `namedtuple` of ``(hits, misses, maxsize, currsize)``, matching
+            the output of `functools.lru_cache`
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self))
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Duncan Macleod (2016)
+#
+# This file is part of GWpy.
+#
+# GWpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWpy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Parallel execution with shared-memory data exchange
+
+This module provides persistent process and thread pools, and a
+`SharedArray` type that can be passed to (and returned from) worker
+processes without copying the underlying data through a pipe.
+Array data are stored in memory-mapped files (in ``/dev/shm`` where
+available), so only the file name and array shape are ever pickled.
+"""
+
+import atexit
+import os
+import pickle
+import tempfile
+import threading
+from multiprocessing import (Pool, current_process)
+from multiprocessing.pool import ThreadPool
+
+import numpy
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+# directory in which to create shared-memory files
+if os.path.isdir('/dev/shm'):
+    SHARED_MEMORY_DIR = '/dev/shm'
+else:
+    SHARED_MEMORY_DIR = None
+
+# persistent worker pools, keyed by (nproc, threads)
+POOLS = {}
+POOLS_LOCK = threading.Lock()
+
+
+# -----------------------------------------------------------------------------
+# shared memory
+
+class SharedArray(object):
+    """A picklable handle to an array stored in shared memory
+
+    Parameters
+    ----------
+    shape : `tuple` of `int`
+        the shape of the array
+    dtype : `type`, `numpy.dtype`, optional
+        the data type of the array, default: `float`
+
+    Notes
+    -----
+    The array is stored in a memory-mapped temporary file, which is
+    removed by calling :meth:`SharedArray.unlink`. On POSIX systems
+    any array views already mapped remain valid after the file has been
+    removed, so the creator should call `unlink` as soon as all workers
+    have attached.
+    """
+    def __init__(self, shape, dtype=float):
+        self.shape = tuple(numpy.atleast_1d(shape).astype(int))
+        self.dtype = numpy.dtype(dtype)
+        fd, self.filename = tempfile.mkstemp(prefix='gwpy-shm-',
+                                             dir=SHARED_MEMORY_DIR)
+        os.close(fd)
+        self._array = None
+        self._map('w+')
+
+    @classmethod
+    def from_array(cls, array):
+        """Copy an existing array into shared memory
+
+        Parameters
+        ----------
+        array : `numpy.ndarray`
+            input data
+
+        Returns
+        -------
+        shared : `SharedArray`
+            a new handle to a shared-memory copy of the input
+        """
+        array = numpy.asarray(array)
+        new = cls(array.shape, dtype=array.dtype)
+        new.array[...] = array
+        return new
+
+    def _map(self, mode):
+        if numpy.prod(self.shape) == 0:  # can't mmap an empty file
+            self._array = numpy.zeros(self.shape, dtype=self.dtype)
+        else:
+            self._array = numpy.memmap(self.filename, dtype=self.dtype,
+                                       mode=mode, shape=self.shape)
+
+    @property
+    def array(self):
+        """The shared `numpy.ndarray`
+
+        Writes to this array are seen by every process attached to it.
+        """
+        return self._array
+
+    def __array__(self, dtype=None):
+        if dtype is None:
+            return self._array
+        return self._array.astype(dtype)
+
+    def __getstate__(self):
+        return {'shape': self.shape, 'dtype': self.dtype.str,
+                'filename': self.filename}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.dtype = numpy.dtype(self.dtype)
+        self._map('r+')
+
+    def unlink(self):
+        """Remove the file backing this `SharedArray`
+        """
+        try:
+            os.remove(self.filename)
+        except OSError:
+            pass
+
+
+class _SharedSeries(object):
+    """Picklable container for an array subclass in shared memory
+    """
+    def __init__(self, array):
+        self.type = type(array)
+        self.data = SharedArray.from_array(array.view(numpy.ndarray))
+        self.metadata = getattr(array, '__dict__', {})
+
+    def restore(self):
+        new = numpy.asarray(self.data).view(self.type)
+        self.data.unlink()
+        if self.metadata:
+            new.__dict__ = self.metadata
+        return new
+
+
+def share(obj):
+    """Move the data for an array, or `dict` of arrays, into shared memory
+
+    This is designed to be used to return large results from a worker
+    process, the output should be given to :func:`unshare` in the
+    parent process to reconstruct the original object.
+
+    Parameters
+    ----------
+    obj : `numpy.ndarray`, `dict`
+        the object to share, arrays (including subclasses) are moved
+        into shared memory, `dict` values are handled recursively,
+        anything else is returned unmodified
+
+    Returns
+    -------
+    shared : `object`
+        a picklable representation of the input
+    """
+    if isinstance(obj, numpy.ndarray):
+        return _SharedSeries(obj)
+    if isinstance(obj, dict):
+        return type(obj), [(key, share(val)) for key, val in obj.items()]
+    return obj
+
+
+def unshare(obj):
+    """Reconstruct an object passed through :func:`share`
+
+    Parameters
+    ----------
+    obj : `object`
+        the output of :func:`share`
+
+    Returns
+    -------
+    obj : `object`
+        the reconstructed object, with array data backed by shared memory
+    """
+    if isinstance(obj, _SharedSeries):
+        return obj.restore()
+    if _is_shared_dict(obj):
+        out = obj[0]()
+        for key, val in obj[1]:
+            out[key] = unshare(val)
+        return out
+    return obj
+
+
+def discard(obj):
+    """Release the shared memory held by the output of :func:`share`
+
+    This should be used for results that will never be given to
+    :func:`unshare`, e.g. when another element of the same map failed.
+
+    Parameters
+    ----------
+    obj : `object`
+        the output of :func:`share`, anything else is ignored
+    """
+    if isinstance(obj, _SharedSeries):
+        obj.data.unlink()
+    elif _is_shared_dict(obj):
+        for _, val in obj[1]:
+            discard(val)
+
+
+def _is_shared_dict(obj):
+    return (isinstance(obj, tuple) and len(obj) == 2 and
+            isinstance(obj[0], type) and issubclass(obj[0], dict))
+
+
+# -----------------------------------------------------------------------------
+# execution
+
+def get_pool(nproc, threads=False):
+    """Return a persistent worker pool
+
+    Pools are created on first use and re-used for all subsequent calls
+    with the same arguments (from any thread), and are closed when the
+    interpreter exits.
+
+    Parameters
+    ----------
+    nproc : `int`
+        number of workers
+    threads : `bool`, optional
+        return a `~multiprocessing.pool.ThreadPool` rather than a
+        process `~multiprocessing.Pool`
+
+    Returns
+    -------
+    pool : `multiprocessing.Pool`
+        the pool of workers
+
+    Notes
+    -----
+    Process workers are forked when the pool is created, so they only
+    see the module state (e.g. the I/O format registry) of the parent
+    at that time. Call :func:`close_pools` after changing such state
+    to have new workers started on the next call.
+    """
+    key = (int(nproc), bool(threads))
+    with POOLS_LOCK:
+        try:
+            return POOLS[key]
+        except KeyError:
+            if threads:
+                pool = POOLS[key] = ThreadPool(nproc)
+            else:
+                pool = POOLS[key] = Pool(nproc)
+            return pool
+
+
+def close_pools():
+    """Terminate all persistent worker pools
+
+    New pools are created by the next call to :func:`get_pool`.
+    """
+    with POOLS_LOCK:
+        pools = list(POOLS.values())
+        POOLS.clear()
+    for pool in pools:
+        pool.terminate()
+        pool.join()
+
+atexit.register(close_pools)
+
+
+def _safe_call(args):
+    """Call a function, returning `(success, result-or-exception)`
+    """
+    func, arg = args
+    try:
+        return True, func(arg)
+    except Exception as e:
+        try:  # make sure the exception can make it back to the parent
+            pickle.dumps(e)
+        except Exception:
+            e = RuntimeError('%s: %s' % (type(e).__name__, str(e)))
+        return False, e
+
+
+def parallel_map(func, iterable, nproc=1, threads=False):
+    """Apply a function to each element of an iterable in parallel
+
+    Parameters
+    ----------
+    func : `callable`
+        the function to call, this must be picklable (i.e. a module-level
+        function) unless ``threads=True`` is given
+    iterable : `iterable`
+        the arguments to map, each element is passed as the only
+        argument to ``func``
+    nproc : `int`, optional
+        number of parallel workers, default: ``1``
+    threads : `bool`, optional
+        use threads rather than processes, default: `False`
+
+    Returns
+    -------
+    results : `list`
+        the output of ``func`` for each element, in input order
+
+    Raises
+    ------
+    Exception
+        if any call fails, the exception raised for the first failing
+        element (in input order) is re-raised, regardless of the order
+        in which the workers finish; any shared memory returned (via
+        :func:`share`) by the successful calls is released first
+    """
+    args = list(iterable)
+    # daemonic processes cannot have children, so run serially
+    if (min(nproc, len(args)) <= 1 or
+            (not threads and current_process().daemon)):
+        results = []
+        try:
+            for arg in args:
+                results.append(func(arg))
+        except Exception:
+            for result in results:
+                discard(result)
+            raise
+        return results
+    pool = get_pool(nproc, threads=threads)
+    results = pool.map(_safe_call, [(func, arg) for arg in args], chunksize=1)
+    errors = [result for success, result in results if not success]
+    if errors:
+        for success, result in results:
+            if success:
+                discard(result)
+        raise errors[0]
+    return [result for _, result in results]
+
+
+def split(n, nproc):
+    """Split ``range(n)`` into at most ``nproc`` contiguous blocks
+
+    Parameters
+    ----------
+    n : `int`
+        number of items to split
+    nproc : `int`
+        number of blocks
+
+    Returns
+    -------
+    bounds : `list` of `tuple`
+        a `(start, stop)` pair for each non-empty block
+    """
+    nproc = max(1, min(n, nproc))
+    edges = numpy.linspace(0, n, nproc + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
@@ -64,7 +64,7 @@ setup_requires = [
 install_requires = [
     'python-dateutil',
     'numpy>=1.7',
-    'scipy>=0.16.0',
+    'scipy>=0.17.0',
     'matplotlib>=1.3.0',
     'astropy>=1.0',
     'six>=1.5'